@@ -1,10 +1,12 @@
 import os
-import yfinance as yf
-import pandas as pd
-import numpy as np
-import requests
-import time
 from datetime import datetime
+from core.heikin_ashi import heikin_ashi, ha_direction
+from core.indicators import adx
+from core.cpu_pool import map_arrays, ohlc_arrays
+from core.snapshot import Snapshot
+from core.scan_store import SCANS
+from core.telegram import send_blocks
+from core.alert_state import ALERT_MODE, AlertState, digest
 
 # --- 1. CREDENCIALES (Configúralas aquí o en variables de entorno) ---
 # Si no usas variables de entorno, pon tu token entre comillas directamente
@@ -19,6 +21,7 @@ TIMEFRAMES = [
 ]
 
 ADX_TH = 20
+SCANNER = "alerta_bot"  # escáner en la base compartida (core.scan_store)
 
 # --- 3. BASE DE DATOS MAESTRA ---
 TICKERS = sorted([
@@ -39,117 +42,59 @@ TICKERS = sorted([
     'SPY', 'QQQ', 'IWM', 'DIA', 'EEM', 'EWZ', 'FXI', 'XLE', 'XLF', 'XLK', 'XLV', 'XLI', 'XLP', 'XLU', 'XLY', 'ARKK', 'SMH', 'TAN', 'GLD', 'SLV', 'GDX'
 ])
 
-# --- 4. FUNCIÓN DE ENVÍO INTELIGENTE (Smart Splitter) ---
-def send_telegram_msg(message):
+# --- 4. ENVÍO (core.telegram: bloques empaquetados en pocos mensajes, cola por chat y reintentos) ---
+def send_telegram_msg(*blocks):
     if not TELEGRAM_TOKEN or not CHAT_ID:
         print("⚠️ Falta configurar Token o Chat ID")
         return
-
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    
-    # Si el mensaje es corto, se envía directo
-    if len(message) < 4000:
-        requests.post(url, data={"chat_id": CHAT_ID, "text": message, "parse_mode": "Markdown"})
-        return
-
-    # Si es largo, lo dividimos por saltos de línea para no cortar palabras
-    lines = message.split('\n')
-    buffer = ""
-    
-    for line in lines:
-        if len(buffer) + len(line) + 1 > 4000:
-            # Enviar el buffer actual y limpiar
-            requests.post(url, data={"chat_id": CHAT_ID, "text": buffer, "parse_mode": "Markdown"})
-            time.sleep(1) # Pausa para evitar flood limit
-            buffer = line + "\n"
-        else:
-            buffer += line + "\n"
-    
-    # Enviar lo que quede en el buffer
-    if buffer:
-        requests.post(url, data={"chat_id": CHAT_ID, "text": buffer, "parse_mode": "Markdown"})
+    send_blocks(TELEGRAM_TOKEN, CHAT_ID, blocks)
 
 # --- 5. INDICADORES ---
-def calculate_heikin_ashi(df):
-    df_ha = df.copy()
-    df_ha['HA_Close'] = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    
-    # Calculo iterativo rápido para HA Open
-    ha_open = [df['Open'].iloc[0]]
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[-1] + df_ha['HA_Close'].iloc[i-1]) / 2)
-    
-    df_ha['HA_Open'] = ha_open
-    # 1 = Verde, -1 = Rojo
-    df_ha['Color'] = np.where(df_ha['HA_Close'] > df_ha['HA_Open'], 1, -1)
-    return df_ha
-
-def calculate_adx(df, period=14):
-    df = df.copy()
-    df['H-L'] = df['High'] - df['Low']
-    df['H-C'] = abs(df['High'] - df['Close'].shift(1))
-    df['L-C'] = abs(df['Low'] - df['Close'].shift(1))
-    df['TR'] = df[['H-L', 'H-C', 'L-C']].max(axis=1)
-    
-    df['UpMove'] = df['High'] - df['High'].shift(1)
-    df['DownMove'] = df['Low'].shift(1) - df['Low']
-    
-    df['+DM'] = np.where((df['UpMove'] > df['DownMove']) & (df['UpMove'] > 0), df['UpMove'], 0)
-    df['-DM'] = np.where((df['DownMove'] > df['UpMove']) & (df['DownMove'] > 0), df['DownMove'], 0)
-    
-    # Media Móvil Exponencial (Wilder)
-    def wilder(x, period): return x.ewm(alpha=1/period, adjust=False).mean()
-
-    tr_s = wilder(df['TR'], period).replace(0, 1)
-    p_dm_s = wilder(df['+DM'], period)
-    n_dm_s = wilder(df['-DM'], period)
-    
-    p_di = 100 * (p_dm_s / tr_s)
-    n_di = 100 * (n_dm_s / tr_s)
-    dx = 100 * abs(p_di - n_di) / (p_di + n_di)
-    return wilder(dx, period)
+# Sobre arrays (no DataFrames): corre en los procesos de core.cpu_pool
+def ha_state(o, h, l, c, period=14):
+    if len(c) < 50: return None
+    # HA Open vectorizado (filtro recursivo, sin bucle por vela); 1 = Verde, -1 = Rojo
+    ha_open, ha_close = heikin_ashi(o, h, l, c, seed="open")
+    color = ha_direction(ha_open, ha_close)
+    # ADX de Wilder (ewm adjust=False) de core.indicators
+    adx_v = adx(h, l, c, period)[0]
+    return {
+        'Color': int(color[-1]),
+        'Prev_Color': int(color[-2]),
+        'Price': float(c[-1]),
+        'ADX': float(adx_v[-1])
+    }
 
 # --- 6. MOTOR DE ANÁLISIS ---
-def run_scan():
+def run_scan(snapshot=None):
     print(f"🦅 Iniciando escaneo SystemaTrader... {datetime.now()}")
     
     market_state = {t: {} for t in TICKERS}
     
-    # Bucle de descarga por temporalidad
+    # Descarga masiva: solo el diario, semanal y mensual se derivan de él
+    # (compartido con los demás bots del ciclo si viene una instantánea)
+    print("Descargando datos 1d...")
+    panels = (snapshot or Snapshot()).yf_panels(TICKERS, {label_key: {"int": interval, "per": period} for interval, label_key, period in TIMEFRAMES})
+
+    # Cálculos: un trabajo (arrays OHLC) por ticker y temporalidad, repartidos entre procesos
+    jobs = {}
     for interval, label_key, period in TIMEFRAMES:
         try:
-            print(f"Descargando datos {interval}...")
-            # Descarga masiva
-            data = yf.download(TICKERS, interval=interval, period=period, group_by='ticker', progress=False, auto_adjust=True, threads=True)
+            data = panels[label_key]
             
             for ticker in TICKERS:
                 try:
-                    # Manejo de DataFrame MultiIndex
-                    if len(TICKERS) > 1:
-                        df = data[ticker].dropna()
-                    else:
-                        df = data.dropna()
-                    
+                    df = data[ticker].dropna()
                     if df.empty or len(df) < 50: continue
-
-                    # Cálculos
-                    df['ADX'] = calculate_adx(df)
-                    df_ha = calculate_heikin_ashi(df)
-                    
-                    last = df_ha.iloc[-1]
-                    prev = df_ha.iloc[-2]
-                    
-                    market_state[ticker][label_key] = {
-                        'Color': int(last['Color']),
-                        'Prev_Color': int(prev['Color']),
-                        'Price': float(last['Close']),
-                        'ADX': float(last['ADX'])
-                    }
+                    jobs[(ticker, label_key)] = ohlc_arrays(df)
                 except Exception as e:
                     continue
         except Exception as e:
             print(f"Error en descarga masiva {interval}: {e}")
 
+    for (ticker, label_key), res in map_arrays(ha_state, jobs).items():
+        if res: market_state[ticker][label_key] = res
+
     # --- CLASIFICACIÓN ---
     categories = {
         "🌱 NACIMIENTO DE TENDENCIA": [], # M- S+ D+
@@ -160,6 +105,10 @@ def run_scan():
     }
     
     icon_map = {1: "🟢", -1: "🔴"}
+    rows = []
+    # Colores [M S D] de la corrida anterior: en modo delta solo se mandan los que cambiaron
+    state = AlertState(SCANNER)
+    counts = dict.fromkeys(categories, 0)
 
     for t, data in market_state.items():
         # Verificamos que tenga las 3 temporalidades
@@ -171,6 +120,7 @@ def run_scan():
         
         price = data['1d']['Price']
         adx = data['1d']['ADX']
+        for k in ('1mo', '1wk', '1d'): state.set(t, k, data[k]['Color'])
         
         # Matrioska Visual: [M S D]
         visual = f"[{icon_map[m_col]} {icon_map[w_col]} {icon_map[d_col]}]"
@@ -182,32 +132,45 @@ def run_scan():
         line = f"{tag}**{t}** ${price:.2f} {visual} (ADX {adx:.0f})"
         
         # Lógica SystemaTrader
+        cat = None
         if m_col == -1 and w_col == 1 and d_col == 1:
-            categories["🌱 NACIMIENTO DE TENDENCIA"].append(line)
+            cat = "🌱 NACIMIENTO DE TENDENCIA"
         elif m_col == 1 and w_col == 1 and d_col == 1:
-            categories["🚀 TENDENCIA ALCISTA (FULL BULL)"].append(line)
+            cat = "🚀 TENDENCIA ALCISTA (FULL BULL)"
         elif m_col == 1 and w_col == 1 and d_col == -1:
-            categories["⚠️ CORRECCIÓN / PULLBACK"].append(line)
+            cat = "⚠️ CORRECCIÓN / PULLBACK"
         elif m_col == -1 and w_col == -1 and d_col == -1:
-            categories["🩸 TENDENCIA BAJISTA (FULL BEAR)"].append(line)
+            cat = "🩸 TENDENCIA BAJISTA (FULL BEAR)"
         elif m_col == 1 and w_col == -1 and d_col == -1:
-            categories["🐻 INICIO BAJA (REVERSAL)"].append(line)
+            cat = "🐻 INICIO BAJA (REVERSAL)"
+        if cat: counts[cat] += 1
+        if ALERT_MODE == "full":
+            if cat: categories[cat].append(line)
+        elif state.changed(t):
+            categories.setdefault(cat or "🌀 SIN CATEGORÍA", []).append(line)
+        rows.append({"Activo": t, "Precio": price, "Matrioska": visual, "ADX": adx, "Nuevo": is_new, "Categoría": cat or "-"})
+
+    # Publicar el snapshot para las páginas
+    try:
+        SCANS.put(SCANNER, rows, replace=True)
+    except Exception as e:
+        print(f"No se pudo guardar el snapshot: {e}")
 
     # --- ENVÍO DE REPORTES ---
     
     # 1. Cabecera
     header = f"🦅 **REPORTE SYSTEMATRADER**\n📅 {datetime.now().strftime('%d/%m %H:%M')}\n🔎 *Matrioska: [Mes Sem Dia]*"
-    send_telegram_msg(header)
+    if ALERT_MODE == "delta": header = digest(header, len(state.current), len(state.changes()), counts)
+    blocks = [header]
     
-    # 2. Enviar categorías (Solo si tienen datos)
+    # 2. Categorías (Solo si tienen datos), un bloque cada una
     for title, lines in categories.items():
         if lines:
             # Ordenar alfabéticamente
             lines.sort()
-            # Construir bloque
-            block = f"\n**{title}**\n" + "\n".join(lines)
-            send_telegram_msg(block)
-            time.sleep(0.5) # Pausa entre categorías para orden
+            blocks.append(f"**{title}**\n" + "\n".join(lines))
+    send_telegram_msg(*blocks)
+    state.save()
 
     print("Reporte enviado exitosamente.")
 
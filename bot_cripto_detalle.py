@@ -1,14 +1,18 @@
 import ccxt
 import pandas as pd
-import numpy as np
-import requests
-import time
 import os
 from datetime import datetime
+from core.heikin_ashi import heikin_ashi, ha_direction
+from core.indicators import macd
+from core.signals import macd_flip_position
+from core.snapshot import Snapshot
+from core.telegram import send_blocks
+from core.alert_state import ALERT_MODE, AlertState, digest
 
 # --- 1. CREDENCIALES ---
 TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID_CRIPTO_DETALLE")
+BOT = "bot_cripto_detalle"  # clave del estado de alertas (core.alert_state)
 
 # --- 2. CONFIGURACIÓN ---
 # Intradía + Swing + Macro
@@ -53,58 +57,20 @@ def get_top_assets(limit=35):
         ]
 
 # --- 4. ENVÍO TELEGRAM ---
-def send_telegram_msg(message):
+def send_telegram_msg(*blocks):
     if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
         print("❌ Error credenciales Telegram")
         return
-
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-
-    if len(message) < 4000:
-        requests.post(url, data={
-            "chat_id": TELEGRAM_CHAT_ID,
-            "text": message,
-            "parse_mode": "Markdown"
-        })
-    else:
-        parts = message.split('\n\n')
-        buffer = ""
-
-        for part in parts:
-            if len(buffer) + len(part) > 3800:
-                requests.post(url, data={
-                    "chat_id": TELEGRAM_CHAT_ID,
-                    "text": buffer,
-                    "parse_mode": "Markdown"
-                })
-                time.sleep(1)
-                buffer = part + "\n\n"
-            else:
-                buffer += part + "\n\n"
-
-        if buffer:
-            requests.post(url, data={
-                "chat_id": TELEGRAM_CHAT_ID,
-                "text": buffer,
-                "parse_mode": "Markdown"
-            })
+    send_blocks(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, blocks)
 
 # --- 5. INDICADORES ---
 def calculate_strategy(df):
-    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-    macd = exp1 - exp2
-    signal = macd.ewm(span=9, adjust=False).mean()
-    hist = macd - signal
-
-    ha_close = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    ha_open = [df['Open'].iloc[0]]
+    _, _, hist = macd(df['Close'], mode="ewm")
 
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[-1] + ha_close.iloc[i-1]) / 2)
+    ha_open, ha_close = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="open")
 
     df['Hist'] = hist
-    df['HA_Color'] = np.where(ha_close > ha_open, 1, -1)
+    df['HA_Color'] = ha_direction(ha_open, ha_close)
 
     return df
 
@@ -112,37 +78,13 @@ def get_last_signal(df):
     if df.empty or len(df) < 3:
         return "N/A", 0, None
 
-    position = "FLAT"
-    entry_price = 0.0
-    entry_date = df['Timestamp'].iloc[0]
+    sig = macd_flip_position(df['HA_Color'].to_numpy(), df['Hist'].to_numpy(), df['Close'].to_numpy())
+    entry_price = sig.price
+    entry_date = df['Timestamp'].iloc[max(sig.index, 0)]
 
-    for i in range(1, len(df)):
-        c_ha = df['HA_Color'].iloc[i]
-        c_hist = df['Hist'].iloc[i]
-        p_hist = df['Hist'].iloc[i-1]
-
-        curr_date = df['Timestamp'].iloc[i]
-        curr_price = df['Close'].iloc[i]
-
-        if position == "LONG" and c_hist < p_hist:
-            position = "FLAT"
-        if position == "SHORT" and c_hist > p_hist:
-            position = "FLAT"
-
-        if position == "FLAT":
-            if c_ha == 1 and c_hist < 0 and c_hist > p_hist:
-                position = "LONG"
-                entry_price = curr_price
-                entry_date = curr_date
-
-            elif c_ha == -1 and c_hist > 0 and c_hist < p_hist:
-                position = "SHORT"
-                entry_price = curr_price
-                entry_date = curr_date
-
-    if position == "LONG":
+    if sig.state == 1:
         return "🟢 LONG", entry_price, entry_date
-    elif position == "SHORT":
+    elif sig.state == -1:
         return "🔴 SHORT", entry_price, entry_date
     else:
         last = df.iloc[-1]
@@ -152,10 +94,13 @@ def get_last_signal(df):
         return f"⚪ (HA {ha_icon}|MACD {macd_icon})", last['Close'], last['Timestamp']
 
 # --- 6. MOTOR PRINCIPAL ---
-def run_analysis():
+def run_analysis(snapshot=None):
     print("⏳ Conectando a KuCoin Futures...")
-    ex = get_exchange()
-    tickers = get_top_assets(limit=40)
+    snapshot = snapshot or Snapshot()
+    tickers = snapshot.get(('kucoin-top', 40), lambda: get_top_assets(limit=40))
+
+    jobs = [(symbol, tf_code, limit) for symbol in tickers for tf_code, _, limit in TIMEFRAMES]
+    candles, _ = snapshot.kucoin_batch(jobs)
 
     master_data = {}
 
@@ -165,7 +110,7 @@ def run_analysis():
 
         for tf_code, label, limit in TIMEFRAMES:
             try:
-                ohlcv = ex.fetch_ohlcv(symbol, timeframe=tf_code, limit=limit)
+                ohlcv = candles.get((symbol, tf_code))
                 if not ohlcv:
                     continue
 
@@ -190,10 +135,9 @@ def run_analysis():
             except Exception as e:
                 continue
 
-        time.sleep(0.15)
-
     # --- 7. REPORTE ---
     report_list = []
+    state = AlertState(BOT)  # señal por temporalidad de la corrida anterior
 
     for asset, info in master_data.items():
         if 'Current_Price' not in info:
@@ -209,6 +153,7 @@ def run_analysis():
 
         max_date = max(dates)
         has_new_active_signal = False
+        for tf in required_tfs: state.set(asset, tf, [info[tf]['Signal'], info[tf]['Date']])
 
         lines = []
         lines.append(f"🔹 **{asset}** | ${info['Current_Price']:.4f}")
@@ -244,6 +189,7 @@ def run_analysis():
             lines.append(f"{fmt}{line}{fmt}")
 
         report_list.append({
+            'asset': asset,
             'sort_date': max_date,
             'priority': has_new_active_signal,
             'text': "\n".join(lines)
@@ -257,8 +203,14 @@ def run_analysis():
         "[15M 1H 4H Día Sem]\n\n"
     )
 
-    body = "\n\n".join(item['text'] for item in report_list)
-    send_telegram_msg(header + body)
+    if ALERT_MODE == "delta":
+        # Solo los activos cuya señal cambió desde la corrida anterior
+        changed = set(state.changes())
+        header = digest(header.strip(), len(report_list), len(changed))
+        report_list = [item for item in report_list if item['asset'] in changed]
+
+    send_telegram_msg(header, *(item['text'] for item in report_list))
+    state.save()
 
     print("✅ Reporte enviado correctamente.")
 
@@ -1,14 +1,17 @@
-import yfinance as yf
-import pandas as pd
-import numpy as np
-import requests
-import time
 import os
 from datetime import datetime
+from core.heikin_ashi import heikin_ashi, ha_direction
+from core.indicators import macd
+from core.signals import macd_flip_position
+from core.snapshot import Snapshot
+from core.telegram import send_blocks
+from core.alert_state import ALERT_MODE, AlertState, digest
 
 # --- 1. CREDENCIALES ---
 TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN")
-TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
+# En el programador (core.scheduler) todos los bots comparten entorno: el chat propio tiene prioridad
+TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID_DETALLE") or os.environ.get("TELEGRAM_CHAT_ID")
+BOT = "bot_detalle"  # clave del estado de alertas (core.alert_state)
 
 # --- 2. BASE DE DATOS MAESTRA ---
 TICKERS = sorted([
@@ -30,74 +33,31 @@ TICKERS = sorted([
 ])
 
 # --- 3. ENVÍO ---
-def send_telegram_msg(message):
+def send_telegram_msg(*blocks):
     if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID: 
         print("Error de Credenciales")
         return
-        
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    
-    if len(message) < 4000:
-        requests.post(url, data={"chat_id": TELEGRAM_CHAT_ID, "text": message, "parse_mode": "Markdown"})
-    else:
-        parts = message.split('\n\n')
-        buffer = ""
-        for part in parts:
-            if len(buffer) + len(part) + 4 > 4000:
-                requests.post(url, data={"chat_id": TELEGRAM_CHAT_ID, "text": buffer, "parse_mode": "Markdown"})
-                time.sleep(1)
-                buffer = part + "\n\n"
-            else:
-                buffer += part + "\n\n"
-        if buffer:
-            requests.post(url, data={"chat_id": TELEGRAM_CHAT_ID, "text": buffer, "parse_mode": "Markdown"})
+    send_blocks(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, blocks)
 
 # --- 4. INDICADORES ---
 def calculate_strategy(df):
-    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-    macd = exp1 - exp2
-    signal = macd.ewm(span=9, adjust=False).mean()
-    hist = macd - signal
+    _, _, hist = macd(df['Close'], mode="ewm")
     
-    ha_close = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    ha_open = [df['Open'].iloc[0]]
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[-1] + ha_close.iloc[i-1]) / 2)
+    ha_open, ha_close = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="open")
     
     df['Hist'] = hist
-    df['HA_Color'] = np.where(ha_close > ha_open, 1, -1)
+    df['HA_Color'] = ha_direction(ha_open, ha_close)
     return df
 
 def get_last_signal(df):
     if df.empty: return "N/A", 0, None
-    position = "FLAT"
-    entry_price = 0.0
-    entry_date = df.index[0]
-    
-    for i in range(1, len(df)):
-        c_ha = df['HA_Color'].iloc[i]
-        c_hist = df['Hist'].iloc[i]
-        p_hist = df['Hist'].iloc[i-1]
-        date = df.index[i]
-        price = df['Close'].iloc[i]
-        
-        if position == "LONG" and c_hist < p_hist: position = "FLAT"
-        if position == "SHORT" and c_hist > p_hist: position = "FLAT"
-        
-        if position == "FLAT":
-            if c_ha == 1 and c_hist < 0 and c_hist > p_hist:
-                position = "LONG"
-                entry_date = date
-                entry_price = price
-            elif c_ha == -1 and c_hist > 0 and c_hist < p_hist:
-                position = "SHORT"
-                entry_date = date
-                entry_price = price
+    sig = macd_flip_position(df['HA_Color'].to_numpy(), df['Hist'].to_numpy(), df['Close'].to_numpy())
+    entry_price = sig.price
+    entry_date = df.index[sig.index] if sig.index >= 0 else df.index[0]
                 
-    if position == "LONG":
+    if sig.state == 1:
         return "🟢 LONG", entry_price, entry_date
-    elif position == "SHORT":
+    elif sig.state == -1:
         return "🔴 SHORT", entry_price, entry_date
     else:
         last_row = df.iloc[-1]
@@ -108,20 +68,21 @@ def get_last_signal(df):
         return f"⚪ ({ha_icon}|{macd_icon})", last_row['Close'], last_row.name
 
 # --- 5. MOTOR PRINCIPAL ---
-def run_analysis():
+def run_analysis(snapshot=None):
     print("⏳ Descargando datos masivos...")
     master_data = {}
     configs = [('D', '1d', '2y'), ('S', '1wk', '5y'), ('M', '1mo', 'max')]
+    # Un solo diario (compartido con los demás bots del ciclo); semanal y mensual se derivan de él
+    panels = (snapshot or Snapshot()).yf_panels(TICKERS, {label: {"int": interval, "per": period} for label, interval, period in configs})
     
     for label, interval, period in configs:
         print(f"-> Procesando {label}...")
         try:
-            data = yf.download(TICKERS, interval=interval, period=period, group_by='ticker', progress=False, auto_adjust=True, threads=True)
+            data = panels[label]
             for t in TICKERS:
                 if t not in master_data: master_data[t] = {}
                 try:
-                    if len(TICKERS) > 1: df = data[t].dropna()
-                    else: df = data.dropna()
+                    df = data[t].dropna()
                     
                     if df.empty: continue
                     if label == 'D': master_data[t]['Current_Price'] = df['Close'].iloc[-1]
@@ -134,6 +95,7 @@ def run_analysis():
     # --- 6. PROCESAMIENTO Y FORMATO ---
     print("⚙️ Generando reporte...")
     report_list = []
+    state = AlertState(BOT)  # señal por temporalidad de la corrida anterior
     
     for t, info in master_data.items():
         if 'Current_Price' not in info or not all(k in info for k in ['D','S','M']): continue
@@ -143,6 +105,7 @@ def run_analysis():
         if not valid_dates: continue
         
         max_date = max(valid_dates)
+        for tf in ['D', 'S', 'M']: state.set(t, tf, [info[tf]['Signal'], info[tf]['Date']])
         
         # Banderas de Prioridad
         has_new_active_signal = False
@@ -183,6 +146,7 @@ def run_analysis():
             lines.append(f"{fmt}{line_str}{fmt}")
             
         report_list.append({
+            'asset': t,
             'sort_date': max_date,
             'is_priority': has_new_active_signal, # True si tiene señal nueva activa
             'text': "\n".join(lines)
@@ -195,9 +159,13 @@ def run_analysis():
     
     # --- 7. ENVÍO ---
     final_msg = f"🦅 **REPORTE SYSTEMATRADER**\n📅 {datetime.now().strftime('%d/%m %H:%M')}\n\n"
-    body = "\n\n".join([item['text'] for item in report_list])
-    
-    send_telegram_msg(final_msg + body)
+    if ALERT_MODE == "delta":
+        # Solo los activos cuya señal cambió desde la corrida anterior
+        changed = set(state.changes())
+        final_msg = digest(final_msg.strip(), len(report_list), len(changed))
+        report_list = [item for item in report_list if item['asset'] in changed]
+    send_telegram_msg(final_msg, *(item['text'] for item in report_list))
+    state.save()
     print("✅ Reporte enviado.")
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+# Núcleo compartido de SystemaTrader (bots de Telegram + páginas de Streamlit).
@@ -0,0 +1,82 @@
+"""
+Estado de la última señal enviada por cada bot, para alertar solo lo que cambió.
+
+Los bots mandaban el universo completo en cada corrida aunque no se hubiera
+movido nada (y el 🆕 de `crypto_bot` dependía de un `estado_mercado.json`
+que en Actions no sobrevivía entre corridas). Acá cada bot guarda, por
+activo y temporalidad, un valor chico y comparable (color, tipo de señal,
+estado): `.cache/alerts/<bot>.json`, escrito de forma atómica (archivo
+temporal + `os.replace`) para que una corrida cortada no lo deje a medias.
+
+    state = AlertState("mtf_bot")
+    state.set("AAPL", "DIARIO", ["LONG", "2024-05-02"])
+    if state.changed("AAPL"): ...         # distinto de la corrida anterior (o nuevo)
+    state.save()
+
+Con `SLY_ALERT_MODE=delta` los bots mandan solo los activos que cambiaron
+y un resumen compacto del resto (`digest`); con `full` (por defecto) el
+reporte completo de siempre, marcando con 🆕 lo que cambió.
+"""
+import json
+import os
+import threading
+
+from core.scan_store import dumps
+
+STATE_DIR = os.environ.get("SLY_ALERT_STATE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "alerts"))
+MODES = ("full", "delta")
+ALERT_MODE = os.environ.get("SLY_ALERT_MODE", "full")
+if ALERT_MODE not in MODES: raise ValueError(f"SLY_ALERT_MODE desconocido: {ALERT_MODE!r} (opciones: {', '.join(MODES)})")
+
+
+class AlertState:
+    def __init__(self, bot, state_dir=STATE_DIR):
+        self.path = os.path.join(state_dir, f"{bot}.json")
+        self.previous = self._load()        # {activo: {temporalidad: valor}} de la corrida anterior
+        self.current = {}
+
+    def _load(self):
+        try:
+            with open(self.path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def set(self, asset, timeframe, value):
+        # Ida y vuelta por JSON: se compara exactamente lo que se va a guardar
+        self.current.setdefault(str(asset), {})[str(timeframe)] = json.loads(dumps(value))
+
+    def get_previous(self, asset, timeframe, default=None):
+        return self.previous.get(str(asset), {}).get(str(timeframe), default)
+
+    def changed(self, asset, timeframe=None):
+        """
+        True si alguna temporalidad cargada en esta corrida (o la pedida)
+        difiere de la anterior o no estaba. Una temporalidad que no se pudo
+        descargar no se carga y no cuenta como cambio.
+        """
+        cur, prev = self.current.get(str(asset), {}), self.previous.get(str(asset), {})
+        if timeframe is not None: return str(timeframe) in cur and cur[str(timeframe)] != prev.get(str(timeframe))
+        return any(k not in prev or prev[k] != v for k, v in cur.items())
+
+    def changes(self):
+        """Activos que cambiaron, en el orden en que se cargaron."""
+        return [a for a in self.current if self.changed(a)]
+
+    def save(self):
+        """Guarda el estado actual; lo que no se vio en esta corrida conserva el valor anterior."""
+        merged = {a: dict(v) for a, v in self.previous.items()}
+        for a, v in self.current.items(): merged.setdefault(a, {}).update(v)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as fh:
+            fh.write(dumps(merged))
+        os.replace(tmp, self.path)
+        self.previous = merged
+
+
+def digest(title, n_total, n_changed, counts=None):
+    """Bloque de resumen del modo delta: cuántos activos cambiaron y el conteo por categoría."""
+    lines = [title, f"🔁 Cambios: {n_changed} de {n_total} activos" if n_changed else f"💤 Sin cambios en {n_total} activos"]
+    if counts: lines.append(" | ".join(f"{k}: {v}" for k, v in counts.items() if v))
+    return "\n".join(lines)
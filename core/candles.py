@@ -0,0 +1,132 @@
+"""
+Contenedor compacto de velas sobre un array estructurado de NumPy.
+
+Reemplaza el DataFrame que cada página arma por pedido (`pd.DataFrame(ohlcv,
+columns=[...])`, `pd.to_datetime`, el `.copy()` de calculate_heikin_ashi):
+
+    c = Candles.from_rows(ohlcv)          # filas ccxt; Candles.wrap(array) no copia
+    c.set_last_close(price)
+    hist = macd(c.close)[2]               # vistas float64, sin copiar
+    c.to_frame()                          # DataFrame solo para mostrar
+
+Las velas son `CANDLE_DTYPE` (ts int64 en ms + OHLCV float64). Con capacidad
+fija funciona como buffer circular: `put` agrega la vela nueva (o reemplaza
+la última si llega con la misma ts) y descarta la más vieja. El array interno
+mide el doble de la capacidad y la ventana se corre al principio solo cuando
+llega al final, así que siempre es contigua y `view()` no copia.
+
+Las vistas (`view()`, `close`, ...) comparten memoria con el contenedor:
+valen hasta el próximo `put` / `seed`.
+"""
+import numpy as np
+
+from core.ohlcv_store import CANDLE_DTYPE, candles_to_frame, candles_to_rows, merge_candles, to_candles
+
+FIELDS = ("ts", "open", "high", "low", "close", "volume")
+
+
+class Candles:
+    __slots__ = ("capacity", "_buf", "_lo", "_hi")
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._buf = np.zeros(2 * self.capacity, dtype=CANDLE_DTYPE)
+        self._lo = self._hi = 0
+
+    @classmethod
+    def wrap(cls, arr, capacity=None):
+        """Envuelve un array `CANDLE_DTYPE` ya ordenado sin copiarlo (si es de solo lectura, se copia)."""
+        arr = np.asarray(arr, dtype=CANDLE_DTYPE)
+        if not arr.flags.writeable: arr = arr.copy()
+        out = cls.__new__(cls)
+        out.capacity = int(capacity or max(len(arr), 1))
+        out._buf, out._lo, out._hi = arr, max(0, len(arr) - out.capacity), len(arr)
+        return out
+
+    @classmethod
+    def from_rows(cls, rows, capacity=None):
+        """Filas [ts, o, h, l, c, v] (formato ccxt) -> Candles."""
+        return cls.wrap(to_candles(rows), capacity)
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    def view(self):
+        return self._buf[self._lo:self._hi]
+
+    @property
+    def ts(self): return self._buf["ts"][self._lo:self._hi]
+
+    @property
+    def open(self): return self._buf["open"][self._lo:self._hi]
+
+    @property
+    def high(self): return self._buf["high"][self._lo:self._hi]
+
+    @property
+    def low(self): return self._buf["low"][self._lo:self._hi]
+
+    @property
+    def close(self): return self._buf["close"][self._lo:self._hi]
+
+    @property
+    def volume(self): return self._buf["volume"][self._lo:self._hi]
+
+    @property
+    def last_ts(self):
+        return int(self._buf["ts"][self._hi - 1]) if len(self) else None
+
+    def _make_room(self):
+        n = len(self)
+        if len(self._buf) < 2 * self.capacity:
+            buf = np.zeros(2 * self.capacity, dtype=CANDLE_DTYPE)
+            buf[:n] = self._buf[self._lo:self._hi]
+            self._buf = buf
+        else:
+            self._buf[:n] = self._buf[self._lo:self._hi]
+        self._lo, self._hi = 0, n
+
+    def put(self, row):
+        """Agrega una vela o reemplaza la última (misma ts). Devuelve False si es más vieja."""
+        ts = int(row[0])
+        rec = (ts, *(float(x) for x in row[1:6]))
+        last = self.last_ts
+        if last is not None and ts <= last:
+            if ts < last: return False
+            self._buf[self._hi - 1] = rec
+            return True
+        if self._hi == len(self._buf): self._make_room()
+        self._buf[self._hi] = rec
+        self._hi += 1
+        if len(self) > self.capacity: self._lo += 1
+        return True
+
+    def extend(self, rows):
+        for r in rows: self.put(r)
+        return self
+
+    def seed(self, rows):
+        """Funde velas históricas (REST): mandan en las cerradas; la vela abierta ya recibida se conserva."""
+        cur = self.view().copy()
+        merged = merge_candles(cur, to_candles(rows))
+        if len(cur) and cur["ts"][-1] >= merged["ts"][-1]: merged[-1] = cur[-1]
+        merged = merged[-self.capacity:]
+        self._buf = np.zeros(2 * self.capacity, dtype=CANDLE_DTYPE)
+        self._buf[:len(merged)] = merged
+        self._lo, self._hi = 0, len(merged)
+        return self
+
+    def set_last_close(self, price):
+        """Cierre de la vela abierta con el último precio (antes: `ohlcv[-1][4] = current_price`)."""
+        if len(self): self._buf["close"][self._hi - 1] = float(price)
+
+    def rows(self, n=None):
+        """Últimas `n` velas como filas ccxt."""
+        v = self.view()
+        return candles_to_rows(v if n is None else v[len(v) - min(n, len(v)):])
+
+    def to_frame(self, columns=("open", "high", "low", "close", "vol")):
+        """DataFrame (índice datetime `dt`) para mostrar; se arma recién acá."""
+        df = candles_to_frame(self.view(), columns)
+        df.index.name = "dt"
+        return df
@@ -0,0 +1,54 @@
+"""
+Etapa de cálculo por ticker en un pool de procesos.
+
+Después de la descarga masiva, `alerta_bot` y `mtf_bot` calculaban ADX,
+Heikin Ashi y la última señal ticker por ticker (≈180 tickers × 3
+temporalidades, 500 con el universo completo): CPU pura que en el bucle del
+bot usa un solo núcleo. Acá cada trabajo viaja a un proceso como arrays de
+NumPy (sin DataFrames, que cuestan mucho más de serializar) y vuelve un
+resultado chico:
+
+    jobs = {(ticker, tf): ohlc_arrays(df) for ...}
+    out = map_arrays(ha_state, jobs)            # {(ticker, tf): resultado o None}
+
+`fn` tiene que ser una función de módulo (viaja por pickle). Un trabajo que
+falla queda en None, como el `try/except: continue` de los bots. Con
+`SLY_WORKERS=1`, con pocos trabajos o si el pool no puede arrancar, corre en
+serie en el mismo proceso con la misma función: los resultados son
+idénticos.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+WORKERS = int(os.environ.get("SLY_WORKERS") or 0) or os.cpu_count() or 1
+MIN_JOBS = 32               # por debajo, arrancar los procesos cuesta más que calcular
+CHUNKS_PER_WORKER = 4       # lotes por proceso: reparte la carga sin un pickle por trabajo
+OHLC = ("Open", "High", "Low", "Close")
+
+
+def ohlc_arrays(df, columns=OHLC):
+    """Columnas de un DataFrame como arrays float64 (lo que se manda a los procesos)."""
+    return tuple(df[c].to_numpy(dtype=float) for c in columns)
+
+
+def _guard(fn, args):
+    try:
+        return fn(*args)
+    except Exception:
+        return None
+
+
+def map_arrays(fn, jobs, workers=WORKERS, min_jobs=MIN_JOBS):
+    """{clave: fn(*args)} para `jobs` = {clave: args}, repartido entre `workers` procesos."""
+    keys, args = list(jobs), list(jobs.values())
+    workers = min(workers, len(keys))
+    if workers > 1 and len(keys) >= min_jobs:
+        chunksize = -(-len(keys) // (workers * CHUNKS_PER_WORKER))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return dict(zip(keys, pool.map(partial(_guard, fn), args, chunksize=chunksize)))
+        except (BrokenProcessPool, OSError) as e:
+            print(f"Pool de procesos no disponible ({e}); cálculo en serie")
+    return {k: _guard(fn, a) for k, a in zip(keys, args)}
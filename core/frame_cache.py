@@ -0,0 +1,73 @@
+"""
+Caché LRU de DataFrames en memoria, con tope en bytes y compartida entre sesiones.
+
+Las páginas guardaban el historial completo de cada ticker dentro de la fila
+de resultados en `st.session_state`, así que la memoria de cada sesión
+crecía sin límite. Con esta caché la fila guarda solo el ticker y el
+historial vive una vez por proceso (vía `st.cache_resource`):
+
+    @st.cache_resource
+    def get_history_cache():
+        return FrameCache(max_bytes=256 * 2**20)
+
+    HISTORY = get_history_cache()
+    HISTORY.put("AAPL", df)
+    df = HISTORY.get_or_load("AAPL", lambda: yf.Ticker("AAPL").history(period="10y"))
+
+Cuando la suma de `memory_usage(deep=True)` pasa el tope se descartan las
+entradas menos usadas; una entrada descartada se vuelve a cargar con
+`get_or_load` cuando se pide. Es segura entre hilos.
+"""
+import threading
+from collections import OrderedDict
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class FrameCache:
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = int(max_bytes)
+        self.frames = OrderedDict()      # clave -> (DataFrame, bytes)
+        self.nbytes = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self.frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get(self, key):
+        with self._lock:
+            hit = self.frames.get(key)
+            if hit is None: return None
+            self.frames.move_to_end(key)
+            return hit[0]
+
+    def put(self, key, df):
+        size = frame_bytes(df)
+        with self._lock:
+            old = self.frames.pop(key, None)
+            if old is not None: self.nbytes -= old[1]
+            if size > self.max_bytes: return
+            self.frames[key] = (df, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, dropped) = self.frames.popitem(last=False)
+                self.nbytes -= dropped
+
+    def get_or_load(self, key, loader):
+        """Devuelve la entrada o la carga con `loader()` (None o vacío no se guarda)."""
+        df = self.get(key)
+        if df is None:
+            df = loader()
+            if df is not None and not df.empty: self.put(key, df)
+        return df
+
+    def discard(self, key):
+        with self._lock:
+            old = self.frames.pop(key, None)
+            if old is not None: self.nbytes -= old[1]
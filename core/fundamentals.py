@@ -0,0 +1,148 @@
+"""
+Descarga concurrente y caché en disco de datos fundamentales de Yahoo Finance.
+
+El screener fundamental pedía `info`, `growth_estimates` y los estados
+contables de `yf.Ticker` de a un ticker por vez y con una pausa fija entre
+ellos, así que 1000 tickers tardaban decenas de minutos por corrida. Acá:
+
+- los tickers se reparten en un pool de hilos y un limitador global acota
+  los pedidos por segundo entre todos ellos (cada parte de `yf.Ticker` es un
+  pedido aparte);
+- cada parte se guarda cruda en `FUND_DIR/<TICKER>.pkl` con la fecha en que
+  se bajó y vence según `TTL_S`. Los estados contables cambian por trimestre;
+  `info` trae además el precio, así que vence en el día;
+- cada ticker se escribe apenas termina, así que si una corrida se corta la
+  siguiente retoma donde quedó. Los tickers para los que Yahoo no devuelve
+  `info` se anotan en `_empty.json` y no se vuelven a pedir hasta que pasa
+  `EMPTY_TTL_S`. Un error de red no se anota: se reintenta en la próxima corrida.
+
+`fetch_fundamentals(tickers)` devuelve {ticker: {parte: valor}}; los ratios
+y el score se calculan después sobre eso, sin tocar la red.
+"""
+import json
+import os
+import pickle
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import yfinance as yf
+
+from core.pipeline import RateLimiter
+
+FUND_DIR = os.environ.get("SLY_FUND_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "fundamentals"))
+
+PARTS = ("info", "growth_estimates", "income_stmt", "balance_sheet", "quarterly_income_stmt")
+DAY_S = 86_400
+TTL_S = {
+    "info": DAY_S,
+    "growth_estimates": 30 * DAY_S,
+    "income_stmt": 30 * DAY_S,
+    "balance_sheet": 30 * DAY_S,
+    "quarterly_income_stmt": 30 * DAY_S,
+}
+EMPTY_TTL_S = DAY_S
+MAX_WORKERS = 8
+REQUESTS_PER_S = 8.0
+
+
+def _atomic_write(path, data, mode="wb"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, mode) as fh: fh.write(data)
+    os.replace(tmp, path)
+
+
+class FundamentalsCache:
+    """Un `.pkl` por ticker con {parte: (fecha de descarga, valor crudo)}."""
+
+    def __init__(self, root=FUND_DIR, ttl=None):
+        self.root = root
+        self.ttl = {**TTL_S, **(ttl or {})}
+        self.empty_path = os.path.join(root, "_empty.json")
+        self._lock = threading.Lock()
+
+    def path(self, symbol):
+        return os.path.join(self.root, f"{re.sub(r'[^A-Za-z0-9._-]', '_', symbol)}.pkl")
+
+    def load(self, symbol):
+        try:
+            with open(self.path(symbol), "rb") as fh: return pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return {}
+
+    def save(self, symbol, entry):
+        _atomic_write(self.path(symbol), pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def stale(self, entry, now=None):
+        """Partes que faltan o vencieron."""
+        now = time.time() if now is None else now
+        return [p for p in PARTS if p not in entry or now - entry[p][0] > self.ttl[p]]
+
+    def load_empty(self, now=None):
+        now = time.time() if now is None else now
+        try:
+            with open(self.empty_path) as fh: marks = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        return {s: t for s, t in marks.items() if now - t <= EMPTY_TTL_S}
+
+    def mark_empty(self, symbol):
+        with self._lock:
+            marks = self.load_empty()
+            marks[symbol] = time.time()
+            _atomic_write(self.empty_path, json.dumps(marks), "w")
+
+
+def _unpack(entry):
+    return {part: value for part, (_, value) in entry.items()}
+
+
+def _fetch(symbol, entry, parts, limiter, cache):
+    """Baja las partes pedidas de un ticker y lo guarda. Devuelve (entry, sin_datos)."""
+    ticker, fetched = yf.Ticker(symbol), {}
+    for part in parts:
+        limiter.wait()
+        try:
+            value = getattr(ticker, part)
+        except Exception:
+            continue
+        if part == "info" and not value: return entry, True
+        fetched[part] = (time.time(), value)
+    if fetched:
+        entry = {**entry, **fetched}
+        cache.save(symbol, entry)
+    return entry, False
+
+
+def fetch_fundamentals(tickers, workers=MAX_WORKERS, rate=REQUESTS_PER_S, cache=None, refresh=False, progress=None):
+    """
+    {ticker: {parte: valor}} para los tickers con `info`. Lo vigente sale del
+    disco; lo vencido se baja en paralelo. `refresh=True` ignora la caché.
+    `progress(hechos, total)` se llama al terminar cada ticker descargado.
+    """
+    cache = cache or FundamentalsCache()
+    now = time.time()
+    empty = {} if refresh else cache.load_empty(now)
+    out, todo = {}, []
+    for symbol in dict.fromkeys(tickers):
+        if symbol in empty: continue
+        entry = cache.load(symbol)
+        parts = list(PARTS) if refresh else cache.stale(entry, now)
+        if parts: todo.append((symbol, entry, parts))
+        else: out[symbol] = _unpack(entry)
+
+    limiter = RateLimiter(rate)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_fetch, s, entry, parts, limiter, cache): s for s, entry, parts in todo}
+        for n, fut in enumerate(as_completed(futures), start=1):
+            symbol = futures[fut]
+            try:
+                entry, no_data = fut.result()
+            except Exception:
+                entry, no_data = {}, False
+            if no_data: cache.mark_empty(symbol)
+            elif entry.get("info"): out[symbol] = _unpack(entry)
+            if progress: progress(n, len(todo))
+    return {s: out[s] for s in dict.fromkeys(tickers) if s in out}
@@ -0,0 +1,117 @@
+"""
+Heikin Ashi vectorizado.
+
+El HA Open es un filtro recursivo de primer orden sobre el HA Close:
+
+    ha_open[i] = (ha_open[i-1] + ha_close[i-1]) / 2
+
+Se evalúa con `scipy.signal.lfilter` (mismo redondeo que el bucle original,
+resultado bit a bit idéntico). Sin SciPy se recorre el array en crudo, nunca
+con `.iloc`.
+"""
+import numpy as np
+
+try:
+    from scipy.signal import lfilter
+except ImportError:  # Los workflows de los bots no siempre instalan SciPy
+    lfilter = None
+
+# Semilla del primer HA Open. Cada script usa una convención distinta:
+#   "open" -> Open[0]                   (alerta_bot, crypto_bot, mtf_bot, bot_detalle...)
+#   "mid"  -> (Open[0] + Close[0]) / 2  (macro_sly_bot y páginas SLY)
+SEEDS = ("open", "mid")
+
+_B = np.array([0.0, 0.5])
+_A = np.array([1.0, -0.5])
+
+
+def _seed(o, c, seed):
+    if seed == "open": return o
+    if seed == "mid": return (o + c) / 2
+    raise ValueError(f"Semilla HA desconocida: {seed!r} (usar {SEEDS})")
+
+
+def ha_close(o, h, l, c):
+    return (np.asarray(o, dtype=float) + np.asarray(h, dtype=float) + np.asarray(l, dtype=float) + np.asarray(c, dtype=float)) / 4
+
+
+def ha_open_from_close(hc, seed_value):
+    """HA Open 1-D a partir del HA Close y el valor inicial."""
+    hc = np.asarray(hc, dtype=float)
+    n = len(hc)
+    if n == 0: return np.empty(0)
+    if lfilter is not None:
+        return lfilter(_B, _A, hc, zi=[float(seed_value)])[0]
+    out = np.empty(n)
+    prev = float(seed_value)
+    out[0] = prev
+    hc_list = hc.tolist()
+    for i in range(1, n):
+        prev = (prev + hc_list[i-1]) / 2
+        out[i] = prev
+    return out
+
+
+def heikin_ashi(o, h, l, c, seed="open"):
+    """Devuelve (ha_open, ha_close) como arrays de NumPy. Acepta Series o arrays."""
+    hc = ha_close(o, h, l, c)
+    if len(hc) == 0: return np.empty(0), hc
+    o0, c0 = float(np.asarray(o)[0]), float(np.asarray(c)[0])
+    return ha_open_from_close(hc, _seed(o0, c0, seed)), hc
+
+
+def ha_direction(ha_o, ha_c):
+    """1 = vela verde, -1 = vela roja (empate = roja, como en los scripts originales)."""
+    return np.where(np.asarray(ha_c) > np.asarray(ha_o), 1, -1)
+
+
+# ─────────────────────────────────────────────
+# VARIANTE POR PANEL (tickers x velas)
+# ─────────────────────────────────────────────
+def heikin_ashi_panel(o, h, l, c, seed="open"):
+    """
+    Heikin Ashi para una matriz 2-D (una fila por ticker) en una sola llamada.
+
+    Cada fila puede traer NaN al principio (historia más corta); la semilla se
+    toma en la primera vela válida de cada fila, igual que si cada ticker se
+    procesara por separado tras `dropna()`. Las posiciones de relleno quedan en NaN.
+    """
+    o, h, l, c = (np.atleast_2d(np.asarray(x, dtype=float)) for x in (o, h, l, c))
+    hc = (o + h + l + c) / 4
+    rows, n = hc.shape
+    if n == 0: return np.empty((rows, 0)), hc
+
+    valid = ~np.isnan(hc)
+    has_data = valid.any(axis=1)
+    first = np.where(has_data, valid.argmax(axis=1), 0)
+    idx = np.arange(rows)
+    seeds = _seed(o[idx, first], c[idx, first], seed)
+    seeds = np.where(has_data, seeds, np.nan)
+
+    # Relleno inicial = semilla: (s + s) / 2 == s, así el filtro llega intacto a la primera vela válida
+    lead = np.arange(n)[None, :] < first[:, None]
+    hc_fill = np.where(lead, seeds[:, None], hc)
+
+    if lfilter is not None:
+        out = lfilter(_B, _A, hc_fill, axis=1, zi=seeds[:, None])[0]
+    else:
+        out = np.empty_like(hc_fill)
+        out[:, 0] = seeds
+        for i in range(1, n):
+            out[:, i] = (out[:, i-1] + hc_fill[:, i-1]) / 2
+    out[lead] = np.nan
+    return out, hc
+
+
+def stack_panel(frames, columns=("Open", "High", "Low", "Close")):
+    """
+    Alinea a la derecha (última vela con última vela) una lista de DataFrames ya
+    limpios y devuelve un dict columna -> matriz 2-D con NaN a la izquierda.
+    """
+    n = max((len(f) for f in frames), default=0)
+    panel = {col: np.full((len(frames), n), np.nan) for col in columns}
+    for r, f in enumerate(frames):
+        if len(f) == 0: continue
+        for col in columns:
+            panel[col][r, n - len(f):] = f[col].to_numpy(dtype=float)
+    return panel
@@ -0,0 +1,32 @@
+"""
+Indicadores técnicos sobre NumPy (EMA, DEMA, MACD, RSI, ADX, ATR).
+
+Todas las funciones aceptan Series, arrays 1-D o matrices 2-D (tickers x
+velas, con NaN a la izquierda como las arma `core.heikin_ashi.stack_panel`)
+y devuelven arrays de la misma forma. Las variantes reproducen las fórmulas
+que ya usa el repo:
+
+    ema(x, n, sma_seed=True)     == ta.ema         (con NaN iniciales: ta.ema(x.dropna()))
+    macd(x, mode="pandas_ta")    == ta.macd        (macd, signal, hist)
+    macd(x, mode="ewm")          == MACD de bot_detalle / bot_cripto_detalle
+    macd(x, mode="dema")         == MACD Zero-Lag de las páginas Señales
+    rsi(x, n)                    == ta.rsi
+    adx(h, l, c, n)              == calculate_adx de los bots   (adx, +DI, -DI)
+    adx(h, l, c, n, "pandas_ta") == ta.adx
+    atr(h, l, c, n)              == ta.atr
+
+Dentro de `with scan_cache():` los resultados intermedios se memoizan por
+(array, parámetros), así MACD, su señal y la DEMA comparten las EMAs.
+
+`core.indicators.streaming` tiene las mismas fórmulas en versión incremental
+(estado O(1) por símbolo/temporalidad, con checkpoint en disco).
+"""
+from core.indicators.base import dema, ema, rma, sma, wilder
+from core.indicators.cache import IndicatorCache, active_cache, scan_cache
+from core.indicators.oscillators import MACD_MODES, adx, atr, macd, rsi, true_range
+
+__all__ = [
+    "sma", "ema", "dema", "rma", "wilder",
+    "macd", "rsi", "true_range", "atr", "adx", "MACD_MODES",
+    "scan_cache", "active_cache", "IndicatorCache",
+]
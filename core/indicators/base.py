@@ -0,0 +1,61 @@
+"""Medias: SMA, EMA (con o sin semilla SMA), DEMA, RMA de pandas_ta y suavizado de Wilder."""
+import numpy as np
+
+from core.indicators.cache import memoized
+from core.indicators.ewm import as_rows, ewm_mean, first_valid, restore
+
+
+@memoized
+def sma(x, length):
+    rows, was_1d = as_rows(x)
+    out = np.full(rows.shape, np.nan)
+    if rows.shape[1] >= length:
+        csum = np.cumsum(np.nan_to_num(rows), axis=1)
+        cnt = np.cumsum(~np.isnan(rows), axis=1)
+        win = csum[:, length-1:] - np.concatenate([np.zeros((len(rows), 1)), csum[:, :-length]], axis=1)
+        ok = (cnt[:, length-1:] - np.concatenate([np.zeros((len(rows), 1)), cnt[:, :-length]], axis=1)) == length
+        out[:, length-1:] = np.where(ok, win / length, np.nan)
+    return restore(out, was_1d)
+
+
+@memoized
+def ema(x, length, sma_seed=False):
+    """
+    EMA de span `length`.
+    sma_seed=False -> `Series.ewm(span=length, adjust=False).mean()` (bots, DEMA de las páginas)
+    sma_seed=True  -> `ta.ema` de pandas_ta: arranca con la SMA de los primeros `length` valores.
+                      La semilla se toma desde el primer valor válido, así que con NaN
+                      iniciales equivale a `ta.ema(x.dropna())` (lo que hace `ta.macd`
+                      con la señal) y no a `ta.ema(x)`, que promedia sobre el hueco.
+    """
+    alpha = 2.0 / (length + 1.0)
+    if not sma_seed: return ewm_mean(x, alpha, adjust=False)
+    rows, was_1d = as_rows(x)
+    rows = rows.copy()
+    n = rows.shape[1]
+    for r, f in enumerate(first_valid(rows)):
+        if f + length > n:
+            rows[r] = np.nan
+            continue
+        rows[r, f + length - 1] = np.nanmean(rows[r, f:f + length])
+        rows[r, :f + length - 1] = np.nan
+    return restore(ewm_mean(rows, alpha, adjust=False), was_1d)
+
+
+@memoized
+def dema(x, length):
+    """Double EMA (2·EMA - EMA(EMA)), la que usan las páginas Zero-Lag."""
+    e1 = ema(x, length)
+    return 2 * e1 - ema(e1, length)
+
+
+@memoized
+def rma(x, length):
+    """`ta.rma` de pandas_ta: ewm(alpha=1/length, min_periods=length) con adjust=True."""
+    return ewm_mean(x, 1.0 / length, adjust=True, min_periods=length)
+
+
+@memoized
+def wilder(x, length):
+    """Suavizado de Wilder de los bots: ewm(alpha=1/length, adjust=False)."""
+    return ewm_mean(x, 1.0 / length, adjust=False)
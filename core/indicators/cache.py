@@ -0,0 +1,73 @@
+"""
+Memoización de indicadores dentro de un escaneo.
+
+    with scan_cache():
+        m = macd(close)          # ema(close, 12) y ema(close, 26)
+        d = dema(close, 12)      # reutiliza ema(close, 12) si coincide la variante
+
+La clave es (indicador, identidad de cada array de entrada, parámetros). La
+identidad de un array es su buffer (puntero, forma, strides): una Series de
+pandas y su `.to_numpy()` comparten clave. El caché guarda una referencia a
+las entradas, así que el buffer no se reutiliza mientras dure el escaneo; no
+modificar los arrays in-place dentro del bloque.
+"""
+import contextvars
+import functools
+from contextlib import contextmanager
+
+import numpy as np
+
+_ACTIVE = contextvars.ContextVar("indicator_cache", default=None)
+
+
+class IndicatorCache:
+    def __init__(self):
+        self.store = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.store.clear()
+        self.hits = self.misses = 0
+
+
+def _ident(x):
+    if isinstance(x, np.ndarray) or hasattr(x, "__array__"):
+        arr = np.asarray(x)
+        return ("arr", arr.__array_interface__["data"][0], arr.shape, arr.strides, arr.dtype.str), arr
+    return ("val", x), None
+
+
+@contextmanager
+def scan_cache(cache=None):
+    """Activa un caché para todo lo que se calcule dentro del bloque (anidable)."""
+    cache = cache if cache is not None else (_ACTIVE.get() or IndicatorCache())
+    token = _ACTIVE.set(cache)
+    try:
+        yield cache
+    finally:
+        _ACTIVE.reset(token)
+
+
+def active_cache():
+    return _ACTIVE.get()
+
+
+def memoized(fn):
+    """Memoiza `fn(*arrays, **params)` en el caché activo; sin caché la llama directo."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        cache = _ACTIVE.get()
+        if cache is None: return fn(*args, **kwargs)
+        idents = [_ident(a) for a in args]
+        key = (fn.__name__, tuple(i for i, _ in idents), tuple(sorted(kwargs.items())))
+        hit = cache.store.get(key)
+        if hit is not None:
+            cache.hits += 1
+            return hit[0]
+        cache.misses += 1
+        out = fn(*args, **kwargs)
+        # Se guardan las entradas para que su buffer no se libere (y no se recicle la clave)
+        cache.store[key] = (out, [ref for _, ref in idents])
+        return out
+    return wrapper
@@ -0,0 +1,100 @@
+"""
+Medias exponenciales sobre arrays 1-D o 2-D (tickers x velas, eje -1).
+
+Replica `pandas.Series.ewm(...).mean()` con `ignore_na=False`:
+
+    adjust=False -> y[i] = (1-a)·y[i-1] + a·x[i]      (EMA clásica, Wilder)
+    adjust=True  -> promedio ponderado de todas las observaciones (rma de pandas_ta)
+
+Los NaN iniciales (warm-up de otro indicador o relleno a la izquierda de un
+panel) se saltean como en pandas. Con SciPy y sin NaN intermedios se usa
+`lfilter` en bloque; si no, el mismo algoritmo de pandas fila por fila.
+"""
+import numpy as np
+
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
+
+def as_rows(x):
+    """Array float64 2-D (filas = series) y si la entrada era 1-D."""
+    arr = np.asarray(x, dtype=np.float64)
+    if arr.ndim == 1: return arr[None, :], True
+    if arr.ndim != 2: raise ValueError("Se esperaba un array 1-D o 2-D")
+    return arr, False
+
+
+def restore(out, was_1d):
+    return out[0] if was_1d else out
+
+
+def first_valid(rows):
+    """Índice del primer valor no-NaN por fila (n si la fila está vacía)."""
+    valid = ~np.isnan(rows)
+    n = rows.shape[1]
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), n)
+
+
+def _interior_nan(rows, start):
+    pos = np.arange(rows.shape[1])[None, :]
+    return bool((np.isnan(rows) & (pos >= start[:, None])).any())
+
+
+def _ewm_loop(row, alpha, adjust, min_periods):
+    # Misma secuencia de operaciones que pandas (_libs/window/aggregations.pyx: ewm)
+    vals = row.tolist()
+    out = [np.nan] * len(vals)
+    old_wt_factor, new_wt = 1.0 - alpha, (1.0 if adjust else alpha)
+    weighted = vals[0]
+    nobs = int(weighted == weighted)
+    out[0] = weighted if nobs >= min_periods else np.nan
+    old_wt = 1.0
+    for i in range(1, len(vals)):
+        cur = vals[i]
+        is_obs = cur == cur
+        nobs += is_obs
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_obs:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+                old_wt = old_wt + new_wt if adjust else 1.0
+        elif is_obs:
+            weighted = cur
+        out[i] = weighted if nobs >= min_periods else np.nan
+    return np.array(out)
+
+
+def _ewm_filter(rows, start, alpha, adjust, min_periods):
+    n = rows.shape[1]
+    valid = ~np.isnan(rows)
+    decay = 1.0 - alpha
+    if adjust:
+        num = lfilter([1.0], [1.0, -decay], np.where(valid, rows, 0.0), axis=-1)
+        den = lfilter([1.0], [1.0, -decay], valid.astype(np.float64), axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = num / den
+    else:
+        # Relleno a la izquierda con el primer valor: una EMA de una constante es la constante
+        first = rows[np.arange(len(rows)), np.minimum(start, n - 1)]
+        filled = np.where(np.arange(n)[None, :] < start[:, None], first[:, None], rows)
+        den = decay + alpha
+        out = lfilter([alpha / den], [1.0, -decay / den], filled, axis=-1, zi=(decay / den * first)[:, None])[0]
+    pos = np.arange(n)[None, :]
+    out[pos < start[:, None]] = np.nan
+    if min_periods > 1:
+        out[np.cumsum(valid, axis=1) < min_periods] = np.nan
+    return out
+
+
+def ewm_mean(x, alpha, adjust=False, min_periods=0):
+    rows, was_1d = as_rows(x)
+    if rows.shape[1] == 0: return restore(rows.copy(), was_1d)
+    start = first_valid(rows)
+    if lfilter is not None and not _interior_nan(rows, start):
+        out = _ewm_filter(rows, start, alpha, adjust, min_periods)
+    else:
+        out = np.vstack([_ewm_loop(r, alpha, adjust, min_periods) for r in rows])
+    return restore(out, was_1d)
@@ -0,0 +1,118 @@
+"""MACD, RSI, True Range, ATR y ADX sobre arrays 1-D o 2-D."""
+import sys
+
+import numpy as np
+
+from core.indicators.base import dema, ema, rma, sma, wilder
+from core.indicators.cache import memoized
+from core.indicators.ewm import as_rows, first_valid, restore
+
+MACD_MODES = ("pandas_ta", "ewm", "dema")
+
+
+@memoized
+def macd(x, fast=12, slow=26, signal=9, mode="pandas_ta"):
+    """
+    Devuelve (macd, signal, hist).
+    "pandas_ta" -> `ta.macd` (EMAs con semilla SMA)
+    "ewm"       -> `ewm(span, adjust=False)` de los bots
+    "dema"      -> MACD Zero-Lag de las páginas Señales / SIMPLIFICADO V2
+    """
+    if mode == "pandas_ta":
+        line = ema(x, fast, True) - ema(x, slow, True)
+        sig = ema(line, signal, True)
+    elif mode == "ewm":
+        line = ema(x, fast) - ema(x, slow)
+        sig = ema(line, signal)
+    elif mode == "dema":
+        line = dema(x, fast) - dema(x, slow)
+        sig = ema(line, signal)
+    else:
+        raise ValueError(f"Modo MACD desconocido: {mode!r} (usar {MACD_MODES})")
+    return line, sig, line - sig
+
+
+@memoized
+def rsi(x, length=14, mode="rma"):
+    """"rma" -> `ta.rsi` de pandas_ta; "sma" -> medias simples (calculate_rsi de Análisis Fundamental)."""
+    rows, was_1d = as_rows(x)
+    delta = np.full(rows.shape, np.nan)
+    delta[:, 1:] = rows[:, 1:] - rows[:, :-1]
+    with np.errstate(invalid="ignore"):
+        up = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+        down = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+    if mode == "rma":
+        avg_up, avg_down = rma(up, length), rma(down, length)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = 100 * avg_up / (avg_up + avg_down)
+    elif mode == "sma":
+        avg_up, avg_down = sma(np.nan_to_num(up), length), sma(np.nan_to_num(down), length)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = 100 - 100 / (1 + avg_up / avg_down)
+    else:
+        raise ValueError(f"Modo RSI desconocido: {mode!r}")
+    return restore(out, was_1d)
+
+
+def _prev(rows):
+    out = np.full(rows.shape, np.nan)
+    out[:, 1:] = rows[:, :-1]
+    return out
+
+
+@memoized
+def true_range(high, low, close, mode="wilder"):
+    """
+    "wilder"    -> max(H-L, |H-C₋₁|, |L-C₋₁|) salteando NaN (bots: la primera vela vale H-L)
+    "pandas_ta" -> `ta.true_range`: primera vela NaN y H-L corrido un épsilon si hay rangos nulos
+    """
+    (h, was_1d), (l, _), (c, _) = as_rows(high), as_rows(low), as_rows(close)
+    pc = _prev(c)
+    hl = h - l
+    if mode == "pandas_ta":
+        hl = hl + np.where((hl == 0).any(axis=1, keepdims=True), sys.float_info.epsilon, 0.0)
+        tr = np.fmax(np.fmax(np.abs(hl), np.abs(h - pc)), np.abs(pc - l))
+        # Primera vela de cada fila en NaN (también con relleno a la izquierda del panel)
+        tr[np.arange(tr.shape[1])[None, :] <= first_valid(c)[:, None]] = np.nan
+    else:
+        tr = np.fmax(np.fmax(hl, np.abs(h - pc)), np.abs(l - pc))
+    return restore(tr, was_1d)
+
+
+@memoized
+def atr(high, low, close, length=14, mode="rma"):
+    """"rma" -> `ta.atr`; "sma" -> media simple del TR (calculate_atr de Análisis Fundamental)."""
+    if mode == "rma": return rma(true_range(high, low, close, "pandas_ta"), length)
+    if mode == "sma": return sma(true_range(high, low, close), length)
+    raise ValueError(f"Modo ATR desconocido: {mode!r}")
+
+
+@memoized
+def adx(high, low, close, length=14, mode="wilder"):
+    """
+    Devuelve (adx, +DI, -DI).
+    "wilder"    -> calculate_adx de los bots (ewm adjust=False, TR nulo reemplazado por 1)
+    "pandas_ta" -> `ta.adx` (medias rma, ATR de pandas_ta)
+    """
+    (h, was_1d), (l, _) = as_rows(high), as_rows(low)
+    up, down = h - _prev(h), _prev(l) - l
+    with np.errstate(invalid="ignore"):
+        plus = np.where((up > down) & (up > 0), up, 0.0)
+        minus = np.where((down > up) & (down > 0), down, 0.0)
+    if mode == "wilder":
+        tr_s = wilder(as_rows(true_range(high, low, close))[0], length)
+        tr_s = np.where(tr_s == 0, 1.0, tr_s)
+        p_di, n_di = 100 * (wilder(plus, length) / tr_s), 100 * (wilder(minus, length) / tr_s)
+        smooth = wilder
+    elif mode == "pandas_ta":
+        plus[:, :1] = minus[:, :1] = np.nan
+        eps = sys.float_info.epsilon
+        plus, minus = np.where(np.abs(plus) < eps, 0.0, plus), np.where(np.abs(minus) < eps, 0.0, minus)
+        k = 100 / as_rows(atr(high, low, close, length))[0]
+        p_di, n_di = k * rma(plus, length), k * rma(minus, length)
+        smooth = rma
+    else:
+        raise ValueError(f"Modo ADX desconocido: {mode!r}")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dx = 100 * np.abs(p_di - n_di) / (p_di + n_di)
+    return restore(smooth(dx, length), was_1d), restore(p_di, was_1d), restore(n_di, was_1d)
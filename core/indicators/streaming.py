@@ -0,0 +1,373 @@
+"""
+Indicadores incrementales: estado O(1) por símbolo/temporalidad.
+
+Cada objeto avanza una vela por vez con `update(...)` y reproduce la versión
+vectorizada de `core.indicators` evaluada sobre toda la historia que ya
+consumió (mismas semillas, mismo warm-up, mismos NaN).
+
+`CandleStream` agrupa los indicadores de una serie y distingue vela nueva de
+vela revisada: si llega otra vez la misma ts (la vela abierta, o la anterior
+ya cerrada con su valor final) se rehace sobre el estado previo a esa vela.
+`StreamBook` guarda el estado de todas las series en un JSON para que la
+próxima corrida solo procese las velas nuevas.
+
+    book = StreamBook("impulso", HaMacdStream)
+    s = book.feed(("BTC/USDT:USDT", "5m"), rows)    # filas formato ccxt
+    s.hist, s.prev_hist, s.position, s.entry_ts
+    book.save()
+
+Si las filas no empalman con la última vela consumida (la página no corrió
+durante más velas de las que se bajan) la serie se reinicia desde esas filas.
+"""
+import copy
+import json
+import math
+import os
+import threading
+
+from core.heikin_ashi import _seed
+
+NAN = float("nan")
+
+STREAM_DIR = os.environ.get("SLY_STREAM_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".cache", "streams"))
+
+
+def _dump(v):
+    if isinstance(v, Incremental): return v.state()
+    if isinstance(v, dict): return {k: _dump(x) for k, x in v.items()}
+    return v
+
+
+def _restore(cur, v):
+    if isinstance(cur, Incremental): return cur.load(v)
+    if isinstance(cur, dict) and isinstance(v, dict): return {k: _restore(cur[k], x) if k in cur else x for k, x in v.items()}
+    return v
+
+
+class Incremental:
+    """Estado serializable: los atributos públicos son escalares, dicts u otros Incremental."""
+
+    def state(self):
+        return {k: _dump(v) for k, v in vars(self).items() if not k.startswith("_")}
+
+    def load(self, state):
+        for k, v in state.items():
+            setattr(self, k, _restore(getattr(self, k, None), v))
+        return self
+
+
+# ─────────────────────────────────────────────
+# MEDIAS
+# ─────────────────────────────────────────────
+class EWM(Incremental):
+    """Un paso de `Series.ewm(alpha=..., adjust=..., min_periods=...).mean()` (mismo algoritmo que pandas)."""
+
+    def __init__(self, alpha, adjust=False, min_periods=0):
+        self.alpha, self.adjust, self.min_periods = alpha, adjust, min_periods
+        self.weighted, self.old_wt, self.nobs = NAN, 1.0, 0
+
+    @property
+    def value(self):
+        return self.weighted if self.nobs >= self.min_periods else NAN
+
+    def update(self, x):
+        x = float(x)
+        obs = x == x
+        self.nobs += obs
+        w = self.weighted
+        if w == w:
+            self.old_wt *= 1.0 - self.alpha
+            if obs:
+                new_wt = 1.0 if self.adjust else self.alpha
+                if w != x: self.weighted = (self.old_wt * w + new_wt * x) / (self.old_wt + new_wt)
+                self.old_wt = self.old_wt + new_wt if self.adjust else 1.0
+        elif obs:
+            self.weighted = x
+        return self.value
+
+
+class EMA(Incremental):
+    """
+    `ema(x, length, sma_seed)`: con semilla SMA espera `length` velas desde el primer dato válido.
+    `from_start=True` es `ta.ema` literal sobre una serie con NaN al principio (un RSI):
+    la ventana de la semilla arranca en la primera vela y los NaN suman 0
+    (`close[0:length].sum() / length`).
+    """
+
+    def __init__(self, length, sma_seed=False, from_start=False):
+        self.length, self.sma_seed, self.from_start = length, sma_seed, from_start
+        self.ewm = EWM(2.0 / (length + 1.0))
+        self.seen, self.seed_sum, self.seed_n = 0, 0.0, 0
+
+    @property
+    def value(self):
+        return self.ewm.value
+
+    def update(self, x):
+        x = float(x)
+        if self.sma_seed and self.seen < self.length:
+            if self.seen == 0 and x != x and not self.from_start: return NAN
+            self.seen += 1
+            if x == x: self.seed_sum, self.seed_n = self.seed_sum + x, self.seed_n + 1
+            if self.seen < self.length: return NAN
+            x = self.seed_sum / (self.length if self.from_start else self.seed_n)
+        return self.ewm.update(x)
+
+
+class DEMA(Incremental):
+    def __init__(self, length):
+        self.e1, self.e2 = EMA(length), EMA(length)
+        self.value = NAN
+
+    def update(self, x):
+        a = self.e1.update(x)
+        self.value = 2 * a - self.e2.update(a)
+        return self.value
+
+
+def RMA(length):
+    """`ta.rma`: ewm(alpha=1/length, min_periods=length) con adjust=True."""
+    return EWM(1.0 / length, adjust=True, min_periods=length)
+
+
+def Wilder(length):
+    """Suavizado de Wilder de los bots: ewm(alpha=1/length, adjust=False)."""
+    return EWM(1.0 / length)
+
+
+# ─────────────────────────────────────────────
+# OSCILADORES
+# ─────────────────────────────────────────────
+class MACD(Incremental):
+    """Mismos modos que `macd()`: "pandas_ta", "ewm" o "dema"."""
+
+    def __init__(self, fast=12, slow=26, signal=9, mode="pandas_ta"):
+        if mode == "pandas_ta": self.fast, self.slow, self.sig = EMA(fast, True), EMA(slow, True), EMA(signal, True)
+        elif mode == "ewm": self.fast, self.slow, self.sig = EMA(fast), EMA(slow), EMA(signal)
+        elif mode == "dema": self.fast, self.slow, self.sig = DEMA(fast), DEMA(slow), EMA(signal)
+        else: raise ValueError(f"Modo MACD desconocido: {mode!r}")
+        self.line = self.signal = self.hist = NAN
+
+    def update(self, x):
+        self.line = self.fast.update(x) - self.slow.update(x)
+        self.signal = self.sig.update(self.line)
+        self.hist = self.line - self.signal
+        return self.line, self.signal, self.hist
+
+
+class RSI(Incremental):
+    """`rsi(x, length)` (modo "rma", el de `ta.rsi`)."""
+
+    def __init__(self, length=14):
+        self.up, self.down = RMA(length), RMA(length)
+        self.prev_close, self.value = NAN, NAN
+
+    def update(self, close):
+        close = float(close)
+        delta, self.prev_close = close - self.prev_close, close
+        if delta != delta: up = down = NAN
+        else: up, down = max(delta, 0.0), max(-delta, 0.0)
+        a, b = self.up.update(up), self.down.update(down)
+        self.value = 100 * a / (a + b) if a + b != 0 else NAN
+        return self.value
+
+
+class HeikinAshi(Incremental):
+    """Última vela HA; `seed` como en `core.heikin_ashi` ("open" o "mid")."""
+
+    def __init__(self, seed="open"):
+        self.seed = seed
+        self.open = self.close = NAN
+
+    @property
+    def direction(self):
+        return 1 if self.close > self.open else -1
+
+    def update(self, o, h, l, c):
+        o, h, l, c = float(o), float(h), float(l), float(c)
+        self.open = _seed(o, c, self.seed) if self.open != self.open else (self.open + self.close) / 2
+        self.close = (o + h + l + c) / 4
+        return self.open, self.close
+
+
+class MacdFlip(Incremental):
+    """Paso a paso de `core.signals.macd_flip_position` (entrada guardada como ts y precio)."""
+
+    def __init__(self, zero_filter=True):
+        self.zero_filter = zero_filter
+        self.position, self.entry_ts, self.entry_price = 0, None, 0.0
+        self.prev_hist, self.started = NAN, False
+
+    def update(self, ha, h, ts, close):
+        ph, self.prev_hist = self.prev_hist, h
+        if not self.started:
+            self.started = True
+            return self.position
+        if self.position == 1 and h < ph: self.position = 0
+        elif self.position == -1 and h > ph: self.position = 0
+        if self.position == 0:
+            if ha == 1 and h > ph and (not self.zero_filter or h < 0): self.position = 1
+            elif ha == -1 and h < ph and (not self.zero_filter or h > 0): self.position = -1
+            if self.position != 0: self.entry_ts, self.entry_price = int(ts), float(close)
+        return self.position
+
+
+# ─────────────────────────────────────────────
+# SERIES
+# ─────────────────────────────────────────────
+class CandleStream(Incremental):
+    """Estado de una serie de velas. Las subclases implementan `on_bar(ts, o, h, l, c, v)`."""
+
+    def __init__(self):
+        self.last_ts = None
+        self.bars = 0
+        self.before_last = None   # estado previo a la última vela, para poder revisarla
+
+    def on_bar(self, ts, o, h, l, c, v):
+        raise NotImplementedError
+
+    def continues(self, rows):
+        """True si `rows` llega hasta la última vela consumida (no quedó un hueco)."""
+        return self.last_ts is None or not len(rows) or rows[0][0] <= self.last_ts
+
+    def _snapshot(self):
+        snap = self.state()
+        snap.pop("before_last", None)
+        return snap
+
+    def push(self, ts, o, h, l, c, v=NAN, snapshot=True):
+        """Aplica una vela. Devuelve False si es más vieja que la última consumida."""
+        ts = int(ts)
+        if self.last_ts is not None and ts <= self.last_ts:
+            if ts < self.last_ts or self.before_last is None: return False
+            self.load(self.before_last)
+        else:
+            self.before_last = self._snapshot() if snapshot else None
+        self.on_bar(ts, o, h, l, c, v)
+        self.last_ts, self.bars = ts, self.bars + 1
+        return True
+
+    def feed(self, rows):
+        """Consume filas [ts, o, h, l, c, v]; solo guarda el estado previo de la última."""
+        start = 0
+        if self.last_ts is not None:
+            while start < len(rows) and rows[start][0] < self.last_ts: start += 1
+        for i in range(start, len(rows)):
+            self.push(*rows[i][:6], snapshot=i == len(rows) - 1)
+        return self
+
+
+class HaMacdStream(CandleStream):
+    """
+    H.A. + MACD + RSI de las páginas cripto intradía: histograma y su valor
+    previo, color HA actual y previo, RSIs (opcionalmente suavizados con una
+    EMA del mismo largo, como `ta.ema(ta.rsi(x, p), p)`), último cruce MACD y
+    la posición de `macd_flip_position`.
+    """
+
+    def __init__(self, ha_seed="open", macd_mode="pandas_ta", rsi_lengths=(14,), rsi_ema=False, zero_filter=False):
+        super().__init__()
+        self.macd = MACD(mode=macd_mode)
+        self.ha = HeikinAshi(ha_seed)
+        self.flip = MacdFlip(zero_filter)
+        self.rsi = {str(p): RSI(p) for p in rsi_lengths}
+        # ta.ema sobre el RSI: semilla SMA de las primeras `p` velas, con los NaN iniciales del RSI como 0
+        self.rsi_ema = {str(p): EMA(p, sma_seed=True, from_start=True) for p in rsi_lengths} if rsi_ema else {}
+        self.rsi_value = {str(p): NAN for p in rsi_lengths}
+        self.prev_rsi = dict(self.rsi_value)
+        self.prev_hist, self.prev_color = NAN, 0
+        self.cross_sign, self.cross_bull = None, None
+
+    @property
+    def hist(self): return self.macd.hist
+
+    @property
+    def color(self): return self.ha.direction if self.bars else 0
+
+    @property
+    def position(self): return self.flip.position
+
+    @property
+    def entry_ts(self): return self.flip.entry_ts
+
+    def on_bar(self, ts, o, h, l, c, v):
+        self.prev_hist, self.prev_color = self.macd.hist, self.color
+        self.prev_rsi = dict(self.rsi_value)
+        line, sig, hist = self.macd.update(c)
+        self.ha.update(o, h, l, c)
+        self.flip.update(self.ha.direction, hist, ts, c)
+        for p, r in self.rsi.items():
+            val = r.update(c)
+            self.rsi_value[p] = self.rsi_ema[p].update(val) if self.rsi_ema else val
+        # Igual que np.sign(MACD - Signal).diff().ne(0): NaN cuenta como cruce
+        sign = NAN if math.isnan(line - sig) else (line > sig) - (line < sig)
+        if self.cross_sign is None or sign != self.cross_sign:
+            self.cross_bull = bool(line > sig)
+        self.cross_sign = sign
+
+
+# ─────────────────────────────────────────────
+# CHECKPOINT
+# ─────────────────────────────────────────────
+def _key(key):
+    return "|".join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+class StreamBook:
+    """
+    Estados por serie (clave (símbolo, tf)) con checkpoint en `STREAM_DIR/<name>.json`.
+    `version` invalida el checkpoint si cambia la configuración de `factory`.
+    Se comparte entre sesiones (`st.cache_resource`): cada serie avanza bajo su
+    propio lock y `feed` devuelve una copia, que otra sesión no puede mover.
+    """
+
+    def __init__(self, name, factory, version=1, root=STREAM_DIR):
+        self.path = os.path.join(root, f"{name}.json")
+        self.factory, self.version = factory, version
+        self.streams = {}
+        self._lock = threading.Lock()
+        self._locks = {}                # clave -> lock de esa serie
+        self._pending = self._read()   # estados leídos del disco aún no instanciados
+
+    def _read(self):
+        try:
+            with open(self.path) as fh: data = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        return data.get("streams", {}) if data.get("version") == self.version else {}
+
+    def get(self, key):
+        k = _key(key)
+        with self._lock:
+            s = self.streams.get(k)
+            if s is None:
+                s = self.factory()
+                raw = self._pending.pop(k, None)
+                if raw is not None: s.load(raw)
+                self.streams[k] = s
+            return s
+
+    def reset(self, key):
+        with self._lock:
+            s = self.streams[_key(key)] = self.factory()
+            return s
+
+    def _key_lock(self, k):
+        with self._lock:
+            return self._locks.setdefault(k, threading.Lock())
+
+    def feed(self, key, rows):
+        with self._key_lock(_key(key)):
+            s = self.get(key)
+            if not s.continues(rows): s = self.reset(key)
+            return copy.deepcopy(s.feed(rows))
+
+    def save(self):
+        with self._lock:
+            streams, items = dict(self._pending), list(self.streams.items())
+        for k, s in items:
+            with self._key_lock(k): streams[k] = s.state()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as fh: json.dump({"version": self.version, "streams": streams}, fh)
+        os.replace(tmp, self.path)
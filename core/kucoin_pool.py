@@ -0,0 +1,154 @@
+"""
+Descarga concurrente de velas de KuCoin Futures (ccxt.async_support).
+
+Los escáneres pedían símbolo por símbolo y temporalidad por temporalidad con
+`time.sleep` entre medio. Acá todos los pedidos salen a la vez, acotados por:
+
+- un token bucket con los pesos publicados por KuCoin (pool público de
+  futuros: 2000 de peso cada 30 s; klines pesa 3, allTickers 15),
+- un máximo de pedidos en vuelo,
+- reintentos con backoff exponencial y jitter ante 429 / timeouts.
+
+Las velas pasan por el almacén local (`core.ohlcv_store`), así que en la
+segunda corrida solo se baja la cola. `fetch_kucoin_batch` es el envoltorio
+sincrónico para las páginas de Streamlit y los bots; con `as_candles=True`
+cada serie sale como `core.candles.Candles` en vez de filas ccxt.
+"""
+import asyncio
+import random
+import threading
+import time
+
+import ccxt
+import ccxt.async_support as ccxt_async
+
+from core.candles import Candles
+from core.ohlcv_store import STORE, candles_to_rows
+
+EXCHANGE_ID = "kucoinfutures"
+
+# Límites de KuCoin Futures (pool público)
+QUOTA_WEIGHT = 2000
+QUOTA_WINDOW_S = 30
+WEIGHT_KLINES = 3
+WEIGHT_TICKERS = 15
+BURST_WEIGHT = 500        # margen: bots y páginas comparten IP
+MAX_IN_FLIGHT = 16
+MAX_RETRIES = 4
+BACKOFF_BASE_S = 0.5
+
+RETRYABLE = (ccxt.RateLimitExceeded, ccxt.DDoSProtection, ccxt.RequestTimeout, ccxt.ExchangeNotAvailable, ccxt.NetworkError)
+
+
+class TokenBucket:
+    """Token bucket para asyncio: `rate` de peso por segundo, hasta `capacity` acumulado."""
+
+    def __init__(self, rate, capacity):
+        self.rate, self.capacity = float(rate), float(capacity)
+        self.tokens = float(capacity)
+        self.stamp = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, weight=1):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                await asyncio.sleep((weight - self.tokens) / self.rate)
+
+    def penalize(self, seconds):
+        # Ante un 429 vaciamos el balde: el próximo pedido espera `seconds` como mínimo
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class KucoinFetchPool:
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, store=None, exchange_id=EXCHANGE_ID, as_candles=False):
+        self.max_in_flight = max_in_flight
+        self.store = store or STORE
+        self.exchange_id = exchange_id
+        self.as_candles = as_candles
+
+    async def _call(self, weight, fn, *args, **kwargs):
+        for attempt in range(MAX_RETRIES + 1):
+            await self.bucket.acquire(weight)
+            async with self.sem:
+                try:
+                    return await fn(*args, **kwargs)
+                except RETRYABLE as e:
+                    if attempt == MAX_RETRIES: raise
+                    delay = BACKOFF_BASE_S * (2 ** attempt) * random.uniform(0.5, 1.5)
+                    if isinstance(e, (ccxt.RateLimitExceeded, ccxt.DDoSProtection)): self.bucket.penalize(delay)
+            await asyncio.sleep(delay)
+
+    async def _ohlcv(self, symbol, timeframe, limit):
+        source = self.exchange_id
+        fetch = lambda since: self._call(WEIGHT_KLINES, self.ex.fetch_ohlcv, symbol, timeframe=timeframe, since=since, limit=limit)
+        stored, since = self.store.plan(source, symbol, timeframe, max_bars=limit)
+        merged = self.store.absorb(source, symbol, timeframe, stored, since, await fetch(since), limit)
+        if merged is None:
+            merged = self.store.absorb(source, symbol, timeframe, stored, None, await fetch(None), limit)
+        merged = merged[-limit:]
+        return Candles.wrap(merged) if self.as_candles else candles_to_rows(merged)
+
+    async def run(self, jobs, prices_for=(), progress=None):
+        """
+        jobs: iterable de (symbol, timeframe, limit). Devuelve
+        ({(symbol, timeframe): filas ccxt (o Candles) o None si falló}, {symbol: último precio}).
+        `progress(hechos, total)` se llama al terminar cada pedido.
+        """
+        jobs = list(dict.fromkeys(jobs))
+        self.bucket = TokenBucket(QUOTA_WEIGHT / QUOTA_WINDOW_S, BURST_WEIGHT)
+        self.sem = asyncio.Semaphore(self.max_in_flight)
+        self.ex = getattr(ccxt_async, self.exchange_id)({"enableRateLimit": False, "timeout": 30000})
+        total, done = len(jobs) + (1 if prices_for else 0), 0
+        candles, prices = {}, {}
+        try:
+            await self._call(WEIGHT_TICKERS, self.ex.load_markets)
+
+            async def one(job):
+                try: return job[:2], await self._ohlcv(*job)
+                except Exception: return job[:2], None
+
+            async def last_prices():
+                try:
+                    tickers = await self._call(WEIGHT_TICKERS, self.ex.fetch_tickers, list(prices_for))
+                    return {s: t["last"] for s, t in tickers.items() if t.get("last") is not None}
+                except Exception: return {}
+
+            tasks = [asyncio.ensure_future(one(j)) for j in jobs]
+            if prices_for: tasks.append(asyncio.ensure_future(last_prices()))
+            for fut in asyncio.as_completed(tasks):
+                res = await fut
+                if isinstance(res, dict): prices = res
+                else: candles[res[0]] = res[1]
+                done += 1
+                if progress: progress(done, total)
+        finally:
+            await self.ex.close()
+        return candles, prices
+
+
+def run_sync(coro):
+    """Corre una corrutina desde código sincrónico, haya o no un event loop activo en el hilo."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    box = {}
+    def target():
+        try: box["out"] = asyncio.run(coro)
+        except BaseException as e: box["err"] = e
+    th = threading.Thread(target=target)
+    th.start()
+    th.join()
+    if "err" in box: raise box["err"]
+    return box["out"]
+
+
+def fetch_kucoin_batch(jobs, prices_for=(), max_in_flight=MAX_IN_FLIGHT, progress=None, store=None, as_candles=False):
+    """Versión sincrónica de `KucoinFetchPool.run`."""
+    return run_sync(KucoinFetchPool(max_in_flight, store, as_candles=as_candles).run(jobs, prices_for, progress))
@@ -0,0 +1,427 @@
+"""
+Servicio de velas en vivo de KuCoin Futures por WebSocket.
+
+Reemplaza el sondeo REST (`fetch_ohlcv` / `fetch_tickers`) de los tableros
+cripto. Un proceso aparte se suscribe a los canales públicos de velas
+(`/contractMarket/limitCandle`) y de ticker (`/contractMarket/ticker`) del
+universo activo, guarda en memoria un buffer circular con las últimas velas
+por símbolo/temporalidad y sirve instantáneas por HTTP local:
+
+    python -m core.live_feed --symbols BTC/USDT:USDT,ETH/USDT:USDT --timeframes 1m,5m,15m
+
+    POST /snapshot {"jobs": [[símbolo, tf, limit], ...], "prices_for": [...]}
+    GET  /candles?symbol=BTC/USDT:USDT&tf=5m&limit=100
+    GET  /tickers?symbols=BTC/USDT:USDT,ETH/USDT:USDT
+    POST /track {"keys": [[símbolo, tf], ...], "tickers": [...]}
+    GET  /health
+
+Cada buffer se siembra una vez por REST (`core.kucoin_pool`, que además
+actualiza el almacén local) y de ahí en adelante lo mueve el WebSocket; tras
+una reconexión se vuelve a sembrar para tapar el hueco. Una serie cuenta como
+en vivo solo con el ack del tópico y la siembra hecha; si la siembra falla, se
+sirve por REST y se reintenta en la próxima consulta. Lo que una consulta
+pide y el servicio no sigue todavía se agrega al universo solo.
+
+Las páginas usan `live_batch` / `live_ohlcv`, con la misma firma y salida que
+`fetch_kucoin_batch` / `fetch_ohlcv_cached`: lo que el servicio tiene en vivo
+sale de ahí y el resto (o todo, si el servicio no corre) por REST.
+Con `as_candles=True` devuelven `core.candles.Candles` (el mismo contenedor
+que usan los buffers del servicio). `core.ws_replay` imita el protocolo de KuCoin para probar sin el exchange.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+import aiohttp
+import ccxt.async_support as ccxt_async
+import requests
+from aiohttp import web
+
+from core.candles import Candles
+from core.kucoin_pool import EXCHANGE_ID, KucoinFetchPool, fetch_kucoin_batch
+from core.ohlcv_store import fetch_ohlcv_array, fetch_ohlcv_cached
+
+KUCOIN_REST = "https://api-futures.kucoin.com"
+FEED_URL = os.environ.get("SLY_FEED_URL", "http://127.0.0.1:8765")
+
+RING_SIZE = 500
+MAX_TOPICS_PER_CONN = 280     # KuCoin admite 300 suscripciones por conexión
+SUBSCRIBE_INTERVAL_S = 0.11   # hasta 100 mensajes cada 10 s hacia el servidor
+RECONNECT_MAX_S = 30
+CLIENT_TIMEOUT_S = 2
+CLIENT_RETRY_S = 30           # si el servicio no responde, REST directo durante este lapso
+
+CANDLE_TOPIC = "/contractMarket/limitCandle"
+TICKER_TOPIC = "/contractMarket/ticker"
+WS_INTERVALS = {
+    "1m": "1min", "3m": "3min", "5m": "5min", "15m": "15min", "30m": "30min",
+    "1h": "1hour", "2h": "2hour", "4h": "4hour", "8h": "8hour", "12h": "12hour",
+    "1d": "1day", "1w": "1week",
+}
+
+
+def contract_id(symbol):
+    """'BTC/USDT:USDT' -> 'XBTUSDTM'. Regla de KuCoin Futures para cuando no se pudieron cargar los mercados."""
+    base, rest = symbol.split("/", 1)
+    return f"{'XBT' if base == 'BTC' else base}{rest.split(':')[0]}M"
+
+
+class _Connection:
+    """Una conexión WebSocket con hasta MAX_TOPICS_PER_CONN tópicos; se reconecta sola."""
+
+    def __init__(self, feed):
+        self.feed = feed
+        self.topics = []
+        self.ws = None
+        self.task = None
+        self._acks = {}
+        self._seq = 0
+        self._send_lock = asyncio.Lock()
+
+    async def add(self, topics):
+        self.topics.extend(topics)
+        if self.ws is not None and not self.ws.closed: await self._subscribe(topics)
+
+    async def _send(self, msg, pause=0.0):
+        # Si la conexión se cae a mitad de camino, `run` reconecta y vuelve a suscribir todo
+        async with self._send_lock:
+            if self.ws is None or self.ws.closed: return False
+            try: await self.ws.send_json(msg)
+            except (ConnectionError, RuntimeError): return False
+            if pause: await asyncio.sleep(pause)
+            return True
+
+    async def _subscribe(self, topics):
+        for topic in topics:
+            self._seq += 1
+            self._acks[str(self._seq)] = topic
+            msg = {"id": str(self._seq), "type": "subscribe", "topic": topic, "privateChannel": False, "response": True}
+            if not await self._send(msg, SUBSCRIBE_INTERVAL_S): return
+
+    async def _ping(self, interval):
+        while await self._send({"id": str(int(time.time() * 1000)), "type": "ping"}):
+            await asyncio.sleep(interval)
+
+    async def _connect(self, session):
+        async with session.post(f"{self.feed.rest_url}/api/v1/bullet-public") as r:
+            info = (await r.json())["data"]
+        server = info["instanceServers"][0]
+        ws = await session.ws_connect(f"{server['endpoint']}?token={info['token']}&connectId={uuid.uuid4().hex}")
+        return ws, server.get("pingInterval", 18000) / 1000
+
+    async def run(self):
+        delay, first = 1.0, True
+        while True:
+            try:
+                self.ws, ping_s = await self._connect(self.feed.session)
+                tasks = [asyncio.ensure_future(self._ping(ping_s)), asyncio.ensure_future(self._subscribe(list(self.topics)))]
+                if not first:
+                    # Lo que pasó mientras estuvo caída la conexión se recupera por REST; hasta
+                    # que la siembra termine bien, las series no cuentan como en vivo
+                    tasks.append(asyncio.ensure_future(self.feed.seed(self.feed.keys_for(self.topics))))
+                first, delay = False, 1.0
+                try:
+                    async for msg in self.ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT: self.feed.handle(json.loads(msg.data), self)
+                finally:
+                    for t in tasks: t.cancel()
+                    await self.ws.close()
+                    self.ws = None
+                    self.feed.drop(self.topics)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, RECONNECT_MAX_S)
+
+
+class LiveFeed:
+    """
+    Estado del servicio: buffers de velas, último precio por símbolo y las
+    conexiones WebSocket. `markets` ({símbolo ccxt: id de contrato}) evita
+    cargar los mercados; `seed=False` no siembra por REST (replay);
+    `record` es un .jsonl donde se graban los mensajes crudos.
+    """
+
+    def __init__(self, ring_size=RING_SIZE, rest_url=KUCOIN_REST, markets=None, seed=True, record=None):
+        self.ring_size, self.rest_url, self.seed_rest = ring_size, rest_url, seed
+        self.ids = dict(markets or {})
+        self.rings, self.prices = {}, {}
+        self.by_topic = {}      # tópico -> (tf o None si es ticker, símbolo)
+        self.acked = set()      # tópicos confirmados (ack) en una conexión abierta
+        self.seeded = set()     # series (símbolo, tf) sembradas por REST desde la última conexión
+        self.live = set()       # tópicos confirmados y, si son de velas, con la serie sembrada
+        self._seeding = set()
+        self._drops = {}        # serie -> caídas vistas (una siembra que la cruza no vale)
+        self.conns = []
+        self.session = None
+        self._markets_loaded = markets is not None
+        self._track_lock = asyncio.Lock()
+        self._record = open(record, "a") if record else None
+
+    async def start(self):
+        self.session = aiohttp.ClientSession()
+        return self
+
+    async def close(self):
+        for c in self.conns:
+            if c.task: c.task.cancel()
+        await asyncio.gather(*(c.task for c in self.conns if c.task), return_exceptions=True)
+        if self.session: await self.session.close()
+        if self._record: self._record.close()
+
+    async def _load_markets(self):
+        if self._markets_loaded: return
+        self._markets_loaded = True
+        ex = getattr(ccxt_async, EXCHANGE_ID)({"enableRateLimit": False, "timeout": 30000})
+        try:
+            markets = await ex.load_markets()
+            self.ids.update({s: m["id"] for s, m in markets.items()})
+        except Exception:
+            pass
+        finally:
+            await ex.close()
+
+    def _topic(self, symbol, tf=None):
+        sid = self.ids.setdefault(symbol, contract_id(symbol))
+        return f"{TICKER_TOPIC}:{sid}" if tf is None else f"{CANDLE_TOPIC}:{sid}_{WS_INTERVALS[tf]}"
+
+    def keys_for(self, topics):
+        return [(s, tf) for tf, s in (self.by_topic.get(t, (None, None)) for t in topics) if tf is not None]
+
+    async def track(self, keys=(), tickers=()):
+        """Agrega series (símbolo, tf) y tickers al universo; las series nuevas se siembran por REST."""
+        async with self._track_lock:
+            await self._load_markets()
+            new_topics, new_keys = [], []
+            for symbol, tf in keys:
+                if tf not in WS_INTERVALS: continue
+                topic = self._topic(symbol, tf)
+                if topic in self.by_topic: continue
+                self.by_topic[topic] = (tf, symbol)
+                self.rings[(symbol, tf)] = Candles(self.ring_size)
+                new_topics.append(topic)
+                new_keys.append((symbol, tf))
+            for symbol in dict.fromkeys(list(tickers) + [k[0] for k in keys]):
+                topic = self._topic(symbol)
+                if topic in self.by_topic: continue
+                self.by_topic[topic] = (None, symbol)
+                new_topics.append(topic)
+            await self._assign(new_topics)
+        await self.seed(new_keys)
+
+    async def _assign(self, topics):
+        for conn in self.conns:
+            room = MAX_TOPICS_PER_CONN - len(conn.topics)
+            if room > 0 and topics:
+                await conn.add(topics[:room])
+                topics = topics[room:]
+        while topics:
+            conn = _Connection(self)
+            self.conns.append(conn)
+            await conn.add(topics[:MAX_TOPICS_PER_CONN])
+            topics = topics[MAX_TOPICS_PER_CONN:]
+            conn.task = asyncio.ensure_future(conn.run())
+
+    async def seed(self, keys):
+        """Siembra (o resiembra) las series por REST; solo las que salen bien pasan a `seeded`."""
+        keys = [k for k in dict.fromkeys(keys) if k in self.rings and k not in self._seeding]
+        if not keys: return
+        if not self.seed_rest:
+            self._mark_seeded(keys)
+            return
+        self._seeding.update(keys)
+        drops = {k: self._drops.get(k, 0) for k in keys}
+        try:
+            candles, _ = await KucoinFetchPool(as_candles=True).run([(s, tf, self.ring_size) for s, tf in keys])
+        except Exception:
+            candles = {}
+        finally:
+            self._seeding.difference_update(keys)
+        ok = [k for k in keys if candles.get(k) is not None and len(candles[k]) and self._drops.get(k, 0) == drops[k]]
+        for key in ok: self.rings[key].seed(candles[key].view())
+        self._mark_seeded(ok)
+
+    def _mark_seeded(self, keys):
+        self.seeded.update(keys)
+        self.live.update(t for t in (self._topic(s, tf) for s, tf in keys) if t in self.acked)
+
+    def drop(self, topics):
+        """Conexión caída: sus tópicos dejan de estar en vivo y sus series hay que resembrarlas."""
+        self.acked.difference_update(topics)
+        self.live.difference_update(topics)
+        for key in self.keys_for(topics):
+            self.seeded.discard(key)
+            self._drops[key] = self._drops.get(key, 0) + 1
+
+    def handle(self, msg, conn=None):
+        kind = msg.get("type")
+        if kind == "ack" and conn is not None:
+            topic = conn._acks.pop(msg.get("id"), None)
+            if topic:
+                self.acked.add(topic)
+                tf, symbol = self.by_topic.get(topic, (None, None))
+                if tf is None or (symbol, tf) in self.seeded: self.live.add(topic)
+            return
+        if kind != "message": return
+        if self._record: self._record.write(json.dumps({**msg, "_recv": int(time.time() * 1000)}) + "\n")
+        tf, symbol = self.by_topic.get(msg.get("topic"), (None, None))
+        if symbol is None: return
+        data = msg.get("data") or {}
+        if tf is None:
+            if data.get("price") is not None: self.prices[symbol] = float(data["price"])
+            return
+        # KuCoin: [inicio (s), open, close, high, low, volumen, monto]
+        t, o, c, h, l, v = data["candles"][:6]
+        self.rings[(symbol, tf)].put([int(t) * 1000, float(o), float(h), float(l), float(c), float(v)])
+
+    def snapshot(self, jobs, prices_for=()):
+        """
+        Como `KucoinFetchPool.run`, pero solo con lo que está en vivo y completo:
+        una serie que pide más velas de las que entran en el buffer va por REST.
+        """
+        candles, prices = {}, {}
+        for symbol, tf, limit in jobs:
+            ring = self.rings.get((symbol, tf))
+            if ring is None or self._topic(symbol, tf) not in self.live: continue
+            if int(limit) > ring.capacity or len(ring) < int(limit): continue
+            candles[(symbol, tf)] = ring.rows(int(limit))
+        for symbol in prices_for:
+            if symbol in self.prices and self._topic(symbol) in self.live: prices[symbol] = self.prices[symbol]
+        return candles, prices
+
+
+# ─────────────────────────────────────────────
+# HTTP LOCAL
+# ─────────────────────────────────────────────
+def make_app(feed):
+    def reply(candles, prices):
+        return web.json_response({"candles": [[s, tf, rows] for (s, tf), rows in candles.items()], "prices": prices})
+
+    async def snapshot(request):
+        body = await request.json()
+        jobs = [(s, tf, int(limit)) for s, tf, limit in body.get("jobs", [])]
+        prices_for = body.get("prices_for", [])
+        candles, prices = feed.snapshot(jobs, prices_for)
+        # Lo que falta se empieza a seguir: la próxima consulta ya sale del WebSocket
+        keys = [j[:2] for j in jobs if j[:2] not in feed.rings]
+        tickers = [s for s in prices_for if feed._topic(s) not in feed.by_topic]
+        if keys or tickers: asyncio.ensure_future(feed.track(keys, tickers))
+        # Y lo que quedó sin sembrar (REST caído tras una reconexión) se vuelve a intentar
+        stale = [j[:2] for j in jobs if j[:2] in feed.rings and j[:2] not in feed.seeded]
+        if stale: asyncio.ensure_future(feed.seed(stale))
+        return reply(candles, prices)
+
+    async def candles(request):
+        q = request.query
+        out, _ = feed.snapshot([(q["symbol"], q["tf"], int(q.get("limit", 100)))])
+        return reply(out, {})
+
+    async def tickers(request):
+        symbols = [s for s in request.query.get("symbols", "").split(",") if s]
+        return reply({}, feed.snapshot([], symbols)[1])
+
+    async def track(request):
+        body = await request.json()
+        await feed.track([tuple(k) for k in body.get("keys", [])], body.get("tickers", []))
+        return web.json_response({"series": len(feed.rings)})
+
+    async def health(request):
+        return web.json_response({"connections": sum(c.ws is not None for c in feed.conns), "live_topics": len(feed.live), "series": len(feed.rings)})
+
+    app = web.Application()
+    app.router.add_post("/snapshot", snapshot)
+    app.router.add_get("/candles", candles)
+    app.router.add_get("/tickers", tickers)
+    app.router.add_post("/track", track)
+    app.router.add_get("/health", health)
+    return app
+
+
+async def serve(feed, host="127.0.0.1", port=8765):
+    runner = web.AppRunner(make_app(feed))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+# ─────────────────────────────────────────────
+# CLIENTE (PÁGINAS Y BOTS)
+# ─────────────────────────────────────────────
+_down_until = 0.0
+
+
+def _snapshot(jobs, prices_for, url):
+    global _down_until
+    if time.monotonic() < _down_until: return {}, {}
+    try:
+        r = requests.post(f"{url}/snapshot", json={"jobs": jobs, "prices_for": list(prices_for)}, timeout=CLIENT_TIMEOUT_S)
+        r.raise_for_status()
+        data = r.json()
+        return {(s, tf): rows for s, tf, rows in data["candles"]}, data["prices"]
+    except (requests.RequestException, ValueError, KeyError):
+        _down_until = time.monotonic() + CLIENT_RETRY_S
+        return {}, {}
+
+
+def live_batch(jobs, prices_for=(), progress=None, url=FEED_URL, as_candles=False, **rest_kwargs):
+    """Misma firma y salida que `fetch_kucoin_batch`; lo que el servicio no tiene en vivo sale por REST."""
+    jobs, prices_for = list(dict.fromkeys(jobs)), list(prices_for)
+    candles, prices = _snapshot(jobs, prices_for, url)
+    if as_candles: candles = {k: Candles.from_rows(rows) for k, rows in candles.items()}
+    rest_jobs = [j for j in jobs if j[:2] not in candles]
+    rest_prices = [s for s in prices_for if s not in prices]
+    if rest_jobs or rest_prices:
+        more, more_prices = fetch_kucoin_batch(rest_jobs, rest_prices, progress=progress, as_candles=as_candles, **rest_kwargs)
+        candles.update(more)
+        prices.update(more_prices)
+    elif progress:
+        progress(1, 1)
+    return candles, prices
+
+
+def live_ohlcv(exchange, symbol, timeframe, limit=100, url=FEED_URL, as_candles=False):
+    """Reemplazo de `fetch_ohlcv_cached`: lee del servicio si es KuCoin Futures y la serie está en vivo."""
+    if exchange.id == EXCHANGE_ID:
+        candles, _ = _snapshot([(symbol, timeframe, limit)], (), url)
+        if (symbol, timeframe) in candles:
+            rows = candles[(symbol, timeframe)]
+            return Candles.from_rows(rows) if as_candles else rows
+    if as_candles: return Candles.wrap(fetch_ohlcv_array(exchange, symbol, timeframe, limit=limit))
+    return fetch_ohlcv_cached(exchange, symbol, timeframe, limit=limit)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Velas en vivo de KuCoin Futures por WebSocket, servidas por HTTP local")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--symbols", default="", help="símbolos ccxt separados por coma (BTC/USDT:USDT,...)")
+    p.add_argument("--timeframes", default="1m,5m,15m,30m,1h,4h,1d")
+    p.add_argument("--ring", type=int, default=RING_SIZE, help="velas guardadas por serie")
+    p.add_argument("--rest-url", default=KUCOIN_REST, help="API REST (bullet-public); un ws_replay para pruebas")
+    p.add_argument("--no-seed", action="store_true", help="no sembrar los buffers por REST")
+    p.add_argument("--record", help="grabar los mensajes crudos en este .jsonl")
+    args = p.parse_args(argv)
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    tfs = [t.strip() for t in args.timeframes.split(",") if t.strip()]
+
+    async def run():
+        feed = await LiveFeed(args.ring, args.rest_url, seed=not args.no_seed, record=args.record).start()
+        runner = await serve(feed, args.host, args.port)
+        try:
+            if symbols: await feed.track([(s, tf) for s in symbols for tf in tfs], symbols)
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+            await feed.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
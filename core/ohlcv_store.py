@@ -0,0 +1,274 @@
+"""
+Almacén local de velas OHLCV con descarga incremental.
+
+Cada serie (fuente, símbolo, temporalidad) vive en un `.npy` con un array
+estructurado (ts en ms + OHLCV en float64) que se abre memory-mapped. En cada
+corrida solo se piden al exchange / Yahoo las velas posteriores a la
+penúltima guardada: la vela abierta se reescribe y la penúltima (ya cerrada)
+sirve de control. Si no coincide (split, dividendo con auto_adjust, vela
+corregida) la serie se descarga completa de nuevo.
+
+Directorio por defecto: `.cache/ohlcv` en la raíz del repo (`SLY_DATA_DIR` lo cambia).
+"""
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.environ.get("SLY_DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "ohlcv"))
+
+CANDLE_DTYPE = np.dtype([
+    ("ts", "i8"), ("open", "f8"), ("high", "f8"), ("low", "f8"), ("close", "f8"), ("volume", "f8")
+])
+
+_UNITS_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000, "mo": 2_678_400_000, "y": 31_536_000_000}
+_WORDS = {"min": "m", "hour": "h", "day": "d", "week": "w", "wk": "w", "month": "mo", "M": "mo"}
+
+
+def timeframe_ms(tf):
+    """Duración aproximada de una vela: '15m', '4h', '1d', '1w', '1wk', '1mo', '1day', '1week'..."""
+    m = re.fullmatch(r"(\d+)\s*([a-zA-Z]+)", str(tf).strip())
+    if not m: raise ValueError(f"Temporalidad desconocida: {tf!r}")
+    n, unit = int(m.group(1)), m.group(2)
+    unit = _WORDS.get(unit, unit.lower())
+    if unit not in _UNITS_MS: raise ValueError(f"Temporalidad desconocida: {tf!r}")
+    return n * _UNITS_MS[unit]
+
+
+def to_candles(rows):
+    """Filas [ts_ms, o, h, l, c, v] (formato ccxt) -> array estructurado ordenado por ts."""
+    if isinstance(rows, np.ndarray) and rows.dtype == CANDLE_DTYPE: return rows
+    out = np.zeros(len(rows), dtype=CANDLE_DTYPE)
+    if len(rows):
+        arr = np.asarray(rows, dtype=float)
+        out["ts"] = arr[:, 0].astype(np.int64)
+        for k, name in enumerate(("open", "high", "low", "close", "volume"), start=1):
+            out[name] = arr[:, k] if arr.shape[1] > k else np.nan
+    return out[np.argsort(out["ts"], kind="stable")]
+
+
+def merge_candles(old, new):
+    """Une dos series; ante el mismo ts gana la más nueva (vela abierta actualizada)."""
+    if len(old) == 0: return np.array(new, dtype=CANDLE_DTYPE)
+    if len(new) == 0: return np.array(old, dtype=CANDLE_DTYPE)
+    both = np.concatenate([np.asarray(old, dtype=CANDLE_DTYPE), np.asarray(new, dtype=CANDLE_DTYPE)])
+    # np.unique se queda con la primera aparición: invertimos para priorizar `new`
+    rev = both[::-1]
+    _, first = np.unique(rev["ts"], return_index=True)
+    return rev[first]
+
+
+class OHLCVStore:
+    def __init__(self, root=DATA_DIR):
+        self.root = root
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def path(self, source, symbol, timeframe):
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", str(symbol))
+        return os.path.join(self.root, str(source), safe, f"{timeframe}.npy")
+
+    def _lock(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def load(self, source, symbol, timeframe):
+        p = self.path(source, symbol, timeframe)
+        if not os.path.exists(p): return np.zeros(0, dtype=CANDLE_DTYPE)
+        try:
+            arr = np.load(p, mmap_mode="r")
+            return arr if arr.dtype == CANDLE_DTYPE else np.zeros(0, dtype=CANDLE_DTYPE)
+        except (OSError, ValueError):
+            return np.zeros(0, dtype=CANDLE_DTYPE)
+
+    def save(self, source, symbol, timeframe, candles):
+        p = self.path(source, symbol, timeframe)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = f"{p}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.save(fh, np.asarray(candles, dtype=CANDLE_DTYPE))
+        os.replace(tmp, p)
+
+    def load_meta(self, source, symbol, timeframe):
+        p = self.path(source, symbol, timeframe)[:-4] + ".json"
+        try:
+            with open(p) as fh: return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def save_meta(self, source, symbol, timeframe, meta):
+        p = self.path(source, symbol, timeframe)[:-4] + ".json"
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = f"{p}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as fh: json.dump(meta, fh)
+        os.replace(tmp, p)
+
+    def last_ts(self, source, symbol, timeframe):
+        arr = self.load(source, symbol, timeframe)
+        return int(arr["ts"][-1]) if len(arr) else None
+
+    def plan(self, source, symbol, timeframe, max_bars=None):
+        """
+        Lo guardado y desde qué ts pedir (None = descarga completa). `max_bars`
+        es cuántas velas entrega el origen por pedido (y las que se piden): si el
+        hueco desde la última corrida es mayor, se baja todo. Si lo guardado es
+        más corto, también, salvo que ya venga de una descarga completa de al
+        menos `max_bars` velas (serie joven o semanal: no hay más historia).
+        """
+        stored = np.array(self.load(source, symbol, timeframe))
+        if len(stored) < 2: return stored, None
+        if max_bars is not None and len(stored) < max_bars:
+            if self.load_meta(source, symbol, timeframe).get("full_bars", 0) < max_bars: return stored, None
+        gap_bars = (time.time() * 1000 - stored["ts"][-1]) / timeframe_ms(timeframe)
+        if max_bars is not None and gap_bars >= max_bars - 2: return stored, None
+        return stored, int(stored["ts"][-2])
+
+    def absorb(self, source, symbol, timeframe, stored, since, rows, max_bars=None):
+        """
+        Fusiona lo bajado con `plan`. Devuelve None si el solapamiento no cuadra (hay que bajar todo).
+        Una descarga completa anota cuántas velas se pidieron (`max_bars`) para que `plan` no la repita.
+        """
+        new = to_candles(rows)
+        if since is None: stored = np.zeros(0, dtype=CANDLE_DTYPE)
+        elif not _overlap_ok(stored[-2], new): return None
+        merged = merge_candles(stored, new)
+        if len(merged) and (len(new) or not len(stored)):
+            self.save(source, symbol, timeframe, merged)
+            if since is None and max_bars is not None:
+                self.save_meta(source, symbol, timeframe, {**self.load_meta(source, symbol, timeframe), "full_bars": int(max_bars)})
+        return merged
+
+    def update(self, source, symbol, timeframe, fetch, max_bars=None):
+        """Trae lo nuevo con `fetch(since_ms)` y lo fusiona; `fetch(None)` es la descarga completa."""
+        key = (source, symbol, timeframe)
+        with self._lock(key):
+            stored, since = self.plan(*key, max_bars=max_bars)
+            merged = self.absorb(*key, stored, since, fetch(since), max_bars)
+            if merged is None:
+                merged = self.absorb(*key, stored, None, fetch(None), max_bars)
+            return merged
+
+
+def _overlap_ok(anchor, new):
+    hit = new[new["ts"] == anchor["ts"]]
+    if len(hit) == 0: return False
+    return bool(np.isclose(hit["close"][0], anchor["close"], rtol=1e-6, atol=0.0))
+
+
+STORE = OHLCVStore()
+
+
+# ─────────────────────────────────────────────
+# LECTURA PARA BOTS Y PÁGINAS
+# ─────────────────────────────────────────────
+def candles_to_rows(candles):
+    """Array estructurado -> lista [[ts, o, h, l, c, v], ...] como la devuelve ccxt."""
+    return [[int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5])] for r in candles.tolist()]
+
+
+def candles_to_frame(candles, columns=("Open", "High", "Low", "Close", "Volume")):
+    df = pd.DataFrame({col: candles[name] for col, name in zip(columns, ("open", "high", "low", "close", "volume"))})
+    df.index = pd.to_datetime(candles["ts"], unit="ms")
+    return df
+
+
+def fetch_ohlcv_array(exchange, symbol, timeframe, limit=100, store=None):
+    """Como `fetch_ohlcv_cached`, pero devuelve el array estructurado (últimas `limit` velas)."""
+    store = store or STORE
+    fetch = lambda since: exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+    return store.update(exchange.id, symbol, timeframe, fetch, max_bars=limit)[-limit:]
+
+
+def fetch_ohlcv_cached(exchange, symbol, timeframe, limit=100, store=None):
+    """Reemplazo directo de `exchange.fetch_ohlcv(symbol, timeframe=..., limit=...)`."""
+    return candles_to_rows(fetch_ohlcv_array(exchange, symbol, timeframe, limit, store))
+
+
+_YF_CACHEABLE = ("1d", "5d", "1wk", "1mo", "3mo")
+
+
+def period_start(period):
+    if not period or period == "max": return None
+    m = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not m: return None
+    n, unit = int(m.group(1)), m.group(2)
+    offset = {"d": pd.DateOffset(days=n), "wk": pd.DateOffset(weeks=n), "mo": pd.DateOffset(months=n), "y": pd.DateOffset(years=n)}[unit]
+    return pd.Timestamp.now().normalize() - offset
+
+
+def _yf_frames(data, tickers):
+    frames = {}
+    if data is None or data.empty: return frames
+    if isinstance(data.columns, pd.MultiIndex):
+        lvl0 = set(data.columns.get_level_values(0))
+        for t in tickers:
+            if t in lvl0: frames[t] = data[t]
+            elif t in set(data.columns.get_level_values(-1)): frames[t] = data.xs(t, axis=1, level=-1)
+    elif len(tickers) == 1:
+        frames[tickers[0]] = data
+    return frames
+
+
+def _yf_candles(df):
+    df = df.dropna(subset=["Close"])
+    idx = df.index.tz_localize(None) if getattr(df.index, "tz", None) is not None else df.index
+    out = np.zeros(len(df), dtype=CANDLE_DTYPE)
+    out["ts"] = pd.DatetimeIndex(idx).values.astype("datetime64[ms]").astype(np.int64)
+    for col, name in (("Open", "open"), ("High", "high"), ("Low", "low"), ("Close", "close"), ("Volume", "volume")):
+        out[name] = df[col].to_numpy(dtype=float) if col in df.columns else np.nan
+    return out
+
+
+def yf_download_cached(tickers, interval="1d", period="max", auto_adjust=True, store=None, **kwargs):
+    """
+    Descarga masiva de Yahoo a través del almacén. Devuelve dict ticker -> DataFrame
+    (Open/High/Low/Close/Volume) recortado a `period`, así `data[ticker]` sigue funcionando.
+    Las temporalidades intradía no se cachean (Yahoo solo guarda 60 días).
+    """
+    import yfinance as yf
+
+    store = store or STORE
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    source = "yahoo-adj" if auto_adjust else "yahoo"
+    dl = dict(interval=interval, group_by="ticker", auto_adjust=auto_adjust, progress=False, threads=True)
+    dl.update(kwargs)
+
+    if interval not in _YF_CACHEABLE:
+        return {t: df.dropna(how="all") for t, df in _yf_frames(yf.download(tickers, period=period, **dl), tickers).items()}
+
+    # Lo guardado solo sirve si se bajó con un periodo al menos tan largo como el pedido
+    start = period_start(period)
+    need_from = 0 if start is None else int(start.value // 1_000_000)
+    stored = {t: np.array(store.load(source, t, interval)) for t in tickers}
+    covered = {t: store.load_meta(source, t, interval).get("from", -1) for t in tickers}
+    warm = [t for t in tickers if len(stored[t]) >= 2 and 0 <= covered[t] <= need_from]
+    fresh = [t for t in tickers if t not in warm]
+
+    incoming = {}
+    if warm:
+        since = min(int(stored[t]["ts"][-2]) for t in warm)
+        dl_start = pd.to_datetime(since, unit="ms").strftime("%Y-%m-%d")
+        for t, df in _yf_frames(yf.download(warm, start=dl_start, **dl), warm).items():
+            new = _yf_candles(df)
+            if _overlap_ok(stored[t][-2], new): incoming[t] = new
+            else: fresh.append(t)
+    if fresh:
+        for t, df in _yf_frames(yf.download(fresh, period=period, **dl), fresh).items():
+            stored[t] = np.zeros(0, dtype=CANDLE_DTYPE)
+            incoming[t] = _yf_candles(df)
+            covered[t] = need_from
+
+    out = {}
+    for t in tickers:
+        merged = merge_candles(stored[t], incoming.get(t, np.zeros(0, dtype=CANDLE_DTYPE)))
+        if len(incoming.get(t, ())):
+            store.save(source, t, interval, merged)
+            store.save_meta(source, t, interval, {"from": covered[t]})
+        if not len(merged): continue
+        df = candles_to_frame(merged)
+        out[t] = df[df.index >= start] if start is not None else df
+    return out
@@ -0,0 +1,153 @@
+"""
+Max pain y muros de opciones (open interest y gamma) vectorizados.
+
+El max pain se calculaba recorriendo cada strike candidato y, para cada uno,
+todas las filas de calls y puts con `DataFrame.apply` (O(strikes²) llamadas
+de Python). Con los strikes ordenados y sumas acumuladas de OI y de K·OI el
+pago de las opciones en cada candidato `s` sale de dos `searchsorted`:
+
+    calls: Σ_{K<s} (s-K)·OI = s·ΣOI - Σ K·OI
+    puts:  Σ_{K>s} (K-s)·OI = Σ K·OI - s·ΣOI
+
+`chain_walls` resume una cadena (un vencimiento); `walls_from_chains` arma
+una fila por vencimiento más el agregado de todos (OI sumado por strike) y
+`option_walls` hace lo mismo bajando antes las cadenas de un `yf.Ticker`
+(`fetch_chains`, separada para poder descargarla en otro hilo). Los muros de gamma ponderan el OI
+por la gamma de Black-Scholes con la volatilidad implícita de Yahoo.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+CONTRACT_SIZE = 100
+MIN_T_YEARS = 1 / 365
+
+
+def _oi(df):
+    return np.nan_to_num(df["openInterest"].to_numpy(dtype=float), nan=0.0)
+
+
+def max_pain(call_strikes, call_oi, put_strikes, put_oi, candidates):
+    """Candidato con el menor pago total a los compradores, y el pago en cada candidato."""
+    cands = np.asarray(candidates, dtype=float)
+
+    def side(strikes, oi):
+        strikes, oi = np.asarray(strikes, dtype=float), np.nan_to_num(np.asarray(oi, dtype=float), nan=0.0)
+        order = np.argsort(strikes, kind="stable")
+        k, w = strikes[order], oi[order]
+        cum_w, cum_kw = np.r_[0.0, np.cumsum(w)], np.r_[0.0, np.cumsum(k * w)]
+        return k, cum_w, cum_kw
+
+    k, cw, ckw = side(call_strikes, call_oi)
+    below = np.searchsorted(k, cands, side="left")            # calls con K < s
+    pay = cands * cw[below] - ckw[below]
+    k, cw, ckw = side(put_strikes, put_oi)
+    above = np.searchsorted(k, cands, side="right")           # puts con K > s
+    pay += (ckw[-1] - ckw[above]) - cands * (cw[-1] - cw[above])
+    return (cands[np.argmin(pay)] if len(cands) else np.nan), pay
+
+
+def bs_gamma(spot, strikes, iv, t_years):
+    """Gamma de Black-Scholes (sin tasa ni dividendos) por strike."""
+    strikes, iv = np.asarray(strikes, dtype=float), np.asarray(iv, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vol = iv * np.sqrt(t_years)
+        d1 = (np.log(spot / strikes) + 0.5 * vol ** 2) / vol
+        g = np.exp(-0.5 * d1 ** 2) / np.sqrt(2 * np.pi) / (spot * vol)
+    return np.where(np.isfinite(g), g, 0.0)
+
+
+def _gamma_wall(df, spot, t_years):
+    if "impliedVolatility" not in df or t_years is None or df.empty: return np.nan
+    gex = _oi(df) * bs_gamma(spot, df["strike"], df["impliedVolatility"], t_years) * spot ** 2 * 0.01 * CONTRACT_SIZE
+    return float(df["strike"].iloc[int(np.argmax(gex))]) if gex.max() > 0 else np.nan
+
+
+def chain_walls(calls, puts, price, t_years=None, band=0.3):
+    """
+    Resumen de una cadena: muros de OI (strike con más OI en calls / puts),
+    muros de gamma, put/call ratio y max pain entre los strikes a ±`band`
+    del precio (todos si no hay ninguno en la banda).
+    """
+    call_oi, put_oi = _oi(calls), _oi(puts)
+    t_call, t_put = call_oi.sum(), put_oi.sum()
+    strikes = np.union1d(calls["strike"].to_numpy(dtype=float), puts["strike"].to_numpy(dtype=float))
+    rel = strikes[(strikes > price * (1 - band)) & (strikes < price * (1 + band))]
+    mp, _ = max_pain(calls["strike"], call_oi, puts["strike"], put_oi, rel if len(rel) else strikes)
+    return {
+        "call_wall": float(calls["strike"].iloc[int(np.argmax(call_oi))]) if len(calls) else np.nan,
+        "put_wall": float(puts["strike"].iloc[int(np.argmax(put_oi))]) if len(puts) else np.nan,
+        "call_gamma_wall": _gamma_wall(calls, price, t_years),
+        "put_gamma_wall": _gamma_wall(puts, price, t_years),
+        "max_pain": float(mp),
+        "call_oi": float(t_call),
+        "put_oi": float(t_put),
+        "pcr": float(t_put / t_call) if t_call > 0 else 0.0,
+    }
+
+
+def years_to(expiry, now=None):
+    now = now or datetime.now()
+    return max((pd.Timestamp(expiry) + pd.Timedelta(hours=16) - pd.Timestamp(now)).total_seconds() / (365 * 86_400), MIN_T_YEARS)
+
+
+def _aggregate(chains):
+    """Une las cadenas de varios vencimientos sumando el OI por strike."""
+    def one(frames):
+        df = pd.concat(frames, ignore_index=True)[["strike", "openInterest"]]
+        df = df.assign(openInterest=df["openInterest"].fillna(0))
+        return df.groupby("strike", as_index=False, sort=True)["openInterest"].sum()
+    return one([c for c, _ in chains]), one([p for _, p in chains])
+
+
+def fetch_chains(tk_obj, expirations=None, wait=None):
+    """
+    [(vencimiento, calls, puts)] de un `yf.Ticker`; `expirations=None` toma
+    todos los listados. `wait()` se llama antes de cada pedido.
+    """
+    if wait: wait()
+    exps = list(tk_obj.options if expirations is None else expirations)
+    out = []
+    for exp in exps:
+        if wait: wait()
+        try:
+            opt = tk_obj.option_chain(exp)
+        except Exception:
+            continue
+        if not (opt.calls.empty or opt.puts.empty): out.append((exp, opt.calls, opt.puts))
+    return out
+
+
+def walls_from_chains(chains, price):
+    """(tabla por vencimiento, resumen agregado); (DataFrame vacío, None) si no hay cadenas."""
+    if not chains: return pd.DataFrame(), None
+    rows = [{"expiry": exp, **chain_walls(calls, puts, price, years_to(exp))} for exp, calls, puts in chains]
+    pairs = [(calls, puts) for _, calls, puts in chains]
+    calls, puts = _aggregate(pairs)
+    total = chain_walls(calls, puts, price)
+    # Gamma agregada: suma por strike de la exposición de cada vencimiento
+    total["call_gamma_wall"], total["put_gamma_wall"] = _total_gamma_walls(pairs, rows, price)
+    return pd.DataFrame(rows), total
+
+
+def option_walls(tk_obj, price, expirations=None):
+    """`walls_from_chains` bajando las cadenas de un `yf.Ticker`."""
+    return walls_from_chains(fetch_chains(tk_obj, expirations), price)
+
+
+def _total_gamma_walls(chains, rows, price):
+    out = []
+    for side in (0, 1):
+        parts = []
+        for (calls, puts), row in zip(chains, rows):
+            df = (calls, puts)[side]
+            if "impliedVolatility" not in df: continue
+            gex = _oi(df) * bs_gamma(price, df["strike"], df["impliedVolatility"], years_to(row["expiry"]))
+            parts.append(pd.Series(gex, index=df["strike"].to_numpy(dtype=float)))
+        if not parts:
+            out.append(np.nan)
+            continue
+        by_strike = pd.concat(parts).groupby(level=0).sum()
+        out.append(float(by_strike.idxmax()) if by_strike.max() > 0 else np.nan)
+    return tuple(out)
@@ -0,0 +1,76 @@
+"""
+Escaneo por etapas: descargas concurrentes y cálculo a medida que llegan.
+
+Cada clave (ticker) necesita varias descargas independientes
+(`fetchers`: {nombre: fn(clave, wait)}). Todas corren en un pool de hilos
+bajo un mismo `RateLimiter`; cada descarga llama a `wait()` antes de cada
+pedido a la red (una que hace varios pedidos lo llama varias veces). Cuando
+una clave junta todas sus partes, `finish(clave, partes)` corre en un
+segundo pool (el cálculo) y el resultado sale por el generador en orden de
+llegada, así la página muestra la tabla mientras sigue el escaneo:
+
+    for key, result in run_pipeline(tickers, {"history": ..., "info": ...}, score):
+        ...
+
+Una descarga o un cálculo que falla deja None en su lugar. Si quien consume
+el generador corta antes (o Streamlit interrumpe el script), lo pendiente se
+cancela.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+MAX_WORKERS = 8
+CPU_WORKERS = 2
+REQUESTS_PER_S = 4.0
+
+
+class RateLimiter:
+    """Como mucho `rate` pedidos por segundo entre todos los hilos (turnos espaciados 1/rate)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+        if at > now: time.sleep(at - now)
+
+
+def guard(fn, *args):
+    """fn(*args), o None si falla: una parte caída no tumba el ticker."""
+    try:
+        return fn(*args)
+    except Exception:
+        return None
+
+
+def run_pipeline(keys, fetchers, finish, workers=MAX_WORKERS, rate=REQUESTS_PER_S, cpu_workers=CPU_WORKERS, limiter=None):
+    """Genera (clave, finish(clave, {nombre: parte})) a medida que cada clave termina."""
+    keys = list(dict.fromkeys(keys))
+    limiter = limiter or RateLimiter(rate)
+    parts = {k: {} for k in keys}
+    io = ThreadPoolExecutor(max_workers=workers)
+    cpu = ThreadPoolExecutor(max_workers=cpu_workers)
+    pending = {}
+    try:
+        for k in keys:
+            for name, fn in fetchers.items():
+                pending[io.submit(guard, fn, k, limiter.wait)] = (k, name)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                k, name = pending.pop(fut)
+                if name is None:
+                    yield k, fut.result()
+                    continue
+                parts[k][name] = fut.result()
+                if len(parts[k]) == len(fetchers):
+                    pending[cpu.submit(guard, finish, k, parts.pop(k))] = (k, None)
+    finally:
+        io.shutdown(wait=False, cancel_futures=True)
+        cpu.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,174 @@
+"""
+Motor de carteras de Markowitz sobre NumPy.
+
+`portfolio_cloud` reemplaza los bucles de Monte Carlo de las páginas
+Markowitz (un `get_portfolio_perf` por cartera): arma de una vez la matriz
+de pesos (N carteras x activos) y calcula todos los retornos con un
+producto matricial y todas las varianzas con `einsum`. 100k carteras de
+50 activos tardan bastante menos de un segundo.
+
+Muestreo de pesos (siempre no negativos y sumando 1):
+
+    "dirichlet"  Dirichlet(alpha); alpha=1 es uniforme sobre el simplex
+    "sobol"      secuencia de Sobol (cuasi-aleatoria) llevada al simplex;
+                 cubre la frontera de forma más pareja con menos puntos
+
+`efficient_frontier` traza la frontera exacta (sin cortos, pesos que suman
+1): mínima varianza, un barrido de K retornos objetivo resolviendo en cada
+uno min w'Σw con un active set (`active_set_qp`) que arranca desde la
+solución del punto anterior, y máximo Sharpe como el QP equivalente sobre
+y = w / (μ-rf)'w. Cada paso es un sistema lineal exacto (gradiente y
+hessiano analíticos), así que 150 activos se resuelven en milisegundos.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+try:
+    from scipy.stats import qmc
+except ImportError:  # sin scipy: Sobol cae a Dirichlet
+    qmc = None
+
+SAMPLERS = ("dirichlet", "sobol")
+
+
+def random_weights(n, n_assets, method="dirichlet", alpha=1.0, seed=None):
+    """Matriz (n x n_assets) de pesos sobre el simplex."""
+    if method not in SAMPLERS: raise ValueError(f"Muestreo desconocido: {method!r}")
+    rng = np.random.default_rng(seed)
+    if method == "sobol" and qmc is not None and alpha == 1.0:
+        u = qmc.Sobol(d=n_assets, scramble=True, seed=rng).random_base2(max(int(np.ceil(np.log2(max(n, 1)))), 0))[:n]
+        # Espaciados exponenciales normalizados: Dirichlet(1) a partir de uniformes
+        e = -np.log1p(-np.clip(u, 0.0, 1.0 - 1e-12))
+        return e / e.sum(axis=1, keepdims=True)
+    return rng.dirichlet(np.full(n_assets, alpha), size=n)
+
+
+def portfolio_stats(weights, mean_returns, cov_matrix, risk_free_rate=0.0):
+    """Retorno, volatilidad y Sharpe de una o muchas carteras (filas de `weights`)."""
+    w = np.asarray(weights, dtype=float)
+    mu, cov = np.asarray(mean_returns, dtype=float), np.asarray(cov_matrix, dtype=float)
+    ret = w @ mu
+    var = np.einsum("ij,jk,ik->i", np.atleast_2d(w), cov, np.atleast_2d(w), optimize=True)
+    vol = np.sqrt(np.maximum(var, 0.0))
+    if w.ndim == 1: vol = vol[0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = (ret - risk_free_rate) / vol
+    return ret, vol, sharpe
+
+
+def portfolio_cloud(mean_returns, cov_matrix, n=20_000, risk_free_rate=0.0, method="dirichlet", seed=None):
+    """(pesos, retornos, volatilidades, Sharpe) de `n` carteras al azar."""
+    w = random_weights(n, len(mean_returns), method, seed=seed)
+    ret, vol, sharpe = portfolio_stats(w, mean_returns, cov_matrix, risk_free_rate)
+    return w, ret, vol, sharpe
+
+
+# ─────────────────────────────────────────────
+# FRONTERA EXACTA
+# ─────────────────────────────────────────────
+class Portfolio(NamedTuple):
+    weights: np.ndarray
+    ret: float
+    vol: float
+    sharpe: float
+
+
+class Frontier(NamedTuple):
+    min_variance: Portfolio
+    max_sharpe: Portfolio
+    rets: np.ndarray        # K retornos objetivo
+    vols: np.ndarray        # K volatilidades mínimas
+    weights: np.ndarray     # K x activos
+
+
+def _portfolio(w, mu, cov, rf):
+    w = np.clip(w, 0.0, None)
+    w = w / w.sum()
+    ret, vol, sharpe = portfolio_stats(w, mu, cov, rf)
+    return Portfolio(w, float(ret), float(vol), float(sharpe))
+
+
+def active_set_qp(cov, A, b, w0, tol=1e-12, max_iter=None):
+    """
+    min ½ w'Σw  sujeto a  A w = b,  w >= 0, arrancando de `w0` factible.
+
+    Active set primal: las variables en cero forman el conjunto de trabajo;
+    en cada paso se resuelve el KKT de las libres (sistema lineal exacto),
+    se avanza hasta la primera que toca cero o, si el paso es nulo, se libera
+    la de multiplicador más negativo. Arrancar desde la solución vecina deja
+    casi todo el conjunto activo ya acertado.
+    """
+    n, m = len(w0), len(b)
+    w = np.array(w0, dtype=float)
+    fixed = w <= tol
+    w[fixed] = 0.0
+    for _ in range(max_iter or 20 * n + 50):
+        free = np.flatnonzero(~fixed)
+        g = cov @ w
+        Af = A[:, free]
+        kkt = np.zeros((len(free) + m, len(free) + m))
+        kkt[:len(free), :len(free)] = cov[np.ix_(free, free)]
+        kkt[:len(free), len(free):] = Af.T
+        kkt[len(free):, :len(free)] = Af
+        rhs = np.r_[-g[free], np.zeros(m)]
+        try:
+            sol = np.linalg.solve(kkt, rhs)
+        except np.linalg.LinAlgError:
+            sol = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+        p, nu = sol[:len(free)], sol[len(free):]
+        if np.max(np.abs(p), initial=0.0) <= tol * max(1.0, np.abs(w).max()):
+            mult = g + A.T @ nu                   # multiplicadores de w_i >= 0
+            mult[~fixed] = np.inf
+            j = int(np.argmin(mult))
+            if mult[j] >= -tol: return w
+            fixed[j] = False
+            continue
+        neg = p < -tol
+        steps = np.where(neg, -w[free] / np.where(neg, p, -1.0), np.inf)
+        k = int(np.argmin(steps))
+        alpha = min(1.0, steps[k])
+        w[free] += alpha * p
+        if alpha < 1.0:
+            fixed[free[k]] = True
+            w[free[k]] = 0.0
+    return w
+
+
+def efficient_frontier(mean_returns, cov_matrix, k=50, risk_free_rate=0.0, tol=1e-12):
+    """Frontera eficiente sin cortos: mínima varianza, máximo Sharpe y `k` puntos con sus pesos."""
+    mu, cov = np.asarray(mean_returns, dtype=float), np.asarray(cov_matrix, dtype=float)
+    n = len(mu)
+    ones = np.ones((1, n))
+
+    w = active_set_qp(cov, ones, np.ones(1), np.full(n, 1.0 / n), tol)
+    min_var = _portfolio(w, mu, cov, risk_free_rate)
+
+    # Barrido de retornos objetivo desde el de mínima varianza hasta el mayor alcanzable.
+    # Punto de partida factible: mezcla de la solución anterior con el activo de mayor retorno.
+    top = int(np.argmax(mu))
+    A = np.vstack([ones, mu])
+    rets = np.linspace(min_var.ret, mu[top], k)
+    vols, weights = np.empty(k), np.empty((k, n))
+    w, prev = min_var.weights, min_var.ret
+    for i, target in enumerate(rets):
+        if i and target > prev:
+            a = (target - prev) / (mu[top] - prev)
+            start = (1 - a) * w
+            start[top] += a
+            w = active_set_qp(cov, A, np.array([1.0, target]), start, tol)
+            prev = target
+        p = _portfolio(w, mu, cov, risk_free_rate)
+        vols[i], weights[i] = p.vol, p.weights
+
+    # Máximo Sharpe: min y'Σy con (μ-rf)'y = 1, y >= 0, y después w = y / Σy
+    excess = mu - risk_free_rate
+    if excess.max() > 0:
+        j = int(np.argmax(excess))
+        y0 = np.zeros(n)
+        y0[j] = 1.0 / excess[j]
+        best = _portfolio(active_set_qp(cov, excess[None, :], np.ones(1), y0, tol), mu, cov, risk_free_rate)
+    else:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            best = _portfolio(weights[np.nanargmax((rets - risk_free_rate) / vols)], mu, cov, risk_free_rate)
+    return Frontier(min_var, best, rets, vols, weights)
@@ -0,0 +1,371 @@
+"""
+Retornos diarios alineados y estimadores de covarianza con caché para las
+herramientas de carteras.
+
+Las páginas de Markowitz y la auditoría de carteras hacían `yf.download` en
+cada clic, recortaban todo con `dropna()` a la historia del activo más nuevo
+y calculaban `returns.cov() * 252` desde cero. Acá:
+
+- los cierres se bajan por ticker a través del almacén local
+  (`yf_download_cached`) y quedan en memoria; un conjunto que comparte
+  activos con otro ya pedido solo baja los que faltan;
+- cada ticker tiene sus retornos sobre una grilla de días hábiles (lunes a
+  viernes, la misma para todos). Un feriado queda como NaN y el retorno del
+  día siguiente abarca los dos días; los activos que cotizan el fin de semana
+  (cripto) se toman al cierre de cada día hábil. Como la grilla no depende del
+  conjunto, las estadísticas de un subconjunto son un bloque de las del
+  conjunto grande;
+- `CovStats` guarda sumas por par de activos (conteos, sumas, productos
+  cruzados, cuartos momentos y la versión EWMA). Con eso sale la covarianza
+  por pares completos, Ledoit-Wolf y EWMA sin volver a pasar por los datos;
+  cuando llega un día nuevo se suma la fila y se resta la que sale de la
+  ventana (O(n²) por día en vez de O(T·n²));
+- `em_moments` estima media y covarianza por máxima verosimilitud con datos
+  faltantes (EM gaussiano, agrupando las filas por patrón de faltantes).
+
+Uso desde una página:
+
+    @st.cache_resource
+    def get_returns_service():
+        return ReturnsService()
+
+    m = get_returns_service().estimate(tickers, "5y", method="ledoit_wolf")
+    m.mean, m.cov            # anualizados (252 ruedas), indexados por ticker
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from core.ohlcv_store import period_start, yf_download_cached
+
+PERIODS_PER_YEAR = 252
+EWMA_LAMBDA = 0.94          # RiskMetrics diario
+MIN_OBS = 20
+REFRESH_S = 3_600
+MAX_STATS = 32
+METHODS = ("pairwise", "em", "ledoit_wolf", "ewma", "complete")
+
+
+class Moments(NamedTuple):
+    mean: pd.Series         # retorno esperado anual
+    cov: pd.DataFrame       # covarianza anual
+    n_obs: pd.Series        # retornos disponibles por activo
+
+
+def bday_returns(close):
+    """Retornos simples de una serie de cierres sobre días hábiles (sin fines de semana)."""
+    close = close.dropna()
+    idx = pd.DatetimeIndex(close.index)
+    if idx.tz is not None: idx = idx.tz_localize(None)
+    close = pd.Series(close.to_numpy(dtype=float), index=idx.normalize())
+    close = close[~close.index.duplicated(keep="last") & (close.index.dayofweek < 5)]
+    return close.pct_change().iloc[1:]
+
+
+def nearest_psd(cov, eps=0.0):
+    """Proyección a semidefinida positiva recortando autovalores negativos."""
+    cov = (cov + cov.T) / 2
+    vals, vecs = np.linalg.eigh(cov)
+    if vals.min() >= eps: return cov
+    return (vecs * np.maximum(vals, eps)) @ vecs.T
+
+
+def _arrays(R):
+    x = R.to_numpy(dtype=float)
+    m = ~np.isnan(x)
+    return np.where(m, x, 0.0), m.astype(float)
+
+
+def _moments(x, m, decay, rows=slice(None), cols=slice(None)):
+    """Bloque (rows x cols) de las sumas por par sobre las filas de `x`."""
+    xr, xc, mr, mc = x[:, rows], x[:, cols], m[:, rows], m[:, cols]
+    d = decay[:, None]
+    return {
+        "count": mr.T @ mc,             # días con ambos activos
+        "sums": xr.T @ mc,              # Σ x_i en esos días
+        "cross": xr.T @ xc,             # Σ x_i x_j
+        "quad": (xr * xr).T @ (xc * xc),  # Σ x_i² x_j²
+        "ew": (xr * d).T @ xc,          # Σ λ^edad x_i x_j
+        "ew_w": (mr * d).T @ mc,        # Σ λ^edad
+    }
+
+
+class CovStats:
+    """Sumas por par de activos sobre una ventana de retornos (filas = días hábiles)."""
+
+    def __init__(self, tickers, index, fields, tail, lam=EWMA_LAMBDA):
+        self.tickers = list(tickers)
+        self.index = index
+        self.f = fields
+        self.tail = tail                # última fila (puede cambiar si el día no cerró)
+        self.lam = lam
+
+    @classmethod
+    def from_returns(cls, R, lam=EWMA_LAMBDA):
+        x, m = _arrays(R)
+        decay = lam ** np.arange(len(R) - 1, -1, -1, dtype=float)
+        return cls(R.columns, R.index, _moments(x, m, decay), R.to_numpy(dtype=float)[-1].copy(), lam)
+
+    def take(self, tickers):
+        """Sub-bloque para un subconjunto de los activos."""
+        pos = [self.tickers.index(t) for t in tickers]
+        return CovStats(tickers, self.index, {k: v[np.ix_(pos, pos)] for k, v in self.f.items()}, self.tail[pos], self.lam)
+
+    def extend(self, R):
+        """Agrega las columnas de `R` que faltan calculando solo los bloques que las involucran."""
+        R = R.loc[self.index]
+        new = [t for t in R.columns if t not in self.tickers]
+        if not new: return self.take(list(R.columns))
+        R = R[self.tickers + new]
+        x, m = _arrays(R)
+        decay = self.lam ** np.arange(len(R) - 1, -1, -1, dtype=float)
+        k = len(self.tickers)
+        right = _moments(x, m, decay, cols=slice(k, None))         # todos x nuevos
+        below = _moments(x, m, decay, rows=slice(k, None))         # nuevos x todos
+        fields = {}
+        for name, old in self.f.items():
+            full = np.empty((len(R.columns), len(R.columns)))
+            full[:k, :k] = old
+            full[:, k:] = right[name]
+            full[k:, :] = below[name]
+            fields[name] = full
+        return CovStats(R.columns, self.index, fields, R.to_numpy(dtype=float)[-1].copy(), self.lam)
+
+    def dropped(self, index):
+        """Fechas de esta ventana que quedan fuera de una ventana nueva `index`."""
+        return self.index[self.index < index[0]]
+
+    def roll(self, R, old=None):
+        """
+        Mismos activos con la ventana corrida: resta la última fila vieja
+        (provisoria si el día no había cerrado) y las que salen por el
+        comienzo (`old`, filas en `dropped(R.index)`), y suma las nuevas.
+        None si `R` no continúa esta ventana.
+        """
+        last = self.index[-1]
+        if list(R.columns) != self.tickers or last not in R.index or R.index[0] < self.index[0]: return None
+        gone = self.dropped(R.index)
+        if not R.index.equals(self.index[self.index >= R.index[0]].append(R.index[R.index > last])): return None
+        if len(gone) and (old is None or not old.index.equals(gone)): return None
+        fresh = R.loc[last:]
+        lam, f = self.lam, {k: v.copy() for k, v in self.f.items()}
+
+        def add(x, sign, ages):
+            m = ~np.isnan(x)
+            for name, v in _moments(np.where(m, x, 0.0), m.astype(float), lam ** np.asarray(ages, dtype=float)).items():
+                f[name] += sign * v
+
+        # La última fila vieja sale con edad 0; el resto envejece k días
+        k = len(fresh) - 1
+        add(self.tail[None, :], -1.0, [0])
+        f["ew"] *= lam ** k
+        f["ew_w"] *= lam ** k
+        add(fresh.to_numpy(dtype=float), 1.0, np.arange(k, -1, -1))
+        if len(gone):
+            add(old[self.tickers].to_numpy(dtype=float), -1.0, len(self.index) - 1 - np.arange(len(gone)) + k)
+        return CovStats(self.tickers, R.index, f, R.to_numpy(dtype=float)[-1].copy(), lam)
+
+    # ─── estimadores (por período, sin anualizar) ───
+    def n_obs(self):
+        return np.diag(self.f["count"]).copy()
+
+    def mean(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.diag(self.f["sums"]) / np.diag(self.f["count"])
+
+    def pairwise(self):
+        """Covarianza por pares completos (cada par usa todos los días en que cotizan ambos)."""
+        n, s, c = self.f["count"], self.f["sums"], self.f["cross"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (c - s * s.T / n) / (n - 1)
+        cov = np.where(n > 1, cov, 0.0)
+        return nearest_psd(cov)
+
+    def ledoit_wolf(self):
+        """
+        Ledoit-Wolf hacia σ̄²·I. La intensidad usa la varianza de los productos
+        x_i·x_j sin centrar: con retornos diarios la media es despreciable
+        frente al desvío y así sale de las mismas sumas que la incremental.
+        """
+        S = self.pairwise()
+        n, c, q = self.f["count"], self.f["cross"], self.f["quad"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pi = np.where(n > 1, (q / n - (c / n) ** 2) / n, 0.0).sum()
+        target = np.eye(len(S)) * np.trace(S) / len(S)
+        d2 = ((S - target) ** 2).sum()
+        shrink = float(np.clip(pi / d2, 0.0, 1.0)) if d2 > 0 else 1.0
+        return shrink * target + (1 - shrink) * S
+
+    def ewma(self):
+        """Covarianza EWMA de media cero (RiskMetrics), normalizada por los pesos de cada par."""
+        w = self.f["ew_w"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = np.where(w > 0, self.f["ew"] / w, 0.0)
+        return nearest_psd(cov)
+
+
+def em_moments(R, mean=None, cov=None, tol=1e-10, max_iter=500):
+    """
+    Media y covarianza por EM con datos faltantes (normal multivariada).
+    Las filas se agrupan por patrón de faltantes: con historias de distinto
+    largo hay pocos patrones, así que cada iteración son unos pocos
+    productos matriciales. `mean`/`cov` sirven de punto de partida.
+    """
+    x = R.to_numpy(dtype=float)
+    x = x[~np.isnan(x).all(axis=1)]
+    obs = ~np.isnan(x)
+    T, n = x.shape
+    patterns, inverse = np.unique(obs, axis=0, return_inverse=True)
+    groups = [(pat, x[inverse.ravel() == p][:, pat]) for p, pat in enumerate(patterns)]
+    if mean is None:
+        mean = np.nan_to_num(np.nanmean(x, axis=0))
+    if cov is None:
+        cov = np.diag(np.nan_to_num(np.nanvar(x, axis=0)) + 1e-12)
+    for _ in range(max_iter):
+        s1, s2 = np.zeros(n), np.zeros((n, n))
+        for pat, xo in groups:
+            miss = ~pat
+            full = np.empty((len(xo), n))
+            full[:, pat] = xo
+            if miss.any():
+                if pat.any():
+                    B = np.linalg.lstsq(cov[np.ix_(pat, pat)], cov[np.ix_(pat, miss)], rcond=None)[0].T
+                    full[:, miss] = mean[miss] + (xo - mean[pat]) @ B.T
+                    cond = cov[np.ix_(miss, miss)] - B @ cov[np.ix_(pat, miss)]
+                else:
+                    full[:, miss] = mean[miss]
+                    cond = cov[np.ix_(miss, miss)]
+                s2[np.ix_(miss, miss)] += len(xo) * cond
+            s1 += full.sum(axis=0)
+            s2 += full.T @ full
+        new_mean = s1 / T
+        new_cov = s2 / T - np.outer(new_mean, new_mean)
+        done = max(np.abs(new_mean - mean).max(), np.abs(new_cov - cov).max()) < tol
+        mean, cov = new_mean, new_cov
+        if done: break
+    return mean, nearest_psd(cov * T / max(T - 1, 1))
+
+
+def _last_bday(now=None):
+    d = pd.Timestamp.now().normalize() if now is None else pd.Timestamp(now).normalize()
+    while d.dayofweek >= 5: d -= pd.Timedelta(days=1)
+    return d
+
+
+class ReturnsService:
+    """
+    Cierres y retornos por ticker en memoria más una caché LRU de `CovStats`
+    por (periodo, activos). Segura entre hilos (un lock para todo).
+    """
+
+    def __init__(self, loader=None, refresh_s=REFRESH_S, lam=EWMA_LAMBDA, max_stats=MAX_STATS, periods_per_year=PERIODS_PER_YEAR):
+        self.loader = loader or (lambda tickers, period: {t: df["Close"] for t, df in yf_download_cached(tickers, period=period).items()})
+        self.refresh_s = refresh_s
+        self.lam = lam
+        self.max_stats = max_stats
+        self.ppy = periods_per_year
+        self.series = {}                # ticker -> (bajado_en, cubre_desde, retornos)
+        self.stats = OrderedDict()      # (periodo, activos) -> CovStats
+        self.em = {}                    # (periodo, activos) -> (media, cov) para arrancar el próximo EM
+        self._lock = threading.RLock()
+
+    # ─── datos ───
+    def load(self, tickers, period):
+        """Baja (una sola llamada) los tickers que faltan, vencieron o no cubren `period`."""
+        start = period_start(period)
+        covers = pd.Timestamp.min if start is None else start
+        now = time.time()
+        with self._lock:
+            todo = [t for t in dict.fromkeys(tickers)
+                    if t not in self.series or now - self.series[t][0] > self.refresh_s or self.series[t][1] > covers]
+            if todo:
+                got = self.loader(todo, period)
+                for t in todo:
+                    close = got.get(t)
+                    if close is None or close.dropna().empty: continue
+                    r, since = bday_returns(close), covers
+                    if t in self.series:   # lo viejo queda: hace falta para restar lo que sale de la ventana
+                        r = r.combine_first(self.series[t][2])
+                        since = min(since, self.series[t][1])
+                    if len(r): self.series[t] = (now, since, r)
+            return [t for t in dict.fromkeys(tickers) if t in self.series]
+
+    def _window(self, tickers, period, index=None):
+        start = period_start(period)
+        if index is None:
+            first = min(self.series[t][2].index[0] for t in tickers)
+            index = pd.bdate_range(max(first, start) if start is not None else first, _last_bday())
+        return pd.DataFrame({t: self.series[t][2].reindex(index) for t in tickers}, index=index)
+
+    def returns(self, tickers, period="5y"):
+        """Matriz de retornos diarios con NaN donde un activo no tiene dato (sin filas vacías)."""
+        with self._lock:
+            tickers = self.load(tickers, period)
+            if not tickers: return pd.DataFrame()
+            return self._window(tickers, period).dropna(how="all")
+
+    # ─── estadísticas ───
+    def _overlap(self, period, tickers, index):
+        """Entrada cacheada sobre la misma ventana que comparte más activos con `tickers`."""
+        best, most = None, 0
+        for (per, tks), st in self.stats.items():
+            common = len(set(tks) & set(tickers))
+            if per == period and common > most and st.index.equals(index): best, most = st, common
+        return best.take([t for t in best.tickers if t in tickers]) if best is not None else None
+
+    def cov_stats(self, tickers, period="5y"):
+        """
+        `CovStats` de los tickers con datos. Mismo conjunto con días nuevos:
+        se corre la ventana. Si no, se parte del conjunto cacheado que más
+        activos comparte y solo se calculan los bloques de los que faltan.
+        """
+        with self._lock:
+            tickers = self.load(tickers, period)
+            if not tickers: return None
+            R = self._window(tickers, period)
+            key = (period, tuple(tickers))
+            stats, cached = None, self.stats.get(key)
+            if cached is not None and cached.index.equals(R.index) and np.array_equal(cached.tail, R.to_numpy(dtype=float)[-1], equal_nan=True):
+                stats = cached
+            elif cached is not None:
+                gone = cached.dropped(R.index)
+                stats = cached.roll(R, self._window(tickers, period, gone) if len(gone) else None)
+            if stats is None:
+                base = self._overlap(period, tickers, R.index)
+                stats = base.extend(R).take(tickers) if base is not None else CovStats.from_returns(R, self.lam)
+            self.stats[key] = stats
+            self.stats.move_to_end(key)
+            while len(self.stats) > self.max_stats: self.stats.popitem(last=False)
+            return stats
+
+    def estimate(self, tickers, period="5y", method="pairwise", min_obs=MIN_OBS):
+        """
+        `Moments` anualizados. Métodos: "pairwise" (pares completos), "em"
+        (máxima verosimilitud con faltantes), "ledoit_wolf" (encogida),
+        "ewma" (RiskMetrics) o "complete" (solo días con todos los activos,
+        lo que hacía `dropna()`). Se descartan los activos con menos de
+        `min_obs` retornos.
+        """
+        if method not in METHODS: raise ValueError(f"Método desconocido: {method!r}")
+        with self._lock:
+            stats = self.cov_stats(tickers, period)
+            if stats is None: return Moments(pd.Series(dtype=float), pd.DataFrame(), pd.Series(dtype=float))
+            keep = [t for t, n in zip(stats.tickers, stats.n_obs()) if n >= min_obs]
+            if not keep: return Moments(pd.Series(dtype=float), pd.DataFrame(), pd.Series(dtype=float))
+            if keep != stats.tickers: stats = stats.take(keep)
+            n_obs = pd.Series(stats.n_obs(), index=keep)
+            if method == "complete":
+                R = self._window(keep, period).dropna()
+                mean, cov = R.mean().to_numpy(), R.cov().to_numpy()
+            elif method == "em":
+                key = (period, tuple(keep))
+                mean, cov = em_moments(self._window(keep, period), *self.em.get(key, (None, None)))
+                self.em[key] = (mean, cov)
+            else:
+                mean = stats.mean()
+                cov = {"pairwise": stats.pairwise, "ledoit_wolf": stats.ledoit_wolf, "ewma": stats.ewma}[method]()
+            return Moments(pd.Series(mean * self.ppy, index=keep), pd.DataFrame(cov * self.ppy, index=keep, columns=keep), n_obs)
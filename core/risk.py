@@ -0,0 +1,111 @@
+"""
+Métricas de riesgo móviles de una cartera y de cada uno de sus activos, vectorizadas.
+
+La auditoría de carteras calculaba solo CAGR, volatilidad, Sharpe y beta del
+periodo completo, y buscaba pares "gemelos" con un doble bucle sobre
+`corr.iloc[i, j]`. Acá todo sale de una matriz de retornos (días x activos,
+con la cartera como una columna más):
+
+- se acumulan una sola vez las sumas de x, x² y x·benchmark (y las del
+  benchmark); la suma sobre cualquier ventana es la diferencia de dos filas
+  de esas acumuladas, así que volatilidad, Sharpe y beta móviles para 63,
+  126 y 252 ruedas (o las que se pidan) y los del periodo completo salen sin
+  volver a recorrer los datos;
+- drawdown de cada columna con `np.maximum.accumulate` sobre la curva de
+  capital, y el máximo drawdown como su mínimo;
+- gemelos con la máscara del triángulo superior de la matriz de correlación.
+
+Con 200 activos y 10 años son unas pocas matrices de 2500 x 200.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = 252
+WINDOWS = (63, 126, 252)
+TWIN_CORR = 0.85
+
+
+class RiskReport(NamedTuple):
+    summary: pd.DataFrame       # una fila por columna: CAGR, volatilidad, Sharpe, beta, máx. drawdown
+    rolling: dict               # {ventana: {"vol" | "sharpe" | "beta": DataFrame}}
+    drawdown: pd.DataFrame      # drawdown diario de cada columna
+
+
+def _cumsum0(a):
+    """Acumulada con una fila de ceros adelante: suma de (i, j] = c[j] - c[i]."""
+    out = np.zeros((len(a) + 1,) + a.shape[1:])
+    np.cumsum(a, axis=0, out=out[1:])
+    return out
+
+
+def _window_sum(c, w):
+    """Suma móvil de `w` filas a partir de la acumulada; NaN en las primeras w-1."""
+    out = np.full((len(c) - 1,) + c.shape[1:], np.nan)
+    if w <= len(c) - 1: out[w - 1:] = c[w:] - c[:-w]
+    return out
+
+
+def _stats(n, sx, sxx, sxb, sb, sbb, rf, ppy):
+    """Volatilidad y Sharpe anualizados y beta a partir de sumas sobre `n` días."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sx / n
+        var = (sxx - sx * mean) / (n - 1)
+        vol = np.sqrt(np.maximum(var, 0.0)) * np.sqrt(ppy)
+        sharpe = (mean * ppy - rf) / vol
+        cov_b = (sxb - sx * (sb / n)) / (n - 1)
+        var_b = (sbb - sb * sb / n) / (n - 1)
+        beta = cov_b / var_b
+    return vol, sharpe, beta
+
+
+def drawdowns(returns):
+    """Drawdown diario (DataFrame) y máximo drawdown (Series) de cada columna."""
+    wealth = np.cumprod(1.0 + np.nan_to_num(returns.to_numpy(dtype=float)), axis=0)
+    dd = wealth / np.maximum.accumulate(wealth, axis=0) - 1.0
+    dd = pd.DataFrame(dd, index=returns.index, columns=returns.columns)
+    return dd, dd.min()
+
+
+def rolling_metrics(returns, benchmark, windows=WINDOWS, risk_free_rate=0.0, periods_per_year=PERIODS_PER_YEAR):
+    """{ventana: {"vol", "sharpe", "beta": DataFrame}} para todas las columnas de una vez."""
+    x = np.nan_to_num(returns.to_numpy(dtype=float))
+    b = np.nan_to_num(np.asarray(benchmark, dtype=float))[:, None]
+    cx, cxx, cxb, cb, cbb = _cumsum0(x), _cumsum0(x * x), _cumsum0(x * b), _cumsum0(b), _cumsum0(b * b)
+    out = {}
+    for w in windows:
+        vol, sharpe, beta = _stats(w, *(_window_sum(c, w) for c in (cx, cxx, cxb, cb, cbb)), risk_free_rate, periods_per_year)
+        out[w] = {name: pd.DataFrame(v, index=returns.index, columns=returns.columns)
+                  for name, v in (("vol", vol), ("sharpe", sharpe), ("beta", beta))}
+    return out
+
+
+def risk_report(returns, benchmark, windows=WINDOWS, risk_free_rate=0.0, periods_per_year=PERIODS_PER_YEAR):
+    """
+    Métricas del periodo completo, móviles y drawdowns de cada columna de
+    `returns` (retornos diarios alineados, sin huecos) contra `benchmark`.
+    """
+    x = np.nan_to_num(returns.to_numpy(dtype=float))
+    b = np.nan_to_num(np.asarray(benchmark, dtype=float))
+    n = len(x)
+    vol, sharpe, beta = _stats(n, x.sum(0), (x * x).sum(0), (x * b[:, None]).sum(0), b.sum(), (b * b).sum(), risk_free_rate, periods_per_year)
+    dd, max_dd = drawdowns(returns)
+    years = (returns.index[-1] - returns.index[0]).days / 365.25 if n > 1 else np.nan
+    growth = np.prod(1.0 + x, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cagr = growth ** (1 / years) - 1
+    summary = pd.DataFrame({
+        "CAGR": cagr, "Volatilidad": vol, "Sharpe": sharpe, "Beta": beta,
+        "Máx. Drawdown": max_dd.to_numpy(), "Drawdown Actual": dd.iloc[-1].to_numpy(),
+    }, index=returns.columns)
+    return RiskReport(summary, rolling_metrics(returns, b, windows, risk_free_rate, periods_per_year), dd)
+
+
+def twin_pairs(corr, threshold=TWIN_CORR):
+    """[(a, b, ρ)] con ρ > `threshold` sobre el triángulo superior, de mayor a menor."""
+    c = corr.to_numpy(dtype=float)
+    i, j = np.nonzero(np.triu(np.nan_to_num(c) > threshold, k=1))
+    order = np.argsort(-c[i, j], kind="stable")
+    names = list(corr.columns)
+    return [(names[a], names[b], float(c[a, b])) for a, b in zip(i[order], j[order])]
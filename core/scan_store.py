@@ -0,0 +1,151 @@
+"""
+Base local de resultados de escaneo (SQLite en modo WAL), compartida entre
+sesiones, páginas y bots.
+
+Los escáneres acumulaban sus filas en `st.session_state` (`sniper_results`,
+`scan_results`, ...): se perdían al refrescar, cada usuario tenía las suyas
+y los bots de Telegram no podían aportar nada. Acá cada fila se guarda con
+clave (escáner, símbolo, temporalidad, fecha del resultado):
+
+- `results` guarda la historia; escribir la misma clave dos veces la pisa
+  (upsert);
+- `latest` tiene la última fila de cada (escáner, símbolo, temporalidad),
+  así una página muestra el último snapshot al cargar con una sola consulta
+  por clave primaria, sin volver a escanear.
+
+Las filas se guardan como JSON (los escalares de NumPy se pasan a Python y
+las fechas a ISO). WAL deja leer mientras otro proceso escribe; cada hilo
+usa su propia conexión.
+
+    from core.scan_store import SCANS
+    SCANS.put("nexo_macd", rows)                  # upsert por row["Activo"]
+    rows = SCANS.latest("nexo_macd")              # lista de dicts
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+DB_PATH = os.environ.get("SLY_SCAN_DB", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "scans.db"))
+KEEP_S = 30 * 86_400        # historia que se conserva al podar
+BUSY_TIMEOUT_MS = 5_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    scanner TEXT NOT NULL, symbol TEXT NOT NULL, timeframe TEXT NOT NULL, asof REAL NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (scanner, symbol, timeframe, asof)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS latest (
+    scanner TEXT NOT NULL, symbol TEXT NOT NULL, timeframe TEXT NOT NULL, asof REAL NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (scanner, symbol, timeframe)
+);
+CREATE INDEX IF NOT EXISTS results_asof ON results (asof);
+"""
+
+
+def _plain(v):
+    if isinstance(v, np.generic): return v.item()
+    if isinstance(v, (datetime, date, pd.Timestamp)): return v.isoformat()
+    if isinstance(v, np.ndarray): return v.tolist()
+    return str(v)
+
+
+def dumps(row):
+    return json.dumps(row, default=_plain, ensure_ascii=False)
+
+
+class ScanStore:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._ready = False
+        self._guard = threading.Lock()
+
+    def conn(self):
+        """Conexión del hilo actual (se crea la primera vez, con el esquema)."""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            con = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            with self._guard:
+                if not self._ready:
+                    con.executescript(SCHEMA)
+                    self._ready = True
+            self._local.con = con
+        return con
+
+    def put(self, scanner, rows, key="Activo", timeframe="", asof=None, replace=False):
+        """
+        Upsert de filas (dicts) de un escáner; el símbolo sale de `row[key]`.
+        `replace=True` borra antes el snapshot vigente del escáner (para la
+        temporalidad dada), como cuando la página no acumulaba.
+        """
+        asof = time.time() if asof is None else float(asof)
+        data = [(scanner, str(r[key]), str(timeframe), asof, dumps(r)) for r in rows if r and r.get(key) is not None]
+        con = self.conn()
+        with con:
+            con.execute("BEGIN IMMEDIATE")
+            if replace: con.execute("DELETE FROM latest WHERE scanner = ? AND timeframe = ?", (scanner, str(timeframe)))
+            con.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?) ON CONFLICT DO UPDATE SET payload = excluded.payload", data)
+            con.executemany(
+                "INSERT INTO latest VALUES (?, ?, ?, ?, ?) ON CONFLICT DO UPDATE SET asof = excluded.asof, payload = excluded.payload "
+                "WHERE excluded.asof >= latest.asof", data)
+        return len(data)
+
+    def latest(self, scanner, timeframe=None):
+        """Último resultado de cada símbolo (en el orden en que aparecieron), como lista de dicts."""
+        sql, args = "SELECT payload FROM latest WHERE scanner = ?", [scanner]
+        if timeframe is not None:
+            sql += " AND timeframe = ?"
+            args.append(str(timeframe))
+        return [json.loads(p) for (p,) in self.conn().execute(sql + " ORDER BY rowid", args)]
+
+    def frame(self, scanner, timeframe=None):
+        """`latest` como DataFrame (vacío si no hay nada)."""
+        return pd.DataFrame(self.latest(scanner, timeframe))
+
+    def history(self, scanner, symbol, timeframe="", since=None):
+        """[(fecha, fila)] guardadas para un símbolo, de la más vieja a la más nueva."""
+        rows = self.conn().execute(
+            "SELECT asof, payload FROM results WHERE scanner = ? AND symbol = ? AND timeframe = ? AND asof >= ? ORDER BY asof",
+            (scanner, str(symbol), str(timeframe), -1.0 if since is None else float(since)))
+        return [(asof, json.loads(p)) for asof, p in rows]
+
+    def discard(self, scanner, symbols, timeframe=""):
+        """Saca símbolos del snapshot vigente (la historia queda)."""
+        con = self.conn()
+        with con:
+            con.execute("BEGIN IMMEDIATE")
+            con.executemany("DELETE FROM latest WHERE scanner = ? AND symbol = ? AND timeframe = ?",
+                            [(scanner, str(s), str(timeframe)) for s in symbols])
+
+    def updated_at(self, scanner):
+        """Fecha (epoch) del último resultado del escáner, o None."""
+        (asof,), = self.conn().execute("SELECT MAX(asof) FROM latest WHERE scanner = ?", (scanner,))
+        return asof
+
+    def clear(self, scanner):
+        """Borra el snapshot y la historia de un escáner (para todos los que lo miran)."""
+        con = self.conn()
+        with con:
+            con.execute("BEGIN IMMEDIATE")
+            con.execute("DELETE FROM latest WHERE scanner = ?", (scanner,))
+            con.execute("DELETE FROM results WHERE scanner = ?", (scanner,))
+
+    def prune(self, keep_s=KEEP_S):
+        """Borra la historia más vieja que `keep_s` (el snapshot vigente queda)."""
+        con = self.conn()
+        with con:
+            return con.execute("DELETE FROM results WHERE asof < ?", (time.time() - keep_s,)).rowcount
+
+
+SCANS = ScanStore()
@@ -0,0 +1,165 @@
+"""
+Programador único de los bots de Telegram.
+
+Cada bot corría en su propio workflow y bajaba sus datos por su cuenta
+(`alerta_bot`, `mtf_bot` y `bot_detalle` el mismo universo de acciones, en
+el mismo horario). Acá un solo proceso de larga vida dispara cada bot con
+sus horarios cron (UTC, los mismos de los workflows) y todos los bots que
+caen en el mismo minuto forman un ciclo que comparte una `core.snapshot`:
+cada (universo, intervalo) se baja una vez por ciclo.
+
+    python -m core.scheduler                           # demonio con todos los bots
+    python -m core.scheduler --jobs alerta_bot,mtf_bot
+    python -m core.scheduler --once                     # un ciclo con todos ya mismo
+    python -m core.scheduler --list                     # próximas corridas
+
+Los bots son funciones importables (`alerta_bot.run_scan(snapshot=...)`,
+...) y siguen funcionando sueltos (`python alerta_bot.py`). Si un ciclo
+tarda más que el minuto siguiente, los disparos que se pasaron se corren
+juntos en el ciclo que sigue. Los envíos a Telegram siguen en segundo
+plano (`core.telegram`) mientras arranca el próximo bot.
+"""
+import argparse
+import importlib
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from core.snapshot import Snapshot
+
+LOOKAHEAD_DAYS = 366
+
+
+class Cron:
+    """Expresión cron de 5 campos (minuto hora día mes día-de-semana): `*`, `a-b`, listas y `/n`."""
+    BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expr):
+        parts = expr.split()
+        if len(parts) != 5: raise ValueError(f"Cron inválido (se esperan 5 campos): {expr!r}")
+        self.expr = expr
+        self.minute, self.hour, self.day, self.month, dow = (self._field(p, lo, hi, expr) for p, (lo, hi) in zip(parts, self.BOUNDS))
+        self.weekday = frozenset(d % 7 for d in dow)     # 0 y 7 son domingo
+        self.any_day, self.any_weekday = parts[2] == "*", parts[4] == "*"
+
+    @staticmethod
+    def _field(text, lo, hi, expr):
+        out = set()
+        for part in text.split(","):
+            rng, _, step = part.partition("/")
+            step = int(step) if step else 1
+            if rng == "*": a, b = lo, hi
+            elif "-" in rng: a, b = map(int, rng.split("-"))
+            else: a, b = int(rng), (hi if step > 1 else int(rng))
+            if not lo <= a <= b <= hi or step < 1: raise ValueError(f"Cron inválido: {expr!r}")
+            out.update(range(a, b + 1, step))
+        return frozenset(out)
+
+    def matches(self, t):
+        if t.minute not in self.minute or t.hour not in self.hour or t.month not in self.month: return False
+        day_ok, weekday_ok = t.day in self.day, t.isoweekday() % 7 in self.weekday
+        # Como cron: si se restringen día del mes y de la semana, alcanza con cualquiera de los dos
+        if self.any_day or self.any_weekday: return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, t):
+        t = t.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(LOOKAHEAD_DAYS * 1440):
+            if self.matches(t): return t
+            t += timedelta(minutes=1)
+        return None
+
+
+class Job(NamedTuple):
+    target: str         # "módulo:función"; la función acepta snapshot=
+    crons: tuple        # expresiones cron, en UTC
+
+
+# Horarios de los workflows de .github/workflows
+STOCK_HOURS = ("30 14 * * 1-5", "0 17 * * 1-5", "0 20 * * 1-5")
+JOBS = {
+    # Primero los de acciones: comparten el diario del universo
+    "alerta_bot": Job("alerta_bot:run_scan", STOCK_HOURS),
+    "mtf_bot": Job("mtf_bot:run_bot", STOCK_HOURS),
+    "bot_detalle": Job("bot_detalle:run_analysis", STOCK_HOURS + ("0 21 * * 1-5",)),
+    "macro_sly_bot": Job("macro_sly_bot:main", ("30 16 * * *", "30 21 * * *")),
+    "crypto_bot": Job("crypto_bot:run_bot", ("0 */3 * * *",)),
+    "bot_cripto_detalle": Job("bot_cripto_detalle:run_analysis", ("0 */4 * * *",)),
+}
+
+
+def resolve(target):
+    module, _, func = target.partition(":")
+    return getattr(importlib.import_module(module), func)
+
+
+def utc_minute(t=None):
+    return (t or datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+
+
+def due_between(jobs, start, end):
+    """Bots con algún disparo en (start, end], en el orden de `jobs`."""
+    due, t = set(), start + timedelta(minutes=1)
+    crons = {name: [Cron(c) for c in job.crons] for name, job in jobs.items()}
+    while t <= end:
+        due.update(name for name, cs in crons.items() if any(c.matches(t) for c in cs))
+        t += timedelta(minutes=1)
+    return [name for name in jobs if name in due]
+
+
+def run_cycle(names, jobs=JOBS, snapshot=None):
+    """Corre los bots `names` en orden sobre una misma instantánea; {bot: None o el error}."""
+    snapshot = snapshot or Snapshot()
+    results = {}
+    for name in names:
+        t0 = time.perf_counter()
+        print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] ▶ {name}")
+        try:
+            resolve(jobs[name].target)(snapshot=snapshot)
+            results[name] = None
+        except Exception as e:
+            traceback.print_exc()
+            results[name] = e
+        print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {'✔' if results[name] is None else '✖'} {name} ({time.perf_counter() - t0:.1f}s)")
+    print(f"Ciclo {', '.join(names)}: {snapshot.loads} descargas")
+    return results
+
+
+def serve(jobs=JOBS):
+    """Bucle del demonio: cada minuto corre, en un ciclo, los bots que tocan."""
+    print(f"Programador: {', '.join(jobs)}")
+    last = utc_minute()
+    while True:
+        time.sleep(max(0.0, (last + timedelta(minutes=1) - datetime.now(timezone.utc)).total_seconds()))
+        now = utc_minute()
+        due = due_between(jobs, last, now)
+        last = now
+        if due: run_cycle(due, jobs)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Corre los bots de Telegram con sus horarios, compartiendo los datos de cada ciclo")
+    p.add_argument("--jobs", default="", help=f"bots separados por coma (por defecto todos: {','.join(JOBS)})")
+    p.add_argument("--once", action="store_true", help="correr ya un ciclo con los bots elegidos y salir")
+    p.add_argument("--list", action="store_true", help="mostrar la próxima corrida de cada bot y salir")
+    args = p.parse_args(argv)
+    names = [n.strip() for n in args.jobs.split(",") if n.strip()] or list(JOBS)
+    unknown = [n for n in names if n not in JOBS]
+    if unknown: p.error(f"bots desconocidos: {', '.join(unknown)}")
+    jobs = {n: JOBS[n] for n in JOBS if n in names}
+
+    if args.list:
+        now = datetime.now(timezone.utc)
+        for name, job in jobs.items():
+            nxt = min(Cron(c).next_after(now) for c in job.crons)
+            print(f"{name:20s} {nxt:%Y-%m-%d %H:%M} UTC  ({' | '.join(job.crons)})")
+    elif args.once:
+        results = run_cycle(list(jobs), jobs)
+        if any(e is not None for e in results.values()): raise SystemExit(1)
+    else:
+        serve(jobs)
+
+
+if __name__ == "__main__":
+    main()
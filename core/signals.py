@@ -0,0 +1,171 @@
+"""
+Máquinas de estado de señales sobre arrays de NumPy.
+
+Reemplazan los bucles `for i in range(1, len(df))` con `.iloc` de los bots y
+las páginas. Cada motor recibe arrays ya extraídos (dirección HA 1/-1,
+histograma MACD, ADX, RSI, régimen EMA) y devuelve `EngineResult`:
+
+    state -> 1 LONG, -1 SHORT, 0 FUERA
+    index -> vela de la última entrada (-1 si nunca hubo)
+    price -> Close de esa vela (0.0 si nunca hubo)
+
+Con Numba instalado los kernels se compilan; si no, se recorren como listas
+de Python (mismo código, mismos resultados).
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA = True
+except ImportError:
+    NUMBA = False
+
+
+def _kernel(fn):
+    return njit(cache=True)(fn) if NUMBA else fn
+
+
+def _prep(*arrays):
+    # Numba necesita arrays contiguos; el intérprete es más rápido indexando listas
+    if NUMBA: return tuple(np.ascontiguousarray(a) for a in arrays)
+    return tuple(a.tolist() for a in arrays)
+
+
+class EngineResult(NamedTuple):
+    state: int
+    index: int
+    price: float
+
+
+def _result(state, idx, close):
+    if idx < 0: return EngineResult(int(state), -1, 0.0)
+    return EngineResult(int(state), int(idx), float(close[idx]))
+
+
+# ─────────────────────────────────────────────
+# KERNELS
+# ─────────────────────────────────────────────
+@_kernel
+def _ha_adx_kernel(color, adx, adx_th, out):
+    in_pos = False
+    for i in range(1, len(color)):
+        if not in_pos and color[i] == 1 and adx[i] > adx_th:
+            in_pos = True
+            out[i] = 1
+        elif in_pos and color[i] == -1:
+            in_pos = False
+            out[i] = -1
+    return in_pos
+
+
+@_kernel
+def _macd_flip_kernel(ha, hist, zero_filter):
+    position, entry = 0, -1
+    for i in range(1, len(ha)):
+        h, ph = hist[i], hist[i-1]
+        if position == 1 and h < ph: position = 0
+        elif position == -1 and h > ph: position = 0
+        if position == 0:
+            if ha[i] == 1 and h > ph and (not zero_filter or h < 0):
+                position, entry = 1, i
+            elif ha[i] == -1 and h < ph and (not zero_filter or h > 0):
+                position, entry = -1, i
+    return position, entry
+
+
+@_kernel
+def _sly_kernel(ha_dir, hist):
+    state, entry = 0, -1
+    for i in range(1, len(ha_dir)):
+        h, h_prev = hist[i], hist[i-1]
+        hd, hd_prev = ha_dir[i], ha_dir[i-1]
+        if hd == 1 and hd_prev == -1 and h < 0 and h > h_prev:
+            state, entry = 1, i
+        elif hd == -1 and hd_prev == 1 and h > 0 and h < h_prev:
+            state, entry = -1, i
+        elif state != 0:
+            if (state == 1 and h < h_prev) or (state == -1 and h > h_prev): state = 0
+    return state, entry
+
+
+@_kernel
+def _trend_filter_kernel(ha, hist, rsi, authorized, side):
+    active, entry = False, -1
+    for i in range(1, len(ha)):
+        h, ph, r, pr = hist[i], hist[i-1], rsi[i], rsi[i-1]
+        if side == 1:
+            trigger = ha[i] == 1 and ha[i-1] == -1 and h > ph and r > pr and r < 50
+            stop = ha[i] == -1 and h < ph and r < pr
+        else:
+            trigger = ha[i] == -1 and ha[i-1] == 1 and h < ph and r < pr and r > 50
+            stop = ha[i] == 1 and h > ph and r > pr
+        if not active and authorized[i] and trigger:
+            active, entry = True, i
+        elif active and stop:
+            active = False
+    return active, entry
+
+
+# ─────────────────────────────────────────────
+# API
+# ─────────────────────────────────────────────
+def _f(x): return np.asarray(x, dtype=np.float64)
+def _i(x): return np.asarray(x, dtype=np.int64)
+
+
+def ha_adx_events(color, adx, adx_th):
+    """
+    HA + ADX (crypto_bot, mtf_bot, Escáner Pro): entra con vela verde y ADX > umbral,
+    sale con la primera vela roja. Devuelve un array con 1 (entrada), -1 (salida) o 0.
+    """
+    color, adx = _i(color), _f(adx)
+    c, a = _prep(color, adx)
+    out = np.zeros(len(color), dtype=np.int64)
+    if NUMBA:
+        _ha_adx_kernel(c, a, float(adx_th), out)
+        return out
+    buf = [0] * len(color)
+    _ha_adx_kernel(c, a, float(adx_th), buf)
+    out[:] = buf
+    return out
+
+
+def last_ha_adx_signal(color, adx, adx_th, close):
+    """Última señal HA + ADX: state 1 si la última fue entrada, -1 si fue salida, 0 si no hubo."""
+    events = ha_adx_events(color, adx, adx_th)
+    hits = np.flatnonzero(events)
+    if len(hits) == 0: return EngineResult(0, -1, 0.0)
+    idx = hits[-1]
+    return _result(events[idx], idx, _f(close))
+
+
+def macd_flip_position(ha_color, hist, close, zero_filter=True):
+    """
+    HA + giro del histograma MACD (bot_detalle, bot_cripto_detalle, páginas H.A. + MACD).
+    Sale cuando el histograma se da vuelta; desde FUERA entra a favor del color HA.
+    `zero_filter=True` exige además el histograma del lado opuesto del cero (versión bots).
+    """
+    ha, h = _prep(_i(ha_color), _f(hist))
+    state, entry = _macd_flip_kernel(ha, h, bool(zero_filter))
+    return _result(state, entry, _f(close))
+
+
+def sly_state(ha_dir, hist, close):
+    """Motor SLY (run_sly_engine): giro HA + histograma acelerando del lado opuesto del cero."""
+    hd, h = _prep(_i(ha_dir), _f(hist))
+    state, entry = _sly_kernel(hd, h)
+    return _result(state, entry, _f(close))
+
+
+def trend_filter_signal(ha_color, hist, rsi, authorized, close, side=1):
+    """
+    HA + MACD + RSI + régimen EMA52/EMA260 (páginas Señales - Cierres).
+    `authorized` es el array booleano del régimen ya combinado con el override
+    (Bear-Longs / Bull-Shorts). `side=1` LONG, `side=-1` SHORT.
+    Devuelve state=side si la posición sigue vigente.
+    """
+    ha, h, r, auth = _prep(_i(ha_color), _f(hist), _f(rsi), np.asarray(authorized, dtype=np.bool_))
+    active, entry = _trend_filter_kernel(ha, h, r, auth, int(side))
+    return _result(side if active else 0, entry, _f(close))
@@ -0,0 +1,83 @@
+"""
+Instantánea de datos de un ciclo del programador de bots (`core.scheduler`).
+
+`alerta_bot`, `mtf_bot` y `bot_detalle` bajaban por separado el mismo
+universo de acciones (y `macro_sly_bot` buena parte de él). Una `Snapshot`
+vive lo que dura un ciclo y recuerda lo que ya se descargó:
+
+- paneles de Yahoo por (intervalo, periodo): el primer bot que pide el
+  diario de un ticker lo baja y los demás lo reciben de memoria (solo se
+  piden los tickers que faltan);
+- lotes de KuCoin Futures por (símbolo, temporalidad, velas);
+- cualquier otra carga con `get(clave, loader)`.
+
+Cada bot recibe la instantánea como argumento opcional; sin ella arma una
+propia, así que corrido suelto se comporta como antes:
+
+    snap = Snapshot()
+    alerta_bot.run_scan(snapshot=snap)
+    mtf_bot.run_bot(snapshot=snap)          # el diario ya está en memoria
+"""
+import threading
+import time
+
+from core.yf_panel import CHUNK_SIZE, THREADS, load_panel, load_panels
+
+
+class Snapshot:
+    def __init__(self):
+        self.created = time.time()
+        self.memo = {}                  # clave -> resultado de `get`
+        self.panels = {}                # (intervalo, periodo) -> {ticker: DataFrame}
+        self.tried = {}                 # (intervalo, periodo) -> tickers ya pedidos (aunque fallaran)
+        self.candles = {}               # (símbolo, tf, velas) -> filas ccxt o None
+        self.loads = 0                  # descargas reales hechas (para medir lo que se ahorra)
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key, loader):
+        """Resultado de `loader()` para `key`, calculado una sola vez por ciclo."""
+        with self._key_lock(("memo", key)):
+            if key not in self.memo:
+                self.memo[key] = loader()
+                self.loads += 1
+            return self.memo[key]
+
+    # ─────────────────────────────────────────────
+    # YAHOO
+    # ─────────────────────────────────────────────
+    def yf_panel(self, tickers, interval="1d", period="max", chunk_size=CHUNK_SIZE, threads=THREADS, progress=None):
+        """Como `core.yf_panel.load_panel`, bajando solo los tickers que nadie pidió todavía."""
+        key = (interval, period)
+        with self._key_lock(("yf",) + key):
+            have, tried = self.panels.setdefault(key, {}), self.tried.setdefault(key, set())
+            missing = [t for t in dict.fromkeys(tickers) if t not in tried]
+            if missing:
+                have.update(load_panel(missing, interval, period, chunk_size, threads, progress))
+                tried.update(missing)
+                self.loads += 1
+            return {t: have[t] for t in tickers if t in have}
+
+    def yf_panels(self, tickers, config, progress=None):
+        """Como `core.yf_panel.load_panels` (semanal y mensual derivados del diario compartido)."""
+        return load_panels(tickers, config, progress=progress, loader=self.yf_panel)
+
+    # ─────────────────────────────────────────────
+    # KUCOIN FUTURES
+    # ─────────────────────────────────────────────
+    def kucoin_batch(self, jobs, **kwargs):
+        """Como `core.kucoin_pool.fetch_kucoin_batch` (sin precios): solo se piden las series que faltan."""
+        from core.kucoin_pool import fetch_kucoin_batch     # ccxt solo hace falta para los bots cripto
+
+        jobs = list(dict.fromkeys(jobs))
+        with self._key_lock(("kucoin",)):
+            missing = [j for j in jobs if j not in self.candles]
+            if missing:
+                got, _ = fetch_kucoin_batch(missing, **kwargs)
+                for j in missing: self.candles[j] = got.get(j[:2])
+                self.loads += 1
+        return {j[:2]: self.candles[j] for j in jobs}, {}
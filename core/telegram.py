@@ -0,0 +1,330 @@
+"""
+Envío a Telegram compartido por todos los bots.
+
+Cada bot tenía su copia de `send_telegram_msg` / `send_message`: un
+`requests.post` nuevo (conexión TLS nueva) por fragmento, `time.sleep` fijos
+entre fragmentos y, ante un 429 de Telegram, el mensaje se perdía en
+silencio. Acá hay un solo cliente por token:
+
+- una `requests.Session` con pool de conexiones, reutilizada en todos los
+  envíos;
+- una cola por chat que respeta los límites de Telegram (un mensaje por
+  segundo por chat, 20 por minuto en grupos y 30 por segundo por bot) y
+  conserva el orden de los mensajes de cada chat;
+- ante un 429 espera lo que pide `parameters.retry_after` y reintenta; ante
+  errores de red o 5xx reintenta con espera exponencial; si Telegram no
+  puede interpretar el Markdown lo manda como texto plano;
+- un hilo de fondo hace los envíos, así que el escaneo no se frena: `send`
+  encola y vuelve. Al salir del proceso se espera a que las colas se vacíen.
+
+Los reportes se arman como lista de bloques (uno por activo o categoría) y
+`pack_blocks` los junta, en orden, en la menor cantidad de mensajes de hasta
+4096 caracteres sin cortar nunca una entidad Markdown (`*...*`, `_..._`,
+`` `...` ``, enlaces): menos mensajes son menos llamadas y menos esperas por
+el límite de envío.
+
+    from core.telegram import send_blocks, send_message
+    send_message(TELEGRAM_TOKEN, CHAT_ID, "⚡ **INICIANDO...**")   # encola y vuelve
+    send_blocks(TELEGRAM_TOKEN, CHAT_ID, [header] + fichas)
+
+`SLY_TELEGRAM_API` cambia la URL base de la API; `core.telegram_fake` la
+imita para probar sin Telegram.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = os.environ.get("SLY_TELEGRAM_API", "https://api.telegram.org")
+MAX_LEN = 4096                  # tope de Telegram por mensaje (unidades UTF-16)
+CHAT_INTERVAL_S = 1.0           # un mensaje por segundo por chat
+GROUP_INTERVAL_S = 3.0          # 20 por minuto en grupos (chat id negativo)
+GLOBAL_INTERVAL_S = 1 / 30      # 30 por segundo por bot
+MAX_RETRIES = 5
+MAX_BACKOFF_S = 30.0
+TIMEOUT_S = 15
+FLUSH_TIMEOUT_S = 300
+
+
+# ─────────────────────────────────────────────
+# EMPAQUETADO DE MENSAJES
+# ─────────────────────────────────────────────
+def units(text):
+    """Largo como lo cuenta Telegram (unidades UTF-16: un emoji suele valer 2)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def entity_spans(text):
+    """
+    [(inicio, fin, marca)] de las entidades Markdown (clásico) de `text`:
+    ```pre```, `code`, *bold*, _italic_ y [texto](url). Una marca sin cerrar
+    no abre entidad (Telegram la rechazaría igual).
+    """
+    spans, i, n = [], 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        end, mark = -1, ch
+        if text.startswith("```", i):
+            mark = "```"
+            end = text.find("```", i + 3)
+            if end >= 0: end += 3
+        elif ch in "`*_":
+            end = text.find(ch, i + 1)
+            if end >= 0: end += 1
+        elif ch == "[":
+            close = text.find("](", i + 1)
+            if close >= 0 and "\n" not in text[i:close]:
+                end = text.find(")", close + 2)
+                if end >= 0: end += 1
+        if end > 0:
+            spans.append((i, end, mark))
+            i = end
+        else:
+            i += 1
+    return spans
+
+
+def _split_entity(text, mark, limit):
+    """Parte una entidad más larga que `limit` cerrando y reabriendo su marca en cada pedazo."""
+    if mark == "[":
+        inner, mark = text, ""          # un enlace no se puede repartir: queda como texto partido
+    else:
+        inner = text[len(mark):-len(mark)]
+    size = max(limit - 2 * units(mark), 1)
+    out, buf = [], ""
+    for ch in inner:
+        if units(buf + ch) > size:
+            out.append(f"{mark}{buf}{mark}")
+            buf = ""
+        buf += ch
+    if buf: out.append(f"{mark}{buf}{mark}")
+    return out
+
+
+def split_block(text, limit=MAX_LEN):
+    """
+    Parte `text` en pedazos de hasta `limit` unidades sin cortar entidades
+    Markdown: corta en el último salto de línea que entra, si no en el último
+    espacio y, si no hay, en el último borde entre entidades.
+    """
+    text = text.strip("\n")
+    if units(text) <= limit: return [text] if text.strip() else []
+    spans = entity_spans(text)
+    inside = bytearray(len(text) + 1)           # 1 si cortar antes de ese índice parte una entidad
+    for a, b, _ in spans:
+        inside[a + 1:b] = b"\x01" * (b - a - 1)
+    cum = [0]
+    for ch in text:
+        cum.append(cum[-1] + units(ch))
+
+    out, start, n = [], 0, len(text)
+    while start < n:
+        if cum[n] - cum[start] <= limit:
+            out.append(text[start:])
+            break
+        hi = start
+        while hi + 1 <= n and cum[hi + 1] - cum[start] <= limit: hi += 1
+        cut = None
+        for prefer in ("\n", " "):
+            for p in range(hi, start, -1):
+                if not inside[p] and text[p - 1] == prefer:
+                    cut = p
+                    break
+            if cut: break
+        if cut is None:
+            cut = next((p for p in range(hi, start, -1) if not inside[p]), None)
+        if cut is None:                          # la entidad que arranca acá no entra en un mensaje
+            a, b, mark = next(s for s in spans if s[0] <= start < s[1])
+            out.extend(_split_entity(text[a:b], mark, limit))
+            start = b
+            continue
+        out.append(text[start:cut])
+        start = cut
+    return [p.strip("\n") for p in out if p.strip()]
+
+
+def pack_blocks(blocks, limit=MAX_LEN, sep="\n\n"):
+    """
+    Junta bloques de reporte (uno por activo o categoría), en orden, en la
+    menor cantidad de mensajes de hasta `limit` unidades: llena cada mensaje
+    con todos los bloques siguientes que entran (con orden fijo, eso da el
+    mínimo). Un bloque que no entra solo se parte con `split_block`.
+    """
+    out, cur = [], ""
+    for block in blocks:
+        for piece in split_block(block or "", limit):
+            if cur and units(cur) + units(sep) + units(piece) <= limit:
+                cur += sep + piece
+            else:
+                if cur: out.append(cur)
+                cur = piece
+    if cur: out.append(cur)
+    return out
+
+
+def chat_interval(chat_id):
+    return GROUP_INTERVAL_S if str(chat_id).startswith("-") else CHAT_INTERVAL_S
+
+
+def _session(pool=8):
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=pool, pool_maxsize=pool))
+    s.mount("http://", HTTPAdapter(pool_connections=pool, pool_maxsize=pool))
+    return s
+
+
+class Delivery:
+    def __init__(self, token, api_url=API_URL, session=None, global_interval_s=GLOBAL_INTERVAL_S, max_retries=MAX_RETRIES):
+        self.url = f"{api_url.rstrip('/')}/bot{token}"
+        self.session = session or _session()
+        self.global_interval_s, self.max_retries = global_interval_s, max_retries
+        self.queues = {}            # chat -> deque([payload, intentos])
+        self.ready_at = {}          # chat -> time.monotonic() desde el que se puede enviar
+        self.global_ready_at = 0.0
+        self.pending = 0
+        self.sent, self.failed = 0, []
+        self._cv = threading.Condition()
+        self._worker = None
+        self._closed = False
+
+    def send(self, chat_id, text, parse_mode="Markdown"):
+        """Encola `text` (partido si hace falta) para `chat_id` y vuelve; devuelve cuántos mensajes."""
+        return self._enqueue(chat_id, split_block(text or ""), parse_mode)
+
+    def send_blocks(self, chat_id, blocks, parse_mode="Markdown", sep="\n\n"):
+        """Empaqueta `blocks` con `pack_blocks` y los encola; devuelve cuántos mensajes."""
+        return self._enqueue(chat_id, pack_blocks(blocks, sep=sep), parse_mode)
+
+    def _enqueue(self, chat_id, parts, parse_mode):
+        if self._closed: raise RuntimeError("Delivery cerrado")
+        with self._cv:
+            q = self.queues.setdefault(str(chat_id), deque())
+            for p in parts:
+                payload = {"chat_id": chat_id, "text": p}
+                if parse_mode: payload["parse_mode"] = parse_mode
+                q.append([payload, 0])
+            self.pending += len(parts)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="telegram-delivery", daemon=True)
+                self._worker.start()
+            self._cv.notify_all()
+        return len(parts)
+
+    def flush(self, timeout=None):
+        """Espera a que se vacíen las colas; False si se venció `timeout`."""
+        with self._cv:
+            return self._cv.wait_for(lambda: self.pending == 0, timeout)
+
+    def close(self, timeout=FLUSH_TIMEOUT_S):
+        done = self.flush(timeout)
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+        self.session.close()
+        return done
+
+    # ─────────────────────────────────────────────
+    # HILO DE ENVÍO
+    # ─────────────────────────────────────────────
+    def _next_chat(self):
+        """Chat con mensajes cuyo turno llega antes (con el lock tomado); None si no hay nada."""
+        best = None
+        for chat, q in self.queues.items():
+            if q:
+                at = max(self.ready_at.get(chat, 0.0), self.global_ready_at)
+                if best is None or at < best[0]: best = (at, chat)
+        return best
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while True:
+                    if self._closed: return
+                    best = self._next_chat()
+                    if best is None:
+                        self._cv.wait()
+                        continue
+                    wait = best[0] - time.monotonic()
+                    if wait <= 0: break
+                    self._cv.wait(wait)
+                chat = best[1]
+                item = self.queues[chat][0]
+            retry_after = self._post(item)
+            with self._cv:
+                now = time.monotonic()
+                self.global_ready_at = now + self.global_interval_s
+                item[1] += 1
+                if retry_after is not None and item[1] <= self.max_retries:
+                    self.ready_at[chat] = now + retry_after
+                    continue
+                if retry_after is not None: self.failed.append(item[0])
+                self.queues[chat].popleft()
+                self.pending -= 1
+                self.ready_at[chat] = now + chat_interval(chat)
+                self._cv.notify_all()
+
+    def _post(self, item):
+        """Envía un fragmento. None si terminó (enviado o error definitivo); si no, segundos hasta reintentar."""
+        payload, tries = item
+        backoff = min(2.0 ** tries, MAX_BACKOFF_S)
+        try:
+            r = self.session.post(f"{self.url}/sendMessage", data=payload, timeout=TIMEOUT_S)
+            body = r.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"Telegram: error de red ({e}); reintento en {backoff:.0f}s")
+            return backoff
+        if body.get("ok"):
+            self.sent += 1
+            return None
+        desc = body.get("description", "")
+        if r.status_code == 429:
+            return float(body.get("parameters", {}).get("retry_after", backoff))
+        if r.status_code >= 500:
+            return backoff
+        if r.status_code == 400 and "parse_mode" in payload and "parse" in desc.lower():
+            payload.pop("parse_mode")       # Markdown inválido: se manda como texto plano
+            return 0.0
+        print(f"Telegram: mensaje descartado ({r.status_code} {desc})")
+        self.failed.append(payload)
+        return None
+
+
+# Un cliente por token, compartido por todo el proceso
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_delivery(token, api_url=API_URL):
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get((token, api_url))
+        if client is None or client._closed:
+            client = _CLIENTS[(token, api_url)] = Delivery(token, api_url)
+        return client
+
+
+def send_message(token, chat_id, text, parse_mode="Markdown"):
+    """Encola un mensaje; sin token o chat no hace nada (devuelve 0)."""
+    if not token or not chat_id or not text: return 0
+    return get_delivery(token).send(chat_id, text, parse_mode)
+
+
+def send_blocks(token, chat_id, blocks, parse_mode="Markdown", sep="\n\n"):
+    """Encola bloques de reporte empaquetados en la menor cantidad de mensajes."""
+    if not token or not chat_id: return 0
+    return get_delivery(token).send_blocks(chat_id, blocks, parse_mode, sep)
+
+
+def flush_all(timeout=FLUSH_TIMEOUT_S):
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+    return all(c.flush(timeout) for c in clients)
+
+
+atexit.register(flush_all)
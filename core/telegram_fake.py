@@ -0,0 +1,116 @@
+"""
+Servidor local que imita la Bot API de Telegram (`sendMessage`).
+
+Sirve para probar `core.telegram` (y los bots) sin mandar nada de verdad:
+
+    with FakeBotAPI(chat_interval_s=1.0) as api:
+        d = Delivery("TOKEN", api_url=api.url)
+        d.send(-100123, "hola"); d.flush()
+        api.messages        # [{"chat_id": "-100123", "text": "hola", ...}]
+
+o, para un bot entero, `SLY_TELEGRAM_API=http://127.0.0.1:<puerto>`.
+
+Acepta form o JSON como Telegram y guarda cada mensaje aceptado con su hora
+de llegada. Responde 400 si el texto pasa de 4096 caracteres (UTF-16) y 429 con
+`parameters.retry_after` si un chat recibe mensajes más rápido que
+`chat_interval_s` (o en las llamadas que se indiquen en `flood_on`, para
+forzar el caso). `parse_errors=True` rechaza Markdown con `*`, `_` o `` ` ``
+sin cerrar, como el parser de Telegram.
+"""
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+TEXT_LIMIT = 4096
+
+
+def unbalanced_markdown(text):
+    """True si queda un `*`, `_` o `` ` `` sin cerrar (Markdown clásico)."""
+    stack = None
+    for ch in text:
+        if stack is None and ch in "*_`": stack = ch
+        elif ch == stack: stack = None
+    return stack is not None
+
+
+class FakeBotAPI:
+    def __init__(self, chat_interval_s=0.0, retry_after=1, flood_on=(), parse_errors=False, host="127.0.0.1", port=0):
+        self.chat_interval_s, self.retry_after = chat_interval_s, retry_after
+        self.flood_on = set(flood_on)       # números de llamada (desde 1) que responden 429
+        self.parse_errors = parse_errors
+        self.messages, self.calls, self.floods = [], 0, 0
+        self.last = {}                      # chat -> hora del último mensaje aceptado
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-bot-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def texts(self, chat_id=None):
+        return [m["text"] for m in self.messages if chat_id is None or m["chat_id"] == str(chat_id)]
+
+    def handle(self, method, params):
+        """(status, cuerpo) para una llamada a la API."""
+        if method != "sendMessage":
+            return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+        chat, text = str(params.get("chat_id", "")), params.get("text", "")
+        if not chat or not text:
+            return 400, {"ok": False, "error_code": 400, "description": "Bad Request: message text is empty"}
+        if len(text.encode("utf-16-le")) // 2 > TEXT_LIMIT:
+            return 400, {"ok": False, "error_code": 400, "description": "Bad Request: message is too long"}
+        if self.parse_errors and params.get("parse_mode") and unbalanced_markdown(text):
+            return 400, {"ok": False, "error_code": 400, "description": "Bad Request: can't parse entities"}
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            wait = self.last.get(chat, -math.inf) + self.chat_interval_s - now
+            if self.calls in self.flood_on or wait > 0:
+                self.floods += 1
+                retry = max(self.retry_after, math.ceil(wait)) if wait > 0 else self.retry_after
+                return 429, {"ok": False, "error_code": 429, "description": f"Too Many Requests: retry after {retry}",
+                             "parameters": {"retry_after": retry}}
+            self.last[chat] = now
+            msg = {"chat_id": chat, "text": text, "parse_mode": params.get("parse_mode"), "at": now, "message_id": len(self.messages) + 1}
+            self.messages.append(msg)
+        return 200, {"ok": True, "result": {"message_id": msg["message_id"], "chat": {"id": chat}, "text": text}}
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+                if "json" in (self.headers.get("Content-Type") or ""):
+                    params = json.loads(raw or "{}")
+                else:
+                    params = dict(parse_qsl(raw))
+                status, body = api.handle(self.path.rsplit("/", 1)[-1], params)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
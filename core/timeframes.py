@@ -0,0 +1,58 @@
+"""
+Derivación de temporalidades mayores a partir de una sola serie fina.
+
+Acciones: se baja solo el diario y se arman semanal y mensual con el mismo
+anclaje que usa Yahoo (semana que arranca el lunes, mes etiquetado el día 1).
+Cripto: 1h / 4h / 1d / 1w salen de una serie de 15m o 1h, anclados a 00:00
+UTC como las velas del exchange (el índice tiene que venir en UTC naive, que
+es lo que devuelve `core.ohlcv_store`).
+
+`flag_partial=True` agrega la columna booleana `Partial`: True en la vela que
+todavía no cerró (su fin de periodo es posterior a `now`). Las velas cerradas
+coinciden con las del exchange siempre que la serie fina esté completa.
+"""
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+OHLCV_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum", "Vol": "sum"}
+
+# Reglas de pandas válidas tanto en 1.3 como en 2.x/3.x ('H' y 'M' ya no lo son)
+RESAMPLE_RULES = {
+    "1h": "60min", "4h": "240min",
+    "1d": "D", "1day": "D",
+    "1w": "W-MON", "1wk": "W-MON", "1week": "W-MON",
+    "1mo": "MS",
+}
+
+
+def _rule(interval, week_start):
+    rule = RESAMPLE_RULES[interval]
+    return f"W-{week_start}" if rule.startswith("W") else rule
+
+
+def resample_ohlcv(df, interval, now=None, flag_partial=False, week_start="MON"):
+    """
+    Velas finas (índice de fechas) -> `interval`. Las columnas OHLCV que falten
+    se ignoran. `now` (naive, misma zona que el índice) decide qué vela está abierta.
+    """
+    rule = _rule(interval, week_start)
+    agg = {c: f for c, f in OHLCV_AGG.items() if c in df.columns}
+    kw = dict(label="left", closed="left") if rule.startswith("W") else {}
+    out = df.resample(rule, **kw).agg(agg).dropna(subset=["Close"])
+    if out.empty: return out
+
+    # Una primera vela que arranca antes que los datos está incompleta (Open de mitad de periodo).
+    # Con acciones también cae si el periodo abrió con feriado: se pierde solo la vela más vieja.
+    if df.index[0] > out.index[0]:
+        out = out.iloc[1:]
+
+    if flag_partial:
+        now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+        ends = pd.DatetimeIndex([ts + to_offset(rule) for ts in out.index]) if rule.startswith(("W", "M")) else out.index + to_offset(rule)
+        out["Partial"] = ends > now
+    return out
+
+
+def derive_timeframes(df, intervals, now=None, flag_partial=False, week_start="MON"):
+    """Dict intervalo -> DataFrame para todos los `intervals` a partir de la misma serie fina."""
+    return {iv: resample_ohlcv(df, iv, now, flag_partial, week_start) for iv in intervals}
@@ -0,0 +1,137 @@
+"""
+Servidor local que imita el WebSocket público de KuCoin Futures.
+
+Sirve para probar `core.live_feed` (y lo que lo consume) sin el exchange:
+
+    server = await ReplayServer("grabacion.jsonl").start()
+    feed = await LiveFeed(rest_url=server.url, markets={"BTC/USDT:USDT": "XBTUSDTM"}, seed=False).start()
+    await feed.track([("BTC/USDT:USDT", "1m")])
+
+Responde `POST /api/v1/bullet-public` como KuCoin y, en el WebSocket, manda
+`welcome`, contesta `ping` con `pong` y cada `subscribe` con `ack`. Cuando
+las suscripciones se asientan (`settle_s` sin suscripciones nuevas; por
+defecto varias veces el espaciado con que `core.live_feed` suscribe) reenvía
+los mensajes grabados de los tópicos suscriptos: al ritmo original si
+`speed > 0` (2 = el doble de rápido) o sin espera. Un tópico suscripto con la
+reproducción ya en marcha recibe la suya aparte. `drop_after` corta cada
+conexión tras N mensajes para probar la reconexión.
+
+La grabación es la que deja `LiveFeed(record=...)` o `python -m core.live_feed
+--record`: un mensaje JSON por línea con `_recv` (ms) de la recepción.
+`candle_message` y `ticker_message` arman mensajes sintéticos.
+"""
+import asyncio
+import json
+import socket
+
+from aiohttp import WSMsgType, web
+
+from core.live_feed import CANDLE_TOPIC, SUBSCRIBE_INTERVAL_S, TICKER_TOPIC
+
+SETTLE_S = 5 * SUBSCRIBE_INTERVAL_S
+
+
+def load_recording(path):
+    with open(path) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def candle_message(contract, interval, row, recv=None):
+    """Mensaje de vela a partir de una fila ccxt [ts_ms, o, h, l, c, v]."""
+    ts, o, h, l, c, v = row[:6]
+    msg = {"type": "message", "topic": f"{CANDLE_TOPIC}:{contract}_{interval}", "subject": "candle.stick",
+           "data": {"symbol": contract, "candles": [str(int(ts) // 1000), str(o), str(c), str(h), str(l), str(v), str(v * c)], "time": int(ts)}}
+    if recv is not None: msg["_recv"] = recv
+    return msg
+
+
+def ticker_message(contract, price, recv=None):
+    msg = {"type": "message", "topic": f"{TICKER_TOPIC}:{contract}", "subject": "ticker", "data": {"symbol": contract, "price": str(price)}}
+    if recv is not None: msg["_recv"] = recv
+    return msg
+
+
+class ReplayServer:
+    def __init__(self, messages=(), speed=0.0, settle_s=SETTLE_S, drop_after=None, ping_interval_ms=18000, host="127.0.0.1", port=0):
+        self.messages = load_recording(messages) if isinstance(messages, str) else list(messages)
+        self.speed, self.settle_s, self.drop_after = speed, settle_s, drop_after
+        self.ping_interval_ms = ping_interval_ms
+        self.host, self.port = host, port
+        self.connections = 0
+        self.subscriptions = []
+        self.pings = 0
+        self.runner = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/api/v1/bullet-public", self._bullet)
+        app.router.add_get("/ws", self._ws)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+        await web.SockSite(self.runner, sock).start()
+        return self
+
+    async def close(self):
+        if self.runner: await self.runner.cleanup()
+
+    async def _bullet(self, request):
+        server = {"endpoint": f"ws://{self.host}:{self.port}/ws", "encrypt": False, "protocol": "websocket",
+                  "pingInterval": self.ping_interval_ms, "pingTimeout": 10000}
+        return web.json_response({"code": "200000", "data": {"token": "replay", "instanceServers": [server]}})
+
+    async def _play(self, ws, topics, last_sub, claimed):
+        loop = asyncio.get_running_loop()
+        while loop.time() - last_sub[0] < self.settle_s:
+            await asyncio.sleep(self.settle_s)
+        # Lo suscripto hasta acá lo reproduce este; lo que llegue después, otro
+        topics = set(topics) - claimed
+        claimed.update(topics)
+        sent, prev = 0, None
+        for msg in self.messages:
+            if msg.get("topic") not in topics: continue
+            recv = msg.get("_recv")
+            if self.speed > 0 and recv is not None and prev is not None:
+                await asyncio.sleep(max(0.0, (recv - prev) / 1000 / self.speed))
+            prev = recv if recv is not None else prev
+            await ws.send_json({k: v for k, v in msg.items() if k != "_recv"})
+            await asyncio.sleep(0)
+            sent += 1
+            if self.drop_after is not None and sent >= self.drop_after:
+                await ws.close()
+                return
+
+    async def _ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        await ws.send_json({"id": request.query.get("connectId", ""), "type": "welcome"})
+        topics, last_sub, claimed, players = set(), [0.0], set(), []
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT: continue
+                m = json.loads(msg.data)
+                if m.get("type") == "ping":
+                    self.pings += 1
+                    await ws.send_json({"id": m.get("id"), "type": "pong"})
+                elif m.get("type") == "subscribe":
+                    new = set(m["topic"].split(","))
+                    self.subscriptions.append(m["topic"])
+                    last_sub[0] = asyncio.get_running_loop().time()
+                    if m.get("response"): await ws.send_json({"id": m.get("id"), "type": "ack"})
+                    if not players or topics <= claimed:
+                        # Primera suscripción, o el último reproductor ya arrancó: uno nuevo
+                        topics = set(new)
+                        players.append(asyncio.ensure_future(self._play(ws, topics, last_sub, claimed)))
+                    else:
+                        topics.update(new)
+        finally:
+            for p in players: p.cancel()
+        return ws
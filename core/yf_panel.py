@@ -0,0 +1,76 @@
+"""
+Cargador masivo de Yahoo Finance para los escáneres de acciones.
+
+Reemplaza el `yf.download(symbol, ...)` por símbolo y temporalidad: cada
+intervalo se baja una sola vez por lote, en bloques de `CHUNK_SIZE` tickers
+(para no pasarse del largo de URL de Yahoo) y con los hilos de yfinance.
+Los bloques van en serie porque yfinance junta los resultados en un dict
+global que no soporta dos `yf.download` simultáneos.
+
+Si la configuración pide diario, semanal y mensual, solo se descarga el
+diario (con el periodo más largo de los tres) y el resto se deriva de ahí.
+Todo pasa por el almacén local (`core.ohlcv_store`).
+"""
+from core.ohlcv_store import period_start, yf_download_cached
+from core.timeframes import derive_timeframes
+
+CHUNK_SIZE = 100
+THREADS = 8
+FROM_DAILY = ("1wk", "1mo")
+
+
+def load_panel(tickers, interval="1d", period="max", chunk_size=CHUNK_SIZE, threads=THREADS, progress=None):
+    """Dict ticker -> DataFrame (Open/High/Low/Close/Volume) para un intervalo."""
+    tickers = list(dict.fromkeys(tickers))
+    chunks = [tickers[i:i+chunk_size] for i in range(0, len(tickers), chunk_size)]
+    out = {}
+    for n, chunk in enumerate(chunks, start=1):
+        try:
+            out.update(yf_download_cached(chunk, interval=interval, period=period, auto_adjust=True, threads=threads))
+        except Exception:
+            pass
+        if progress: progress(n, len(chunks))
+    return out
+
+
+def _longest(periods):
+    starts = [period_start(p) for p in periods]
+    if any(s is None for s in starts): return "max"
+    return periods[starts.index(min(starts))]
+
+
+def load_panels(tickers, config, chunk_size=CHUNK_SIZE, threads=THREADS, progress=None, loader=None):
+    """
+    `config` con el formato de las páginas: {"1D": {"int": "1d", "per": "2y"}, ...}.
+    Devuelve {etiqueta: {ticker: DataFrame}}. `loader` reemplaza a `load_panel`
+    (misma firma); `core.snapshot` lo usa para compartir las descargas.
+    """
+    loader = loader or load_panel
+    derive = {k: c for k, c in config.items() if c["int"] in FROM_DAILY}
+    if not any(c["int"] == "1d" for c in config.values()): derive = {}
+    direct = {k: c for k, c in config.items() if k not in derive}
+
+    daily_period = _longest([c["per"] for c in config.values() if c["int"] == "1d" or c["int"] in FROM_DAILY])
+    plan = []
+    for label, c in direct.items():
+        per = daily_period if c["int"] == "1d" and derive else c["per"]
+        plan.append((label, c["int"], per))
+
+    panels, daily = {}, None
+    for n, (label, interval, period) in enumerate(plan):
+        step = (lambda d, t, n=n: progress(n * t + d, len(plan) * t)) if progress else None
+        panel = loader(tickers, interval, period, chunk_size, threads, step)
+        if interval == "1d" and derive: daily = panel
+        panels[label] = _trim(panel, config[label]["per"]) if period != config[label]["per"] else panel
+
+    if derive:
+        bars = {t: derive_timeframes(df, [c["int"] for c in derive.values()]) for t, df in daily.items()}
+        for label, c in derive.items():
+            panels[label] = _trim({t: b[c["int"]] for t, b in bars.items()}, c["per"])
+    return panels
+
+
+def _trim(panel, period):
+    start = period_start(period)
+    if start is None: return panel
+    return {t: df[df.index >= start] for t, df in panel.items()}
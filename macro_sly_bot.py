@@ -1,17 +1,19 @@
-import yfinance as yf
 import pandas as pd
 import pandas_ta as ta
-import numpy as np
-import requests
-import time
 import os
 from datetime import datetime
+from core.heikin_ashi import heikin_ashi, ha_direction
+from core.signals import sly_state
+from core.snapshot import Snapshot
+from core.telegram import send_blocks
+from core.alert_state import ALERT_MODE, AlertState, digest
 
 # ─────────────────────────────────────────────
 # 1. CREDENCIALES
 # ─────────────────────────────────────────────
 TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
+BOT = "macro_sly_bot"  # clave del estado de alertas (core.alert_state)
 
 # BÓVEDA V47 (46 ACTIVOS EXACTOS)
 TICKERS_TO_SCAN = [
@@ -30,12 +32,7 @@ MACRO_CONFIG = {
 # 2. MOTOR TÉCNICO
 # ─────────────────────────────────────────────
 def calculate_heikin_ashi(df):
-    ha_close = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    ha_open = np.zeros(len(df))
-    ha_open[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    for i in range(1, len(df)):
-        ha_open[i] = (ha_open[i-1] + ha_close.iloc[i-1]) / 2
-    return ha_open, ha_close
+    return heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
 
 def run_sly_engine(df):
     if df.empty or len(df) < 35: return 0, 0, None, False
@@ -43,19 +40,10 @@ def run_sly_engine(df):
     if macd is None: return 0, 0, None, False
     hist = macd['MACDh_12_26_9']
     ha_open, ha_close = calculate_heikin_ashi(df)
-    ha_dir = np.where(ha_close > ha_open, 1, -1)
+    ha_dir = ha_direction(ha_open, ha_close)
     
-    state, entry_px, entry_tm = 0, 0.0, None
-    for i in range(1, len(df)):
-        h, h_prev = hist.iloc[i], hist.iloc[i-1]
-        hd, hd_prev = ha_dir[i], ha_dir[i-1]
-        longC = (hd == 1 and hd_prev == -1 and h < 0 and h > h_prev)
-        shortC = (hd == -1 and hd_prev == 1 and h > 0 and h < h_prev)
-        
-        if longC: state, entry_px, entry_tm = 1, df['Close'].iloc[i], df.index[i]
-        elif shortC: state, entry_px, entry_tm = -1, df['Close'].iloc[i], df.index[i]
-        elif state != 0:
-            if (state == 1 and h < h_prev) or (state == -1 and h > h_prev): state = 0
+    state, entry_px, entry_idx = sly_state(ha_dir, hist.to_numpy(), df['Close'].to_numpy())
+    entry_tm = df.index[entry_idx] if entry_idx >= 0 else None
             
     is_new = False
     if entry_tm is not None:
@@ -68,32 +56,30 @@ def run_sly_engine(df):
 # ─────────────────────────────────────────────
 # 3. COMUNICACIÓN
 # ─────────────────────────────────────────────
-def send_telegram_msg(message):
+def send_telegram_msg(*blocks):
     if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID: return
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    # Fragmentación de seguridad
-    if len(message) > 4000:
-        parts = [message[i:i+4000] for i in range(0, len(message), 4000)]
-        for p in parts: requests.post(url, data={"chat_id": TELEGRAM_CHAT_ID, "text": p, "parse_mode": "Markdown"})
-    else:
-        requests.post(url, data={"chat_id": TELEGRAM_CHAT_ID, "text": message, "parse_mode": "Markdown"})
+    send_blocks(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, blocks)
 
 # ─────────────────────────────────────────────
 # 4. EJECUCIÓN PRINCIPAL
 # ─────────────────────────────────────────────
-def main():
+def main(snapshot=None):
     results_list = []
+    state = AlertState(BOT)  # estado SLY por temporalidad de la corrida anterior
+    # Descarga masiva (el diario se comparte con los demás bots del ciclo; S y M se derivan de él)
+    panels = (snapshot or Snapshot()).yf_panels(TICKERS_TO_SCAN, MACRO_CONFIG)
     for sym in TICKERS_TO_SCAN:
         asset_data = {"symbol": sym, "new_alert": False, "has_position": False, "lines": []}
         curr_price = 0
         for tf_key, config in MACRO_CONFIG.items():
             try:
-                df = yf.download(sym, interval=config['int'], period=config['per'], progress=False, auto_adjust=True)
+                df = panels[tf_key].get(sym, pd.DataFrame())
                 if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
                 if df.empty: continue
                 if tf_key == "1D": curr_price = df['Close'].iloc[-1]
                 
                 st_val, px_in, tm_in, is_new = run_sly_engine(df)
+                state.set(sym, tf_key, [int(st_val), tm_in])
                 
                 if is_new: asset_data["new_alert"] = True
                 if st_val != 0: 
@@ -113,18 +99,24 @@ def main():
         else: asset_data["priority"] = 2
         
         results_list.append(asset_data)
-        time.sleep(0.2)
 
     # ORDENAMIENTO JERÁRQUICO: 1° Nuevas, 2° Activas, 3° Fuera, 4° Alfabético
     results_list.sort(key=lambda x: (x["priority"], x["symbol"]))
     
     header = f"🦅 **REPORTE SYSTEMATRADER MACRO**\n📅 {datetime.now().strftime('%d/%m %H:%M')}\n⎯⎯⎯⎯⎯⎯⎯⎯⎯⎯⎯⎯⎯⎯⎯⎯\n\n"
-    body = ""
+    if ALERT_MODE == "delta":
+        # Solo los activos que entraron, salieron o dieron vuelta su posición
+        changed = set(state.changes())
+        counts = {"🟢🔴 En posición": sum(i["has_position"] for i in results_list), "⚪ Fuera": sum(not i["has_position"] for i in results_list)}
+        header = digest(header.strip(), len(results_list), len(changed), counts)
+        results_list = [i for i in results_list if i["symbol"] in changed]
+    blocks = [header]
     for item in results_list:
         prefix = "🆕 " if item["new_alert"] else "🔹 "
-        body += f"{prefix}**{item['symbol']}** | ${item['price']:,.2f}\n" + "\n".join(item["lines"]) + "\n\n"
+        blocks.append(f"{prefix}**{item['symbol']}** | ${item['price']:,.2f}\n" + "\n".join(item["lines"]))
     
-    send_telegram_msg(header + body)
+    send_telegram_msg(*blocks)
+    state.save()
 
 if __name__ == "__main__":
     main()
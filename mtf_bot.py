@@ -1,10 +1,13 @@
 import os
-import yfinance as yf
 import pandas as pd
-import numpy as np
-import requests
-import time
-from datetime import datetime, timedelta
+from datetime import datetime
+from core.heikin_ashi import heikin_ashi, ha_direction
+from core.indicators import adx
+from core.signals import last_ha_adx_signal
+from core.cpu_pool import map_arrays, ohlc_arrays
+from core.snapshot import Snapshot
+from core.telegram import send_blocks
+from core.alert_state import ALERT_MODE, AlertState, digest
 
 # --- CREDENCIALES ---
 TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN")
@@ -17,6 +20,7 @@ TIMEFRAMES = [
     ("1mo", "MENSUAL", "max")
 ]
 ADX_TH = 20
+BOT = "mtf_bot"  # clave del estado de alertas (core.alert_state)
 
 # --- BASE DE DATOS COMPLETA (TODOS LOS TICKERS) ---
 TICKERS = sorted([
@@ -37,88 +41,91 @@ TICKERS = sorted([
     'SPY', 'QQQ', 'IWM', 'DIA', 'EEM', 'EWZ', 'FXI', 'XLE', 'XLF', 'XLK', 'XLV', 'XLI', 'XLP', 'XLU', 'XLY', 'ARKK', 'SMH', 'TAN', 'GLD', 'SLV', 'GDX'
 ])
 
-def send_message(msg):
+def send_message(*blocks):
     if not TELEGRAM_TOKEN or not CHAT_ID: return
-    try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-        requests.post(url, data={"chat_id": CHAT_ID, "text": msg, "parse_mode": "Markdown"})
-    except: pass
+    send_blocks(TELEGRAM_TOKEN, CHAT_ID, blocks)
 
 # --- CÁLCULOS TÉCNICOS ---
-def calculate_heikin_ashi(df):
-    df_ha = df.copy()
-    df_ha['HA_Close'] = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    ha_open = [df['Open'].iloc[0]]
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[-1] + df_ha['HA_Close'].iloc[i-1]) / 2)
-    df_ha['HA_Open'] = ha_open
-    df_ha['Color'] = np.where(df_ha['HA_Close'] > df_ha['HA_Open'], 1, -1)
-    return df_ha
+# Sobre arrays (no DataFrames): corre en los procesos de core.cpu_pool.
+# La vela de la señal vuelve como posición ("i"); la fecha la pone get_last_signal.
+def last_signal(o, h, l, c, adx_th, period=14):
+    if len(c) < 20: return None
+    # ADX de Wilder (ewm adjust=False) de core.indicators
+    adx_v = adx(h, l, c, period)[0]
+    ha_open, ha_close = heikin_ashi(o, h, l, c, seed="open")
+    color = ha_direction(ha_open, ha_close)
+    sig = last_ha_adx_signal(color, adx_v, adx_th, c)
+    if sig.index >= 0:
+        return {"T": "LONG" if sig.state == 1 else "SHORT", "i": sig.index, "P": sig.price, "A": float(adx_v[sig.index]), "C": sig.state}
+    return {"T": "LONG" if color[-1]==1 else "SHORT", "i": len(c) - 1, "P": float(c[-1]), "A": float(adx_v[-1]), "C": int(color[-1])}
 
-def calculate_adx(df, period=14):
-    df = df.copy()
-    df['H-L'], df['H-C'], df['L-C'] = df['High']-df['Low'], abs(df['High']-df['Close'].shift(1)), abs(df['Low']-df['Close'].shift(1))
-    df['TR'] = df[['H-L', 'H-C', 'L-C']].max(axis=1)
-    df['UpMove'], df['DownMove'] = df['High']-df['High'].shift(1), df['Low'].shift(1)-df['Low']
-    df['+DM'] = np.where((df['UpMove']>df['DownMove']) & (df['UpMove']>0), df['UpMove'], 0)
-    df['-DM'] = np.where((df['DownMove']>df['UpMove']) & (df['DownMove']>0), df['DownMove'], 0)
-    def wilder(x, p): return x.ewm(alpha=1/p, adjust=False).mean()
-    tr_s = wilder(df['TR'], period).replace(0, 1)
-    p_di, n_di = 100*(wilder(df['+DM'], period)/tr_s), 100*(wilder(df['-DM'], period)/tr_s)
-    return wilder(100 * abs(p_di - n_di) / (p_di + n_di), period)
-
-def get_last_signal(df, adx_th):
-    if len(df) < 20: return None
-    df['ADX'] = calculate_adx(df)
-    df_ha = calculate_heikin_ashi(df)
-    last_sig, in_pos = None, False
-    for i in range(1, len(df_ha)):
-        c, a, d, p = df_ha['Color'].iloc[i], df['ADX'].iloc[i], df_ha.index[i], df_ha['Close'].iloc[i]
-        if not in_pos and c == 1 and a > adx_th:
-            in_pos, last_sig = True, {"T": "LONG", "F": d, "P": p, "A": a, "C": 1}
-        elif in_pos and c == -1:
-            in_pos, last_sig = False, {"T": "SHORT", "F": d, "P": p, "A": a, "C": -1}
-    if not last_sig:
-        curr = df_ha.iloc[-1]
-        last_sig = {"T": "LONG" if curr['Color']==1 else "SHORT", "F": curr.name, "P": curr['Close'], "A": df['ADX'].iloc[-1], "C": int(curr['Color'])}
-    return last_sig
+def get_last_signal(df, adx_th, res=None):
+    # `res` es el resultado de last_signal ya calculado en el pool; sin él se calcula acá
+    sig = res if res is not None else last_signal(*ohlc_arrays(df), adx_th)
+    if not sig: return None
+    sig = dict(sig)
+    sig["F"] = df.index[sig.pop("i")]
+    return sig
 
 # --- MOTOR PRINCIPAL ---
-def run_bot():
+def run_bot(snapshot=None):
     print(f"--- START SCAN: {datetime.now()} ---")
-    send_message("⚡ **INICIANDO ESCANEO DE ACTIVOS (+100)...**")
+    if ALERT_MODE == "full": send_message("⚡ **INICIANDO ESCANEO DE ACTIVOS (+100)...**")
     
     master_data = {}
     ahora = datetime.now()
 
-    # Descarga por Timeframe
+    # Descarga única del diario; SEMANAL y MENSUAL se derivan de él
+    # (compartido con los demás bots del ciclo si viene una instantánea)
+    print("Descargando DIARIO...")
+    panels = (snapshot or Snapshot()).yf_panels(TICKERS, {label: {"int": interval, "per": period} for interval, label, period in TIMEFRAMES})
+
+    # Un trabajo (arrays OHLC) por ticker y temporalidad, repartidos entre procesos
+    frames, jobs = {}, {}
     for interval, label, period in TIMEFRAMES:
-        print(f"Descargando {label}...")
         try:
-            data = yf.download(TICKERS, interval=interval, period=period, group_by='ticker', progress=False, auto_adjust=True)
+            data = panels[label]
             for ticker in TICKERS:
                 if ticker not in master_data:
                     master_data[ticker] = {'DIARIO':None, 'SEMANAL':None, 'MENSUAL':None, 'Price':0, 'LastDate':datetime(2000,1,1)}
                 
                 try:
-                    df = data[ticker].dropna() if len(TICKERS)>1 else data.dropna()
+                    df = data[ticker].dropna()
                     if df.empty: continue
                     if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
-                    
-                    sig = get_last_signal(df, ADX_TH)
-                    if sig:
-                        master_data[ticker][label] = sig
-                        if label == 'DIARIO': master_data[ticker]['Price'] = df['Close'].iloc[-1]
-                        if sig['F'] > master_data[ticker]['LastDate']:
-                            master_data[ticker]['LastDate'] = sig['F']
+                    frames[(ticker, label)] = df
+                    jobs[(ticker, label)] = ohlc_arrays(df) + (ADX_TH,)
                 except: pass
         except Exception as e: print(f"Error general en {label}: {e}")
 
+    for (ticker, label), res in map_arrays(last_signal, jobs).items():
+        if not res: continue
+        try:
+            df = frames[(ticker, label)]
+            sig = get_last_signal(df, ADX_TH, res)
+            if sig:
+                master_data[ticker][label] = sig
+                if label == 'DIARIO': master_data[ticker]['Price'] = df['Close'].iloc[-1]
+                if sig['F'] > master_data[ticker]['LastDate']:
+                    master_data[ticker]['LastDate'] = sig['F']
+        except: pass
+
     # Filtrar solo tickers que tienen al menos una señal y ordenar por fecha reciente
     active_tickers = [i for i in master_data.items() if i[1]['LastDate'] > datetime(2000,1,1)]
     sorted_tickers = sorted(active_tickers, key=lambda x: x[1]['LastDate'], reverse=True)
     
-    report_msg = "📋 **REPORTE TÉCNICO DE ACTIVOS**\n\n"
+    report_blocks = ["📋 **REPORTE TÉCNICO DE ACTIVOS**"]
+
+    # Señal por temporalidad de la corrida anterior: en modo delta solo van las fichas que cambiaron
+    state = AlertState(BOT)
+    for ticker, info in sorted_tickers:
+        for tf_key in ('DIARIO', 'SEMANAL', 'MENSUAL'):
+            s = info[tf_key]
+            if s: state.set(ticker, tf_key, [s['C'], s['T'], s['F'].strftime('%Y-%m-%d')])
+    if ALERT_MODE == "delta":
+        changed = set(state.changes())
+        report_blocks = [digest(report_blocks[0], len(sorted_tickers), len(changed))]
+        sorted_tickers = [item for item in sorted_tickers if item[0] in changed]
     
     for ticker, info in sorted_tickers:
         # Encabezado por activo
@@ -143,19 +150,13 @@ def run_bot():
             else:
                 ficha += f"⚪ **{tf_label}** | Sin Datos\n"
         
-        ficha += "━━━━━━━━━━━━━━━━━━\n\n"
-        report_msg += ficha
-        
-        # Control de longitud de mensaje para Telegram
-        if len(report_msg) > 3500:
-            send_message(report_msg)
-            report_msg = ""
-            time.sleep(1)
-
-    if report_msg:
-        send_message(report_msg)
+        ficha += "━━━━━━━━━━━━━━━━━━"
+        report_blocks.append(ficha)
 
-    send_message("✅ **Escaneo completado.**")
+    # Un bloque por activo: se empaquetan en la menor cantidad de mensajes
+    if ALERT_MODE == "full": report_blocks.append("✅ **Escaneo completado.**")
+    send_message(*report_blocks)
+    state.save()
 
 if __name__ == "__main__":
     run_bot()
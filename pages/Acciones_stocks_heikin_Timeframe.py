@@ -1,6 +1,7 @@
 import streamlit as st
 import yfinance as yf
 import pandas as pd
+from core.heikin_ashi import heikin_ashi
 
 # --- CONFIGURACIÓN ---
 st.set_page_config(layout="wide", page_title="SystemaTrader - Stocks HA Matrix Pro")
@@ -69,23 +70,10 @@ def calculate_heikin_ashi(df):
 
     df_ha = df.copy()
     
-    # HA Close
-    df_ha['HA_Close'] = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    
-    # HA Open (Iterativo)
-    df_ha['HA_Open'] = 0.0
-    # Inicializamos
-    df_ha.iat[0, df_ha.columns.get_loc('HA_Open')] = (df.iloc[0]['Open'] + df.iloc[0]['Close']) / 2
-    
-    # Bucle vectorizado optimizado
-    ha_open_idx = df_ha.columns.get_loc('HA_Open')
-    ha_close_idx = df_ha.columns.get_loc('HA_Close')
-    
-    vals = df_ha.values
-    for i in range(1, len(vals)):
-        vals[i, ha_open_idx] = (vals[i-1, ha_open_idx] + vals[i-1, ha_close_idx]) / 2
-    
-    df_ha['HA_Open'] = vals[:, ha_open_idx]
+    # HA Close / HA Open (filtro recursivo vectorizado)
+    ha_open, ha_close = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
+    df_ha['HA_Close'] = ha_close
+    df_ha['HA_Open'] = ha_open
         
     return df_ha
 
@@ -3,12 +3,21 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import time
 from datetime import datetime
+from core.frame_cache import FrameCache
+from core.options import fetch_chains, walls_from_chains
+from core.pipeline import guard, run_pipeline
+from core.scan_store import SCANS
 
 # --- CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="Escáner Pro: Master Database", layout="wide")
 
+# Escaneo en paralelo: hilos de descarga y tope global de pedidos por segundo a Yahoo
+SCAN_WORKERS = 8
+SCAN_RATE = 4.0
+# Historiales compartidos por todas las sesiones (LRU con tope de memoria)
+HISTORY_CACHE_MB = 256
+
 # --- BASE DE DATOS MASTER (DEFINIDA AL PRINCIPIO) ---
 TICKERS_DB = sorted([
     # ARGENTINA
@@ -58,8 +67,16 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# --- ESTADO (V16) ---
-if 'st360_db_v16' not in st.session_state: st.session_state['st360_db_v16'] = []
+# --- ESTADO (V16): último resultado por ticker en la base compartida (core.scan_store) ---
+SCANNER = "fundamental_360"
+st360_db = SCANS.latest(SCANNER)
+
+# Las filas guardan solo el ticker; el historial de 10 años vive acá
+@st.cache_resource
+def get_history_cache():
+    return FrameCache(max_bytes=HISTORY_CACHE_MB * 2**20)
+
+HISTORY = get_history_cache()
 
 # --- HELPERS MATEMÁTICOS ---
 def calculate_rsi(series, period=14):
@@ -127,34 +144,19 @@ def get_technical_score(df):
         return max(0, min(10, score)), details, rsi
     except: return 0, ["Error Tec"], 50
 
-def get_options_data(ticker, price, tk_obj):
-    def_res = (5, "Sin Opciones", 0, 0, 0, "N/A", 0)
+def get_options_data(price, chains):
+    """Estructura de opciones con el OI de todos los vencimientos (muros por vencimiento en la última posición)."""
+    def_res = (5, "Sin Opciones", 0, 0, 0, "N/A", 0, [])
     try:
-        try: exps = tk_obj.options
-        except: return def_res
-        if not exps: return def_res
+        by_exp, total = walls_from_chains(chains or [], price)
+        if total is None: return def_res
         
-        opt = tk_obj.option_chain(exps[0])
-        calls, puts = opt.calls, opt.puts
-        if calls.empty or puts.empty: return def_res
-        
-        t_call, t_put = calls['openInterest'].sum(), puts['openInterest'].sum()
-        pcr = t_put / t_call if t_call > 0 else 0
+        pcr = total['pcr']
         if pcr < 0.6: sentiment = "🚀 EUFORIA (Techo?)"
         elif pcr > 1.4: sentiment = "🐻 MIEDO (Piso?)"
         else: sentiment = "⚖️ NEUTRAL"
 
-        cw = calls.loc[calls['openInterest'].idxmax()]['strike']
-        pw = puts.loc[puts['openInterest'].idxmax()]['strike']
-        
-        strikes = sorted(list(set(calls['strike'].tolist() + puts['strike'].tolist())))
-        rel = [s for s in strikes if price*0.7 < s < price*1.3] or strikes
-        cash = []
-        for s in rel:
-            c_loss = calls.apply(lambda r: max(0, s-r['strike'])*r['openInterest'], axis=1).sum()
-            p_loss = puts.apply(lambda r: max(0, r['strike']-s)*r['openInterest'], axis=1).sum()
-            cash.append(c_loss+p_loss)
-        mp = rel[np.argmin(cash)] if cash else price
+        cw, pw, mp = total['call_wall'], total['put_wall'], total['max_pain']
 
         score = 5
         detail = "Rango Medio"
@@ -167,7 +169,7 @@ def get_options_data(ticker, price, tk_obj):
                 if score > 8: detail="🟢 Soporte"
                 elif score < 2: detail="🧱 Resistencia"
         
-        return score, detail, cw, pw, mp, sentiment, pcr
+        return score, detail, cw, pw, mp, sentiment, pcr, by_exp.round(2).to_dict('records')
     except: return def_res
 
 def get_seasonality_score(df):
@@ -196,10 +198,9 @@ def get_seasonality_score(df):
         return max(0, min(10, score)), f"WR: {win:.0%}", avg
     except: return 5, "N/A", 0
 
-def get_fundamental_score(tk_obj):
+def get_fundamental_score(info):
     score = 0; details = []; tags = []
     try:
-        info = tk_obj.info
         if not info: return 5, ["Sin datos"], []
         
         # 1. Valuation
@@ -236,17 +237,37 @@ def get_fundamental_score(tk_obj):
         return min(10, score), details, tags
     except: return 5, ["Error"], []
 
+# --- DESCARGAS (cada una llama a wait() antes de cada pedido) ---
+def fetch_history(ticker, wait):
+    wait()
+    return yf.Ticker(ticker).history(period="10y")
+
+def fetch_options(ticker, wait):
+    return fetch_chains(yf.Ticker(ticker), wait=wait)
+
+def fetch_info(ticker, wait):
+    wait()
+    return yf.Ticker(ticker).info
+
+FETCHERS = {"history": fetch_history, "options": fetch_options, "info": fetch_info}
+
 def analyze_complete(ticker):
+    """Análisis de un ticker suelto: descarga en serie y puntúa (una descarga que falla queda en None)."""
+    no_wait = lambda: None
+    return score_ticker(ticker, {name: guard(fn, ticker, no_wait) for name, fn in FETCHERS.items()})
+
+def score_ticker(ticker, parts):
+    """Puntúa con las descargas ya hechas (no toca la red)."""
     try:
-        tk = yf.Ticker(ticker)
-        df = tk.history(period="10y") 
-        if df.empty: return None
+        df = parts["history"]
+        if df is None or df.empty: return None
+        HISTORY.put(ticker, df)
         price = df['Close'].iloc[-1]
         
         s_tec, d_tec, rsi = get_technical_score(df)
-        s_opt, d_opt, cw, pw, mp, sent, pcr = get_options_data(ticker, price, tk)
+        s_opt, d_opt, cw, pw, mp, sent, pcr, walls = get_options_data(price, parts["options"])
         s_sea, d_sea, avg_ret = get_seasonality_score(df)
-        s_fun, d_fun, fun_tags = get_fundamental_score(tk)
+        s_fun, d_fun, fun_tags = get_fundamental_score(parts["info"])
         
         atr = calculate_atr(df).iloc[-1]
         sl = price - (2 * atr)
@@ -268,11 +289,10 @@ def analyze_complete(ticker):
         return {
             "Ticker": ticker, "Price": price, "Score": final, "Verdict": verdict,
             "S_Tec": s_tec, "RSI": rsi, "D_Tec": d_tec,
-            "S_Opt": s_opt, "Sentiment": sent, "CW": cw, "PW": pw, "Max_Pain": mp, "D_Opt": d_opt,
+            "S_Opt": s_opt, "Sentiment": sent, "CW": cw, "PW": pw, "Max_Pain": mp, "D_Opt": d_opt, "Walls": walls,
             "S_Sea": s_sea, "D_Sea": d_sea, "WR": wr_val,
             "S_Fun": s_fun, "D_Fun": d_fun, "Fun_Tags": fun_tags,
-            "ATR": atr, "SL": sl, "TP": tp,
-            "History": df
+            "ATR": atr, "SL": sl, "TP": tp
         }
     except: return None
 
@@ -281,25 +301,30 @@ with st.sidebar:
     st.header("⚙️ Panel de Control")
     st.info(f"Base de Datos Master: {len(TICKERS_DB)} Activos")
     
-    batch_size = st.slider("Tamaño del Lote", 1, 10, 3)
+    scan_all = st.checkbox("🌐 Escanear toda la base")
+    batch_size = st.slider("Tamaño del Lote", 1, 50, 10, disabled=scan_all)
     batches = [TICKERS_DB[i:i + batch_size] for i in range(0, len(TICKERS_DB), batch_size)]
     batch_labels = [f"Lote {i+1}: {b[0]} ... {b[-1]}" for i, b in enumerate(batches)]
-    sel_batch = st.selectbox("Seleccionar Lote:", range(len(batches)), format_func=lambda x: batch_labels[x])
+    sel_batch = st.selectbox("Seleccionar Lote:", range(len(batches)), format_func=lambda x: batch_labels[x], disabled=scan_all)
     
     c1, c2 = st.columns(2)
     if c1.button("▶️ ESCANEAR", type="primary"):
-        targets = batches[sel_batch]
+        targets = TICKERS_DB if scan_all else batches[sel_batch]
         prog = st.progress(0)
-        mem = [x['Ticker'] for x in st.session_state['st360_db_v16']]
+        live = st.empty()
+        mem = [x['Ticker'] for x in st360_db]
         run = [t for t in targets if t not in mem]
-        for i, t in enumerate(run):
-            r = analyze_complete(t)
-            if r: st.session_state['st360_db_v16'].append(r)
-            prog.progress((i+1)/len(run))
-            time.sleep(0.5) 
+        # Descargas concurrentes; cada ticker se puntúa apenas tiene sus tres partes y se guarda
+        for i, (t, r) in enumerate(run_pipeline(run, FETCHERS, score_ticker, workers=SCAN_WORKERS, rate=SCAN_RATE), 1):
+            if r:
+                SCANS.put(SCANNER, [r], key='Ticker')
+                st360_db.append(r)
+                done = pd.DataFrame(st360_db)[['Ticker', 'Score']].sort_values("Score", ascending=False)
+                live.dataframe(done, hide_index=True, use_container_width=True)
+            prog.progress(i/len(run), text=f"{t} ({i}/{len(run)})")
         prog.empty(); st.rerun()
         
-    if c2.button("🗑️ Limpiar"): st.session_state['st360_db_v16'] = []; st.rerun()
+    if c2.button("🗑️ Limpiar"): SCANS.clear(SCANNER); st.rerun()
     st.divider()
     mt = st.text_input("Ticker Manual:").upper().strip()
     if st.button("Analizar"):
@@ -307,14 +332,13 @@ with st.sidebar:
             with st.spinner("Descargando Fundamentales..."):
                 r = analyze_complete(mt)
                 if r:
-                    st.session_state['st360_db_v16'] = [x for x in st.session_state['st360_db_v16'] if x['Ticker']!=mt]
-                    st.session_state['st360_db_v16'].append(r)
+                    SCANS.put(SCANNER, [r], key='Ticker')
                     st.rerun()
 
 st.title("SystemaTrader 360: Fundamental Edition (Fixed)")
 
-if st.session_state['st360_db_v16']:
-    dfv = pd.DataFrame(st.session_state['st360_db_v16'])
+if st360_db:
+    dfv = pd.DataFrame(st360_db)
     if 'Score' in dfv.columns: dfv = dfv.sort_values("Score", ascending=False)
     
     # Pre-cálculo filtros
@@ -396,7 +420,7 @@ if st.session_state['st360_db_v16']:
         valid_tickers = df_show['Ticker'].tolist()
         if valid_tickers:
             sel = st.selectbox("Inspección Profunda (Filtrados):", valid_tickers)
-            it = next((x for x in st.session_state['st360_db_v16'] if x['Ticker'] == sel), None)
+            it = next((x for x in st360_db if x['Ticker'] == sel), None)
             
             if it:
                 rsi_msg, rsi_bg, rsi_txt = get_rsi_alert(it['RSI'])
@@ -433,19 +457,24 @@ if st.session_state['st360_db_v16']:
                     with c_str:
                         st.markdown(f"**3. Estructura:** {it['D_Opt']}")
                         st.markdown(f"- Max Pain: ${it['Max_Pain']:.2f}")
+                        if it.get('Walls'):
+                            st.dataframe(pd.DataFrame(it['Walls'])[['expiry', 'call_wall', 'put_wall', 'call_gamma_wall', 'put_gamma_wall', 'max_pain', 'pcr']], hide_index=True, use_container_width=True)
                     with c_sea:
                         st.markdown(f"**4. Estacionalidad:** {it['D_Sea']}")
 
-                h = it['History']
-                fig = go.Figure(data=[go.Candlestick(x=h.index, open=h['Open'], high=h['High'], low=h['Low'], close=h['Close'], name='Precio')])
-                if it['SL']>0:
-                    fig.add_hline(y=it['SL'], line_dash="solid", line_color="red", annotation_text="STOP")
-                    fig.add_hline(y=it['TP'], line_dash="solid", line_color="green", annotation_text="PROFIT")
-                if it['CW']>0:
-                    fig.add_hline(y=it['CW'], line_dash="dot", line_color="orange", annotation_text="Call Wall")
-                    fig.add_hline(y=it['PW'], line_dash="dot", line_color="cyan", annotation_text="Put Wall")
+                try: h = HISTORY.get_or_load(sel, lambda: fetch_history(sel, lambda: None))
+                except: h = None
+                if h is None or h.empty: st.warning("No se pudo cargar el historial.")
+                else:
+                    fig = go.Figure(data=[go.Candlestick(x=h.index, open=h['Open'], high=h['High'], low=h['Low'], close=h['Close'], name='Precio')])
+                    if it['SL']>0:
+                        fig.add_hline(y=it['SL'], line_dash="solid", line_color="red", annotation_text="STOP")
+                        fig.add_hline(y=it['TP'], line_dash="solid", line_color="green", annotation_text="PROFIT")
+                    if it['CW']>0:
+                        fig.add_hline(y=it['CW'], line_dash="dot", line_color="orange", annotation_text="Call Wall")
+                        fig.add_hline(y=it['PW'], line_dash="dot", line_color="cyan", annotation_text="Put Wall")
                     
-                fig.update_layout(height=500, xaxis_rangeslider_visible=False, template="plotly_white", margin=dict(t=30, b=0, l=0, r=0))
-                st.plotly_chart(fig, use_container_width=True)
+                    fig.update_layout(height=500, xaxis_rangeslider_visible=False, template="plotly_white", margin=dict(t=30, b=0, l=0, r=0))
+                    st.plotly_chart(fig, use_container_width=True)
 
 else: st.info("👈 Escanea un lote (Paciencia: Fundamentales tardan más).")
@@ -1,9 +1,10 @@
 import streamlit as st
-import yfinance as yf
 import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from core.returns import ReturnsService
+from core.risk import WINDOWS, risk_report, twin_pairs
 
 # --- CONFIGURACIÓN ---
 st.set_page_config(page_title="Portfolio Architect", layout="wide")
@@ -33,9 +34,18 @@ with st.sidebar:
     )
     
     anios = st.slider("Historial Máximo (Años):", 1, 20, 10)
+    ventana = st.radio("Ventana móvil (ruedas):", WINDOWS, index=len(WINDOWS) - 1, horizontal=True)
     calc_btn = st.button("🚀 AUDITAR CARTERA", type="primary")
 
+# Nombre de la columna de la cartera y tope de activos para anotar el mapa de correlación
+PORTFOLIO = "Mi Cartera"
+MAX_ANNOTATED = 25
+
 # --- FUNCIONES ---
+@st.cache_resource
+def get_returns_service():
+    return ReturnsService()
+
 def convert_df_to_csv(df):
     return df.to_csv(index=True).encode('utf-8')
 
@@ -62,31 +72,22 @@ def main():
         # Descarga
         with st.spinner("Analizando mercado..."):
             try:
-                # Descargamos todo
-                data = yf.download(tickers + [benchmark], period=f"{anios}y", progress=False, auto_adjust=True)
-                
-                if isinstance(data.columns, pd.MultiIndex):
-                    try: precios = data["Close"]
-                    except: precios = data
-                else:
-                    precios = data["Close"] if "Close" in data else data
+                # Retornos diarios por día hábil (cacheados entre corridas; NaN donde un activo no cotiza)
+                returns = get_returns_service().returns(tickers + [benchmark], f"{anios}y")
+                if benchmark not in returns.columns: st.error(f"Sin datos para {benchmark}."); return
 
                 # === CORRECCIÓN INTELIGENTE DE FECHAS ===
-                # En lugar de dropna() ciego que borra todo si un activo es nuevo,
-                # buscamos la fecha donde TODOS los activos ya tienen datos.
-                
-                start_date = precios.dropna().index[0]
-                
-                # Recortamos desde esa fecha
-                precios = precios[precios.index >= start_date]
-                returns = precios.pct_change().dropna()
-                
-                # Check de validez
+                # La curva de la cartera necesita todos los activos: arranca en la
+                # fecha donde TODOS ya tienen datos. Los huecos sueltos (feriados de
+                # un mercado) cuentan como retorno 0.
                 valid_tickers = [t for t in tickers if t in returns.columns]
                 if not valid_tickers: st.error("Sin datos."); return
-                
+                start_date = returns[valid_tickers + [benchmark]].apply(pd.Series.first_valid_index).max()
+                full_returns = returns
+                returns = returns[returns.index >= start_date].fillna(0.0)
+
                 # Aviso de recorte de historia
-                real_years = (precios.index[-1] - precios.index[0]).days / 365.25
+                real_years = (returns.index[-1] - returns.index[0]).days / 365.25
                 if real_years < anios * 0.8:
                     st.warning(f"⚠️ Atención: Algunos activos son muy nuevos (ej: IBIT, ETHA). El análisis se recortó a los últimos **{real_years:.1f} años** disponibles para poder comparar todo junto.")
                 
@@ -97,30 +98,23 @@ def main():
 
             except Exception as e: st.error(f"Error: {e}"); return
 
-        # Cálculos
-        ret_port = returns[valid_tickers].dot(pesos)
-        cum_port = (1 + ret_port).cumprod() * 100
+        # Cálculos: cartera, benchmark y cada activo en una sola matriz
+        ret_port = returns[valid_tickers].to_numpy() @ pesos
+        matrix = returns[valid_tickers].assign(**{PORTFOLIO: ret_port})
+        if benchmark not in matrix.columns: matrix[benchmark] = returns[benchmark]
+        report = risk_report(matrix, returns[benchmark])
+        port, bench = report.summary.loc[PORTFOLIO], report.summary.loc[benchmark]
+        cum_port = (1 + matrix[PORTFOLIO]).cumprod() * 100
         cum_bench = (1 + returns[benchmark]).cumprod() * 100
 
-        # Métricas
-        cov = np.cov(ret_port, returns[benchmark])[0,1]
-        var = np.var(returns[benchmark])
-        beta = cov / var
-        vol = ret_port.std() * np.sqrt(252)
-        sharpe = (ret_port.mean() * 252) / (ret_port.std() * np.sqrt(252))
-        
-        days = (cum_port.index[-1] - cum_port.index[0]).days
-        years = days / 365.25
-        cagr = (cum_port.iloc[-1]/100)**(1/years) - 1
-        cagr_b = (cum_bench.iloc[-1]/100)**(1/years) - 1
-
         # --- VISUALIZACIÓN ---
         
-        k1, k2, k3, k4 = st.columns(4)
-        k1.metric("CAGR (Anual)", f"{cagr:.2%}", delta=f"{cagr-cagr_b:.2%}")
-        k2.metric("Volatilidad", f"{vol:.2%}")
-        k3.metric("Sharpe", f"{sharpe:.2f}")
-        k4.metric("Beta", f"{beta:.2f}")
+        k1, k2, k3, k4, k5 = st.columns(5)
+        k1.metric("CAGR (Anual)", f"{port['CAGR']:.2%}", delta=f"{port['CAGR']-bench['CAGR']:.2%}")
+        k2.metric("Volatilidad", f"{port['Volatilidad']:.2%}")
+        k3.metric("Sharpe", f"{port['Sharpe']:.2f}")
+        k4.metric("Beta", f"{port['Beta']:.2f}")
+        k5.metric("Máx. Drawdown", f"{port['Máx. Drawdown']:.2%}", delta=f"{port['Máx. Drawdown']-bench['Máx. Drawdown']:.2%}")
 
         # DIAGNÓSTICO
         st.divider()
@@ -152,9 +146,34 @@ def main():
 
         # GRÁFICO HISTÓRICO
         st.subheader("📈 Curva de Capital")
-        df_chart = pd.DataFrame({"Mi Cartera": cum_port, benchmark: cum_bench})
+        df_chart = pd.DataFrame({PORTFOLIO: cum_port, benchmark: cum_bench})
         st.line_chart(df_chart)
 
+        # RIESGO MÓVIL
+        st.subheader(f"📉 Riesgo Móvil ({ventana} ruedas)")
+        roll = report.rolling[ventana]
+        r1, r2 = st.columns(2)
+        with r1:
+            st.caption("Volatilidad anualizada")
+            st.line_chart(roll["vol"][[PORTFOLIO, benchmark]].dropna())
+            st.caption("Beta vs " + benchmark)
+            st.line_chart(roll["beta"][[PORTFOLIO]].dropna())
+        with r2:
+            st.caption("Sharpe")
+            st.line_chart(roll["sharpe"][[PORTFOLIO, benchmark]].dropna())
+            st.caption("Drawdown")
+            st.area_chart(report.drawdown[[PORTFOLIO, benchmark]])
+
+        # AUDITORÍA POR ACTIVO
+        st.subheader("🧾 Auditoría por Activo")
+        audit = report.summary.copy()
+        for name, label in (("vol", "Vol"), ("sharpe", "Sharpe"), ("beta", "Beta")):
+            audit[f"{label} {ventana}d"] = roll[name].iloc[-1]
+        audit.insert(0, "Peso", pd.Series(pesos, index=valid_tickers).reindex(audit.index))
+        pct = ["Peso", "CAGR", "Volatilidad", "Máx. Drawdown", "Drawdown Actual", f"Vol {ventana}d"]
+        st.dataframe(audit.style.format({c: "{:.2%}" if c in pct else "{:.2f}" for c in audit.columns}, na_rep="-"), use_container_width=True)
+        st.download_button("📥 Descargar auditoría (CSV)", convert_df_to_csv(audit), "auditoria_cartera.csv", "text/csv")
+
         # CORRELACIÓN
         c1, c2 = st.columns(2)
         with c1:
@@ -164,16 +183,16 @@ def main():
             
         with c2:
             st.subheader("🔥 Mapa de Riesgo")
-            corr = returns[valid_tickers].corr()
-            fig_corr = px.imshow(corr, text_auto=".2f", color_continuous_scale="RdBu_r", zmin=-1, zmax=1)
+            # Correlación por pares completos: cada par usa toda la historia común, no solo la de la cartera
+            corr = full_returns[valid_tickers].corr()
+            fig_corr = px.imshow(corr, text_auto=".2f" if len(valid_tickers) <= MAX_ANNOTATED else False, color_continuous_scale="RdBu_r", zmin=-1, zmax=1)
             st.plotly_chart(fig_corr, use_container_width=True)
             
-            pairs = []
-            for i in range(len(valid_tickers)):
-                for j in range(i+1, len(valid_tickers)):
-                    if corr.iloc[i,j] > 0.85: pairs.append(f"{valid_tickers[i]}-{valid_tickers[j]}")
-            
-            if pairs: st.warning(f"⚠️ Activos Gemelos (>0.85): {', '.join(pairs)}")
+            pairs = twin_pairs(corr)
+            if len(pairs) > 10:
+                st.warning(f"⚠️ {len(pairs)} pares de Activos Gemelos (>0.85):")
+                st.dataframe(pd.DataFrame(pairs, columns=["Activo A", "Activo B", "Correlación"]), use_container_width=True, height=250)
+            elif pairs: st.warning(f"⚠️ Activos Gemelos (>0.85): {', '.join(f'{a}-{b}' for a, b, _ in pairs)}")
             else: st.success("✅ Diversificación Eficiente")
 
 if __name__ == "__main__":
@@ -6,10 +6,16 @@ import plotly.graph_objects as go
 import numpy as np
 import time
 import re
+from core.heikin_ashi import heikin_ashi
+from core.signals import ha_adx_events
+from core.scan_store import SCANS
 
 # --- CONFIGURACIÓN ---
 st.set_page_config(page_title="Escáner Pro: Master Database", layout="wide")
 
+# Resultados en la base compartida (core.scan_store), por ticker y temporalidad
+SCANNER = "escaner_pro_ha_adx"
+
 # --- ESTILOS VISUALES ---
 st.markdown("""
 <style>
@@ -79,14 +85,8 @@ TICKERS_DB = sorted([
 def calculate_heikin_ashi(df):
     """Calcula Heikin Ashi iterativo"""
     df_ha = df.copy()
-    df_ha['HA_Close'] = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    
-    ha_open = [df['Open'].iloc[0]]
-    for i in range(1, len(df)):
-        prev_open = ha_open[-1]
-        prev_close = df_ha['HA_Close'].iloc[i-1]
-        ha_open.append((prev_open + prev_close) / 2)
-        
+    ha_open, ha_close = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="open")
+    df_ha['HA_Close'] = ha_close
     df_ha['HA_Open'] = ha_open
     df_ha['HA_High'] = df_ha[['High', 'HA_Open', 'HA_Close']].max(axis=1)
     df_ha['HA_Low'] = df_ha[['Low', 'HA_Open', 'HA_Close']].min(axis=1)
@@ -124,24 +124,16 @@ def analyze_ticker(ticker, interval, period, adx_len, adx_th):
     df_ha = calculate_heikin_ashi(df)
     
     # 3. Lógica de Señal
+    # Compra: HA verde + ADX > umbral | Venta: primera vela roja
     signals = []
-    in_position = False
-    
-    for i in range(1, len(df_ha)):
-        date = df_ha.index[i]
-        ha_color = df_ha['Color'].iloc[i]
-        adx_val = df_ha[adx_col].iloc[i]
-        price = df_ha['Close'].iloc[i]
-        
-        # Compra
-        if not in_position and ha_color == 1 and adx_val > adx_th:
-            in_position = True
-            signals.append({'Fecha': date, 'Tipo': '🟢 COMPRA', 'Precio': price, 'ADX': adx_val})
-            
-        # Venta
-        elif in_position and ha_color == -1:
-            in_position = False
-            signals.append({'Fecha': date, 'Tipo': '🔴 VENTA', 'Precio': price, 'ADX': adx_val})
+    events = ha_adx_events(df_ha['Color'].to_numpy(), df_ha[adx_col].to_numpy(), adx_th)
+    for i in np.flatnonzero(events):
+        signals.append({
+            'Fecha': df_ha.index[i],
+            'Tipo': '🟢 COMPRA' if events[i] == 1 else '🔴 VENTA',
+            'Precio': df_ha['Close'].iloc[i],
+            'ADX': df_ha[adx_col].iloc[i]
+        })
     
     last_signal = signals[-1] if signals else None
     
@@ -185,29 +177,20 @@ with st.sidebar:
     
     st.divider()
     if st.button("🗑️ Borrar Resultados"):
-        st.session_state['scan_results'] = []
+        SCANS.clear(SCANNER)
         st.rerun()
 
 # --- APP PRINCIPAL ---
 st.title("🛰️ Escáner Multi-Timeframe: Master Database")
 
-if 'scan_results' not in st.session_state:
-    st.session_state['scan_results'] = []
-
 # --- FUNCIÓN DE PROCESAMIENTO ---
 def process_tickers(ticker_list, selected_interval):
     prog_bar = st.progress(0)
     status_text = st.empty()
     new_results = []
     
-    # 1. Limpieza de memoria INTELIGENTE
-    current_data = st.session_state['scan_results']
-    # Mantener los que NO son (Ticker actual Y Intervalo actual)
-    filtered_data = [
-        row for row in current_data 
-        if not (row['Ticker'] in ticker_list and row['Temporalidad'] == selected_interval)
-    ]
-    st.session_state['scan_results'] = filtered_data
+    # 1. Limpieza de memoria INTELIGENTE: se sacan solo (Ticker actual Y Intervalo actual)
+    SCANS.discard(SCANNER, ticker_list, selected_interval)
 
     # 2. Escaneo
     for i, t in enumerate(ticker_list):
@@ -223,7 +206,7 @@ def process_tickers(ticker_list, selected_interval):
         time.sleep(0.1) 
     
     # 3. Guardado
-    st.session_state['scan_results'].extend(new_results)
+    SCANS.put(SCANNER, new_results, key='Ticker', timeframe=selected_interval)
     
     status_text.empty(); prog_bar.empty()
     if new_results:
@@ -246,9 +229,11 @@ if custom_btn and custom_input:
         st.error("Lista vacía.")
 
 # --- MOSTRAR RESULTADOS ---
-if st.session_state['scan_results']:
+scan_results = SCANS.latest(SCANNER)
+if scan_results:
     
-    df_results = pd.DataFrame(st.session_state['scan_results'])
+    df_results = pd.DataFrame(scan_results)
+    df_results['Fecha'] = pd.to_datetime(df_results['Fecha'])
     
     # Ordenar por fecha
     df_results = df_results.sort_values(by="Fecha", ascending=False)
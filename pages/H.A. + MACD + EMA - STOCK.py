@@ -1,10 +1,11 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import pandas_ta as ta
-import numpy as np
-import time
 from datetime import datetime
+from core.heikin_ashi import heikin_ashi, ha_direction
+from core.signals import macd_flip_position
+from core.yf_panel import load_panels
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -20,8 +21,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "sniper_results" not in st.session_state:
-    st.session_state["sniper_results"] = []
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "stock_ha_macd_ema"
 
 # JERARQUÍA MAESTRA: 4 FRACTALES SELECCIONADOS
 TIMEFRAMES = {
@@ -166,29 +167,19 @@ with st.expander("📘 MANUAL DE ESTRATEGIA DUAL SNIPER (4 FRACTALES)"):
 # ─────────────────────────────────────────────
 def calculate_heikin_ashi(df):
     df = df.copy()
-    df["HA_Close"] = (df["Open"] + df["High"] + df["Low"] + df["Close"]) / 4
-    ha_open = [df["Open"].iloc[0]]
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[-1] + df["HA_Close"].iloc[i-1]) / 2)
-    df["HA_Open"], df["HA_Color"] = ha_open, np.where(df["HA_Close"] > ha_open, 1, -1)
+    ha_open, ha_close = heikin_ashi(df["Open"], df["High"], df["Low"], df["Close"], seed="open")
+    df["HA_Close"], df["HA_Open"], df["HA_Color"] = ha_close, ha_open, ha_direction(ha_open, ha_close)
     return df
 
-def analyze_stock_tf(symbol, label, config):
+def analyze_stock_tf(symbol, label, panels):
     try:
-        df = yf.download(symbol, interval=config['int'], period=config['per'], progress=False, auto_adjust=True)
-        if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
+        df = panels[label].get(symbol, pd.DataFrame()).copy()
         if df.empty or len(df) < 35: return None
         macd = ta.macd(df["Close"])
         df["Hist"], df["MACD"], df["Signal"] = macd["MACDh_12_26_9"], macd["MACD_12_26_9"], macd["MACDs_12_26_9"]
         df = calculate_heikin_ashi(df)
-        position = "NEUTRO"
-        for i in range(1, len(df)):
-            h, ph, hc = df["Hist"].iloc[i], df["Hist"].iloc[i-1], df["HA_Color"].iloc[i]
-            if position == "LONG" and h < ph: position = "NEUTRO"
-            elif position == "SHORT" and h > ph: position = "NEUTRO"
-            if position == "NEUTRO":
-                if hc == 1 and h > ph: position = "LONG"
-                elif hc == -1 and h < ph: position = "SHORT"
+        sig = macd_flip_position(df["HA_Color"].to_numpy(), df["Hist"].to_numpy(), df["Close"].to_numpy(), zero_filter=False)
+        position = {1: "LONG", -1: "SHORT"}.get(sig.state, "NEUTRO")
         return {
             "sig": position,
             "m0": "SOBRE 0" if df["MACD"].iloc[-1] > 0 else "BAJO 0",
@@ -222,13 +213,14 @@ def get_column_verdicts(row):
 def scan_stocks(targets, acc):
     results = []
     prog = st.progress(0)
+    panels = load_panels(targets, TIMEFRAMES, progress=lambda d, n: prog.progress(d/n, text="Descargando velas..."))
     for idx, sym in enumerate(targets):
         prog.progress((idx+1)/len(targets), text=f"Analizando {sym}")
         try:
             row = {"Activo": sym, "Tipo": MASTER_INFO.get(sym, {}).get('T', 'MANUAL'), "Sector": MASTER_INFO.get(sym, {}).get('S', 'Custom')}
             valid = False
-            for label, config in TIMEFRAMES.items():
-                res = analyze_stock_tf(sym, label, config)
+            for label in TIMEFRAMES:
+                res = analyze_stock_tf(sym, label, panels)
                 if res:
                     valid = True
                     row[f"{label} H.A./MACD"] = res["sig"]
@@ -241,13 +233,9 @@ def scan_stocks(targets, acc):
             if valid:
                 row["TRADE ALTA PROBABILIDAD"], row["SINCRONÍA MOMENTUM 1D"] = get_column_verdicts(row)
                 results.append(row)
-            time.sleep(0.1)
         except: continue
     prog.empty()
-    if acc:
-        curr = {x["Activo"]: x for x in st.session_state["sniper_results"]}
-        for r in results: curr[r["Activo"]] = r
-        return list(curr.values())
+    SCANS.put(SCANNER, results, replace=not acc)
     return results
 
 # ─────────────────────────────────────────────
@@ -268,20 +256,21 @@ with st.sidebar:
 
     acc = st.checkbox("Acumular Resultados", value=True)
     if st.button("🚀 INICIAR ESCANEO", type="primary"):
-        st.session_state["sniper_results"] = scan_stocks(targets, acc)
+        scan_stocks(targets, acc)
         st.rerun()
 
-    if st.session_state["sniper_results"]:
+    sniper_results = SCANS.latest(SCANNER)
+    if sniper_results:
         st.divider()
-        df_temp = pd.DataFrame(st.session_state["sniper_results"])
+        df_temp = pd.DataFrame(sniper_results)
         f_ver = st.multiselect("Trade Alta Prob:", options=df_temp["TRADE ALTA PROBABILIDAD"].unique(), default=df_temp["TRADE ALTA PROBABILIDAD"].unique())
         f_sync = st.multiselect("Sincronía Momentum:", options=df_temp["SINCRONÍA MOMENTUM 1D"].unique(), default=df_temp["SINCRONÍA MOMENTUM 1D"].unique())
         f_sec = st.multiselect("Sector:", options=df_temp["Sector"].unique(), default=df_temp["Sector"].unique())
 
-    if st.button("Limpiar Memoria"): st.session_state["sniper_results"] = []; st.rerun()
+    if st.button("Limpiar Memoria"): SCANS.clear(SCANNER); st.rerun()
 
-if st.session_state["sniper_results"]:
-    df_f = pd.DataFrame(st.session_state["sniper_results"])
+if sniper_results:
+    df_f = pd.DataFrame(sniper_results)
     df_filtered = df_f[(df_f["TRADE ALTA PROBABILIDAD"].isin(f_ver)) & (df_f["SINCRONÍA MOMENTUM 1D"].isin(f_sync)) & (df_f["Sector"].isin(f_sec))]
     
     def style_matrix(val):
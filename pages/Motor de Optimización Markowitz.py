@@ -1,10 +1,10 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from scipy.optimize import minimize
 import plotly.graph_objects as go
 from datetime import datetime
+from core.portfolio import efficient_frontier, portfolio_cloud
+from core.returns import ReturnsService
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DE PÁGINA Y ESTILOS
@@ -27,20 +27,21 @@ st.markdown("""
 RAW_TICKERS = "BIL, SPY, QQQ, ARKK, BOTZ, DBC, GLD, BND, VWO, VNQ, HYG, VEA, EMB, AAPL, AMZN, TSLA, MSFT, META, NVDA, GOOGL, ARGT, MELI, GLOB, TTWO, RKLB, HOOD, HOG, MSTR, COIN, SWK, INTC, AMD, DIS, GME, ABNB, AMC, KO, DIA, F, ADBE, MO, C, COST, DE, DOCU, GE, ETSY, HAL, CRM, HSBC, IBM, JD, JNJ, LMT, MA, MCD, NFLX, NKE, PYPL, PEP, PBR, SHOP, SNAP, SONY, SPOT, SBUX, TGT, UL, WMT, SMCI, JPM, WFC, AVGO, MU, LLY, UNH, V, QCOM, HD, BAC, GGAL, BABA, YPF, PAM, XOM, AMAT, GS, ACN, MARA, SNOW, ORCL, UBER, DELL, LRCX, CVX, CSCO, CRWD, CVNA, BA, VRT, HUBS, MRK, PLTR, NEE, CAT, PFE, LIN, CMG, GM, BKNG, PG, MRVL, LOW, TXN, ADI, MS, DAL, AMGN, T, LCID, ABBV, NOW, UPS, LEN, BMY, ENPH, SOUN, INTU, SPGI, CMCSA, DHR, AXP, DHI, RTX, BK, CME, PANW, KLAC, BLK, ICE, MDLZ, MRNA, VOO, VTI, VUG, VTV, IWF, IJH, IJR, VIG, VGT, XLK, VO, IWM, TLT, VB, SCHX, XLF, XLV, SCHF, MUB, XLE, XLI, XLY, VHT, SOXX, PHO, XLRE, SCHH, IYR, ICF, DUOL, LUV, AFRM, ITA, SH, IEF, VGIT, GOVT, SGOV, IBIT, EETH, SATL, RMAX, COMP, AGNT, OPAD, OPEN, SSO, SCHD, EWJ, EWZ, EWW, ECH, INDA, EWT, EWS, ENZL, EWA, DGRO, PINS, ZM, ULTA, PM, SCHW, MMM, FDX, CVS, PSX, DASH, KMB, MSI, MNST, TMO, EA, TMUS, ABT, BX, VZ, ISRG, DDOG, MCHI, BSV, IFS, BAP, BVN, TQQQ, SOXL, TMF, SPXL, UPRO, TECL, YINN, SQQQ, FAS, TNA, LABU, SPXS, SOXS, MCO, CL, MAR, KDP, UNP, TEAM, GEHC, SOFI, CCL, NET, WST, MKC, GDDY, HPE, MDB, WBD, KHC, EBAY, HLT, FISV, EEM, AAL, JMIA, BP, BB, BBD, SVXY, REK, VIST, ADM, TSM, RIOT, TLRY, NOC, CGC, GD, IIPR, SYM, NU, ANET, OXY, O, ASML, VEGI, OKLO, PFF, RDDT, SPYD, HSY, PTON, DJT, BITX, KODK, VIXY, RACE, LULU, HMC, FWONK, TS, TX, HIMS, ITUB, ABEV, BIDU, GRWG, HYFM, MANU, FAZ, FNGU, MSFU, AAPU, FBL, LOMA, DLTR, DUK, GPRK, NEM, SO, QBTS, RGTI, BITI, PCAR, NVO, UMAC, AXON, XYZ, PDD, NTES, SOS, RCAT, BN, VALE, ARM, QSI, TM, WM, URTH, BBAR, IRS, BIOX, EDN, SUPV, XP, BBAI, DAPP, TEM, KULR, INBS, TBX, EAT, LMND, UUUU, GDX, ASTS, RCL, APP, PAGS, TTT, UNCY, PL, NIO, CONY, CLOV, JOBY, UGL, TBF, BYND, TWLO, MMSI, LODE, TBT, CEG, UUP, OTLY, SHY, IEI, TLH, IREN, NWTG, FLIN, OSCR, ALAB, AMZY, APLY, AVY, BG, BIIB, BMA, CELH, CEPU, CRESY, DOW, DPZ, EWY, FXI, FXY, HON, HUT, IGPT, LAES, ONON, PYPY, SEDG, SLB, SNA, STLA, STZ, TTEK, URBN, VSCO, AAP, YBIT, ADP, HERO, ABSI, PDBA, MAGS, B, SMMT, SETH, SLV, PATH, AIQ, SHEL, TGS, PSQ, MKL, XLP, XPEV, DXYZ, MSTY, CRCL, PLBY, FIG, AOM, OWNB, BKR, SPYG, USO, APLD, ASPN, AUR, BITO, BKCH, BLDR, BLOK, CDNS, COO, DAVA, EIX, EL, ELF, EVTL, FEZ, FSLR, GAUZ, GPN, HDV, HELO, BMRN, VXUS, URA, ACWI, NVDL, GRAB, GTLB, VT, SPMO, QQQM, IONQ, TSLL, AMZU, SBET, JEPQ, JEPI, QYLD, TXRH, ABCL, AOK, VBR, IAU, IEO, ZETA, KBH, OMC, RYDE, SVCO, POOL, VYM, ANF, TMDX, MTUM, BMNR, TMQ, BNKK, VEEE, QNRX, HRZN"
 MASTER_TICKERS = sorted(list(set([t.strip() for t in RAW_TICKERS.split(",") if t.strip()])))
 
-# ─────────────────────────────────────────────
-# FUNCIONES MATEMÁTICAS (Mundo Markowitz)
-# ─────────────────────────────────────────────
+# Puntos de la frontera eficiente exacta
+FRONTIER_POINTS = 60
 
-def get_portfolio_perf(weights, mean_returns, cov_matrix):
-    """Calcula Retorno y Volatilidad Anualizada."""
-    port_return = np.sum(mean_returns * weights)
-    port_std = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-    return port_return, port_std
+# Estimadores de covarianza (core.returns); por defecto el de siempre: solo fechas comunes
+ESTIMATORS = {
+    "Solo fechas comunes": "complete",
+    "Muestral (pares completos)": "pairwise",
+    "Ledoit-Wolf (encogida)": "ledoit_wolf",
+    "EWMA (λ=0.94)": "ewma",
+    "EM (máx. verosimilitud)": "em",
+}
 
-def neg_sharpe_ratio(weights, mean_returns, cov_matrix, risk_free_rate):
-    """Función a minimizar para encontrar el máximo Sharpe."""
-    p_ret, p_std = get_portfolio_perf(weights, mean_returns, cov_matrix)
-    return -(p_ret - risk_free_rate) / p_std
+@st.cache_resource
+def get_returns_service():
+    return ReturnsService()
 
 # ─────────────────────────────────────────────
 # INTERFAZ DE USUARIO
@@ -58,6 +59,9 @@ with st.sidebar:
     
     lookback = st.slider("Años de datos históricos:", 1, 10, 5)
     rf_rate = st.number_input("Tasa Libre de Riesgo (Treasury %):", value=4.5) / 100
+    estimator = st.selectbox("Estimador de covarianza:", list(ESTIMATORS), help="Pares completos, EM y Ledoit-Wolf usan toda la historia de cada activo en vez de recortar al más nuevo")
+    num_portfolios = st.select_slider("Carteras simuladas:", [1_000, 5_000, 20_000, 50_000, 100_000], value=20_000)
+    sampler = st.radio("Muestreo de pesos:", ["dirichlet", "sobol"], horizontal=True, help="Sobol (cuasi-aleatorio) cubre la frontera de forma más pareja")
     
     st.divider()
     run_button = st.button("🚀 CALCULAR FRONTERA EFICIENTE", type="primary", use_container_width=True)
@@ -67,44 +71,21 @@ if run_button:
         st.error("❌ Selecciona al menos 2 activos para calcular la covarianza.")
     else:
         with st.spinner("Descargando datos y resolviendo matriz..."):
-            # 1. Descarga de datos
-            df = yf.download(selected_assets, period=f"{lookback}y", interval="1d")['Close']
-            
-            # Limpieza básica
-            df = df.dropna()
-            returns = df.pct_change().dropna()
-            
-            # Estadísticas anualizadas (252 días hábiles)
-            mean_returns = returns.mean() * 252
-            cov_matrix = returns.cov() * 252
-            
-            # 2. OPTIMIZACIÓN (SciPy)
-            num_assets = len(selected_assets)
-            args = (mean_returns, cov_matrix, rf_rate)
-            constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1}) # Pesos sumen 1
-            bounds = tuple((0, 1) for asset in range(num_assets))         # No short selling
-            
-            # Resolución
-            result = minimize(neg_sharpe_ratio, num_assets*[1./num_assets], 
-                              args=args, method='SLSQP', bounds=bounds, constraints=constraints)
-            
-            opt_weights = result.x
-            opt_ret, opt_std = get_portfolio_perf(opt_weights, mean_returns, cov_matrix)
-            opt_sharpe = (opt_ret - rf_rate) / opt_std
-
-            # 3. SIMULACIÓN DE MONTE CARLO (Nube de carteras)
-            num_portfolios = 1500
-            p_ret = []
-            p_vol = []
-            p_shp = []
-            
-            for _ in range(num_portfolios):
-                w = np.random.random(num_assets)
-                w /= np.sum(w)
-                r, v = get_portfolio_perf(w, mean_returns, cov_matrix)
-                p_ret.append(r)
-                p_vol.append(v)
-                p_shp.append((r - rf_rate) / v)
+            # 1. Retornos y covarianza anualizados (252 días hábiles), cacheados entre corridas
+            moments = get_returns_service().estimate(selected_assets, f"{lookback}y", ESTIMATORS[estimator])
+            mean_returns, cov_matrix = moments.mean, moments.cov
+            missing = [t for t in selected_assets if t not in mean_returns.index]
+            if missing: st.warning(f"Sin datos suficientes: {', '.join(missing)}")
+            if len(mean_returns) < 2:
+                st.error("❌ No hay datos para al menos 2 activos."); st.stop()
+
+            # 2. OPTIMIZACIÓN: frontera exacta (pesos suman 1, sin cortos)
+            front = efficient_frontier(mean_returns, cov_matrix, FRONTIER_POINTS, rf_rate)
+            opt_weights, opt_ret, opt_std, opt_sharpe = front.max_sharpe
+            min_var = front.min_variance
+
+            # 3. SIMULACIÓN DE MONTE CARLO (Nube de carteras, vectorizada)
+            _, p_ret, p_vol, p_shp = portfolio_cloud(mean_returns, cov_matrix, num_portfolios, rf_rate, sampler)
 
             # 4. RENDERIZADO DE RESULTADOS
             col1, col2, col3 = st.columns(3)
@@ -115,11 +96,23 @@ if run_button:
             # Gráfico de Frontera Eficiente
             fig = go.Figure()
             # Nube de puntos
-            fig.add_trace(go.Scatter(
+            fig.add_trace(go.Scattergl(
                 x=p_vol, y=p_ret, mode='markers',
-                marker=dict(color=p_shp, colorscale='Viridis', size=5, showscale=True, title="Sharpe"),
+                marker=dict(color=p_shp, colorscale='Viridis', size=4, showscale=True, colorbar=dict(title="Sharpe")),
                 name="Carteras Posibles"
             ))
+            # Frontera exacta
+            fig.add_trace(go.Scatter(
+                x=front.vols, y=front.rets, mode='lines',
+                line=dict(color='white', width=3),
+                name="Frontera Eficiente"
+            ))
+            # Mínima varianza
+            fig.add_trace(go.Scatter(
+                x=[min_var.vol], y=[min_var.ret], mode='markers',
+                marker=dict(color='cyan', size=12, symbol='diamond', line=dict(width=2, color='white')),
+                name="MÍNIMA VARIANZA"
+            ))
             # Punto Óptimo
             fig.add_trace(go.Scatter(
                 x=[opt_std], y=[opt_ret], mode='markers',
@@ -139,15 +132,20 @@ if run_button:
             # Tabla de Pesos
             st.subheader("🎯 Composición de la Cartera Óptima")
             weights_df = pd.DataFrame({
-                'Ticker': selected_assets,
-                'Peso Recomendado': [f"{w*100:.2f}%" for w in opt_weights]
+                'Ticker': list(mean_returns.index),
+                'Peso Recomendado': opt_weights,
+                'Peso Mín. Varianza': min_var.weights
             }).sort_values(by='Peso Recomendado', ascending=False)
+            for col in ('Peso Recomendado', 'Peso Mín. Varianza'):
+                weights_df[col] = [f"{w*100:.2f}%" for w in weights_df[col]]
             
             st.table(weights_df)
 
             # Matriz de Correlación
             st.subheader("🔗 Matriz de Correlación (Crucial para Diversificar)")
-            corr_matrix = returns.corr()
+            # Correlación implícita en la covarianza estimada (con "Solo fechas comunes" es returns.corr())
+            std = pd.Series(np.sqrt(np.diag(cov_matrix)), index=cov_matrix.index)
+            corr_matrix = cov_matrix.div(std, axis=0).div(std, axis=1)
             st.dataframe(corr_matrix.style.background_gradient(cmap='RdYlGn'))
 
 else:
@@ -1,10 +1,11 @@
 import streamlit as st
 import ccxt
 import pandas as pd
-import pandas_ta as ta
-import numpy as np
 import time
 from datetime import datetime
+from core.indicators.streaming import HaMacdStream, StreamBook
+from core.live_feed import live_ohlcv
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -18,8 +19,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "rsi_matrix_results" not in st.session_state:
-    st.session_state["rsi_matrix_results"] = []
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "rsi_matrix_v27"
 
 RSI_PERIODS = [2, 4, 8, 12, 24, 84, 168]
 
@@ -42,45 +43,28 @@ def get_active_pairs_by_vol(min_vol):
         return pd.DataFrame(valid).sort_values("vol", ascending=False)["symbol"].tolist()
     except: return []
 
+# Estado incremental por símbolo: MACD (12, 26, 9), Heikin Ashi y los RSI
+# suavizados avanzan solo con las velas nuevas en lugar de recalcular 400
+# (version=2: semilla del RSI suavizado como ta.ema; descarta los checkpoints viejos)
+@st.cache_resource
+def get_stream_book():
+    return StreamBook("rsi_matrix", lambda: HaMacdStream(ha_seed="mid", rsi_lengths=RSI_PERIODS, rsi_ema=True), version=2)
+
 # ─────────────────────────────────────────────
 # CÁLCULOS TÉCNICOS (REPLICA TRADINGVIEW)
 # ─────────────────────────────────────────────
-def calculate_heikin_ashi(df):
-    df = df.copy()
-    # HA Close
-    df["HA_Close"] = (df["open"] + df["high"] + df["low"] + df["close"]) / 4
-    # HA Open (Recursivo)
-    ha_open = [ (df["open"].iloc[0] + df["close"].iloc[0]) / 2 ]
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[-1] + df["HA_Close"].iloc[i-1]) / 2)
-    df["HA_Open"] = ha_open
-    df["HA_Color"] = np.where(df["HA_Close"] > df["HA_Open"], 1, -1)
-    return df
-
 def analyze_ticker_rsi_logic(symbol, exchange):
     try:
         # Descargamos un poco más de data para estabilizar el RSI 168
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe='1h', limit=400)
+        ohlcv = live_ohlcv(exchange, symbol, '1h', limit=400)
         if not ohlcv or len(ohlcv) < 200: return None
+        s = get_stream_book().feed((symbol, "1h"), ohlcv)
         
-        df = pd.DataFrame(ohlcv, columns=["time", "open", "high", "low", "close", "vol"])
-        
-        # 1. MACD (12, 26, 9)
-        macd = ta.macd(df["close"], fast=12, slow=26, signal=9)
-        df["Hist"] = macd["MACDh_12_26_9"]
-        
-        # 2. Heikin Ashi
-        df = calculate_heikin_ashi(df)
-        
-        # 3. RSIs con suavizado EMA (Standard TV)
+        # RSIs con suavizado EMA (Standard TV): EMA del mismo largo sobre el RSI
         rsi_signals = {}
         for p in RSI_PERIODS:
-            rsi_raw = ta.rsi(df["close"], length=p)
-            # El Smoothing Length pedido: aplicamos EMA sobre el RSI
-            rsi_smooth = ta.ema(rsi_raw, length=p)
-            
-            curr_rsi = rsi_smooth.iloc[-1]
-            prev_rsi = rsi_smooth.iloc[-2]
+            curr_rsi = s.rsi_value[str(p)]
+            prev_rsi = s.prev_rsi[str(p)]
             
             if curr_rsi > prev_rsi:
                 rsi_signals[f"RSI {p}"] = f"📈 SUBE ({round(curr_rsi,1)})"
@@ -88,10 +72,8 @@ def analyze_ticker_rsi_logic(symbol, exchange):
                 rsi_signals[f"RSI {p}"] = f"📉 BAJA ({round(curr_rsi,1)})"
 
         # Lógica MACD Hist + HA (Basado en tu descripción)
-        hist_now = df["Hist"].iloc[-1]
-        hist_prev = df["Hist"].iloc[-2]
-        ha_now = df["HA_Color"].iloc[-1]
-        ha_prev = df["HA_Color"].iloc[-2]
+        hist_now, hist_prev = s.hist, s.prev_hist
+        ha_now, ha_prev = s.color, s.prev_color
         
         # Interpretación de impulso
         if hist_now > hist_prev:
@@ -107,7 +89,7 @@ def analyze_ticker_rsi_logic(symbol, exchange):
             "MACD_Hist": macd_momentum,
             "HA_Color": ha_status,
             "HA_Trend": ha_trend,
-            "Price": df["close"].iloc[-1]
+            "Price": ohlcv[-1][4]
         }
     except: return None
 
@@ -143,11 +125,12 @@ with st.sidebar:
                     row.update(analysis["RSI_Data"])
                     results.append(row)
                 time.sleep(0.05)
-            st.session_state["rsi_matrix_results"] = results
+            get_stream_book().save()
+            SCANS.put(SCANNER, results, replace=True)
             prog.empty()
 
     if st.button("Limpiar Memoria"):
-        st.session_state["rsi_matrix_results"] = []
+        SCANS.clear(SCANNER)
         st.rerun()
 
 # ─────────────────────────────────────────────
@@ -155,8 +138,9 @@ with st.sidebar:
 # ─────────────────────────────────────────────
 st.title("🎯 SNIPER MATRIX V27.1")
 
-if st.session_state["rsi_matrix_results"]:
-    df = pd.DataFrame(st.session_state["rsi_matrix_results"])
+rsi_matrix_results = SCANS.latest(SCANNER)
+if rsi_matrix_results:
+    df = pd.DataFrame(rsi_matrix_results)
     
     def style_matrix(val):
         v = str(val).upper()
@@ -1,10 +1,11 @@
 import streamlit as st
 import ccxt
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
-import time
 from datetime import datetime
+from core.indicators import macd
+from core.live_feed import live_batch
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -23,8 +24,8 @@ st.markdown("""
 # Lista Maestra para asegurar disponibilidad en Binance
 BINANCE_WHITELIST = ['BTC', 'ETH', 'SOL', 'BNB', 'XRP', 'ADA', 'AVAX', 'DOGE', 'DOT', 'LINK', 'MATIC', 'SHIB', 'TRX', 'LTC', 'BCH', 'UNI', 'NEAR', 'SUI', 'APT', 'OP', 'ARB', 'TIA', 'INJ', 'FET', 'RNDR', 'STX', 'KAS', 'ORDI', 'FIL', 'ATOM', 'IMX', 'HBAR', 'LDO', 'ICP', 'GRT', 'AAVE', 'MKR', 'RUNE', 'EGLD', 'SEI', 'PEPE', 'WIF', 'FLOKI', 'BONK', 'JUP', 'PYTH', 'ENA', 'BOME', 'STRK', 'DYDX', 'GALA', 'ALGO', 'FLOW', 'VET', 'AXS', 'SAND', 'MANA', 'THETA', 'CHZ', 'BEAM', 'PENDLE', 'ALT', 'MANTA', 'PIXEL', 'DYM', 'RON', 'ARKM', 'ID', 'MAV', 'WOO', 'JTO', 'ORDI', 'SATS', 'RATS', 'MYRO', 'METIS', 'GNO', 'ENS', 'ASTR', 'WLD', 'ZETA', 'XAI', 'TAO', 'TON', 'NOT', 'TURBO', 'MEME', 'LISTA', 'IO', 'ZK', 'ZRO', 'BANANA', 'RENDER', 'FIDA', 'EIGEN', 'SCR', 'COW', 'CETUS', 'PNUT', 'ACT', 'NEIRO', 'MOODENG', 'THE', 'VANA', 'PENGU']
 
-if "accumulated_results" not in st.session_state:
-    st.session_state["accumulated_results"] = []
+# Resultados en la base compartida (core.scan_store); el puntero de lotes sigue siendo por sesión
+SCANNER = "macd_pre_cross_4h"
 if "all_symbols" not in st.session_state:
     st.session_state["all_symbols"] = []
 if "pointer" not in st.session_state:
@@ -52,23 +53,16 @@ def fetch_filtered_universe(min_vol):
 # ─────────────────────────────────────────────
 # LÓGICA DE PRE-CRUCE MACD
 # ─────────────────────────────────────────────
-def analyze_macd_pre_cross(symbol, exchange):
+def analyze_macd_pre_cross(c):
     try:
-        # Analizamos 4 Horas como timeframe principal
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe='4h', limit=100)
-        if not ohlcv or len(ohlcv) < 50: return None
+        if c is None or len(c) < 50: return None
         
-        df = pd.DataFrame(ohlcv, columns=["time", "open", "high", "low", "close", "vol"])
-        macd = ta.macd(df["close"], fast=12, slow=26, signal=9)
+        macd_line, signal_line, hist = macd(c.close, 12, 26, 9)
         
-        hist = macd["MACDh_12_26_9"]
-        macd_line = macd["MACD_12_26_9"]
-        signal_line = macd["MACDs_12_26_9"]
-        
-        curr_h = hist.iloc[-1]
-        prev_h = hist.iloc[-2]
-        curr_m = macd_line.iloc[-1]
-        curr_s = signal_line.iloc[-1]
+        curr_h = hist[-1]
+        prev_h = hist[-2]
+        curr_m = macd_line[-1]
+        curr_s = signal_line[-1]
         
         state = "⚖️ NEUTRAL"
         logic_desc = "Sin anomalía detectada"
@@ -88,7 +82,7 @@ def analyze_macd_pre_cross(symbol, exchange):
             "Análisis": logic_desc,
             "Hist. Actual": round(curr_h, 6),
             "Hist. Previo": round(prev_h, 6),
-            "Precio": f"{df['close'].iloc[-1]:,.4f}"
+            "Precio": f"{c.close[-1]:,.4f}"
         }
     except: return None
 
@@ -96,16 +90,15 @@ def analyze_macd_pre_cross(symbol, exchange):
 # MOTOR DE ESCANEO POR LOTES
 # ─────────────────────────────────────────────
 def scan_batch(targets):
-    ex = get_exchange()
     new_data = []
     prog = st.progress(0)
-    for idx, sym in enumerate(targets):
-        prog.progress((idx+1)/len(targets), text=f"Analizando MACD 4H: {sym}")
-        res = analyze_macd_pre_cross(sym, ex)
+    # Analizamos 4 Horas como timeframe principal
+    candles, _ = live_batch([(sym, '4h', 100) for sym in targets], as_candles=True, progress=lambda d, n: prog.progress(d/n, text=f"Descargando MACD 4H: {d}/{n}"))
+    for sym in targets:
+        res = analyze_macd_pre_cross(candles.get((sym, '4h')))
         if res:
             res["Activo"] = sym.split(":")[0].replace("/USDT", "")
             new_data.append(res)
-        time.sleep(0.05)
     prog.empty()
     return new_data
 
@@ -131,23 +124,22 @@ with st.sidebar:
             targets = st.session_state["all_symbols"][ptr : ptr+b_size]
             results = scan_batch(targets)
             
-            # Acumular resultados
-            existing = {x["Activo"]: x for x in st.session_state["accumulated_results"]}
-            for r in results: existing[r["Activo"]] = r
-            st.session_state["accumulated_results"] = list(existing.values())
+            # Acumular resultados (upsert por Activo)
+            SCANS.put(SCANNER, results)
             st.session_state["pointer"] += b_size
             st.rerun()
 
     if st.button("🗑️ LIMPIAR MEMORIA"):
-        st.session_state["accumulated_results"] = []
+        SCANS.clear(SCANNER)
         st.session_state["pointer"] = 0
         st.rerun()
 
 # ─────────────────────────────────────────────
 # RENDERIZADO DE RESULTADOS
 # ─────────────────────────────────────────────
-if st.session_state["accumulated_results"]:
-    df = pd.DataFrame(st.session_state["accumulated_results"])
+accumulated_results = SCANS.latest(SCANNER)
+if accumulated_results:
+    df = pd.DataFrame(accumulated_results)
     
     # Filtros rápidos
     st.subheader(f"📊 Inteligencia Acumulada ({len(df)} activos)")
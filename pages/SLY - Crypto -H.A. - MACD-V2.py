@@ -1,9 +1,11 @@
 import streamlit as st
 import ccxt
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
 import time
+from core.indicators import macd
+from core.live_feed import live_ohlcv
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -21,8 +23,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "matrix_results" not in st.session_state:
-    st.session_state["matrix_results"] = []
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "omni_filter_matrix_v28"
 
 TIMEFRAMES = {
     "1m": "1m", "30m": "30m", "1H": "1h", "4H": "4h", "12H": "12h", "1D": "1d"
@@ -53,19 +55,17 @@ def get_filtered_symbols(min_vol):
 # ─────────────────────────────────────────────
 def analyze_macd_logic(symbol, tf_code, exchange):
     try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe=tf_code, limit=100)
-        if not ohlcv or len(ohlcv) < 35: return None
-        df = pd.DataFrame(ohlcv, columns=["time", "open", "high", "low", "close", "vol"])
-        macd = ta.macd(df["close"], fast=12, slow=26, signal=9)
-        m_line_series = macd["MACD_12_26_9"]
-        m_line = m_line_series.iloc[-1]
-        m_sig = macd["MACDs_12_26_9"].iloc[-1]
-        m_hist = macd["MACDh_12_26_9"].iloc[-1]
-        m_hist_prev = macd["MACDh_12_26_9"].iloc[-2]
+        c = live_ohlcv(exchange, symbol, tf_code, limit=100, as_candles=True)
+        if c is None or len(c) < 35: return None
+        m_line_series, signal, hist = macd(c.close, 12, 26, 9)
+        m_line = m_line_series[-1]
+        m_sig = signal[-1]
+        m_hist = hist[-1]
+        m_hist_prev = hist[-2]
 
         m0_status = "SOBRE 0" if m_line > 0 else "BAJO 0"
         if tf_code == "1m":
-            last_5 = m_line_series.tail(6).tolist()
+            last_5 = m_line_series[-6:].tolist()
             for i in range(1, len(last_5)):
                 if last_5[i-1] <= 0 and last_5[i] > 0:
                     m0_status = "⚡ CROSS UP"
@@ -81,7 +81,7 @@ def analyze_macd_logic(symbol, tf_code, exchange):
         }
     except: return None
 
-def scan_batch(targets, acc):
+def scan_batch(targets):
     ex = get_exchange()
     new_results = []
     prog = st.progress(0)
@@ -100,10 +100,6 @@ def scan_batch(targets, acc):
             time.sleep(0.05)
         except: continue
     prog.empty()
-    if acc:
-        curr = {x["Activo"]: x for x in st.session_state["matrix_results"]}
-        for r in new_results: curr[r["Activo"]] = r
-        return list(curr.values())
     return new_results
 
 def style_matrix(df):
@@ -138,13 +134,15 @@ with st.sidebar:
         
         acc = st.checkbox("Acumular resultados", value=True)
         if st.button("🚀 INICIAR ESCANEO", type="primary", use_container_width=True):
-            st.session_state["matrix_results"] = scan_batch(targets_to_scan, acc)
+            # Sin acumular se reemplaza el snapshot vigente por el del lote
+            SCANS.put(SCANNER, scan_batch(targets_to_scan), replace=not acc)
             st.rerun()
 
-    if st.session_state["matrix_results"]:
+    matrix_results = SCANS.latest(SCANNER)
+    if matrix_results:
         st.divider()
         st.header("🔍 2. Filtros de Resultados")
-        df_full = pd.DataFrame(st.session_state["matrix_results"])
+        df_full = pd.DataFrame(matrix_results)
         
         # Filtro de nombre
         search = st.text_input("Buscar Activo (ej: BTC):").upper()
@@ -159,14 +157,14 @@ with st.sidebar:
         h1_filter = st.multiselect("Filtrar 1H Hist.:", df_full["1H Hist."].unique(), default=df_full["1H Hist."].unique())
 
     if st.button("🗑️ Limpiar Todo", use_container_width=True):
-        st.session_state["matrix_results"] = []
+        SCANS.clear(SCANNER)
         st.rerun()
 
 # ─────────────────────────────────────────────
 # RENDERIZADO FINAL CON FILTROS APLICADOS
 # ─────────────────────────────────────────────
-if st.session_state["matrix_results"]:
-    df = pd.DataFrame(st.session_state["matrix_results"])
+if matrix_results:
+    df = pd.DataFrame(matrix_results)
     
     # Aplicación de Filtros
     if search:
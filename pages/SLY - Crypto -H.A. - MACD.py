@@ -1,10 +1,13 @@
 import streamlit as st
 import ccxt
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
-import time
 from datetime import datetime
+from core.heikin_ashi import heikin_ashi, ha_direction
+from core.indicators import macd, rsi
+from core.signals import macd_flip_position
+from core.live_feed import live_batch
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -23,8 +26,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "sniper_results" not in st.session_state:
-    st.session_state["sniper_results"] = []
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "crypto_ha_macd"
 
 TIMEFRAMES = {
     "1m":"1m", "5m":"5m", "15m":"15m",
@@ -63,52 +66,29 @@ def get_active_pairs_by_vol(min_vol):
 # ─────────────────────────────────────────────
 # CÁLCULOS TÉCNICOS
 # ─────────────────────────────────────────────
-def calculate_heikin_ashi(df):
-    df = df.copy()
-    df["HA_Close"] = (df["open"] + df["high"] + df["low"] + df["close"]) / 4
-    ha_open = [df["open"].iloc[0]]
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[-1] + df["HA_Close"].iloc[i-1]) / 2)
-    df["HA_Open"], df["HA_Color"] = ha_open, np.where(df["HA_Close"] > ha_open, 1, -1)
-    return df
-
-def analyze_ticker_tf(symbol, tf_code, exchange, current_price):
+def analyze_ticker_tf(c, current_price):
     try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe=tf_code, limit=100)
-        if not ohlcv or len(ohlcv) < 50: return None
-        ohlcv[-1][4] = current_price
-        df = pd.DataFrame(ohlcv, columns=["time", "open", "high", "low", "close", "vol"])
-        df["dt"] = pd.to_datetime(df["time"], unit="ms")
-        
-        macd = ta.macd(df["close"])
-        df["Hist"], df["MACD"], df["Signal"] = macd["MACDh_12_26_9"], macd["MACD_12_26_9"], macd["MACDs_12_26_9"]
-        df["RSI"] = ta.rsi(df["close"], length=14)
-        df = calculate_heikin_ashi(df)
+        if c is None or len(c) < 50: return None
+        c.set_last_close(current_price)
+        line, signal, hist = macd(c.close)
+        ha_open, ha_close = heikin_ashi(c.open, c.high, c.low, c.close, seed="open")
 
-        position, last_date = "NEUTRO", df["dt"].iloc[-1]
-        for i in range(1, len(df)):
-            h, ph, hc, d = df["Hist"].iloc[i], df["Hist"].iloc[i-1], df["HA_Color"].iloc[i], df["dt"].iloc[i]
-            if position == "LONG" and h < ph: position = "NEUTRO"
-            elif position == "SHORT" and h > ph: position = "NEUTRO"
-            if position == "NEUTRO":
-                if hc == 1 and h > ph: position, last_date = "LONG", d
-                elif hc == -1 and h < ph: position, last_date = "SHORT", d
+        sig = macd_flip_position(ha_direction(ha_open, ha_close), hist, c.close, zero_filter=False)
+        position = {1: "LONG", -1: "SHORT"}.get(sig.state, "NEUTRO")
+        last_date = pd.to_datetime(c.ts[sig.index if sig.index >= 0 else -1], unit="ms")
 
-        rsi_val = round(df["RSI"].iloc[-1], 1)
+        rsi_val = round(rsi(c.close, 14)[-1], 1)
         rsi_state = "RSI↑" if rsi_val > 55 else "RSI↓" if rsi_val < 45 else "RSI="
-        
-        df["cross"] = np.sign(df["MACD"] - df["Signal"]).diff().ne(0)
-        cross_rows = df[df["cross"]]
-        if not cross_rows.empty:
-            last_cross = cross_rows.iloc[-1]
-            cross_result = "Alcista" if last_cross["MACD"] > last_cross["Signal"] else "Bajista"
-        else: cross_result = "--"
+
+        # Último cruce MACD/Señal (un NaN cuenta como cambio, igual que .diff().ne(0))
+        cross = np.flatnonzero(np.r_[True, ~(np.diff(np.sign(line - signal)) == 0)])[-1]
+        cross_result = "Alcista" if line[cross] > signal[cross] else "Bajista"
 
         return {
             "signal": f"{'🟢' if position=='LONG' else '🔴' if position=='SHORT' else '⚪'} {position} | {rsi_state}",
             "signal_time": (last_date - pd.Timedelta(hours=3)).strftime("%H:%M"),
-            "m0": "SOBRE 0" if df["MACD"].iloc[-1] > 0 else "BAJO 0",
-            "h_dir": "SUBIENDO" if df["Hist"].iloc[-1] > df["Hist"].iloc[-2] else "BAJANDO",
+            "m0": "SOBRE 0" if line[-1] > 0 else "BAJO 0",
+            "h_dir": "SUBIENDO" if hist[-1] > hist[-2] else "BAJANDO",
             "cross_state": cross_result
         }
     except: return None
@@ -134,16 +114,16 @@ def get_macd_rec(row):
 # MOTOR DE ESCANEO
 # ─────────────────────────────────────────────
 def scan_batch(targets, acc):
-    ex = get_exchange()
     new_results = []
     prog = st.progress(0)
-    for idx, sym in enumerate(targets):
-        prog.progress((idx+1)/len(targets), text=f"Analizando {sym.split(':')[0]}")
+    jobs = [(sym, tf, 100) for sym in targets for tf in TIMEFRAMES.values()]
+    candles, prices = live_batch(jobs, prices_for=targets, as_candles=True, progress=lambda d, n: prog.progress(d/n, text=f"Descargando velas {d}/{n}"))
+    for sym in targets:
         try:
-            p = ex.fetch_ticker(sym)["last"]
+            p = prices[sym]
             row = {"Activo": sym.split(":")[0].replace("/USDT", ""), "Precio": f"{p:,.4f}"}
             for label, tf in TIMEFRAMES.items():
-                res = analyze_ticker_tf(sym, tf, ex, p)
+                res = analyze_ticker_tf(candles.get((sym, tf)), p)
                 if res:
                     row[f"{label} H.A./MACD"], row[f"{label} Hora Señal"] = res["signal"], res["signal_time"]
                     row[f"{label} MACD 0"], row[f"{label} Hist."], row[f"{label} Cruce MACD"] = res["m0"], res["h_dir"], res["cross_state"]
@@ -152,13 +132,9 @@ def scan_batch(targets, acc):
             row["VEREDICTO"], row["ESTRATEGIA"] = get_verdict(row)
             row["MACD REC."] = get_macd_rec(row)
             new_results.append(row)
-            time.sleep(0.05)
         except: continue
     prog.empty()
-    if acc:
-        curr = {x["Activo"]: x for x in st.session_state["sniper_results"]}
-        for r in new_results: curr[r["Activo"]] = r
-        return list(curr.values())
+    SCANS.put(SCANNER, new_results, replace=not acc)
     return new_results
 
 # ─────────────────────────────────────────────
@@ -209,21 +185,22 @@ with st.sidebar:
     
     if st.button("🚀 INICIAR ESCANEO", type="primary", use_container_width=True):
         if targets_to_scan:
-            st.session_state["sniper_results"] = scan_batch(targets_to_scan, acc)
+            scan_batch(targets_to_scan, acc)
             st.rerun()
         else:
             st.warning("Seleccione al menos un activo para analizar.")
 
     st.divider()
-    if st.session_state["sniper_results"]:
+    sniper_results = SCANS.latest(SCANNER)
+    if sniper_results:
         st.subheader("🧹 Post-Filtros")
-        df_temp = pd.DataFrame(st.session_state["sniper_results"])
+        df_temp = pd.DataFrame(sniper_results)
         f_ver = st.multiselect("Veredicto:", options=df_temp["VEREDICTO"].unique(), default=df_temp["VEREDICTO"].unique())
         f_est = st.multiselect("Estrategia:", options=df_temp["ESTRATEGIA"].unique(), default=df_temp["ESTRATEGIA"].unique())
         f_mac = st.multiselect("MACD Rec.:", options=df_temp["MACD REC."].unique(), default=df_temp["MACD REC."].unique())
     
     if st.button("Limpiar Memoria"):
-        st.session_state["sniper_results"] = []
+        SCANS.clear(SCANNER)
         st.rerun()
 
 # ─────────────────────────────────────────────
@@ -231,8 +208,8 @@ with st.sidebar:
 # ─────────────────────────────────────────────
 st.title("🦅 SLY - Crypto Sniper")
 
-if st.session_state["sniper_results"]:
-    df_f = pd.DataFrame(st.session_state["sniper_results"])
+if sniper_results:
+    df_f = pd.DataFrame(sniper_results)
     
     if not df_f.empty:
         # Aplicar Post-Filtros
@@ -1,10 +1,10 @@
 import streamlit as st
 import ccxt
 import pandas as pd
-import pandas_ta as ta
-import numpy as np
-import time
 from datetime import datetime
+from core.indicators.streaming import HaMacdStream, StreamBook
+from core.live_feed import live_batch
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -23,8 +23,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "sniper_results" not in st.session_state:
-    st.session_state["sniper_results"] = []
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "crypto_impulso_mtf"
 
 TIMEFRAMES = {
     "1m":"1m", "5m":"5m", "15m":"15m",
@@ -60,64 +60,37 @@ def get_active_pairs_by_vol(min_vol):
         return pd.DataFrame(valid).sort_values("vol", ascending=False)["symbol"].tolist()
     except: return []
 
+# Estado incremental (MACD, RSI, HA, posición) por símbolo y temporalidad:
+# cada escaneo procesa solo las velas nuevas y la vela abierta revisada
+@st.cache_resource
+def get_stream_book():
+    return StreamBook("impulso_multitemporal", HaMacdStream)
+
 # ─────────────────────────────────────────────
 # CÁLCULOS TÉCNICOS
 # ─────────────────────────────────────────────
-def calculate_heikin_ashi(df):
-    df = df.copy()
-    df["HA_Close"] = (df["open"] + df["high"] + df["low"] + df["close"]) / 4
-    ha_open = [df["open"].iloc[0]]
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[-1] + df["HA_Close"].iloc[i-1]) / 2)
-    df["HA_Open"], df["HA_Color"] = ha_open, np.where(df["HA_Close"] > ha_open, 1, -1)
-    return df
-
-def analyze_ticker_tf(symbol, tf_code, exchange, current_price):
+def analyze_ticker_tf(key, ohlcv):
     try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe=tf_code, limit=100)
         if not ohlcv or len(ohlcv) < 50: return None
-        ohlcv[-1][4] = current_price
-        df = pd.DataFrame(ohlcv, columns=["time", "open", "high", "low", "close", "vol"])
-        df["dt"] = pd.to_datetime(df["time"], unit="ms")
-        macd = ta.macd(df["close"])
-        
-        hist = macd["MACDh_12_26_9"]
-        macd_line = macd["MACD_12_26_9"]
-        signal_line = macd["MACDs_12_26_9"]
-        
-        df["Hist"], df["MACD"], df["Signal"] = hist, macd_line, signal_line
-        df["RSI"] = ta.rsi(df["close"], length=14)
-        df = calculate_heikin_ashi(df)
+        s = get_stream_book().feed(key, ohlcv)
 
-        position, last_date = "NEUTRO", df["dt"].iloc[-1]
-        for i in range(1, len(df)):
-            h, ph, hc, d = df["Hist"].iloc[i], df["Hist"].iloc[i-1], df["HA_Color"].iloc[i], df["dt"].iloc[i]
-            if position == "LONG" and h < ph: position = "NEUTRO"
-            elif position == "SHORT" and h > ph: position = "NEUTRO"
-            if position == "NEUTRO":
-                if hc == 1 and h > ph: position, last_date = "LONG", d
-                elif hc == -1 and h < ph: position, last_date = "SHORT", d
+        position = {1: "LONG", -1: "SHORT"}.get(s.position, "NEUTRO")
+        last_date = pd.to_datetime(s.entry_ts if s.entry_ts is not None else s.last_ts, unit="ms")
 
-        rsi_val = round(df["RSI"].iloc[-1], 1)
+        rsi_val = round(s.rsi_value["14"], 1)
         rsi_state = "RSI↑" if rsi_val > 55 else "RSI↓" if rsi_val < 45 else "RSI="
-        
-        df["cross"] = np.sign(df["MACD"] - df["Signal"]).diff().ne(0)
-        cross_rows = df[df["cross"]]
-        if not cross_rows.empty:
-            last_cross = cross_rows.iloc[-1]
-            cross_result = "Alcista" if last_cross["MACD"] > last_cross["Signal"] else "Bajista"
-        else: cross_result = "--"
+        cross_result = "--" if s.cross_bull is None else "Alcista" if s.cross_bull else "Bajista"
 
         return {
             "signal": f"{'🟢' if position=='LONG' else '🔴' if position=='SHORT' else '⚪'} {position} | {rsi_state}",
             "signal_time": (last_date - pd.Timedelta(hours=3)).strftime("%H:%M"),
-            "m0": "SOBRE 0" if df["MACD"].iloc[-1] > 0 else "BAJO 0",
-            "h_dir": "SUBIENDO" if df["Hist"].iloc[-1] > df["Hist"].iloc[-2] else "BAJANDO",
+            "m0": "SOBRE 0" if s.macd.line > 0 else "BAJO 0",
+            "h_dir": "SUBIENDO" if s.hist > s.prev_hist else "BAJANDO",
             "cross_state": cross_result,
-            "raw_hist": df["Hist"].iloc[-1],
-            "raw_prev_hist": df["Hist"].iloc[-2],
-            "raw_macd": df["MACD"].iloc[-1],
-            "raw_signal": df["Signal"].iloc[-1]
+            "raw_hist": s.hist,
+            "raw_prev_hist": s.prev_hist,
+            "raw_macd": s.macd.line,
+            "raw_signal": s.macd.signal
         }
     except: return None
 
@@ -196,17 +169,20 @@ def get_macd_rec(row):
 # MOTOR DE ESCANEO
 # ─────────────────────────────────────────────
 def scan_batch(targets, acc):
-    ex = get_exchange()
     new_results = []
     prog = st.progress(0)
-    for idx, sym in enumerate(targets):
-        prog.progress((idx+1)/len(targets), text=f"Analizando {sym.split(':')[0]}")
+    jobs = [(sym, tf, 100) for sym in targets for tf in TIMEFRAMES.values()]
+    candles, prices = live_batch(jobs, prices_for=targets, progress=lambda d, n: prog.progress(d/n, text=f"Descargando velas {d}/{n}"))
+    for sym in targets:
         try:
-            p = ex.fetch_ticker(sym)["last"]
+            # Último precio del ticker; si no vino (REST de respaldo), el cierre de la última vela
+            p = prices.get(sym)
+            if p is None: p = next((c[-1][4] for c in (candles.get((sym, tf)) for tf in TIMEFRAMES.values()) if c), None)
+            if p is None: continue
             row = {"Activo": sym.split(":")[0].replace("/USDT", ""), "Precio": f"{p:,.4f}"}
             tf_raw_data = {}
             for label, tf in TIMEFRAMES.items():
-                res = analyze_ticker_tf(sym, tf, ex, p)
+                res = analyze_ticker_tf((sym, tf), candles.get((sym, tf)))
                 if res:
                     row[f"{label} H.A./MACD"], row[f"{label} Hora Señal"] = res["signal"], res["signal_time"]
                     row[f"{label} MACD 0"], row[f"{label} Hist."], row[f"{label} Cruce MACD"] = res["m0"], res["h_dir"], res["cross_state"]
@@ -220,13 +196,10 @@ def scan_batch(targets, acc):
             row["ALERTA ESTRATÉGICA"] = get_strategic_alert(row) # NUEVA COLUMNA
             final_row = {k: v for k, v in row.items() if "_data" not in k}
             new_results.append(final_row)
-            time.sleep(0.05)
         except: continue
+    get_stream_book().save()
     prog.empty()
-    if acc:
-        curr = {x["Activo"]: x for x in st.session_state["sniper_results"]}
-        for r in new_results: curr[r["Activo"]] = r
-        return list(curr.values())
+    SCANS.put(SCANNER, new_results, replace=not acc)
     return new_results
 
 def style_matrix(df):
@@ -259,21 +232,22 @@ with st.sidebar:
 
     acc = st.checkbox("Acumular Resultados", value=True)
     if st.button("🚀 INICIAR ESCANEO", type="primary", use_container_width=True):
-        if targets_to_scan: st.session_state["sniper_results"] = scan_batch(targets_to_scan, acc)
+        if targets_to_scan: scan_batch(targets_to_scan, acc)
 
     st.divider()
-    if st.session_state["sniper_results"]:
+    sniper_results = SCANS.latest(SCANNER)
+    if sniper_results:
         st.subheader("🧹 Post-Filtros")
-        df_temp = pd.DataFrame(st.session_state["sniper_results"])
+        df_temp = pd.DataFrame(sniper_results)
         f_str = st.multiselect("Alerta Estratégica:", options=df_temp["ALERTA ESTRATÉGICA"].unique(), default=df_temp["ALERTA ESTRATÉGICA"].unique())
         f_imp = st.multiselect("Impulso:", options=df_temp["IMPULSO MULTITEMPORAL"].unique(), default=df_temp["IMPULSO MULTITEMPORAL"].unique())
         f_ver = st.multiselect("Veredicto:", options=df_temp["VEREDICTO"].unique(), default=df_temp["VEREDICTO"].unique())
     
-    if st.button("Limpiar Memoria"): st.session_state["sniper_results"] = []; st.rerun()
+    if st.button("Limpiar Memoria"): SCANS.clear(SCANNER); st.rerun()
 
 # RENDERIZADO
-if st.session_state["sniper_results"]:
-    df_f = pd.DataFrame(st.session_state["sniper_results"])
+if sniper_results:
+    df_f = pd.DataFrame(sniper_results)
     # Aplicar Filtros
     df_f = df_f[df_f["ALERTA ESTRATÉGICA"].isin(f_str) & df_f["IMPULSO MULTITEMPORAL"].isin(f_imp) & df_f["VEREDICTO"].isin(f_ver)]
     prio = ["Activo", "ALERTA ESTRATÉGICA", "IMPULSO MULTITEMPORAL", "VEREDICTO", "Precio"]
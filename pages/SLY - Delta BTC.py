@@ -5,6 +5,10 @@ import pandas_ta as ta
 import numpy as np
 import time
 from datetime import datetime
+from core.heikin_ashi import heikin_ashi
+from core.signals import sly_state
+from core.ohlcv_store import fetch_ohlcv_cached
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # 1. CONFIGURACIÓN DE INTERFAZ (ESTILO BINANCE)
@@ -39,8 +43,8 @@ BINANCE_WHITELIST = [
     'MINA', 'RAY', 'DYDX', 'GALA', 'AGLD', 'RAD', 'ILV', 'RENBTC', 'ADX', 'QUICK', 'SPELL', 'TRIAS', 'TFUEL', 'LPT', 'KDA'
 ]
 
-if "accumulated_data" not in st.session_state:
-    st.session_state["accumulated_data"] = pd.DataFrame()
+# Resultados en la base compartida (core.scan_store); el puntero del lote sigue por sesión
+SCANNER = "delta_btc"
 if "filtered_symbols" not in st.session_state:
     st.session_state["filtered_symbols"] = []
 if "current_pointer" not in st.session_state:
@@ -53,22 +57,10 @@ def run_sly_engine_1d(df):
     if df.empty or len(df) < 35: return "FUERA ⚪", "-", "-"
     macd = ta.macd(df['close'], fast=12, slow=26, signal=9)
     hist = macd['MACDh_12_26_9']
-    ha_close = (df['open'] + df['high'] + df['low'] + df['close']) / 4
-    ha_open = np.zeros(len(df))
-    ha_open[0] = (df['open'].iloc[0] + df['close'].iloc[0]) / 2
-    for i in range(1, len(df)):
-        ha_open[i] = (ha_open[i-1] + ha_close.iloc[i-1]) / 2
+    ha_open, ha_close = heikin_ashi(df['open'], df['high'], df['low'], df['close'], seed="mid")
     ha_dir = np.where(ha_close > ha_open, 1, -1)
-    state, entry_px, entry_tm = 0, 0.0, None
-    for i in range(1, len(df)):
-        h, h_prev = hist.iloc[i], hist.iloc[i-1]
-        hd, hd_prev = ha_dir[i], ha_dir[i-1]
-        longC = (hd == 1 and hd_prev == -1 and h < 0 and h > h_prev)
-        shrtC = (hd == -1 and hd_prev == 1 and h > 0 and h < h_prev)
-        if longC: state, entry_px, entry_tm = 1, df['close'].iloc[i], df['dt'].iloc[i]
-        elif shrtC: state, entry_px, entry_tm = -1, df['close'].iloc[i], df['dt'].iloc[i]
-        elif state != 0:
-            if (state == 1 and h < h_prev) or (state == -1 and h > h_prev): state = 0
+    state, entry_px, entry_idx = sly_state(ha_dir, hist.to_numpy(), df['close'].to_numpy())
+    entry_tm = df['dt'].iloc[entry_idx] if entry_idx >= 0 else None
     if state != 0:
         pnl = (df['close'].iloc[-1] - entry_px) / entry_px * 100 if state == 1 else (entry_px - df['close'].iloc[-1]) / entry_px * 100
         return ("LONG 🟢" if state == 1 else "SHORT 🔴"), entry_tm.strftime("%d/%m/%y"), f"{pnl:+.2f}%"
@@ -135,7 +127,7 @@ if st.session_state["filtered_symbols"]:
             prog = st.progress(0)
             for i, sym in enumerate(targets):
                 try:
-                    ohlcv = ex.fetch_ohlcv(sym, timeframe='1d', limit=100)
+                    ohlcv = fetch_ohlcv_cached(ex, sym, '1d', limit=100)
                     df = pd.DataFrame(ohlcv, columns=['t','open','high','low','close','v'])
                     df['dt'] = pd.to_datetime(df['t'], unit='ms')
                     alt_perf = ((df['close'].iloc[-1] / df['close'].iloc[-2]) - 1) * 100
@@ -154,8 +146,7 @@ if st.session_state["filtered_symbols"]:
                 except: continue
                 prog.progress((i + 1) / len(targets))
             if new_rows:
-                df_new = pd.DataFrame(new_rows)
-                st.session_state["accumulated_data"] = pd.concat([st.session_state["accumulated_data"], df_new]).drop_duplicates(subset="Activo", keep="last")
+                SCANS.put(SCANNER, new_rows)
                 st.session_state["current_pointer"] = next_limit
                 st.rerun()
     else:
@@ -164,9 +155,10 @@ if st.session_state["filtered_symbols"]:
 # ─────────────────────────────────────────────
 # 5. RENDERIZADO
 # ─────────────────────────────────────────────
-if not st.session_state["accumulated_data"].empty:
+accumulated_data = SCANS.frame(SCANNER)
+if not accumulated_data.empty:
     st.divider()
-    df_disp = st.session_state["accumulated_data"].sort_values(by="Vs BTC (Delta)", ascending=False).reset_index(drop=True)
+    df_disp = accumulated_data.sort_values(by="Vs BTC (Delta)", ascending=False).reset_index(drop=True)
     def style_output(row):
         styles = [''] * len(row)
         try:
@@ -186,6 +178,6 @@ if not st.session_state["accumulated_data"].empty:
         return styles
     st.dataframe(df_disp.style.apply(style_output, axis=1), use_container_width=True, height=600)
     if st.button("🗑️ REINICIAR TODO"):
-        st.session_state["accumulated_data"] = pd.DataFrame()
+        SCANS.clear(SCANNER)
         st.session_state["current_pointer"] = 0
         st.rerun()
@@ -1,10 +1,12 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-import time
 from datetime import datetime
+from core.heikin_ashi import heikin_ashi
+from core.signals import sly_state
+from core.yf_panel import load_panels
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -20,8 +22,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "sniper_results" not in st.session_state:
-    st.session_state["sniper_results"] = []
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "global_macro_sync"
 
 MACRO_CONFIG = {
     "1D": {"int": "1d", "per": "2y"},
@@ -93,29 +95,17 @@ def run_sly_engine(df):
     if macd is None or macd.empty: return 0, 0, None
     hist = macd['MACDh_12_26_9']
     
-    ha_close = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    ha_open = np.zeros(len(df))
-    ha_open[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    for i in range(1, len(df)):
-        ha_open[i] = (ha_open[i-1] + ha_close.iloc[i-1]) / 2
+    ha_open, ha_close = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
     ha_dir = np.where(ha_close > ha_open, 1, -1)
     
-    state, entry_px, entry_tm = 0, 0.0, None
-    for i in range(1, len(df)):
-        h, h_prev = hist.iloc[i], hist.iloc[i-1]
-        hd, hd_prev = ha_dir[i], ha_dir[i-1]
-        longC = (hd == 1 and hd_prev == -1 and h < 0 and h > h_prev)
-        shrtC = (hd == -1 and hd_prev == 1 and h > 0 and h < h_prev)
-        if longC: state, entry_px, entry_tm = 1, df['Close'].iloc[i], df.index[i]
-        elif shrtC: state, entry_px, entry_tm = -1, df['Close'].iloc[i], df.index[i]
-        elif state != 0:
-            if (state == 1 and h < h_prev) or (state == -1 and h > h_prev): state = 0
+    state, entry_px, entry_idx = sly_state(ha_dir, hist.to_numpy(), df['Close'].to_numpy())
+    entry_tm = df.index[entry_idx] if entry_idx >= 0 else None
     return state, entry_px, entry_tm
 
 # ─────────────────────────────────────────────
 # ANALIZADOR
 # ─────────────────────────────────────────────
-def analyze_asset(symbol, category="Custom"):
+def analyze_asset(symbol, panels, category="Custom"):
     row = {"Categoría": category, "Activo": symbol}
     clean_sym = symbol.split("-")[0].split(".")[0].split(":")[0].upper()
     row["Operable (ByMA)"] = "✅ SÍ" if clean_sym in OPERABLE_BYMA else "❌ NO"
@@ -123,8 +113,7 @@ def analyze_asset(symbol, category="Custom"):
     current_price = None
     for tf_key, config in MACRO_CONFIG.items():
         try:
-            df = yf.download(symbol, interval=config['int'], period=config['per'], progress=False, auto_adjust=True)
-            if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
+            df = panels[tf_key].get(symbol, pd.DataFrame())
             if df.empty: continue
             if tf_key == "1D": current_price = df['Close'].iloc[-1]
             st_val, px_in, tm_in = run_sly_engine(df)
@@ -173,15 +162,16 @@ with st.sidebar:
     if st.button("🚀 ACTUALIZAR MATRIZ GLOBAL", type="primary", use_container_width=True):
         results = []
         prog = st.progress(0)
+        panels = load_panels(TICKERS_LIST, MACRO_CONFIG, progress=lambda d, n: prog.progress(d/n, text="Descargando velas..."))
         for idx, sym in enumerate(TICKERS_LIST):
             prog.progress((idx+1)/len(TICKERS_LIST), text=f"Analizando: {sym}")
-            results.append(analyze_asset(sym, ASSET_DATABASE[sym][0]))
-            time.sleep(0.01)
-        st.session_state["sniper_results"] = results
+            results.append(analyze_asset(sym, panels, ASSET_DATABASE[sym][0]))
+        SCANS.put(SCANNER, results, replace=True)
         st.rerun()
 
-if st.session_state["sniper_results"]:
-    df_f = pd.DataFrame(st.session_state["sniper_results"])
+sniper_results = SCANS.latest(SCANNER)
+if sniper_results:
+    df_f = pd.DataFrame(sniper_results)
     df_f = df_f.sort_values(by=["Categoría", "Activo"], ascending=[True, True])
     main_cols = ["Categoría", "Activo", "Precio", "1D Signal", "1D Fecha", "1D PnL", "1S Signal", "1S Fecha", "1S PnL", "1M Signal", "1M Fecha", "1M PnL"]
     st.dataframe(style_macro(df_f[main_cols]), use_container_width=True, height=600)
@@ -194,9 +184,10 @@ if st.session_state["sniper_results"]:
         constituents = ASSET_DATABASE[selected_main][1]
         detailed_results = []
         prog_detail = st.progress(0)
+        panels = load_panels(constituents, MACRO_CONFIG, progress=lambda d, n: prog_detail.progress(d/n, text="Descargando velas..."))
         for idx, comp in enumerate(constituents):
             prog_detail.progress((idx+1)/len(constituents), text=f"Subyacente: {comp}")
-            detailed_results.append(analyze_asset(comp, f"Driver de {selected_main}"))
+            detailed_results.append(analyze_asset(comp, panels, f"Driver de {selected_main}"))
         
         df_detailed = pd.DataFrame(detailed_results)
         cols_final = ["Operable (ByMA)", "Activo", "Precio", "1D Signal", "1D Fecha", "1D PnL", "1S Signal", "1S Fecha", "1S PnL", "1M Signal", "1M Fecha", "1M PnL"]
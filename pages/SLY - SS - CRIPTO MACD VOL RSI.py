@@ -4,7 +4,10 @@ import pandas as pd
 import pandas_ta as ta
 import numpy as np
 import time
-from datetime import datetime
+from core.heikin_ashi import heikin_ashi
+from core.signals import sly_state
+from core.live_feed import live_ohlcv
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -19,8 +22,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "sniper_results" not in st.session_state:
-    st.session_state["sniper_results"] = []
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "crypto_macd_vol_rsi"
 
 MACRO_CONFIG = {
     "1H": "1h",
@@ -59,18 +62,11 @@ def run_sly_engine(df):
     if macd is None or macd.empty: return 0, 0, None
     hist = macd['MACDh_12_26_9']
     
-    ha_close = (df['open'] + df['high'] + df['low'] + df['close']) / 4
-    ha_open = np.zeros(len(df)); ha_open[0] = (df['open'].iloc[0] + df['close'].iloc[0]) / 2
-    for i in range(1, len(df)): ha_open[i] = (ha_open[i-1] + ha_close.iloc[i-1]) / 2
+    ha_open, ha_close = heikin_ashi(df['open'], df['high'], df['low'], df['close'], seed="mid")
     ha_dir = np.where(ha_close > ha_open, 1, -1)
     
-    state, entry_px, entry_tm = 0, 0.0, None
-    for i in range(1, len(df)):
-        h, h_prev, hd, hd_prev = hist.iloc[i], hist.iloc[i-1], ha_dir[i], ha_dir[i-1]
-        if hd == 1 and hd_prev == -1 and h < 0 and h > h_prev: state, entry_px, entry_tm = 1, df['close'].iloc[i], df.index[i]
-        elif hd == -1 and hd_prev == 1 and h > 0 and h < h_prev: state, entry_px, entry_tm = -1, df['close'].iloc[i], df.index[i]
-        elif state != 0:
-            if (state == 1 and h < h_prev) or (state == -1 and h > h_prev): state = 0
+    state, entry_px, entry_idx = sly_state(ha_dir, hist.to_numpy(), df['close'].to_numpy())
+    entry_tm = df.index[entry_idx] if entry_idx >= 0 else None
     return state, entry_px, entry_tm
 
 def analyze_crypto(symbol, exchange):
@@ -78,7 +74,7 @@ def analyze_crypto(symbol, exchange):
     
     for label, tf in MACRO_CONFIG.items():
         try:
-            ohlcv = exchange.fetch_ohlcv(symbol, timeframe=tf, limit=100)
+            ohlcv = live_ohlcv(exchange, symbol, tf, limit=100)
             df = pd.DataFrame(ohlcv, columns=['time', 'open', 'high', 'low', 'close', 'vol'])
             df['dt'] = pd.to_datetime(df['time'], unit='ms')
             df.set_index('dt', inplace=True)
@@ -155,19 +151,18 @@ with st.sidebar:
                 results.append(analyze_crypto(sym, ex))
                 time.sleep(0.05)
             
-            current = {x["Activo"]: x for x in st.session_state["sniper_results"]}
-            for r in results: current[r["Activo"]] = r
-            st.session_state["sniper_results"] = list(current.values())
+            SCANS.put(SCANNER, results)
             st.rerun()
 
     if st.button("Limpiar Memoria"):
-        st.session_state["sniper_results"] = []; st.rerun()
+        SCANS.clear(SCANNER); st.rerun()
 
 # ─────────────────────────────────────────────
 # RENDERIZADO
 # ─────────────────────────────────────────────
-if st.session_state["sniper_results"]:
-    df = pd.DataFrame(st.session_state["sniper_results"])
+sniper_results = SCANS.latest(SCANNER)
+if sniper_results:
+    df = pd.DataFrame(sniper_results)
     
     def style_matrix(v):
         v_str = str(v)
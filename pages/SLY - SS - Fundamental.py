@@ -1,12 +1,12 @@
 import os
-import time
 import math
 import warnings
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from core.fundamentals import fetch_fundamentals
 
 warnings.filterwarnings("ignore")
 
@@ -42,8 +42,9 @@ MAX_DEBT_EQUITY = 2.0
 # Cantidad de empresas a analizar
 MAX_TICKERS = 1000
 
-# Pausa entre acciones para evitar demasiadas solicitudes
-REQUEST_DELAY = 0.15
+# Descarga en paralelo: hilos y tope global de pedidos por segundo a Yahoo
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 8
 
 
 # ============================================================
@@ -83,15 +84,6 @@ def percent(value):
     return value
 
 
-def get_value(dictionary, *keys):
-    """Busca la primera clave disponible."""
-    for key in keys:
-        if key in dictionary:
-            return dictionary[key]
-
-    return np.nan
-
-
 def safe_row(df, names):
     """
     Obtiene la fila disponible de un DataFrame financiero.
@@ -159,610 +151,305 @@ def growth_from_series(df, names, periods=4):
 # SCORE
 # ============================================================
 
-def score_company(data):
-    """
-    Quality Growth Score 0-100.
-    """
-
-    score = 0
+# Cada componente: columna y tramos (operador, corte, puntos); vale el
+# primer tramo que se cumple y un NaN suma 0.
+SCORE_TIERS = [
 
-    # --------------------------------------------------------
     # CRECIMIENTO - 30 puntos
-    # --------------------------------------------------------
-
-    eps5 = data["EPS Growth 5Y"]
-    eps_next = data["EPS Growth Next 5Y"]
-    sales = data["Sales Growth 5Y"]
-
-    if not pd.isna(eps5):
-        if eps5 >= 20:
-            score += 10
-        elif eps5 >= 10:
-            score += 7
-        elif eps5 > 0:
-            score += 3
-
-    if not pd.isna(eps_next):
-        if eps_next >= 20:
-            score += 10
-        elif eps_next >= 10:
-            score += 7
-        elif eps_next > 0:
-            score += 3
-
-    if not pd.isna(sales):
-        if sales >= 15:
-            score += 10
-        elif sales >= 5:
-            score += 7
-        elif sales > 0:
-            score += 3
+    ("EPS Growth 5Y", [(">=", 20, 10), (">=", 10, 7), (">", 0, 3)]),
+    ("EPS Growth Next 5Y", [(">=", 20, 10), (">=", 10, 7), (">", 0, 3)]),
+    ("Sales Growth 5Y", [(">=", 15, 10), (">=", 5, 7), (">", 0, 3)]),
 
-    # --------------------------------------------------------
     # RENTABILIDAD - 25 puntos
-    # --------------------------------------------------------
-
-    roe = data["ROE"]
-    roic = data["ROIC"]
-    margin = data["Operating Margin"]
-
-    if not pd.isna(roe):
-        if roe >= 25:
-            score += 9
-        elif roe >= 15:
-            score += 6
-        elif roe > 0:
-            score += 2
-
-    if not pd.isna(roic):
-        if roic >= 20:
-            score += 9
-        elif roic >= 10:
-            score += 6
-        elif roic > 0:
-            score += 2
-
-    if not pd.isna(margin):
-        if margin >= 25:
-            score += 7
-        elif margin >= 15:
-            score += 5
-        elif margin > 0:
-            score += 2
+    ("ROE", [(">=", 25, 9), (">=", 15, 6), (">", 0, 2)]),
+    ("ROIC", [(">=", 20, 9), (">=", 10, 6), (">", 0, 2)]),
+    ("Operating Margin", [(">=", 25, 7), (">=", 15, 5), (">", 0, 2)]),
 
-    # --------------------------------------------------------
     # VALUACIÓN - 30 puntos
-    # --------------------------------------------------------
+    ("PEG", [("<=", 0.8, 12), ("<=", 1.0, 10), ("<=", 1.5, 7), ("<=", 2, 3)]),
+    ("Forward PE", [("<=", 15, 10), ("<=", 20, 8), ("<=", 25, 5), ("<=", 35, 2)]),
+    ("P/FCF", [("<=", 20, 8), ("<=", 30, 5), ("<=", 35, 2)]),
 
-    peg = data["PEG"]
-    fwd_pe = data["Forward PE"]
-    pfcf = data["P/FCF"]
-
-    if not pd.isna(peg):
-        if peg <= 0.8:
-            score += 12
-        elif peg <= 1.0:
-            score += 10
-        elif peg <= 1.5:
-            score += 7
-        elif peg <= 2:
-            score += 3
-
-    if not pd.isna(fwd_pe):
-        if fwd_pe <= 15:
-            score += 10
-        elif fwd_pe <= 20:
-            score += 8
-        elif fwd_pe <= 25:
-            score += 5
-        elif fwd_pe <= 35:
-            score += 2
-
-    if not pd.isna(pfcf):
-        if pfcf <= 20:
-            score += 8
-        elif pfcf <= 30:
-            score += 5
-        elif pfcf <= 35:
-            score += 2
-
-    # --------------------------------------------------------
     # DEUDA - 15 puntos
-    # --------------------------------------------------------
-
-    debt = data["Debt/Equity"]
-
-    if not pd.isna(debt):
-        if debt <= 0.5:
-            score += 15
-        elif debt <= 1:
-            score += 12
-        elif debt <= 2:
-            score += 8
-        elif debt <= 3:
-            score += 3
+    ("Debt/Equity", [("<=", 0.5, 15), ("<=", 1, 12), ("<=", 2, 8), ("<=", 3, 3)]),
+]
 
-    return min(score, 100)
-
-
-# ============================================================
-# ANALIZAR UNA EMPRESA
-# ============================================================
-
-def analyze_ticker(symbol):
-
-    try:
-
-        print(f"Analizando {symbol}...")
-
-        ticker = yf.Ticker(symbol)
-
-        info = ticker.info
-
-        if not info:
-            return None
-
-        price = clean_number(
-            get_value(
-                info,
-                "currentPrice",
-                "regularMarketPrice"
-            )
-        )
-
-        market_cap = clean_number(
-            get_value(
-                info,
-                "marketCap"
-            )
-        )
-
-        # ----------------------------------------------------
-        # VALUACIÓN
-        # ----------------------------------------------------
-
-        pe = clean_number(
-            get_value(
-                info,
-                "trailingPE"
-            )
-        )
-
-        forward_pe = clean_number(
-            get_value(
-                info,
-                "forwardPE"
-            )
-        )
-
-        peg = clean_number(
-            get_value(
-                info,
-                "pegRatio"
-            )
-        )
-
-        pfcf = clean_number(
-            get_value(
-                info,
-                "priceToFreeCashflow"
-            )
-        )
-
-        ev_ebitda = clean_number(
-            get_value(
-                info,
-                "enterpriseToEbitda"
-            )
-        )
-
-        # ----------------------------------------------------
-        # CRECIMIENTO
-        # ----------------------------------------------------
-
-        eps_growth_5y = percent(
-            get_value(
-                info,
-                "earningsGrowth"
-            )
-        )
-
-        eps_growth_next_y = percent(
-            get_value(
-                info,
-                "earningsQuarterlyGrowth"
-            )
-        )
-
-        eps_growth_next_5y = np.nan
-
-        try:
-            growth = ticker.growth_estimates
-
-            if growth is not None and not growth.empty:
-
-                # Intentar encontrar estimación 5Y
-                possible_columns = [
-                    "5Y",
-                    "5y",
-                    "Next 5Y"
-                ]
-
-                for col in possible_columns:
-
-                    if col in growth.columns:
-
-                        val = growth[col].iloc[0]
-
-                        if not pd.isna(val):
-                            eps_growth_next_5y = percent(val)
-                            break
-
-        except Exception:
-            pass
-
-        # ----------------------------------------------------
-        # MÁRGENES
-        # ----------------------------------------------------
-
-        gross_margin = percent(
-            get_value(
-                info,
-                "grossMargins"
-            )
-        )
-
-        operating_margin = percent(
-            get_value(
-                info,
-                "operatingMargins"
-            )
-        )
-
-        profit_margin = percent(
-            get_value(
-                info,
-                "profitMargins"
-            )
-        )
+_OPS = {
+    ">=": np.greater_equal,
+    ">": np.greater,
+    "<=": np.less_equal,
+}
 
-        # ----------------------------------------------------
-        # ROE
-        # ----------------------------------------------------
 
-        roe = percent(
-            get_value(
-                info,
-                "returnOnEquity"
-            )
-        )
-
-        # ----------------------------------------------------
-        # DEUDA
-        # ----------------------------------------------------
+def score_frame(df, tiers=SCORE_TIERS):
+    """
+    Quality Growth Score 0-100 para toda la tabla de una vez.
+    """
 
-        debt_equity = clean_number(
-            get_value(
-                info,
-                "debtToEquity"
-            )
-        )
+    score = np.zeros(len(df))
 
-        # Yahoo normalmente devuelve Debt/Equity como porcentaje
-        # Ej: 50 = 0.50x
-        if not pd.isna(debt_equity):
-            debt_equity = debt_equity / 100
+    for column, steps in tiers:
 
-        # ----------------------------------------------------
-        # FREE CASH FLOW
-        # ----------------------------------------------------
+        x = df[column].to_numpy(dtype=float)
 
-        free_cash_flow = clean_number(
-            get_value(
-                info,
-                "freeCashflow"
-            )
+        score += np.select(
+            [_OPS[op](x, cut) for op, cut, _ in steps],
+            [points for _, _, points in steps],
+            default=0
         )
 
-        # ----------------------------------------------------
-        # ROIC
-        # ----------------------------------------------------
-
-        roic = np.nan
-
-        try:
+    return np.minimum(score, 100).astype(int)
 
-            income = ticker.income_stmt
-            balance = ticker.balance_sheet
 
-            operating_income = latest_value(
-                income,
-                [
-                    "Operating Income",
-                    "OperatingIncome"
-                ]
-            )
-
-            total_debt = latest_value(
-                balance,
-                [
-                    "Total Debt",
-                    "TotalDebt"
-                ]
-            )
-
-            equity = latest_value(
-                balance,
-                [
-                    "Stockholders Equity",
-                    "StockholdersEquity"
-                ]
-            )
-
-            cash = latest_value(
-                balance,
-                [
-                    "Cash And Cash Equivalents",
-                    "CashCashEquivalentsAndShortTermInvestments",
-                    "Cash Financial"
-                ]
-            )
+# ============================================================
+# FILTRO PRINCIPAL
+# ============================================================
 
-            if (
-                not pd.isna(operating_income)
-                and not pd.isna(equity)
-            ):
+def default_filters():
+    """
+    (columna, tipo, umbral) con los valores de CONFIGURACIÓN.
+    "min" descarta por debajo, "max" por encima y "gt" si no supera
+    el umbral. Un NaN no descarta.
+    """
 
-                if pd.isna(total_debt):
-                    total_debt = 0
+    return [
+        ("Market Cap", "min", MIN_MARKET_CAP),
+        ("Price", "min", MIN_PRICE),
+        ("PE", "max", MAX_PE),
+        ("Forward PE", "max", MAX_FORWARD_PE),
+        ("PEG", "max", MAX_PEG),
+        ("PEG", "gt", 0),
+        ("EPS Growth 5Y", "min", MIN_EPS_GROWTH_5Y),
+        ("EPS Growth Next 5Y", "min", MIN_EPS_GROWTH_NEXT_5Y),
+        ("Sales Growth 5Y", "min", MIN_SALES_GROWTH_5Y),
+        ("ROE", "min", MIN_ROE),
+        ("ROIC", "min", MIN_ROIC),
+        ("Operating Margin", "min", MIN_OPERATING_MARGIN),
+        ("Profit Margin", "min", MIN_PROFIT_MARGIN),
+        ("Debt/Equity", "max", MAX_DEBT_EQUITY),
+    ]
 
-                if pd.isna(cash):
-                    cash = 0
 
-                invested_capital = (
-                    equity
-                    + total_debt
-                    - cash
-                )
+def pass_mask(df, filters=None):
+    """
+    True para las empresas que pasan todos los filtros.
+    """
 
-                if invested_capital > 0:
+    ok = np.ones(len(df), dtype=bool)
 
-                    # Aproximación ROIC antes de impuestos.
-                    roic = (
-                        operating_income
-                        / invested_capital
-                    ) * 100
+    for column, kind, limit in filters or default_filters():
 
-        except Exception:
-            pass
+        x = df[column].to_numpy(dtype=float)
 
-        # ----------------------------------------------------
-        # CRECIMIENTO DE VENTAS
-        # ----------------------------------------------------
+        if kind == "min":
+            ok &= ~(x < limit)
+        elif kind == "max":
+            ok &= ~(x > limit)
+        else:
+            ok &= ~(x <= limit)
 
-        sales_growth_5y = np.nan
+    return ok
 
-        try:
 
-            income = ticker.income_stmt
+def screen(df, filters=None, tiers=SCORE_TIERS):
+    """
+    Agrega score y PASS a la tabla normalizada. No toca la red: se puede
+    repetir con otros umbrales sobre la misma tabla.
+    """
 
-            sales_growth_5y = growth_from_series(
-                income,
-                [
-                    "Total Revenue",
-                    "TotalRevenue"
-                ],
-                periods=4
-            )
+    df = df.copy()
 
-        except Exception:
-            pass
+    df["Quality Growth Score"] = score_frame(df, tiers)
 
-        # ----------------------------------------------------
-        # CRECIMIENTO EPS Q/Q
-        # ----------------------------------------------------
+    df["PASS"] = pass_mask(df, filters)
 
-        eps_growth_qq = np.nan
+    return df
 
-        try:
 
-            quarterly = ticker.quarterly_income_stmt
+# ============================================================
+# NORMALIZACIÓN
+# ============================================================
 
-            net_income_latest = latest_value(
-                quarterly,
-                [
-                    "Net Income",
-                    "NetIncome"
-                ]
-            )
+def statement_metrics(payload):
+    """
+    Métricas que salen de los estados contables y de las estimaciones
+    (tablas distintas por empresa, se recorren de a una).
+    """
 
-            net_income_previous = np.nan
+    out = {
+        "EPS Growth Next 5Y": np.nan,
+        "EPS Growth Q/Q": np.nan,
+        "Sales Growth 5Y": np.nan,
+        "ROIC": np.nan,
+    }
 
-            row = safe_row(
-                quarterly,
-                [
-                    "Net Income",
-                    "NetIncome"
-                ]
-            )
+    # ----------------------------------------------------
+    # CRECIMIENTO EPS 5Y ESTIMADO
+    # ----------------------------------------------------
 
-            if row is not None:
+    try:
+        growth = payload.get("growth_estimates")
 
-                values = row.dropna()
+        if growth is not None and not growth.empty:
 
-                if len(values) >= 2:
+            for col in ["5Y", "5y", "Next 5Y"]:
 
-                    current = float(values.iloc[0])
-                    previous = float(values.iloc[1])
+                if col in growth.columns:
 
-                    if previous != 0:
+                    val = growth[col].iloc[0]
 
-                        eps_growth_qq = (
-                            (current / previous) - 1
-                        ) * 100
+                    if not pd.isna(val):
+                        out["EPS Growth Next 5Y"] = percent(val)
+                        break
 
-        except Exception:
-            pass
+    except Exception:
+        pass
 
-        # ----------------------------------------------------
-        # CAÍDA DESDE MÁXIMO 52 SEMANAS
-        # ----------------------------------------------------
+    # ----------------------------------------------------
+    # ROIC (aproximación antes de impuestos)
+    # ----------------------------------------------------
 
-        high_52 = clean_number(
-            get_value(
-                info,
-                "fiftyTwoWeekHigh"
-            )
-        )
+    income = payload.get("income_stmt")
 
-        low_52 = clean_number(
-            get_value(
-                info,
-                "fiftyTwoWeekLow"
-            )
+    try:
+        balance = payload.get("balance_sheet")
+
+        operating_income = latest_value(income, ["Operating Income", "OperatingIncome"])
+        total_debt = latest_value(balance, ["Total Debt", "TotalDebt"])
+        equity = latest_value(balance, ["Stockholders Equity", "StockholdersEquity"])
+        cash = latest_value(
+            balance,
+            [
+                "Cash And Cash Equivalents",
+                "CashCashEquivalentsAndShortTermInvestments",
+                "Cash Financial"
+            ]
         )
 
-        drawdown_52 = np.nan
-
-        if (
-            not pd.isna(price)
-            and not pd.isna(high_52)
-            and high_52 > 0
-        ):
-
-            drawdown_52 = (
-                (price / high_52) - 1
-            ) * 100
-
-        # ----------------------------------------------------
-        # RESULTADO
-        # ----------------------------------------------------
-
-        data = {
-
-            "Ticker": symbol,
-
-            "Price": price,
-
-            "Market Cap": market_cap,
-
-            "PE": pe,
-
-            "Forward PE": forward_pe,
-
-            "PEG": peg,
-
-            "P/FCF": pfcf,
-
-            "EV/EBITDA": ev_ebitda,
-
-            "EPS Growth 5Y": eps_growth_5y,
-
-            "EPS Growth Next 5Y": eps_growth_next_5y,
-
-            "EPS Growth Next Y": eps_growth_next_y,
-
-            "EPS Growth Q/Q": eps_growth_qq,
-
-            "Sales Growth 5Y": sales_growth_5y,
-
-            "Gross Margin": gross_margin,
+        if not pd.isna(operating_income) and not pd.isna(equity):
 
-            "Operating Margin": operating_margin,
+            invested_capital = (
+                equity
+                + (0 if pd.isna(total_debt) else total_debt)
+                - (0 if pd.isna(cash) else cash)
+            )
 
-            "Profit Margin": profit_margin,
+            if invested_capital > 0:
+                out["ROIC"] = (operating_income / invested_capital) * 100
 
-            "ROE": roe,
+    except Exception:
+        pass
 
-            "ROIC": roic,
+    # ----------------------------------------------------
+    # CRECIMIENTO DE VENTAS
+    # ----------------------------------------------------
 
-            "Debt/Equity": debt_equity,
+    try:
+        out["Sales Growth 5Y"] = growth_from_series(income, ["Total Revenue", "TotalRevenue"], periods=4)
+    except Exception:
+        pass
 
-            "Free Cash Flow": free_cash_flow,
+    # ----------------------------------------------------
+    # CRECIMIENTO EPS Q/Q
+    # ----------------------------------------------------
 
-            "52W Drawdown": drawdown_52,
-        }
+    try:
+        row = safe_row(payload.get("quarterly_income_stmt"), ["Net Income", "NetIncome"])
 
-        # ----------------------------------------------------
-        # SCORE
-        # ----------------------------------------------------
+        if row is not None:
 
-        data["Quality Growth Score"] = score_company(data)
+            values = row.dropna()
 
-        # ----------------------------------------------------
-        # FILTRO PRINCIPAL
-        # ----------------------------------------------------
+            if len(values) >= 2:
 
-        data["PASS"] = True
+                current = float(values.iloc[0])
+                previous = float(values.iloc[1])
 
-        # Market Cap
-        if not pd.isna(market_cap):
-            if market_cap < MIN_MARKET_CAP:
-                data["PASS"] = False
+                if previous != 0:
+                    out["EPS Growth Q/Q"] = ((current / previous) - 1) * 100
 
-        # Precio
-        if not pd.isna(price):
-            if price < MIN_PRICE:
-                data["PASS"] = False
+    except Exception:
+        pass
+
+    return out
+
+
+# Columna -> claves de `info` (la primera con dato) y si es un ratio a llevar a %
+INFO_FIELDS = {
+    "Price": (["currentPrice", "regularMarketPrice"], False),
+    "Market Cap": (["marketCap"], False),
+    "PE": (["trailingPE"], False),
+    "Forward PE": (["forwardPE"], False),
+    "PEG": (["pegRatio"], False),
+    "P/FCF": (["priceToFreeCashflow"], False),
+    "EV/EBITDA": (["enterpriseToEbitda"], False),
+    "EPS Growth 5Y": (["earningsGrowth"], True),
+    "EPS Growth Next Y": (["earningsQuarterlyGrowth"], True),
+    "Gross Margin": (["grossMargins"], True),
+    "Operating Margin": (["operatingMargins"], True),
+    "Profit Margin": (["profitMargins"], True),
+    "ROE": (["returnOnEquity"], True),
+    "Debt/Equity": (["debtToEquity"], False),
+    "Free Cash Flow": (["freeCashflow"], False),
+    "52W High": (["fiftyTwoWeekHigh"], False),
+}
+
+COLUMNS = [
+    "Ticker", "Price", "Market Cap", "PE", "Forward PE", "PEG", "P/FCF",
+    "EV/EBITDA", "EPS Growth 5Y", "EPS Growth Next 5Y", "EPS Growth Next Y",
+    "EPS Growth Q/Q", "Sales Growth 5Y", "Gross Margin", "Operating Margin",
+    "Profit Margin", "ROE", "ROIC", "Debt/Equity", "Free Cash Flow",
+    "52W Drawdown",
+]
+
+
+def normalize(payloads):
+    """
+    {ticker: payload} -> una tabla float64 con una fila por empresa.
+    """
 
-        # P/E
-        if not pd.isna(pe):
-            if pe > MAX_PE:
-                data["PASS"] = False
+    tickers = [s for s, p in payloads.items() if p.get("info")]
 
-        # Forward P/E
-        if not pd.isna(forward_pe):
-            if forward_pe > MAX_FORWARD_PE:
-                data["PASS"] = False
+    # Sin datos: tabla vacía con las columnas, así main() muestra el aviso
+    if not tickers:
+        return pd.DataFrame(columns=COLUMNS)
 
-        # PEG
-        if not pd.isna(peg):
-            if peg > MAX_PEG or peg <= 0:
-                data["PASS"] = False
+    info = pd.DataFrame.from_records(
+        [payloads[s]["info"] for s in tickers],
+        index=tickers
+    )
 
-        # Crecimiento EPS
-        if not pd.isna(eps_growth_5y):
-            if eps_growth_5y < MIN_EPS_GROWTH_5Y:
-                data["PASS"] = False
+    df = pd.DataFrame(index=pd.Index(tickers, name="Ticker"))
 
-        if not pd.isna(eps_growth_next_5y):
-            if eps_growth_next_5y < MIN_EPS_GROWTH_NEXT_5Y:
-                data["PASS"] = False
+    for column, (keys, is_ratio) in INFO_FIELDS.items():
 
-        # Ventas
-        if not pd.isna(sales_growth_5y):
-            if sales_growth_5y < MIN_SALES_GROWTH_5Y:
-                data["PASS"] = False
+        x = pd.Series(np.nan, index=info.index)
 
-        # Rentabilidad
-        if not pd.isna(roe):
-            if roe < MIN_ROE:
-                data["PASS"] = False
+        for key in reversed(keys):
+            if key in info.columns:
+                x = pd.to_numeric(info[key], errors="coerce").where(lambda v: v.notna(), x)
 
-        if not pd.isna(roic):
-            if roic < MIN_ROIC:
-                data["PASS"] = False
+        x = x.astype(float).replace([np.inf, -np.inf], np.nan)
 
-        if not pd.isna(operating_margin):
-            if operating_margin < MIN_OPERATING_MARGIN:
-                data["PASS"] = False
+        if is_ratio:
+            x = x.where(x.abs() > 2, x * 100)
 
-        if not pd.isna(profit_margin):
-            if profit_margin < MIN_PROFIT_MARGIN:
-                data["PASS"] = False
+        df[column] = x
 
-        # Deuda
-        if not pd.isna(debt_equity):
-            if debt_equity > MAX_DEBT_EQUITY:
-                data["PASS"] = False
+    # Yahoo devuelve Debt/Equity como porcentaje. Ej: 50 = 0.50x
+    df["Debt/Equity"] = df["Debt/Equity"] / 100
 
-        return data
+    high_52 = df.pop("52W High").where(lambda v: v > 0)
+    df["52W Drawdown"] = ((df["Price"] / high_52) - 1) * 100
 
-    except Exception as e:
+    extra = pd.DataFrame.from_records(
+        [statement_metrics(payloads[s]) for s in tickers],
+        index=df.index
+    )
 
-        print(f"ERROR {symbol}: {e}")
+    df = df.join(extra).astype(float).reset_index()
 
-        return None
+    return df[COLUMNS]
 
 
 # ============================================================
@@ -822,29 +509,32 @@ def main():
         f"Empresas a analizar: {len(tickers)}"
     )
 
-    results = []
-
-    for i, symbol in enumerate(tickers, 1):
+    # --------------------------------------------------------
+    # DESCARGA (PARALELA, CON CACHÉ EN DISCO)
+    # --------------------------------------------------------
 
-        print(
-            f"[{i}/{len(tickers)}] {symbol}"
+    payloads = fetch_fundamentals(
+        tickers,
+        workers=MAX_WORKERS,
+        rate=REQUESTS_PER_SECOND,
+        progress=lambda done, total: print(
+            f"[{done}/{total}] descargados"
         )
+    )
 
-        data = analyze_ticker(symbol)
-
-        if data is not None:
-
-            results.append(data)
+    # --------------------------------------------------------
+    # ANÁLISIS (LOCAL)
+    # --------------------------------------------------------
 
-        time.sleep(REQUEST_DELAY)
+    df = normalize(payloads)
 
-    if not results:
+    if df.empty:
 
         print("No se obtuvieron datos.")
 
         return
 
-    df = pd.DataFrame(results)
+    df = screen(df)
 
     # Ordenar por Score
     df = df.sort_values(
@@ -2,8 +2,8 @@ import streamlit as st
 import yfinance as yf
 import pandas as pd
 import pandas_ta as ta
-from datetime import datetime
 import calendar
+from core.scan_store import SCANS
 
 # 1. CONFIGURACIÓN DE LA APP
 st.set_page_config(page_title="Escáner MACD Estratégico", layout="wide")
@@ -71,9 +71,8 @@ def analizar_ticker(ticker):
     except: return None
     return None
 
-# 5. BOTÓN DE ESCANEO Y PERSISTENCIA
-if 'resultados_brutos' not in st.session_state:
-    st.session_state.resultados_brutos = None
+# 5. BOTÓN DE ESCANEO Y PERSISTENCIA (base compartida, core.scan_store)
+SCANNER = "macd_alcista_ciclos"
 
 if st.sidebar.button("🚀 Iniciar Gran Escaneo"):
     with st.spinner("Analizando 150+ activos..."):
@@ -83,12 +82,13 @@ if st.sidebar.button("🚀 Iniciar Gran Escaneo"):
             res = analizar_ticker(t)
             if res: data_lista.append(res)
             progreso.progress((i + 1) / len(MASTER_TICKERS))
-        st.session_state.resultados_brutos = pd.DataFrame(data_lista)
+        SCANS.put(SCANNER, data_lista, key="Ticker", replace=True)
         st.success("Escaneo completado.")
 
 # 6. FILTROS INTERACTIVOS (Solo si hay datos)
-if st.session_state.resultados_brutos is not None:
-    df_res = st.session_state.resultados_brutos.copy()
+df_res = SCANS.frame(SCANNER)
+if not df_res.empty:
+    df_res["Fecha Señal"] = pd.to_datetime(df_res["Fecha Señal"]).dt.date   # la base la guarda en ISO
 
     st.divider()
     st.subheader("🎯 Refinar Resultados")
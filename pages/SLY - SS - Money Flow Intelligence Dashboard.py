@@ -5,6 +5,9 @@ import pandas_ta as ta
 import numpy as np
 import plotly.express as px
 from datetime import datetime, timedelta
+from core.heikin_ashi import heikin_ashi
+from core.signals import sly_state
+from core.yf_panel import load_panels
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN INSTITUCIONAL SLY
@@ -51,27 +54,18 @@ def run_sly_engine(df):
     if df.empty or len(df) < 35: return 0, 0, None
     macd = ta.macd(df['Close'], fast=12, slow=26, signal=9)
     hist = macd['MACDh_12_26_9']
-    ha_close = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    ha_open = np.zeros(len(df))
-    ha_open[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    for i in range(1, len(df)): ha_open[i] = (ha_open[i-1] + ha_close.iloc[i-1]) / 2
+    ha_open, ha_close = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
     ha_dir = np.where(ha_close > ha_open, 1, -1)
-    state, entry_px, entry_tm = 0, 0.0, None
-    for i in range(1, len(df)):
-        h, h_prev, hd, hd_prev = hist.iloc[i], hist.iloc[i-1], ha_dir[i], ha_dir[i-1]
-        if (hd == 1 and hd_prev == -1 and h < 0 and h > h_prev): state, entry_px, entry_tm = 1, df['Close'].iloc[i], df.index[i]
-        elif (hd == -1 and hd_prev == 1 and h > 0 and h < h_prev): state, entry_px, entry_tm = -1, df['Close'].iloc[i], df.index[i]
-        elif state != 0:
-            if (state == 1 and h < h_prev) or (state == -1 and h > h_prev): state = 0
+    state, entry_px, entry_idx = sly_state(ha_dir, hist.to_numpy(), df['Close'].to_numpy())
+    entry_tm = df.index[entry_idx] if entry_idx >= 0 else None
     return state, entry_px, entry_tm
 
-def analyze_asset(symbol, category):
+def analyze_asset(symbol, category, panels):
     row = {"Cat": category, "Activo": symbol}
     row["ByMA"] = "✅" if symbol.upper() in CLEAN_TICKERS else "❌"
     for tf, config in MACRO_CONFIG.items():
         try:
-            df = yf.download(symbol, interval=config['int'], period=config['per'], progress=False, auto_adjust=True)
-            if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
+            df = panels[tf].get(symbol, pd.DataFrame())
             if tf == "1D" and not df.empty: row["Precio"] = f"{df['Close'].iloc[-1]:,.2f}"
             st_val, px_in, tm_in = run_sly_engine(df)
             if st_val != 0:
@@ -134,9 +128,10 @@ if st.button(f"🔎 ESCANEAR COMPONENTES DE {sector_sel}"):
     tickers = ASSET_DATABASE[sector_sel][1]
     res = []
     prog = st.progress(0)
+    panels = load_panels(tickers, MACRO_CONFIG, progress=lambda d, n: prog.progress(d/n, text="Descargando velas..."))
     for i, t in enumerate(tickers):
         prog.progress((i+1)/len(tickers), text=f"Procesando: {t}")
-        res.append(analyze_asset(t, sector_sel))
+        res.append(analyze_asset(t, sector_sel, panels))
     
     df_res = pd.DataFrame(res)
     def style_sig(v):
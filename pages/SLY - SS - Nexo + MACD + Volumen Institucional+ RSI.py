@@ -1,10 +1,11 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-import time
-from datetime import datetime
+from core.heikin_ashi import heikin_ashi
+from core.signals import sly_state
+from core.yf_panel import load_panels
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -19,8 +20,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "sniper_results" not in st.session_state:
-    st.session_state["sniper_results"] = []
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "omni_filter_v48"
 
 MACRO_CONFIG = {
     "1D": {"int": "1d", "per": "2y"},
@@ -42,17 +43,10 @@ def run_sly_engine(df):
     macd = ta.macd(df['Close'], fast=12, slow=26, signal=9)
     if macd is None or macd.empty: return 0, 0, None
     hist = macd['MACDh_12_26_9']
-    ha_close = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    ha_open = np.zeros(len(df)); ha_open[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    for i in range(1, len(df)): ha_open[i] = (ha_open[i-1] + ha_close.iloc[i-1]) / 2
+    ha_open, ha_close = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
     ha_dir = np.where(ha_close > ha_open, 1, -1)
-    state, entry_px, entry_tm = 0, 0.0, None
-    for i in range(1, len(df)):
-        h, h_prev, hd, hd_prev = hist.iloc[i], hist.iloc[i-1], ha_dir[i], ha_dir[i-1]
-        if hd == 1 and hd_prev == -1 and h < 0 and h > h_prev: state, entry_px, entry_tm = 1, df['Close'].iloc[i], df.index[i]
-        elif hd == -1 and hd_prev == 1 and h > 0 and h < h_prev: state, entry_px, entry_tm = -1, df['Close'].iloc[i], df.index[i]
-        elif state != 0:
-            if (state == 1 and h < h_prev) or (state == -1 and h > h_prev): state = 0
+    state, entry_px, entry_idx = sly_state(ha_dir, hist.to_numpy(), df['Close'].to_numpy())
+    entry_tm = df.index[entry_idx] if entry_idx >= 0 else None
     return state, entry_px, entry_tm
 
 def run_vfd_engine(df):
@@ -85,12 +79,11 @@ def run_inertia_engine(df):
     else:
         return "NEUTRAL ↔️"
 
-def analyze_triple_cycle(symbol):
+def analyze_triple_cycle(symbol, panels):
     row = {"Activo": symbol, "Precio": 0.0}
     for tf, config in MACRO_CONFIG.items():
         try:
-            df = yf.download(symbol, interval=config['int'], period=config['per'], progress=False, auto_adjust=True)
-            if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
+            df = panels[tf].get(symbol, pd.DataFrame())
             if df.empty or len(df) < 35: continue
             
             if tf == "1D": row["Precio"] = float(df['Close'].iloc[-1])
@@ -141,17 +134,17 @@ with st.sidebar:
         results = []
         prog = st.progress(0)
         targets = batches[sel_batch]
+        panels = load_panels(targets, MACRO_CONFIG, progress=lambda d, n: prog.progress(d/n, text="Descargando velas..."))
         for idx, sym in enumerate(targets):
             prog.progress((idx+1)/len(targets), text=f"Analizando: {sym}")
-            results.append(analyze_triple_cycle(sym))
-        current = {x["Activo"]: x for x in st.session_state["sniper_results"]}
-        for r in results: current[r["Activo"]] = r
-        st.session_state["sniper_results"] = list(current.values())
+            results.append(analyze_triple_cycle(sym, panels))
+        SCANS.put(SCANNER, results)
         st.rerun()
-    if st.button("Limpiar Memoria"): st.session_state["sniper_results"] = []; st.rerun()
+    if st.button("Limpiar Memoria"): SCANS.clear(SCANNER); st.rerun()
 
-if st.session_state["sniper_results"]:
-    df = pd.DataFrame(st.session_state["sniper_results"])
+sniper_results = SCANS.latest(SCANNER)
+if sniper_results:
+    df = pd.DataFrame(sniper_results)
 
     def style_matrix(v):
         v_str = str(v)
@@ -1,10 +1,11 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
-import time
-from datetime import datetime
+from core.heikin_ashi import heikin_ashi
+from core.indicators import ema, macd, rsi, scan_cache
+from core.signals import sly_state
+from core.yf_panel import load_panels
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -19,8 +20,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "sniper_results" not in st.session_state:
-    st.session_state["sniper_results"] = []
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "simplificado_v2"
 
 MACRO_CONFIG = {
     "1S": {"int": "1wk", "per": "5y"},
@@ -38,17 +39,7 @@ MASTER_TICKERS = sorted(list(set([t.strip() for t in RAW_TICKERS.split(",") if t
 # ─────────────────────────────────────────────
 def get_zero_lag_macd(series, fast=12, slow=26, signal=9):
     """Mimetiza la lógica DEMA del script de TradingView"""
-    def dema(s, length):
-        ema1 = s.ewm(span=length, adjust=False).mean()
-        ema2 = ema1.ewm(span=length, adjust=False).mean()
-        return 2 * ema1 - ema2
-
-    fast_ma = dema(series, fast)
-    slow_ma = dema(series, slow)
-    macd_line = fast_ma - slow_ma
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-    hist = macd_line - signal_line
-    return macd_line, signal_line, hist
+    return tuple(pd.Series(v, index=series.index) for v in macd(series, fast, slow, signal, mode="dema"))
 
 # ─────────────────────────────────────────────
 # MOTOR TÉCNICO SLY CORE
@@ -58,19 +49,11 @@ def run_sly_engine(df):
     # Usando el nuevo motor Zero-Lag
     _, _, hist = get_zero_lag_macd(df['Close'])
     
-    ha_close = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    ha_open = np.zeros(len(df)); ha_open[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    for i in range(1, len(df)): ha_open[i] = (ha_open[i-1] + ha_close.iloc[i-1]) / 2
+    ha_open, ha_close = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
     ha_dir = np.where(ha_close > ha_open, 1, -1)
     
-    state, entry_px, entry_tm = 0, 0.0, None
-    for i in range(1, len(df)):
-        h, h_prev = hist.iloc[i], hist.iloc[i-1]
-        hd, hd_prev = ha_dir[i], ha_dir[i-1]
-        if hd == 1 and hd_prev == -1 and h < 0 and h > h_prev: state, entry_px, entry_tm = 1, df['Close'].iloc[i], df.index[i]
-        elif hd == -1 and hd_prev == 1 and h > 0 and h < h_prev: state, entry_px, entry_tm = -1, df['Close'].iloc[i], df.index[i]
-        elif state != 0:
-            if (state == 1 and h < h_prev) or (state == -1 and h > h_prev): state = 0
+    state, entry_px, entry_idx = sly_state(ha_dir, hist.to_numpy(), df['Close'].to_numpy())
+    entry_tm = df.index[entry_idx] if entry_idx >= 0 else None
     return state, entry_px, entry_tm
 
 def run_vfd_engine(df):
@@ -84,18 +67,17 @@ def run_vfd_engine(df):
 
 def run_inertia_engine(df):
     if df.empty or len(df) < 260: return "No Data"
-    e52, e260 = ta.ema(df['Close'], 52), ta.ema(df['Close'], 260)
-    p, last_52, last_260 = df['Close'].iloc[-1], e52.iloc[-1], e260.iloc[-1]
+    e52, e260 = ema(df['Close'], 52, sma_seed=True), ema(df['Close'], 260, sma_seed=True)
+    p, last_52, last_260 = df['Close'].iloc[-1], e52[-1], e260[-1]
     if p > last_52 and last_52 > last_260: return "BULLISH 📈"
     if p < last_52 and last_52 < last_260: return "BEARISH 📉"
     return "NEUTRAL ↔️"
 
-def analyze_triple_cycle(symbol):
+def analyze_triple_cycle(symbol, panels):
     row = {"Activo": symbol, "Precio": 0.0, "Veredicto": "-"}
     for tf, config in MACRO_CONFIG.items():
         try:
-            df = yf.download(symbol, interval=config['int'], period=config['per'], progress=False, auto_adjust=True)
-            if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
+            df = panels[tf].get(symbol, pd.DataFrame())
             if df.empty or len(df) < 35: continue
             
             row["Precio"] = float(df['Close'].iloc[-1])
@@ -129,9 +111,9 @@ def analyze_triple_cycle(symbol):
                 elif (curr_h < 0 and curr_h < prev_h) or (curr_h > 0 and curr_h < prev_h):
                     row["Veredicto"] = "PIERDE FUERZA 🟡"
 
-            rsi = ta.rsi(df['Close'], length=14)
-            if rsi is not None and len(rsi) >= 2:
-                row[f"{tf} RSI"] = f"{rsi.iloc[-1]:.1f} {'Subiendo' if rsi.iloc[-1] > rsi.iloc[-2] else 'Bajando'}"
+            r = rsi(df['Close'], 14)
+            if len(r) >= 2:
+                row[f"{tf} RSI"] = f"{r[-1]:.1f} {'Subiendo' if r[-1] > r[-2] else 'Bajando'}"
 
         except: pass
     return row
@@ -149,16 +131,17 @@ with st.sidebar:
     if st.button("🚀 INICIAR ESCANEO", type="primary"):
         results = []
         prog = st.progress(0); targets = batches[sel_batch]
+        panels = load_panels(targets, MACRO_CONFIG, progress=lambda d, n: prog.progress(d/n, text="Descargando velas..."))
         for idx, sym in enumerate(targets):
             prog.progress((idx+1)/len(targets), text=f"Analizando: {sym}")
-            results.append(analyze_triple_cycle(sym))
-        current = {x["Activo"]: x for x in st.session_state["sniper_results"]}
-        for r in results: current[r["Activo"]] = r
-        st.session_state["sniper_results"] = list(current.values()); st.rerun()
-    if st.button("Limpiar Memoria"): st.session_state["sniper_results"] = []; st.rerun()
-
-if st.session_state["sniper_results"]:
-    df = pd.DataFrame(st.session_state["sniper_results"])
+            # El MACD Zero-Lag de la señal y del histograma se calcula una sola vez
+            with scan_cache(): results.append(analyze_triple_cycle(sym, panels))
+        SCANS.put(SCANNER, results); st.rerun()
+    if st.button("Limpiar Memoria"): SCANS.clear(SCANNER); st.rerun()
+
+sniper_results = SCANS.latest(SCANNER)
+if sniper_results:
+    df = pd.DataFrame(sniper_results)
 
     def style_matrix(v):
         v_s = str(v)
@@ -1,10 +1,13 @@
 import streamlit as st
 import ccxt
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
 import time
-from datetime import datetime, timedelta
+from core.heikin_ashi import heikin_ashi
+from core.indicators import dema, ema, macd, rsi
+from core.signals import trend_filter_signal
+from core.ohlcv_store import fetch_ohlcv_cached
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN INSTITUCIONAL - LIGHT THEME
@@ -22,8 +25,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "master_results_crypto" not in st.session_state:
-    st.session_state["master_results_crypto"] = {}
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "crypto_long_v2"
 
 # Mapeo de temporalidades para CCXT
 TF_OPTIONS = {
@@ -60,38 +63,24 @@ def get_sly_indicators(df):
         df.columns = [c.capitalize() for c in df.columns]
         df = df.dropna(subset=['Close'])
 
-        def dema(s, length):
-            ema1 = s.ewm(span=length, adjust=False).mean()
-            ema2 = ema1.ewm(span=length, adjust=False).mean()
-            return 2 * ema1 - ema2
-
-        df['macd_line'] = dema(df['Close'], 12) - dema(df['Close'], 26)
-        df['signal_line'] = df['macd_line'].ewm(span=9, adjust=False).mean()
-        df['hist'] = df['macd_line'] - df['signal_line']
-        df['rsi_smooth'] = dema(ta.rsi(df['Close'], length=14).fillna(50), 5)
-        ha_c = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-        ha_o = np.zeros(len(df))
-        ha_o[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-        for i in range(1, len(df)): ha_o[i] = (ha_o[i-1] + ha_c.iloc[i-1]) / 2
+        df['macd_line'], df['signal_line'], df['hist'] = macd(df['Close'], mode="dema")
+        df['rsi_smooth'] = dema(np.nan_to_num(rsi(df['Close'], 14), nan=50.0), 5)
+        ha_o, ha_c = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
         df['ha_color'] = np.where(ha_c > ha_o, "Verde", "Rojo")
-        df['ema52'] = ta.ema(df['Close'], length=52)
-        df['ema260'] = ta.ema(df['Close'], length=260)
+        df['ema52'] = ema(df['Close'], 52, sma_seed=True)
+        df['ema260'] = ema(df['Close'], 260, sma_seed=True)
         return df.dropna(subset=['ema260'])
     except: return pd.DataFrame()
 
 def find_last_signal(df, bear_longs):
     if df.empty or len(df) < 2: return None, None, False, "-"
     last_entry_date, last_entry_px, is_active, verdict = None, None, False, "-"
-    for i in range(1, len(df)):
-        authorized = (df['ema52'].iloc[i] > df['ema260'].iloc[i]) or bear_longs
-        ha_flip = df['ha_color'].iloc[i] == "Verde" and df['ha_color'].iloc[i-1] == "Rojo"
-        macd_accel = df['hist'].iloc[i] > df['hist'].iloc[i-1]
-        rsi_ok = df['rsi_smooth'].iloc[i] > df['rsi_smooth'].iloc[i-1] and df['rsi_smooth'].iloc[i] < 50
-        
-        if not is_active and (authorized and ha_flip and macd_accel and rsi_ok):
-            is_active, last_entry_date, last_entry_px = True, df.index[i], df['Close'].iloc[i]
-        elif is_active and (df['ha_color'].iloc[i] == "Rojo" and df['hist'].iloc[i] < df['hist'].iloc[i-1] and df['rsi_smooth'].iloc[i] < df['rsi_smooth'].iloc[i-1]):
-            is_active = False
+    # Autorizado por régimen (EMA52 > EMA260) o por Bear-Longs
+    authorized = (df['ema52'].to_numpy() > df['ema260'].to_numpy()) | bear_longs
+    ha_dir = np.where(df['ha_color'].to_numpy() == "Verde", 1, -1)
+    sig = trend_filter_signal(ha_dir, df['hist'].to_numpy(), df['rsi_smooth'].to_numpy(), authorized, df['Close'].to_numpy(), side=1)
+    is_active = sig.state == 1
+    if sig.index >= 0: last_entry_date, last_entry_px = df.index[sig.index], sig.price
 
     if is_active:
         c_h, p_h = df['hist'].iloc[-1], df['hist'].iloc[-2]
@@ -146,7 +135,7 @@ with st.sidebar:
                 try:
                     prog.progress((i+1)/len(subset), text=f"Auditando {selected_tf_label}: {sym}")
                     # Descargamos 1000 velas para estabilidad de indicadores
-                    raw_data = ex.fetch_ohlcv(sym, timeframe=selected_tf_code, limit=1000)
+                    raw_data = fetch_ohlcv_cached(ex, sym, selected_tf_code, limit=1000)
                     df = pd.DataFrame(raw_data, columns=['time', 'open', 'high', 'low', 'close', 'vol'])
                     df['time'] = pd.to_datetime(df['time'], unit='ms')
                     df.set_index('time', inplace=True)
@@ -159,8 +148,8 @@ with st.sidebar:
                     last_rsi = data['rsi_smooth'].iloc[-1]
                     rsi_zone = "SOBRE 50 🟢" if last_rsi > 50 else "BAJO 50 🔴"
                     
-                    # Almacenar con el timeframe en la clave para permitir acumular distintos TFs si se desea
-                    st.session_state["master_results_crypto"][sym] = {
+                    # Almacenar con el timeframe en la clave para permitir acumular distintos TFs
+                    SCANS.put(SCANNER, [{
                         "Activo": sym.replace("/USDT", ""), 
                         "Temporalidad": selected_tf_label,
                         "Sector": get_crypto_sector(sym),
@@ -172,20 +161,21 @@ with st.sidebar:
                         "Precio": f"{data['Close'].iloc[-1]:.4f}",
                         "RSI": round(last_rsi, 1),
                         "Régimen": "ALCISTA" if data['ema52'].iloc[-1] > data['ema260'].iloc[-1] else "BAJISTA"
-                    }
+                    }], timeframe=selected_tf_label)
                     time.sleep(0.05)
                 except: continue
             st.rerun()
 
     if st.button("🗑️ Limpiar Memoria"):
-        st.session_state["master_results_crypto"] = {}
+        SCANS.clear(SCANNER)
         st.rerun()
 
 # ─────────────────────────────────────────────
 # RESUMEN SECTORIAL
 # ─────────────────────────────────────────────
-if st.session_state["master_results_crypto"]:
-    df_full = pd.DataFrame(st.session_state["master_results_crypto"].values())
+master_results_crypto = SCANS.latest(SCANNER)
+if master_results_crypto:
+    df_full = pd.DataFrame(master_results_crypto)
     df_vigentes = df_full[df_full["Estado"] == "VIGENTE 🟢"]
 
     st.subheader(f"📊 RESUMEN DE EXPOSICIÓN (VIGENTES)")
@@ -1,10 +1,13 @@
 import streamlit as st
 import ccxt
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
 import time
-from datetime import datetime, timedelta
+from core.heikin_ashi import heikin_ashi
+from core.indicators import dema, ema, macd, rsi
+from core.signals import trend_filter_signal
+from core.ohlcv_store import fetch_ohlcv_cached
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN INSTITUCIONAL - LIGHT THEME (SHORT)
@@ -22,8 +25,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "master_results_short" not in st.session_state:
-    st.session_state["master_results_short"] = {}
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "crypto_short_4h"
 
 # ─────────────────────────────────────────────
 # MAPEO SECTORIAL CRIPTO
@@ -50,24 +53,14 @@ def get_sly_indicators(df):
         df.columns = [c.capitalize() for c in df.columns]
         df = df.dropna(subset=['Close'])
 
-        def dema(s, length):
-            ema1 = s.ewm(span=length, adjust=False).mean()
-            ema2 = ema1.ewm(span=length, adjust=False).mean()
-            return 2 * ema1 - ema2
+        df['macd_line'], df['signal_line'], df['hist'] = macd(df['Close'], mode="dema")
+        df['rsi_smooth'] = dema(np.nan_to_num(rsi(df['Close'], 14), nan=50.0), 5)
 
-        df['macd_line'] = dema(df['Close'], 12) - dema(df['Close'], 26)
-        df['signal_line'] = df['macd_line'].ewm(span=9, adjust=False).mean()
-        df['hist'] = df['macd_line'] - df['signal_line']
-        df['rsi_smooth'] = dema(ta.rsi(df['Close'], length=14).fillna(50), 5)
-
-        ha_c = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-        ha_o = np.zeros(len(df))
-        ha_o[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-        for i in range(1, len(df)): ha_o[i] = (ha_o[i-1] + ha_c.iloc[i-1]) / 2
+        ha_o, ha_c = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
         df['ha_color'] = np.where(ha_c > ha_o, "Verde", "Rojo")
         
-        df['ema52'] = ta.ema(df['Close'], length=52)
-        df['ema260'] = ta.ema(df['Close'], length=260)
+        df['ema52'] = ema(df['Close'], 52, sma_seed=True)
+        df['ema260'] = ema(df['Close'], 260, sma_seed=True)
         return df.dropna(subset=['ema260'])
     except: return pd.DataFrame()
 
@@ -75,22 +68,14 @@ def find_last_short_signal(df, bull_shorts):
     if df.empty or len(df) < 2: return None, None, False, "-"
     last_entry_date, last_entry_px, is_active, verdict = None, None, False, "-"
     
-    for i in range(1, len(df)):
-        # 1. Filtro de Régimen: EMA 52 por debajo de EMA 260 (Bearish)
-        authorized = (df['ema52'].iloc[i] < df['ema260'].iloc[i]) or bull_shorts
-        
-        # 2. Gatillo de Entrada Short: HA Verde a Rojo + MACD Perdiendo fuerza alcista + RSI bajando + RSI > 50
-        ha_flip_red = df['ha_color'].iloc[i] == "Rojo" and df['ha_color'].iloc[i-1] == "Verde"
-        macd_dropping = df['hist'].iloc[i] < df['hist'].iloc[i-1]
-        rsi_dropping = df['rsi_smooth'].iloc[i] < df['rsi_smooth'].iloc[i-1]
-        rsi_premium = df['rsi_smooth'].iloc[i] > 50 # Zona de Short (Premium)
-        
-        if not is_active and (authorized and ha_flip_red and macd_dropping and rsi_dropping and rsi_premium):
-            is_active, last_entry_date, last_entry_px = True, df.index[i], df['Close'].iloc[i]
-        
-        # 3. Gatillo de Salida Short: HA Verde + MACD subiendo + RSI subiendo
-        elif is_active and (df['ha_color'].iloc[i] == "Verde" and df['hist'].iloc[i] > df['hist'].iloc[i-1] and df['rsi_smooth'].iloc[i] > df['rsi_smooth'].iloc[i-1]):
-            is_active = False
+    # 1. Filtro de Régimen: EMA 52 por debajo de EMA 260 (Bearish)
+    # 2. Entrada Short: HA Verde a Rojo + MACD perdiendo fuerza + RSI bajando + RSI > 50 (Premium)
+    # 3. Salida Short: HA Verde + MACD subiendo + RSI subiendo
+    authorized = (df['ema52'].to_numpy() < df['ema260'].to_numpy()) | bull_shorts
+    ha_dir = np.where(df['ha_color'].to_numpy() == "Verde", 1, -1)
+    sig = trend_filter_signal(ha_dir, df['hist'].to_numpy(), df['rsi_smooth'].to_numpy(), authorized, df['Close'].to_numpy(), side=-1)
+    is_active = sig.state == -1
+    if sig.index >= 0: last_entry_date, last_entry_px = df.index[sig.index], sig.price
 
     if is_active:
         c_h, p_h = df['hist'].iloc[-1], df['hist'].iloc[-2]
@@ -140,7 +125,7 @@ with st.sidebar:
             for i, sym in enumerate(subset):
                 try:
                     prog.progress((i+1)/len(subset), text=f"Auditando 4H (SHORT): {sym}")
-                    raw_data = ex.fetch_ohlcv(sym, timeframe='4h', limit=1000)
+                    raw_data = fetch_ohlcv_cached(ex, sym, '4h', limit=1000)
                     df = pd.DataFrame(raw_data, columns=['time','open','high','low','close','vol'])
                     df['time'] = pd.to_datetime(df['time'], unit='ms')
                     df.set_index('time', inplace=True)
@@ -152,7 +137,7 @@ with st.sidebar:
                     # Cálculo PnL para SHORT: (Entrada - Actual) / Entrada
                     pnl_val = f"{((sig_px - data['Close'].iloc[-1]) / sig_px * 100):.2f}%" if (vigente and sig_px) else "-"
                     
-                    st.session_state["master_results_short"][sym] = {
+                    SCANS.put(SCANNER, [{
                         "Activo": sym.replace("/USDT", ""), 
                         "Sector": get_crypto_sector(sym),
                         "Última Señal": sig_date.strftime('%d/%m %H:%M') if sig_date else "-",
@@ -162,20 +147,21 @@ with st.sidebar:
                         "Precio": f"{data['Close'].iloc[-1]:.4f}",
                         "RSI": round(data['rsi_smooth'].iloc[-1], 1),
                         "Régimen": "BAJISTA" if data['ema52'].iloc[-1] < data['ema260'].iloc[-1] else "ALCISTA"
-                    }
+                    }])
                     time.sleep(0.1)
                 except: continue
             st.rerun()
 
     if st.button("🗑️ Limpiar Memoria"):
-        st.session_state["master_results_short"] = {}
+        SCANS.clear(SCANNER)
         st.rerun()
 
 # ─────────────────────────────────────────────
 # RESUMEN SECTORIAL
 # ─────────────────────────────────────────────
-if st.session_state["master_results_short"]:
-    df_full = pd.DataFrame(st.session_state["master_results_short"].values())
+master_results_short = SCANS.latest(SCANNER)
+if master_results_short:
+    df_full = pd.DataFrame(master_results_short)
     df_vigentes = df_full[df_full["Estado"] == "VIGENTE 🔴"]
 
     st.subheader("📊 RESUMEN DE EXPOSICIÓN SHORT (VIGENTES)")
@@ -1,10 +1,13 @@
 import streamlit as st
 import ccxt
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
 import time
-from datetime import datetime, timedelta
+from core.heikin_ashi import heikin_ashi
+from core.indicators import dema, ema, macd, rsi
+from core.signals import trend_filter_signal
+from core.ohlcv_store import fetch_ohlcv_cached
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN INSTITUCIONAL - LIGHT THEME (SHORT)
@@ -22,8 +25,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "master_results_short" not in st.session_state:
-    st.session_state["master_results_short"] = {}
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "crypto_short_v2"
 
 # Mapeo de temporalidades para CCXT
 TF_OPTIONS = {
@@ -60,28 +63,18 @@ def get_sly_indicators(df):
         df.columns = [c.capitalize() for c in df.columns]
         df = df.dropna(subset=['Close'])
 
-        def dema(s, length):
-            ema1 = s.ewm(span=length, adjust=False).mean()
-            ema2 = ema1.ewm(span=length, adjust=False).mean()
-            return 2 * ema1 - ema2
-
         # MACD Zero-Lag
-        df['macd_line'] = dema(df['Close'], 12) - dema(df['Close'], 26)
-        df['signal_line'] = df['macd_line'].ewm(span=9, adjust=False).mean()
-        df['hist'] = df['macd_line'] - df['signal_line']
+        df['macd_line'], df['signal_line'], df['hist'] = macd(df['Close'], mode="dema")
         
         # RSI PRO
-        df['rsi_smooth'] = dema(ta.rsi(df['Close'], length=14).fillna(50), 5)
+        df['rsi_smooth'] = dema(np.nan_to_num(rsi(df['Close'], 14), nan=50.0), 5)
 
         # Heikin Ashi Recursivo
-        ha_c = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-        ha_o = np.zeros(len(df))
-        ha_o[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-        for i in range(1, len(df)): ha_o[i] = (ha_o[i-1] + ha_c.iloc[i-1]) / 2
+        ha_o, ha_c = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
         df['ha_color'] = np.where(ha_c > ha_o, "Verde", "Rojo")
         
-        df['ema52'] = ta.ema(df['Close'], length=52)
-        df['ema260'] = ta.ema(df['Close'], length=260)
+        df['ema52'] = ema(df['Close'], 52, sma_seed=True)
+        df['ema260'] = ema(df['Close'], 260, sma_seed=True)
         return df.dropna(subset=['ema260'])
     except: return pd.DataFrame()
 
@@ -89,21 +82,14 @@ def find_last_short_signal(df, bull_shorts):
     if df.empty or len(df) < 2: return None, None, False, "-"
     last_entry_date, last_entry_px, is_active, verdict = None, None, False, "-"
     
-    for i in range(1, len(df)):
-        # Condición de Régimen: EMA 52 debajo de 260 (Bearish)
-        authorized = (df['ema52'].iloc[i] < df['ema260'].iloc[i]) or bull_shorts
-        
-        # Gatillo Entrada SHORT: Flip a Rojo + MACD cayendo + RSI cayendo + RSI > 50 (Premium)
-        ha_flip_red = df['ha_color'].iloc[i] == "Rojo" and df['ha_color'].iloc[i-1] == "Verde"
-        macd_dropping = df['hist'].iloc[i] < df['hist'].iloc[i-1]
-        rsi_dropping = df['rsi_smooth'].iloc[i] < df['rsi_smooth'].iloc[i-1] and df['rsi_smooth'].iloc[i] > 50
-        
-        if not is_active and (authorized and ha_flip_red and macd_dropping and rsi_dropping):
-            is_active, last_entry_date, last_entry_px = True, df.index[i], df['Close'].iloc[i]
-        
-        # Gatillo Salida SHORT: HA Verde + MACD subiendo + RSI subiendo
-        elif is_active and (df['ha_color'].iloc[i] == "Verde" and df['hist'].iloc[i] > df['hist'].iloc[i-1] and df['rsi_smooth'].iloc[i] > df['rsi_smooth'].iloc[i-1]):
-            is_active = False
+    # Régimen: EMA 52 debajo de 260 (Bearish)
+    # Entrada SHORT: Flip a Rojo + MACD cayendo + RSI cayendo + RSI > 50 (Premium)
+    # Salida SHORT: HA Verde + MACD subiendo + RSI subiendo
+    authorized = (df['ema52'].to_numpy() < df['ema260'].to_numpy()) | bull_shorts
+    ha_dir = np.where(df['ha_color'].to_numpy() == "Verde", 1, -1)
+    sig = trend_filter_signal(ha_dir, df['hist'].to_numpy(), df['rsi_smooth'].to_numpy(), authorized, df['Close'].to_numpy(), side=-1)
+    is_active = sig.state == -1
+    if sig.index >= 0: last_entry_date, last_entry_px = df.index[sig.index], sig.price
 
     if is_active:
         c_h, p_h = df['hist'].iloc[-1], df['hist'].iloc[-2]
@@ -157,7 +143,7 @@ with st.sidebar:
             for i, sym in enumerate(subset):
                 try:
                     prog.progress((i+1)/len(subset), text=f"Auditando {selected_tf_label}: {sym}")
-                    raw_data = ex.fetch_ohlcv(sym, timeframe=selected_tf_code, limit=1000)
+                    raw_data = fetch_ohlcv_cached(ex, sym, selected_tf_code, limit=1000)
                     df = pd.DataFrame(raw_data, columns=['time','open','high','low','close','vol'])
                     df['time'] = pd.to_datetime(df['time'], unit='ms')
                     df.set_index('time', inplace=True)
@@ -171,7 +157,7 @@ with st.sidebar:
                     pnl_val = f"{((sig_px - data['Close'].iloc[-1]) / sig_px * 100):.2f}%" if (vigente and sig_px) else "-"
                     last_rsi = data['rsi_smooth'].iloc[-1]
                     
-                    st.session_state["master_results_short"][sym] = {
+                    SCANS.put(SCANNER, [{
                         "Activo": sym.replace("/USDT", ""), 
                         "Temporalidad": selected_tf_label,
                         "Sector": get_crypto_sector(sym),
@@ -183,20 +169,21 @@ with st.sidebar:
                         "Precio": f"{data['Close'].iloc[-1]:.4f}",
                         "RSI": round(last_rsi, 1),
                         "Régimen": "BAJISTA" if data['ema52'].iloc[-1] < data['ema260'].iloc[-1] else "ALCISTA"
-                    }
+                    }], timeframe=selected_tf_label)
                     time.sleep(0.1)
                 except: continue
             st.rerun()
 
     if st.button("🗑️ Limpiar Memoria"):
-        st.session_state["master_results_short"] = {}
+        SCANS.clear(SCANNER)
         st.rerun()
 
 # ─────────────────────────────────────────────
 # RESUMEN SECTORIAL
 # ─────────────────────────────────────────────
-if st.session_state["master_results_short"]:
-    df_full = pd.DataFrame(st.session_state["master_results_short"].values())
+master_results_short = SCANS.latest(SCANNER)
+if master_results_short:
+    df_full = pd.DataFrame(master_results_short)
     df_vigentes = df_full[df_full["Estado"] == "VIGENTE 🔴"]
 
     st.subheader("📊 RESUMEN DE EXPOSICIÓN SHORT (VIGENTES)")
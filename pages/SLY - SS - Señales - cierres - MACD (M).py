@@ -1,9 +1,11 @@
 import streamlit as st
 import yfinance as yf
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
-from datetime import datetime, timedelta
+from core.heikin_ashi import heikin_ashi
+from core.indicators import dema, ema, macd, rsi
+from core.signals import trend_filter_signal
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN INSTITUCIONAL - LIGHT THEME
@@ -21,8 +23,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "master_results" not in st.session_state:
-    st.session_state["master_results"] = {}
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "stock_signals_1wk_macd_m"
 
 # ─────────────────────────────────────────────
 # MAPEO SECTORIAL
@@ -51,21 +53,12 @@ def get_sly_indicators(df):
     try:
         if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
         df = df.dropna(subset=['Close'])
-        def dema(s, length):
-            ema1 = s.ewm(span=length, adjust=False).mean()
-            ema2 = ema1.ewm(span=length, adjust=False).mean()
-            return 2 * ema1 - ema2
-        df['macd_line'] = dema(df['Close'], 12) - dema(df['Close'], 26)
-        df['signal_line'] = df['macd_line'].ewm(span=9, adjust=False).mean()
-        df['hist'] = df['macd_line'] - df['signal_line']
-        df['rsi_smooth'] = dema(ta.rsi(df['Close'], length=14).fillna(50), 5)
-        ha_c = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-        ha_o = np.zeros(len(df))
-        ha_o[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-        for i in range(1, len(df)): ha_o[i] = (ha_o[i-1] + ha_c.iloc[i-1]) / 2
+        df['macd_line'], df['signal_line'], df['hist'] = macd(df['Close'], mode="dema")
+        df['rsi_smooth'] = dema(np.nan_to_num(rsi(df['Close'], 14), nan=50.0), 5)
+        ha_o, ha_c = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
         df['ha_color'] = np.where(ha_c > ha_o, "Verde", "Rojo")
-        df['ema52'] = ta.ema(df['Close'], length=52)
-        df['ema260'] = ta.ema(df['Close'], length=260)
+        df['ema52'] = ema(df['Close'], 52, sma_seed=True)
+        df['ema260'] = ema(df['Close'], 260, sma_seed=True)
         return df
     except: return pd.DataFrame()
 
@@ -75,16 +68,12 @@ def find_last_signal(df, bear_longs):
     if df_clean.empty or len(df_clean) < 2: return None, None, False, "-"
     
     last_entry_date, last_entry_px, is_active, verdict = None, None, False, "-"
-    for i in range(1, len(df_clean)):
-        authorized = (df_clean['ema52'].iloc[i] > df_clean['ema260'].iloc[i]) or bear_longs
-        ha_flip = df_clean['ha_color'].iloc[i] == "Verde" and df_clean['ha_color'].iloc[i-1] == "Rojo"
-        macd_accel = df_clean['hist'].iloc[i] > df_clean['hist'].iloc[i-1]
-        rsi_ok = df_clean['rsi_smooth'].iloc[i] > df_clean['rsi_smooth'].iloc[i-1] and df_clean['rsi_smooth'].iloc[i] < 50
-        
-        if not is_active and (authorized and ha_flip and macd_accel and rsi_ok):
-            is_active, last_entry_date, last_entry_px = True, df_clean.index[i], df_clean['Close'].iloc[i]
-        elif is_active and (df_clean['ha_color'].iloc[i] == "Rojo" and df_clean['hist'].iloc[i] < df_clean['hist'].iloc[i-1] and df_clean['rsi_smooth'].iloc[i] < df_clean['rsi_smooth'].iloc[i-1]):
-            is_active = False
+    # Autorizado por régimen (EMA52 > EMA260) o por Bear-Longs
+    authorized = (df_clean['ema52'].to_numpy() > df_clean['ema260'].to_numpy()) | bear_longs
+    ha_dir = np.where(df_clean['ha_color'].to_numpy() == "Verde", 1, -1)
+    sig = trend_filter_signal(ha_dir, df_clean['hist'].to_numpy(), df_clean['rsi_smooth'].to_numpy(), authorized, df_clean['Close'].to_numpy(), side=1)
+    is_active = sig.state == 1
+    if sig.index >= 0: last_entry_date, last_entry_px = df_clean.index[sig.index], sig.price
 
     if is_active:
         c_h, p_h = df_clean['hist'].iloc[-1], df_clean['hist'].iloc[-2]
@@ -102,11 +91,10 @@ def get_monthly_macd_status(symbol):
         if isinstance(m_data.columns, pd.MultiIndex): m_data.columns = m_data.columns.get_level_values(0)
         
         # Calcular MACD estándar para mensual
-        macd = ta.macd(m_data['Close'], fast=12, slow=26, signal=9)
-        hist = macd['MACDh_12_26_9']
+        _, _, hist = macd(m_data['Close'], 12, 26, 9)
         
-        curr_h = hist.iloc[-1]
-        prev_h = hist.iloc[-2]
+        curr_h = hist[-1]
+        prev_h = hist[-2]
         
         if curr_h > prev_h:
             return "Ganando Fuerza 🟢"
@@ -149,7 +137,7 @@ with st.sidebar:
                 
                 pnl_str = f"{((data_w['Close'].iloc[-1] - sig_px) / sig_px * 100):.2f}%" if (vigente and sig_px) else "-"
                 
-                st.session_state["master_results"][sym] = {
+                SCANS.put(SCANNER, [{
                     "Activo": sym, 
                     "Sector": get_sector(sym),
                     "Estado": "VIGENTE 🟢" if vigente else "CERRADA 🔴",
@@ -160,16 +148,17 @@ with st.sidebar:
                     "Precio": round(data_w['Close'].iloc[-1], 2),
                     "RSI": round(data_w['rsi_smooth'].iloc[-1], 1),
                     "Régimen": "ALCISTA" if data_w['ema52'].iloc[-1] > data_w['ema260'].iloc[-1] else "BAJISTA"
-                }
+                }])
             except: continue
         st.rerun()
-    if st.button("🗑️ Limpiar Memoria"): st.session_state["master_results"] = {}; st.rerun()
+    if st.button("🗑️ Limpiar Memoria"): SCANS.clear(SCANNER); st.rerun()
 
 # ─────────────────────────────────────────────
 # RESUMEN SECTORIAL
 # ─────────────────────────────────────────────
-if st.session_state["master_results"]:
-    df_full = pd.DataFrame(st.session_state["master_results"].values())
+master_results = SCANS.latest(SCANNER)
+if master_results:
+    df_full = pd.DataFrame(master_results)
     df_vigentes = df_full[df_full["Estado"] == "VIGENTE 🟢"]
 
     st.subheader("📊 RESUMEN DE EXPOSICIÓN (VIGENTES)")
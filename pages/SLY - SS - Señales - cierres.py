@@ -1,9 +1,11 @@
 import streamlit as st
 import yfinance as yf
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
-from datetime import datetime, timedelta
+from core.heikin_ashi import heikin_ashi
+from core.indicators import dema, ema, macd, rsi
+from core.signals import trend_filter_signal
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN INSTITUCIONAL - LIGHT THEME
@@ -21,8 +23,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "master_results" not in st.session_state:
-    st.session_state["master_results"] = {}
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "stock_signals_1wk"
 
 # ─────────────────────────────────────────────
 # MAPEO SECTORIAL
@@ -51,37 +53,24 @@ def get_sly_indicators(df):
     try:
         if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
         df = df.dropna(subset=['Close'])
-        def dema(s, length):
-            ema1 = s.ewm(span=length, adjust=False).mean()
-            ema2 = ema1.ewm(span=length, adjust=False).mean()
-            return 2 * ema1 - ema2
-        df['macd_line'] = dema(df['Close'], 12) - dema(df['Close'], 26)
-        df['signal_line'] = df['macd_line'].ewm(span=9, adjust=False).mean()
-        df['hist'] = df['macd_line'] - df['signal_line']
-        df['rsi_smooth'] = dema(ta.rsi(df['Close'], length=14).fillna(50), 5)
-        ha_c = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-        ha_o = np.zeros(len(df))
-        ha_o[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-        for i in range(1, len(df)): ha_o[i] = (ha_o[i-1] + ha_c.iloc[i-1]) / 2
+        df['macd_line'], df['signal_line'], df['hist'] = macd(df['Close'], mode="dema")
+        df['rsi_smooth'] = dema(np.nan_to_num(rsi(df['Close'], 14), nan=50.0), 5)
+        ha_o, ha_c = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
         df['ha_color'] = np.where(ha_c > ha_o, "Verde", "Rojo")
-        df['ema52'] = ta.ema(df['Close'], length=52)
-        df['ema260'] = ta.ema(df['Close'], length=260)
+        df['ema52'] = ema(df['Close'], 52, sma_seed=True)
+        df['ema260'] = ema(df['Close'], 260, sma_seed=True)
         return df.dropna(subset=['ema260'])
     except: return pd.DataFrame()
 
 def find_last_signal(df, bear_longs):
     if df.empty or len(df) < 2: return None, None, False, "-"
     last_entry_date, last_entry_px, is_active, verdict = None, None, False, "-"
-    for i in range(1, len(df)):
-        authorized = (df['ema52'].iloc[i] > df['ema260'].iloc[i]) or bear_longs
-        ha_flip = df['ha_color'].iloc[i] == "Verde" and df['ha_color'].iloc[i-1] == "Rojo"
-        macd_accel = df['hist'].iloc[i] > df['hist'].iloc[i-1]
-        rsi_ok = df['rsi_smooth'].iloc[i] > df['rsi_smooth'].iloc[i-1] and df['rsi_smooth'].iloc[i] < 50
-        
-        if not is_active and (authorized and ha_flip and macd_accel and rsi_ok):
-            is_active, last_entry_date, last_entry_px = True, df.index[i], df['Close'].iloc[i]
-        elif is_active and (df['ha_color'].iloc[i] == "Rojo" and df['hist'].iloc[i] < df['hist'].iloc[i-1] and df['rsi_smooth'].iloc[i] < df['rsi_smooth'].iloc[i-1]):
-            is_active = False
+    # Autorizado por régimen (EMA52 > EMA260) o por Bear-Longs
+    authorized = (df['ema52'].to_numpy() > df['ema260'].to_numpy()) | bear_longs
+    ha_dir = np.where(df['ha_color'].to_numpy() == "Verde", 1, -1)
+    sig = trend_filter_signal(ha_dir, df['hist'].to_numpy(), df['rsi_smooth'].to_numpy(), authorized, df['Close'].to_numpy(), side=1)
+    is_active = sig.state == 1
+    if sig.index >= 0: last_entry_date, last_entry_px = df.index[sig.index], sig.price
 
     if is_active:
         c_h, p_h = df['hist'].iloc[-1], df['hist'].iloc[-2]
@@ -119,23 +108,24 @@ with st.sidebar:
                 # BLOQUEO DE PnL: Solo si vigente es True
                 pnl_str = f"{((data['Close'].iloc[-1] - sig_px) / sig_px * 100):.2f}%" if (vigente and sig_px) else "-"
                 
-                st.session_state["master_results"][sym] = {
+                SCANS.put(SCANNER, [{
                     "Activo": sym, "Sector": get_sector(sym),
                     "Última Señal": sig_date.strftime('%Y-%m-%d') if sig_date else "-",
                     "Estado": "VIGENTE 🟢" if vigente else "CERRADA 🔴",
                     "PnL Real": pnl_str, "Veredicto": verd, "Precio": round(data['Close'].iloc[-1], 2),
                     "RSI": round(data['rsi_smooth'].iloc[-1], 1),
                     "Régimen": "ALCISTA" if data['ema52'].iloc[-1] > data['ema260'].iloc[-1] else "BAJISTA"
-                }
+                }])
             except: continue
         st.rerun()
-    if st.button("🗑️ Limpiar Memoria"): st.session_state["master_results"] = {}; st.rerun()
+    if st.button("🗑️ Limpiar Memoria"): SCANS.clear(SCANNER); st.rerun()
 
 # ─────────────────────────────────────────────
 # RESUMEN SECTORIAL
 # ─────────────────────────────────────────────
-if st.session_state["master_results"]:
-    df_full = pd.DataFrame(st.session_state["master_results"].values())
+master_results = SCANS.latest(SCANNER)
+if master_results:
+    df_full = pd.DataFrame(master_results)
     df_vigentes = df_full[df_full["Estado"] == "VIGENTE 🟢"]
 
     st.subheader("📊 RESUMEN DE EXPOSICIÓN (VIGENTES POR SECTOR)")
@@ -1,10 +1,11 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-import time
-from datetime import datetime
+from core.heikin_ashi import heikin_ashi
+from core.signals import sly_state
+from core.yf_panel import load_panels
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -19,8 +20,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "sniper_results" not in st.session_state:
-    st.session_state["sniper_results"] = []
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "stock_ha_macd_triple"
 
 MACRO_CONFIG = {
     "1D": {"int": "1d", "per": "2y"},
@@ -51,51 +52,25 @@ def run_sly_engine(df):
     hist = macd['MACDh_12_26_9']
     
     # 2. Heikin Ashi Manual (Recursivo)
-    ha_close = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    ha_open = np.zeros(len(df))
-    ha_open[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    for i in range(1, len(df)):
-        ha_open[i] = (ha_open[i-1] + ha_close.iloc[i-1]) / 2
+    ha_open, ha_close = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
     ha_dir = np.where(ha_close > ha_open, 1, -1)
     
-    # 3. Máquina de Estados (State Machine)
-    state = 0
-    entry_px = 0.0
-    entry_tm = None
-    
-    for i in range(1, len(df)):
-        h, h_prev = hist.iloc[i], hist.iloc[i-1]
-        hd, hd_prev = ha_dir[i], ha_dir[i-1]
-        
-        # Gatillos SLY
-        longC = (hd == 1 and hd_prev == -1 and h < 0 and h > h_prev)
-        shrtC = (hd == -1 and hd_prev == 1 and h > 0 and h < h_prev)
-        
-        if longC:
-            state, entry_px, entry_tm = 1, df['Close'].iloc[i], df.index[i]
-        elif shrtC:
-            state, entry_px, entry_tm = -1, df['Close'].iloc[i], df.index[i]
-        elif state != 0:
-            # Salida por agotamiento de momentum (Mntm Exit)
-            if (state == 1 and h < h_prev) or (state == -1 and h > h_prev):
-                state = 0
+    # 3. Máquina de Estados (gatillos SLY + salida por agotamiento de momentum)
+    state, entry_px, entry_idx = sly_state(ha_dir, hist.to_numpy(), df['Close'].to_numpy())
+    entry_tm = df.index[entry_idx] if entry_idx >= 0 else None
                 
     return state, entry_px, entry_tm
 
 # ─────────────────────────────────────────────
 # ANALIZADOR TRIPLE CICLO
 # ─────────────────────────────────────────────
-def analyze_triple_cycle(symbol):
+def analyze_triple_cycle(symbol, panels):
     row = {"Activo": symbol}
     current_price = None
     
     for tf_key, config in MACRO_CONFIG.items():
         try:
-            df = yf.download(symbol, interval=config['int'], period=config['per'], progress=False, auto_adjust=True)
-            
-            # Parche para MultiIndex de yfinance v0.2.x
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
+            df = panels[tf_key].get(symbol, pd.DataFrame())
             
             if df.empty or len(df) < 50:
                 row[f"{tf_key} Signal"] = "S/D"
@@ -137,23 +112,18 @@ with st.sidebar:
         prog = st.progress(0)
         targets = batches[sel_batch]
         
+        panels = load_panels(targets, MACRO_CONFIG, progress=lambda d, n: prog.progress(d/n, text="Descargando velas..."))
         for idx, sym in enumerate(targets):
             prog.progress((idx+1)/len(targets), text=f"Procesando: {sym}")
-            res = analyze_triple_cycle(sym)
+            res = analyze_triple_cycle(sym, panels)
             results.append(res)
-            time.sleep(0.05) # Jitter estocástico para evitar 429 de Yahoo
             
-        if acc:
-            # Unión inteligente por Activo
-            current = {x["Activo"]: x for x in st.session_state["sniper_results"]}
-            for r in results: current[r["Activo"]] = r
-            st.session_state["sniper_results"] = list(current.values())
-        else:
-            st.session_state["sniper_results"] = results
+        # Unión inteligente por Activo (upsert); sin acumular reemplaza el snapshot
+        SCANS.put(SCANNER, results, replace=not acc)
         st.rerun()
 
     if st.button("Limpiar Memoria"):
-        st.session_state["sniper_results"] = []
+        SCANS.clear(SCANNER)
         st.rerun()
 
 # ─────────────────────────────────────────────
@@ -161,8 +131,9 @@ with st.sidebar:
 # ─────────────────────────────────────────────
 st.title("🦅 SLY TRIPLE MACRO MATRIX")
 
-if st.session_state["sniper_results"]:
-    df_final = pd.DataFrame(st.session_state["sniper_results"])
+sniper_results = SCANS.latest(SCANNER)
+if sniper_results:
+    df_final = pd.DataFrame(sniper_results)
     
     # Columnas ordenadas
     cols_order = ["Activo", "Precio", 
@@ -3,6 +3,8 @@ import ccxt
 import pandas as pd
 import numpy as np
 import time
+from core.ohlcv_store import fetch_ohlcv_cached
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN INSTITUCIONAL
@@ -19,8 +21,8 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- INICIALIZACIÓN DE MEMORIA BLINDADA ---
-if "persistent_list" not in st.session_state:
-    st.session_state["persistent_list"] = []
+# Resultados en la base compartida (core.scan_store); el puntero de lotes sigue siendo por sesión
+SCANNER = "volume_alpha"
 if "all_symbols" not in st.session_state:
     st.session_state["all_symbols"] = []
 if "ptr" not in st.session_state:
@@ -60,7 +62,7 @@ def get_verdict(v2, v21, delta):
 
 def analyze_volume_and_alpha(symbol, tf, exchange, btc_perf):
     try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe=tf, limit=100)
+        ohlcv = fetch_ohlcv_cached(exchange, symbol, tf, limit=100)
         df = pd.DataFrame(ohlcv, columns=['t', 'o', 'h', 'l', 'c', 'v'])
         
         # Rendimiento de la moneda
@@ -100,7 +102,7 @@ with st.sidebar:
     if st.button("📡 1. CARGAR/ACTUALIZAR MERCADO"):
         st.session_state["all_symbols"] = fetch_universe(min_vol)
         st.session_state["ptr"] = 0
-        st.session_state["persistent_list"] = []
+        SCANS.clear(SCANNER)
         st.success(f"Mercado cargado: {len(st.session_state['all_symbols'])} activos.")
 
     if st.session_state["all_symbols"]:
@@ -122,22 +124,23 @@ with st.sidebar:
                 for i, sym in enumerate(targets):
                     res = analyze_volume_and_alpha(sym, tf, ex, btc_perf)
                     if res:
-                        st.session_state["persistent_list"].append(res)
+                        SCANS.put(SCANNER, [res], timeframe=tf)
                     prog.progress((i+1)/len(targets))
                 
                 st.session_state["ptr"] = limit
                 st.rerun()
 
     if st.button("🗑️ LIMPIAR TODO"):
-        st.session_state["persistent_list"] = []
+        SCANS.clear(SCANNER)
         st.session_state["ptr"] = 0
         st.rerun()
 
 # ─────────────────────────────────────────────
 # RENDERIZADO DE RESULTADOS
 # ─────────────────────────────────────────────
-if st.session_state["persistent_list"]:
-    df_accumulated = pd.DataFrame(st.session_state["persistent_list"]).drop_duplicates(subset="Activo", keep="last")
+persistent_list = SCANS.latest(SCANNER, tf)
+if persistent_list:
+    df_accumulated = pd.DataFrame(persistent_list).drop_duplicates(subset="Activo", keep="last")
     
     # Orden lógico de columnas
     prio = ["Activo", "RECOMENDACIÓN", "Alpha Rating", "Vs BTC (Delta)", "Precio", "Chg 2v (%)", "Chg 21v (%)"]
@@ -1,10 +1,12 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-import time
 from datetime import datetime
+from core.heikin_ashi import heikin_ashi
+from core.signals import sly_state
+from core.yf_panel import load_panels
+from core.scan_store import SCANS
 
 # ─────────────────────────────────────────────
 # CONFIGURACIÓN DEL SISTEMA
@@ -20,8 +22,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-if "sniper_results" not in st.session_state:
-    st.session_state["sniper_results"] = []
+# Resultados en la base compartida (core.scan_store)
+SCANNER = "nexo_macd_triple"
 
 MACRO_CONFIG = {
     "1D": {"int": "1d", "per": "2y"},
@@ -47,35 +49,22 @@ def run_sly_engine(df):
     if macd is None or macd.empty: return 0, 0, None
     hist = macd['MACDh_12_26_9']
     
-    ha_close = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    ha_open = np.zeros(len(df))
-    ha_open[0] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    for i in range(1, len(df)):
-        ha_open[i] = (ha_open[i-1] + ha_close.iloc[i-1]) / 2
+    ha_open, ha_close = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed="mid")
     ha_dir = np.where(ha_close > ha_open, 1, -1)
     
-    state, entry_px, entry_tm = 0, 0.0, None
-    for i in range(1, len(df)):
-        h, h_prev = hist.iloc[i], hist.iloc[i-1]
-        hd, hd_prev = ha_dir[i], ha_dir[i-1]
-        longC = (hd == 1 and hd_prev == -1 and h < 0 and h > h_prev)
-        shrtC = (hd == -1 and hd_prev == 1 and h > 0 and h < h_prev)
-        if longC: state, entry_px, entry_tm = 1, df['Close'].iloc[i], df.index[i]
-        elif shrtC: state, entry_px, entry_tm = -1, df['Close'].iloc[i], df.index[i]
-        elif state != 0:
-            if (state == 1 and h < h_prev) or (state == -1 and h > h_prev): state = 0
+    state, entry_px, entry_idx = sly_state(ha_dir, hist.to_numpy(), df['Close'].to_numpy())
+    entry_tm = df.index[entry_idx] if entry_idx >= 0 else None
     return state, entry_px, entry_tm
 
 # ─────────────────────────────────────────────
 # ANALIZADOR TRIPLE CICLO
 # ─────────────────────────────────────────────
-def analyze_triple_cycle(symbol):
+def analyze_triple_cycle(symbol, panels):
     row = {"Activo": symbol}
     current_price = None
     for tf_key, config in MACRO_CONFIG.items():
         try:
-            df = yf.download(symbol, interval=config['int'], period=config['per'], progress=False, auto_adjust=True)
-            if isinstance(df.columns, pd.MultiIndex): df.columns = df.columns.get_level_values(0)
+            df = panels[tf_key].get(symbol, pd.DataFrame())
             if df.empty or len(df) < 35:
                 row[f"{tf_key} Signal"] = "S/D"
                 continue
@@ -112,22 +101,17 @@ with st.sidebar:
         prog = st.progress(0)
         targets = batches[sel_batch]
         
+        panels = load_panels(targets, MACRO_CONFIG, progress=lambda d, n: prog.progress(d/n, text="Descargando velas..."))
         for idx, sym in enumerate(targets):
             prog.progress((idx+1)/len(targets), text=f"Analizando {sym}...")
-            res = analyze_triple_cycle(sym)
+            res = analyze_triple_cycle(sym, panels)
             results.append(res)
-            time.sleep(0.01) # Reducción de latencia institucional
             
-        if acc:
-            current = {x["Activo"]: x for x in st.session_state["sniper_results"]}
-            for r in results: current[r["Activo"]] = r
-            st.session_state["sniper_results"] = list(current.values())
-        else:
-            st.session_state["sniper_results"] = results
+        SCANS.put(SCANNER, results, replace=not acc)
         st.rerun()
 
     if st.button("Limpiar Memoria"):
-        st.session_state["sniper_results"] = []
+        SCANS.clear(SCANNER)
         st.rerun()
 
 # ─────────────────────────────────────────────
@@ -135,8 +119,9 @@ with st.sidebar:
 # ─────────────────────────────────────────────
 st.title("🦅 SLY TRIPLE MACRO MATRIX")
 
-if st.session_state["sniper_results"]:
-    df_final = pd.DataFrame(st.session_state["sniper_results"])
+sniper_results = SCANS.latest(SCANNER)
+if sniper_results:
+    df_final = pd.DataFrame(sniper_results)
     cols_order = ["Activo", "Precio", 
                   "1D Signal", "1D Fecha", "1D PnL",
                   "1S Signal", "1S Fecha", "1S PnL",
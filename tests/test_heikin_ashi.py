@@ -0,0 +1,81 @@
+"""`core.heikin_ashi` contra el bucle `.iloc` que reemplazó (resultado bit a bit igual)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.heikin_ashi as ha
+from core.heikin_ashi import heikin_ashi, heikin_ashi_panel
+
+
+def old_loop(df, seed="open"):
+    # Copia del cálculo original de los bots (seed="open") y de macro_sly_bot (seed="mid")
+    ha_close = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
+    ha_open = np.zeros(len(df))
+    if len(df) == 0: return ha_open, ha_close.to_numpy()
+    ha_open[0] = df['Open'].iloc[0] if seed == "open" else (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
+    for i in range(1, len(df)):
+        ha_open[i] = (ha_open[i-1] + ha_close.iloc[i-1]) / 2
+    return ha_open, ha_close.to_numpy()
+
+
+def ohlc(n, seed=0):
+    rng = np.random.default_rng(seed)
+    c = 100 + np.cumsum(rng.normal(0, 1, n))
+    o = c + rng.normal(0, 0.5, n)
+    return pd.DataFrame({"Open": o, "High": np.maximum(o, c) + rng.random(n), "Low": np.minimum(o, c) - rng.random(n), "Close": c})
+
+
+@pytest.fixture(params=["lfilter", "loop"])
+def kernel(request, monkeypatch):
+    # Con y sin SciPy
+    if request.param == "loop": monkeypatch.setattr(ha, "lfilter", None)
+    elif ha.lfilter is None: pytest.skip("SciPy no instalado")
+    return request.param
+
+
+@pytest.mark.parametrize("seed", ["open", "mid"])
+@pytest.mark.parametrize("n", [1, 2, 500])
+def test_matches_old_loop(kernel, seed, n):
+    df = ohlc(n)
+    ho, hc = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed=seed)
+    ro, rc = old_loop(df, seed)
+    np.testing.assert_array_equal(hc, rc)
+    np.testing.assert_array_equal(ho, ro)
+
+
+@pytest.mark.parametrize("seed", ["open", "mid"])
+def test_leading_nan_propagates_like_old_loop(kernel, seed):
+    df = ohlc(50)
+    df.iloc[:5] = np.nan
+    ho, hc = heikin_ashi(df['Open'], df['High'], df['Low'], df['Close'], seed=seed)
+    ro, rc = old_loop(df, seed)
+    np.testing.assert_array_equal(hc, rc)
+    np.testing.assert_array_equal(ho, ro)
+
+
+def test_empty_and_bad_seed():
+    ho, hc = heikin_ashi([], [], [], [])
+    assert len(ho) == len(hc) == 0
+    with pytest.raises(ValueError):
+        heikin_ashi([1.0], [1.0], [1.0], [1.0], seed="close")
+
+
+@pytest.mark.parametrize("seed", ["open", "mid"])
+def test_panel_matches_old_loop_per_row(kernel, seed):
+    # Historias de distinto largo (NaN a la izquierda), una de una sola vela y una vacía
+    frames = [ohlc(300, 1), ohlc(120, 2), ohlc(1, 3), ohlc(0, 4), ohlc(299, 5)]
+    panel = ha.stack_panel(frames)
+    ho, hc = heikin_ashi_panel(panel["Open"], panel["High"], panel["Low"], panel["Close"], seed=seed)
+    for r, df in enumerate(frames):
+        lead = ho.shape[1] - len(df)
+        assert np.isnan(ho[r, :lead]).all()
+        ro, rc = old_loop(df, seed)
+        np.testing.assert_array_equal(ho[r, lead:], ro)
+        np.testing.assert_array_equal(hc[r, lead:], rc)
+
+
+def test_panel_single_row_and_single_bar(kernel):
+    df = ohlc(1)
+    ho, hc = heikin_ashi_panel(df['Open'], df['High'], df['Low'], df['Close'])
+    assert ho.shape == (1, 1)
+    np.testing.assert_array_equal(ho[0], old_loop(df)[0])
@@ -0,0 +1,162 @@
+"""`core.indicators` contra pandas_ta y contra las fórmulas pandas que reemplazó."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.heikin_ashi import stack_panel
+from core.indicators import MACD_MODES, adx, atr, dema, ema, macd, rsi
+
+RTOL = 1e-9
+
+
+@pytest.fixture(scope="module")
+def ta():
+    return pytest.importorskip("pandas_ta")
+
+
+def ohlc(n, seed=0):
+    rng = np.random.default_rng(seed)
+    c = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    o = c * (1 + rng.normal(0, 0.003, n))
+    return pd.DataFrame({"Open": o, "High": np.maximum(o, c) * (1 + rng.random(n) * 0.01),
+                         "Low": np.minimum(o, c) * (1 - rng.random(n) * 0.01), "Close": c})
+
+
+def same(got, ref):
+    ref = np.asarray(ref, dtype=float)
+    assert np.array_equal(np.isnan(got), np.isnan(ref))
+    np.testing.assert_allclose(got, ref, rtol=RTOL, atol=1e-12, equal_nan=True)
+
+
+# ─────────────────────────────────────────────
+# CONTRA PANDAS_TA
+# ─────────────────────────────────────────────
+@pytest.mark.parametrize("length", [2, 9, 20, 50])
+def test_ema_sma_seed(ta, length):
+    c = ohlc(300)["Close"]
+    same(ema(c, length, sma_seed=True), ta.ema(c, length))
+
+
+def test_ema_sma_seed_leading_nan(ta):
+    # Con NaN iniciales la semilla sale del primer valor válido: ta.ema de la serie sin el hueco
+    c = ohlc(300)["Close"]
+    c.iloc[:40] = np.nan
+    out = ema(c, 20, sma_seed=True)
+    assert np.isnan(out[:40 + 19]).all()
+    same(out[40:], ta.ema(c.dropna().reset_index(drop=True), 20))
+
+
+def test_macd_pandas_ta(ta):
+    c = ohlc(300)["Close"]
+    ref = ta.macd(c, 12, 26, 9)
+    line, sig, hist = macd(c, 12, 26, 9, mode="pandas_ta")
+    same(line, ref["MACD_12_26_9"])
+    same(sig, ref["MACDs_12_26_9"])
+    same(hist, ref["MACDh_12_26_9"])
+
+
+@pytest.mark.parametrize("length", [2, 14, 30])
+def test_rsi(ta, length):
+    c = ohlc(300)["Close"]
+    same(rsi(c, length), ta.rsi(c, length))
+
+
+def test_atr(ta):
+    df = ohlc(300)
+    same(atr(df["High"], df["Low"], df["Close"], 14), ta.atr(df["High"], df["Low"], df["Close"], 14))
+
+
+def test_adx_pandas_ta(ta):
+    df = ohlc(300)
+    ref = ta.adx(df["High"], df["Low"], df["Close"], 14)
+    a, p, n = adx(df["High"], df["Low"], df["Close"], 14, mode="pandas_ta")
+    same(a, ref["ADX_14"])
+    same(p, ref["DMP_14"])
+    same(n, ref["DMN_14"])
+
+
+def test_batch_matches_pandas_ta_per_row(ta):
+    frames = [ohlc(300, 1), ohlc(180, 2), ohlc(260, 3)]
+    panel = stack_panel(frames)
+    h, l, c = panel["High"], panel["Low"], panel["Close"]
+    outs = {"ema": ema(c, 20, sma_seed=True), "rsi": rsi(c, 14), "atr": atr(h, l, c, 14),
+            "adx": adx(h, l, c, 14, mode="pandas_ta")[0], "macd": macd(c, mode="pandas_ta")[1]}
+    for r, df in enumerate(frames):
+        lead = c.shape[1] - len(df)
+        refs = {"ema": ta.ema(df["Close"], 20), "rsi": ta.rsi(df["Close"], 14),
+                "atr": ta.atr(df["High"], df["Low"], df["Close"], 14),
+                "adx": ta.adx(df["High"], df["Low"], df["Close"], 14)["ADX_14"],
+                "macd": ta.macd(df["Close"])["MACDs_12_26_9"]}
+        for name, out in outs.items():
+            assert np.isnan(out[r, :lead]).all(), name
+            same(out[r, lead:], refs[name])
+
+
+# ─────────────────────────────────────────────
+# CONTRA LAS FÓRMULAS PANDAS DE BOTS Y PÁGINAS
+# ─────────────────────────────────────────────
+def pd_ema(s, n):
+    return s.ewm(span=n, adjust=False).mean()
+
+
+def pd_dema(s, n):
+    # calculate_dema de las páginas Señales / SIMPLIFICADO V2
+    ema1 = pd_ema(s, n)
+    return 2 * ema1 - pd_ema(ema1, n)
+
+
+def pd_adx(df, period=14):
+    # calculate_adx de los bots
+    tr = pd.concat([df['High'] - df['Low'], (df['High'] - df['Close'].shift(1)).abs(), (df['Low'] - df['Close'].shift(1)).abs()], axis=1).max(axis=1)
+    up, down = df['High'] - df['High'].shift(1), df['Low'].shift(1) - df['Low']
+    plus = pd.Series(np.where((up > down) & (up > 0), up, 0), index=df.index)
+    minus = pd.Series(np.where((down > up) & (down > 0), down, 0), index=df.index)
+    def wilder(x, n): return x.ewm(alpha=1/n, adjust=False).mean()
+    tr_s = wilder(tr, period).replace(0, 1)
+    p_di, n_di = 100 * (wilder(plus, period) / tr_s), 100 * (wilder(minus, period) / tr_s)
+    return wilder(100 * (p_di - n_di).abs() / (p_di + n_di), period)
+
+
+def test_ema_and_dema_match_pandas_ewm():
+    c = ohlc(300)["Close"]
+    same(ema(c, 12), pd_ema(c, 12))
+    same(dema(c, 12), pd_dema(c, 12))
+
+
+@pytest.mark.parametrize("mode", [m for m in MACD_MODES if m != "pandas_ta"])
+def test_macd_pandas_modes(mode):
+    c = ohlc(300)["Close"]
+    fn = pd_ema if mode == "ewm" else pd_dema
+    ref_line = fn(c, 12) - fn(c, 26)
+    ref_sig = pd_ema(ref_line, 9)
+    line, sig, hist = macd(c, mode=mode)
+    same(line, ref_line)
+    same(sig, ref_sig)
+    same(hist, ref_line - ref_sig)
+
+
+def test_macd_unknown_mode():
+    with pytest.raises(ValueError):
+        macd(ohlc(50)["Close"], mode="zlema")
+
+
+def test_adx_wilder_matches_bots():
+    df = ohlc(300)
+    same(adx(df["High"], df["Low"], df["Close"], 14)[0], pd_adx(df))
+
+
+@pytest.mark.parametrize("mode", MACD_MODES)
+def test_batch_rows_match_single_series(mode):
+    # Panel con NaN a la izquierda: cada fila igual a la serie sola
+    frames = [ohlc(300, 1), ohlc(180, 2), ohlc(1, 3)]
+    panel = stack_panel(frames)
+    h, l, c = panel["High"], panel["Low"], panel["Close"]
+    batch = [*macd(c, mode=mode), rsi(c, 14), atr(h, l, c, 14), adx(h, l, c, 14)[0], adx(h, l, c, 14, mode="pandas_ta")[0], dema(c, 12)]
+    for r, df in enumerate(frames):
+        lead = c.shape[1] - len(df)
+        single = [*macd(df["Close"], mode=mode), rsi(df["Close"], 14), atr(df["High"], df["Low"], df["Close"], 14),
+                  adx(df["High"], df["Low"], df["Close"], 14)[0], adx(df["High"], df["Low"], df["Close"], 14, mode="pandas_ta")[0],
+                  dema(df["Close"], 12)]
+        for out, ref in zip(batch, single):
+            assert np.isnan(out[r, :lead]).all()
+            same(out[r, lead:], ref)
@@ -0,0 +1,144 @@
+"""`core.live_feed` contra `core.ws_replay` (sin el exchange)."""
+import asyncio
+import socket
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("ccxt")
+
+import core.live_feed as live_feed
+from core.live_feed import LiveFeed, live_batch, serve
+from core.ws_replay import ReplayServer, candle_message, ticker_message
+
+BTC, ETH = "BTC/USDT:USDT", "ETH/USDT:USDT"
+MARKETS = {BTC: "XBTUSDTM", ETH: "ETHUSDTM"}
+ROWS = [[60_000 * (100 + i), 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0] for i in range(3)]
+MESSAGES = [candle_message("XBTUSDTM", "1min", r) for r in ROWS] + [ticker_message("XBTUSDTM", 1.75)]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_for(cond, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    end = loop.time() + timeout
+    while not cond():
+        if loop.time() > end: raise AssertionError("timeout")
+        await asyncio.sleep(0.05)
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 30))
+
+
+def test_candles_and_ticker_with_default_settle():
+    async def main():
+        server = await ReplayServer(MESSAGES).start()
+        feed = await LiveFeed(ring_size=50, rest_url=server.url, markets=MARKETS, seed=False).start()
+        try:
+            await feed.track([(BTC, "1m")], [BTC])
+            await wait_for(lambda: BTC in feed.prices and len(feed.rings[(BTC, "1m")]) == len(ROWS))
+            candles, prices = feed.snapshot([(BTC, "1m", len(ROWS))], [BTC])
+            assert candles == {(BTC, "1m"): ROWS}
+            assert prices == {BTC: 1.75}
+            # Más velas de las que hay (o de las que entran en el buffer): no sale del servicio
+            assert feed.snapshot([(BTC, "1m", len(ROWS) + 1)])[0] == {}
+            assert feed.snapshot([(BTC, "1m", 51)])[0] == {}
+        finally:
+            await feed.close()
+            await server.close()
+    run(main())
+
+
+def test_late_subscription_gets_its_replay():
+    async def main():
+        server = await ReplayServer(MESSAGES).start()
+        feed = await LiveFeed(ring_size=50, rest_url=server.url, markets=MARKETS, seed=False).start()
+        try:
+            await feed.track([(BTC, "1m")])
+            await wait_for(lambda: len(feed.rings[(BTC, "1m")]) == len(ROWS))
+            await feed.track(tickers=[BTC])         # con la reproducción ya hecha
+            await wait_for(lambda: BTC in feed.prices)
+        finally:
+            await feed.close()
+            await server.close()
+    run(main())
+
+
+def test_reconnect_after_drop():
+    async def main():
+        server = await ReplayServer(MESSAGES, drop_after=2).start()
+        feed = await LiveFeed(ring_size=50, rest_url=server.url, markets=MARKETS, seed=False).start()
+        topic = feed._topic(BTC, "1m")
+        try:
+            await feed.track([(BTC, "1m")])
+            await wait_for(lambda: server.connections >= 2 and topic in feed.live, timeout=10)
+            await wait_for(lambda: len(feed.rings[(BTC, "1m")]) >= 2)
+            assert feed.rings[(BTC, "1m")].rows() == ROWS[:2]
+        finally:
+            await feed.close()
+            await server.close()
+    run(main())
+
+
+def test_failed_reseed_is_not_live(monkeypatch):
+    class FailingPool:
+        def __init__(self, **kwargs): pass
+        async def run(self, jobs): raise RuntimeError("REST caído")
+
+    async def main():
+        server = await ReplayServer(MESSAGES).start()
+        feed = await LiveFeed(ring_size=50, rest_url=server.url, markets=MARKETS).start()
+        try:
+            monkeypatch.setattr(live_feed, "KucoinFetchPool", FailingPool)
+            await feed.track([(BTC, "1m")])
+            await wait_for(lambda: feed._topic(BTC, "1m") in feed.acked)
+            assert feed._topic(BTC, "1m") not in feed.live
+            assert feed.snapshot([(BTC, "1m", 1)])[0] == {}
+        finally:
+            await feed.close()
+            await server.close()
+    run(main())
+
+
+def test_live_batch_falls_back_to_rest(monkeypatch):
+    calls = []
+
+    def fake_rest(jobs, prices_for=(), progress=None, as_candles=False, **kwargs):
+        calls.append((list(jobs), list(prices_for)))
+        return {j[:2]: [[0, 1.0, 1.0, 1.0, 1.0, 1.0]] for j in jobs}, {s: 9.0 for s in prices_for}
+
+    monkeypatch.setattr(live_feed, "fetch_kucoin_batch", fake_rest)
+    monkeypatch.setattr(live_feed, "_down_until", 0.0)
+
+    async def main():
+        server = await ReplayServer(MESSAGES).start()
+        feed = await LiveFeed(ring_size=50, rest_url=server.url, markets=MARKETS, seed=False).start()
+        port = free_port()
+        runner = await serve(feed, port=port)
+        try:
+            await feed.track([(BTC, "1m")], [BTC])
+            await wait_for(lambda: BTC in feed.prices and len(feed.rings[(BTC, "1m")]) == len(ROWS))
+            url = f"http://127.0.0.1:{port}"
+            jobs = [(BTC, "1m", len(ROWS)), (ETH, "1m", 2)]
+            candles, prices = await asyncio.to_thread(live_batch, jobs, [BTC, ETH], url=url)
+            assert candles[(BTC, "1m")] == ROWS
+            assert candles[(ETH, "1m")] == [[0, 1.0, 1.0, 1.0, 1.0, 1.0]]
+            assert prices == {BTC: 1.75, ETH: 9.0}
+            assert calls == [([(ETH, "1m", 2)], [ETH])]
+        finally:
+            await runner.cleanup()
+            await feed.close()
+            await server.close()
+    run(main())
+
+    # Sin servicio: todo por REST
+    calls.clear()
+    monkeypatch.setattr(live_feed, "_down_until", 0.0)
+    candles, prices = live_batch([(BTC, "1m", 2)], [BTC], url=f"http://127.0.0.1:{free_port()}")
+    assert calls == [([(BTC, "1m", 2)], [BTC])]
+    assert prices == {BTC: 9.0}
@@ -0,0 +1,124 @@
+"""`core.telegram` (empaquetado y envío) contra `core.telegram_fake.FakeBotAPI`."""
+import time
+
+import pytest
+
+import core.telegram as telegram
+from core.telegram import Delivery, pack_blocks, split_block, units
+from core.telegram_fake import FakeBotAPI, unbalanced_markdown
+
+CHAT, GROUP = 12345, -100123
+
+
+@pytest.fixture(autouse=True)
+def fast_intervals(monkeypatch):
+    # Los topes reales (1 s por chat, 3 s por grupo) hacen lentos los tests
+    monkeypatch.setattr(telegram, "CHAT_INTERVAL_S", 0.05)
+    monkeypatch.setattr(telegram, "GROUP_INTERVAL_S", 0.05)
+
+
+@pytest.fixture
+def api(request):
+    with FakeBotAPI(**getattr(request, "param", {})) as api:
+        yield api
+
+
+@pytest.fixture
+def delivery(api):
+    d = Delivery("TOKEN", api_url=api.url, global_interval_s=0.0)
+    yield d
+    d.close(timeout=10)
+
+
+# ─────────────────────────────────────────────
+# EMPAQUETADO
+# ─────────────────────────────────────────────
+def test_pack_blocks_fills_messages_in_order():
+    blocks = [f"*Ficha {i}*\n" + "x" * 90 for i in range(10)]
+    out = pack_blocks(blocks, limit=250)
+    assert all(units(m) <= 250 for m in out)
+    assert len(out) == 5                                        # dos fichas (≈200) por mensaje
+    assert "\n\n".join(out) == "\n\n".join(blocks)
+
+
+def test_pack_blocks_splits_long_block_without_breaking_entities():
+    block = " ".join(f"*dato{i}* _nota {i}_" for i in range(60))
+    out = pack_blocks(["cabecera", block, "pie"], limit=100)
+    assert all(units(m) <= 100 for m in out)
+    assert not any(unbalanced_markdown(m) for m in out)
+    assert out[0].startswith("cabecera") and out[-1].endswith("pie")
+
+
+def test_split_block_counts_utf16_units():
+    text = "🚀" * 60                                             # 2 unidades por emoji
+    out = split_block(text, limit=50)
+    assert [units(p) for p in out] == [50, 50, 20]
+
+
+# ─────────────────────────────────────────────
+# ENVÍO
+# ─────────────────────────────────────────────
+def test_send_blocks_delivers_packed_messages(api, delivery):
+    blocks = [f"*{i}* " + "y" * 1500 for i in range(6)]
+    n = delivery.send_blocks(CHAT, blocks)
+    assert delivery.flush(timeout=10)
+    assert n == len(api.messages) == 3
+    assert api.texts(CHAT) == pack_blocks(blocks)
+    assert all(m["parse_mode"] == "Markdown" for m in api.messages)
+
+
+@pytest.mark.parametrize("api", [{"flood_on": {1}, "retry_after": 1}], indirect=True)
+def test_429_waits_retry_after_and_resends(api, delivery):
+    t0 = time.monotonic()
+    delivery.send(CHAT, "uno")
+    delivery.send(CHAT, "dos")
+    assert delivery.flush(timeout=10)
+    assert api.floods == 1
+    assert api.texts(CHAT) == ["uno", "dos"]
+    assert api.messages[0]["at"] - t0 >= 1.0                    # esperó parameters.retry_after
+    assert delivery.failed == []
+
+
+@pytest.mark.parametrize("api", [{"chat_interval_s": 0.3}], indirect=True)
+def test_flood_from_rate_keeps_order(api, delivery):
+    # Delivery manda cada 0.05 s y el servidor exige 0.3 s por chat: 429 con retry_after y reintento
+    for i in range(3): delivery.send(CHAT, f"msg {i}")
+    assert delivery.flush(timeout=20)
+    assert api.floods > 0
+    assert api.texts(CHAT) == [f"msg {i}" for i in range(3)]
+
+
+@pytest.mark.parametrize("api", [{"parse_errors": True}], indirect=True)
+def test_bad_markdown_falls_back_to_plain_text(api, delivery):
+    delivery.send(CHAT, "precio *alto")
+    delivery.send(CHAT, "*ok*")
+    assert delivery.flush(timeout=10)
+    assert api.texts(CHAT) == ["precio *alto", "*ok*"]
+    assert [m["parse_mode"] for m in api.messages] == [None, "Markdown"]
+
+
+def test_per_chat_order_with_interleaved_chats(api, delivery):
+    for i in range(5):
+        delivery.send(CHAT, f"c{i}")
+        delivery.send(GROUP, f"g{i}")
+    assert delivery.flush(timeout=10)
+    assert api.texts(CHAT) == [f"c{i}" for i in range(5)]
+    assert api.texts(GROUP) == [f"g{i}" for i in range(5)]
+
+
+@pytest.mark.parametrize("api", [{"flood_on": {1}, "retry_after": 1}], indirect=True)
+def test_flush_times_out_while_pending(api, delivery):
+    delivery.send(CHAT, "espera")
+    assert delivery.flush(timeout=0.2) is False
+    assert delivery.pending == 1
+    assert delivery.flush(timeout=10) is True
+    assert delivery.pending == 0 and api.texts(CHAT) == ["espera"]
+
+
+def test_close_rejects_new_messages(api):
+    d = Delivery("TOKEN", api_url=api.url, global_interval_s=0.0)
+    d.send(CHAT, "último")
+    assert d.close(timeout=10)
+    assert api.texts(CHAT) == ["último"]
+    with pytest.raises(RuntimeError):
+        d.send(CHAT, "tarde")
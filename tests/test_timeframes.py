@@ -0,0 +1,33 @@
+"""`core.timeframes`: la primera vela derivada tiene que estar completa."""
+import numpy as np
+import pandas as pd
+
+from core.timeframes import derive_timeframes
+
+
+def frame(start, periods, freq):
+    idx = pd.date_range(start, periods=periods, freq=freq)
+    x = np.arange(periods, dtype=float)
+    return pd.DataFrame({"Open": x, "High": x + 1, "Low": x - 1, "Close": x + 0.5, "Vol": 1.0}, index=idx)
+
+
+def test_daily_source_drops_leading_partial_bins():
+    bars = derive_timeframes(frame("2022-03-17", 60, "D"), ["1mo", "1w", "1d"])
+    assert bars["1mo"].index[0] == pd.Timestamp("2022-04-01")
+    assert bars["1w"].index[0] == pd.Timestamp("2022-03-21")
+    assert len(bars["1d"]) == 60
+    # la primera semana completa arranca con el Open del lunes
+    assert bars["1w"]["Open"].iloc[0] == 4.0
+
+
+def test_daily_source_aligned_keeps_first_bins():
+    bars = derive_timeframes(frame("2022-03-01", 60, "D"), ["1mo", "1w"])
+    assert bars["1mo"].index[0] == pd.Timestamp("2022-03-01")
+    bars = derive_timeframes(frame("2022-03-07", 60, "D"), ["1w"])
+    assert bars["1w"].index[0] == pd.Timestamp("2022-03-07")
+
+
+def test_intraday_source_drops_leading_partial_day():
+    bars = derive_timeframes(frame("2024-01-01 06:00", 72, "h"), ["1d", "4h"])
+    assert bars["1d"].index[0] == pd.Timestamp("2024-01-02")
+    assert bars["4h"].index[0] == pd.Timestamp("2024-01-01 08:00")